@@ -103,7 +103,7 @@ export default function BusesPage({
     try {
       setLoadingChildren(true);
       // Get all children for this company
-      const allChildren: any = await apiClient.get(`/admin/company/${companyId}/children`);
+      const allChildren = await apiClient.getAllPages<any>(`/admin/company/${companyId}/children`);
       
       // Filter children whose route is assigned to this bus
       const children = Array.isArray(allChildren) ? allChildren.filter((child: any) => {
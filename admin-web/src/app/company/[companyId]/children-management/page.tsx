@@ -71,8 +71,8 @@ export default function ChildrenManagementPage({
   const fetchChildren = async () => {
     try {
       setLoading(true);
-      const data = await apiClient.get(`/admin/company/${companyId}/children`);
-      setChildren(Array.isArray(data) ? data : []);
+      const data = await apiClient.getAllPages<any>(`/admin/company/${companyId}/children`);
+      setChildren(data);
     } catch (err) {
       console.error('Error loading children:', err);
     } finally {
@@ -94,8 +94,8 @@ export default function ChildrenPage({
       setRoutes(Array.isArray(routesData) ? routesData : []);
 
       // Fetch children
-      const childrenData = await apiClient.get(`/admin/company/${companyId}/children`);
-      setChildren(Array.isArray(childrenData) ? childrenData : []);
+      const childrenData = await apiClient.getAllPages<any>(`/admin/company/${companyId}/children`);
+      setChildren(childrenData);
 
       // Fetch payment status
       const paymentsData = await apiClient.get(`/admin/company/${companyId}/children/payments`);
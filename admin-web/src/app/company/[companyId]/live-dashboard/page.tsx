@@ -133,8 +133,7 @@ export default function LiveDashboardPage({ params }: { params: Promise<{ compan
 
   const fetchPickups = async () => {
     try {
-      const response = await apiClient.get(`/admin/company/${companyId}/children`);
-      const children = Array.isArray(response) ? response : [];
+      const children = await apiClient.getAllPages<any>(`/admin/company/${companyId}/children`);
       console.log('[LiveDashboard] Fetched children:', children.length);
       const pickupList = children
         .filter((child: any) => child.homeLatitude && child.homeLongitude)
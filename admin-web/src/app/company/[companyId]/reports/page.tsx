@@ -61,8 +61,14 @@ export default function ReportsPage({
       setError('');
 
       const endpoint = `/admin/company/${companyId}/reports/${type}?range=${dateRange}`;
-      const response = await apiClient.get(endpoint);
-      const data = Array.isArray(response) ? response : [];
+      let data: any[] = [];
+      if (type === 'attendance') {
+        // The attendance report is paged; follow the cursor to the end
+        data = await apiClient.getAllPages<any>(endpoint);
+      } else {
+        const response = await apiClient.get(endpoint);
+        data = Array.isArray(response) ? response : [];
+      }
 
       if (data.length === 0) {
         alert('No data available for this report');
@@ -261,7 +267,7 @@ export default function ReportsPage({
             </div>
             <div>
               <p className="font-semibold text-slate-700 mb-1">Record Limit</p>
-              <p className="text-slate-600">1,000 most recent records</p>
+              <p className="text-slate-600">Attendance: all records; others: 1,000 most recent</p>
             </div>
           </div>
         </div>
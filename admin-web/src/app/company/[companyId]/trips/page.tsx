@@ -92,7 +92,10 @@ export default function TripsPage({
     try {
       setLoading(true);
       const [allTrips, active, busesData, driversData] = await Promise.all([
-        apiClient.get(`/admin/company/${companyId}/trips`),
+        // The latest 100 trips
+        apiClient
+          .get<{ data: Trip[] }>(`/admin/company/${companyId}/trips`, { params: { limit: 100 } })
+          .then((page) => page.data),
         apiClient.get(`/admin/company/${companyId}/trips/active`),
         apiClient.get(`/buses/company/${companyId}`),
         apiClient.get(`/admin/company/${companyId}/drivers`),
@@ -115,6 +115,20 @@ class ApiClient {
     return response.data;
   }
 
+  // Every row of a keyset-paged list endpoint, following `nextCursor`
+  async getAllPages<T>(path: string, params: Record<string, any> = {}, pageSize = 500): Promise<T[]> {
+    let rows: T[] = [];
+    let cursor: string | null = null;
+    do {
+      const page: { data: T[]; nextCursor: string | null } = await this.get(path, {
+        params: { ...params, limit: pageSize, ...(cursor ? { cursor } : {}) },
+      });
+      rows = rows.concat(page.data || []);
+      cursor = page.nextCursor;
+    } while (cursor);
+    return rows;
+  }
+
   async post<T>(path: string, data?: any, config = {}) {
     const response = await this.client.post<T>(path, data, config);
     return response.data;
@@ -0,0 +1,184 @@
+-- CreateTable
+CREATE TABLE "CompanyDailyStat" (
+    "companyId" TEXT NOT NULL,
+    "day" DATE NOT NULL,
+    "metric" TEXT NOT NULL,
+    "status" TEXT NOT NULL,
+    "count" INTEGER NOT NULL DEFAULT 0,
+
+    CONSTRAINT "CompanyDailyStat_pkey" PRIMARY KEY ("companyId","day","metric","status")
+);
+
+-- Company that owns a bus: the bus's own company, else its driver's company
+CREATE VIEW "BusCompany" AS
+SELECT b."id" AS "busId", COALESCE(b."companyId", u."companyId") AS "companyId"
+FROM "Bus" b
+LEFT JOIN "Driver" d ON d."id" = b."driverId"
+LEFT JOIN "User" u ON u."id" = d."userId";
+
+-- Statement-level triggers keep "CompanyDailyStat" in step with every write
+-- path (including createMany/deleteMany). Each statement aggregates its
+-- changed rows first, so a bulk insert costs one upsert per (company, day,
+-- status) rather than one per row.
+
+CREATE FUNCTION "company_daily_stat_trip"() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT bc."companyId", r."createdAt"::date, 'trip', r."status"::text, COUNT(*)
+    FROM new_rows r JOIN "BusCompany" bc ON bc."busId" = r."busId"
+    WHERE bc."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  ELSIF TG_OP = 'DELETE' THEN
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT bc."companyId", r."createdAt"::date, 'trip', r."status"::text, -COUNT(*)
+    FROM old_rows r JOIN "BusCompany" bc ON bc."busId" = r."busId"
+    WHERE bc."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  ELSE
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT bc."companyId", r."createdAt"::date, 'trip', r."status"::text, SUM(r."delta")
+    FROM (
+      SELECT "busId", "createdAt", "status", 1 AS "delta" FROM new_rows
+      UNION ALL
+      SELECT "busId", "createdAt", "status", -1 AS "delta" FROM old_rows
+    ) r JOIN "BusCompany" bc ON bc."busId" = r."busId"
+    WHERE bc."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    HAVING SUM(r."delta") <> 0
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE FUNCTION "company_daily_stat_attendance"() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT bc."companyId", r."createdAt"::date, 'attendance', r."status"::text, COUNT(*)
+    FROM new_rows r
+    JOIN "Trip" t ON t."id" = r."tripId"
+    JOIN "BusCompany" bc ON bc."busId" = t."busId"
+    WHERE bc."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  ELSIF TG_OP = 'DELETE' THEN
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT bc."companyId", r."createdAt"::date, 'attendance', r."status"::text, -COUNT(*)
+    FROM old_rows r
+    JOIN "Trip" t ON t."id" = r."tripId"
+    JOIN "BusCompany" bc ON bc."busId" = t."busId"
+    WHERE bc."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  ELSE
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT bc."companyId", r."createdAt"::date, 'attendance', r."status"::text, SUM(r."delta")
+    FROM (
+      SELECT "tripId", "createdAt", "status", 1 AS "delta" FROM new_rows
+      UNION ALL
+      SELECT "tripId", "createdAt", "status", -1 AS "delta" FROM old_rows
+    ) r
+    JOIN "Trip" t ON t."id" = r."tripId"
+    JOIN "BusCompany" bc ON bc."busId" = t."busId"
+    WHERE bc."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    HAVING SUM(r."delta") <> 0
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE FUNCTION "company_daily_stat_payment"() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT u."companyId", r."createdAt"::date, 'payment', r."status", COUNT(*)
+    FROM new_rows r JOIN "User" u ON u."id" = r."parentId"
+    WHERE u."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  ELSIF TG_OP = 'DELETE' THEN
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT u."companyId", r."createdAt"::date, 'payment', r."status", -COUNT(*)
+    FROM old_rows r JOIN "User" u ON u."id" = r."parentId"
+    WHERE u."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  ELSE
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT u."companyId", r."createdAt"::date, 'payment', r."status", SUM(r."delta")
+    FROM (
+      SELECT "parentId", "createdAt", "status", 1 AS "delta" FROM new_rows
+      UNION ALL
+      SELECT "parentId", "createdAt", "status", -1 AS "delta" FROM old_rows
+    ) r JOIN "User" u ON u."id" = r."parentId"
+    WHERE u."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    HAVING SUM(r."delta") <> 0
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE TRIGGER "Trip_stats_insert" AFTER INSERT ON "Trip"
+  REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION "company_daily_stat_trip"();
+CREATE TRIGGER "Trip_stats_update" AFTER UPDATE ON "Trip"
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION "company_daily_stat_trip"();
+CREATE TRIGGER "Trip_stats_delete" AFTER DELETE ON "Trip"
+  REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION "company_daily_stat_trip"();
+
+CREATE TRIGGER "ChildAttendance_stats_insert" AFTER INSERT ON "ChildAttendance"
+  REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION "company_daily_stat_attendance"();
+CREATE TRIGGER "ChildAttendance_stats_update" AFTER UPDATE ON "ChildAttendance"
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION "company_daily_stat_attendance"();
+CREATE TRIGGER "ChildAttendance_stats_delete" AFTER DELETE ON "ChildAttendance"
+  REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION "company_daily_stat_attendance"();
+
+CREATE TRIGGER "PaymentIntent_stats_insert" AFTER INSERT ON "PaymentIntent"
+  REFERENCING NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION "company_daily_stat_payment"();
+CREATE TRIGGER "PaymentIntent_stats_update" AFTER UPDATE ON "PaymentIntent"
+  REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows FOR EACH STATEMENT EXECUTE FUNCTION "company_daily_stat_payment"();
+CREATE TRIGGER "PaymentIntent_stats_delete" AFTER DELETE ON "PaymentIntent"
+  REFERENCING OLD TABLE AS old_rows FOR EACH STATEMENT EXECUTE FUNCTION "company_daily_stat_payment"();
+
+-- Recompute the rollups from the source tables, for one company or all.
+-- The EXCLUSIVE lock makes concurrent trigger upserts wait until the
+-- rebuild commits, so no change is counted twice or lost.
+CREATE FUNCTION "rebuild_company_daily_stats"(p_company_id TEXT DEFAULT NULL) RETURNS INTEGER LANGUAGE plpgsql AS $$
+DECLARE
+  rebuilt INTEGER;
+BEGIN
+  LOCK TABLE "CompanyDailyStat" IN EXCLUSIVE MODE;
+
+  DELETE FROM "CompanyDailyStat" WHERE p_company_id IS NULL OR "companyId" = p_company_id;
+
+  INSERT INTO "CompanyDailyStat" ("companyId", "day", "metric", "status", "count")
+  SELECT r."companyId", r."day", r."metric", r."status", COUNT(*)
+  FROM (
+    SELECT bc."companyId", t."createdAt"::date AS "day", 'trip' AS "metric", t."status"::text AS "status"
+    FROM "Trip" t JOIN "BusCompany" bc ON bc."busId" = t."busId"
+    UNION ALL
+    SELECT bc."companyId", a."createdAt"::date, 'attendance', a."status"::text
+    FROM "ChildAttendance" a
+    JOIN "Trip" t ON t."id" = a."tripId"
+    JOIN "BusCompany" bc ON bc."busId" = t."busId"
+    UNION ALL
+    SELECT u."companyId", p."createdAt"::date, 'payment', p."status"
+    FROM "PaymentIntent" p JOIN "User" u ON u."id" = p."parentId"
+  ) r
+  WHERE r."companyId" IS NOT NULL AND (p_company_id IS NULL OR r."companyId" = p_company_id)
+  GROUP BY 1, 2, 3, 4;
+
+  GET DIAGNOSTICS rebuilt = ROW_COUNT;
+  RETURN rebuilt;
+END;
+$$;
+
+-- Backfill
+SELECT "rebuild_company_daily_stats"();
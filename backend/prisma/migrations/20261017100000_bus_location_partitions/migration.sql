@@ -0,0 +1,94 @@
+-- Move the existing table aside
+ALTER TABLE "BusLocation" RENAME TO "BusLocation_legacy";
+ALTER TABLE "BusLocation_legacy" RENAME CONSTRAINT "BusLocation_pkey" TO "BusLocation_legacy_pkey";
+ALTER TABLE "BusLocation_legacy" DROP CONSTRAINT "BusLocation_busId_fkey";
+ALTER INDEX "BusLocation_busId_timestamp_idx" RENAME TO "BusLocation_legacy_busId_timestamp_idx";
+
+-- CreateTable: range-partitioned by day
+CREATE TABLE "BusLocation" (
+    "id" TEXT NOT NULL,
+    "busId" TEXT NOT NULL,
+    "latitude" DOUBLE PRECISION NOT NULL,
+    "longitude" DOUBLE PRECISION NOT NULL,
+    "speed" DOUBLE PRECISION NOT NULL,
+    "timestamp" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "createdAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+
+    CONSTRAINT "BusLocation_pkey" PRIMARY KEY ("id","timestamp")
+) PARTITION BY RANGE ("timestamp");
+
+-- CreateIndex
+CREATE INDEX "BusLocation_busId_timestamp_idx" ON "BusLocation"("busId", "timestamp" DESC);
+
+-- AddForeignKey
+ALTER TABLE "BusLocation" ADD CONSTRAINT "BusLocation_busId_fkey" FOREIGN KEY ("busId") REFERENCES "Bus"("id") ON DELETE RESTRICT ON UPDATE CASCADE;
+
+-- Catches points whose day has no partition (device clocks far off)
+CREATE TABLE "BusLocation_default" PARTITION OF "BusLocation" DEFAULT;
+
+-- Creates the partition for one UTC day if it doesn't exist yet. Rows for
+-- that day that already landed in the default partition are moved into it,
+-- otherwise the partition couldn't be created.
+CREATE FUNCTION "bus_location_ensure_partition"(p_day DATE) RETURNS BOOLEAN LANGUAGE plpgsql AS $$
+DECLARE
+  partition_name TEXT := 'BusLocation_' || to_char(p_day, 'YYYYMMDD');
+BEGIN
+  IF to_regclass(format('%I', partition_name)) IS NOT NULL THEN
+    RETURN FALSE;
+  END IF;
+
+  CREATE TEMP TABLE IF NOT EXISTS "bus_location_moved" (LIKE "BusLocation") ON COMMIT DROP;
+  DELETE FROM "bus_location_moved";
+
+  WITH moved AS (
+    DELETE FROM "BusLocation_default"
+    WHERE "timestamp" >= p_day AND "timestamp" < p_day + 1
+    RETURNING *
+  )
+  INSERT INTO "bus_location_moved" SELECT * FROM moved;
+
+  EXECUTE format(
+    'CREATE TABLE %I PARTITION OF "BusLocation" FOR VALUES FROM (%L) TO (%L)',
+    partition_name, p_day::timestamp, (p_day + 1)::timestamp
+  );
+
+  INSERT INTO "BusLocation" SELECT * FROM "bus_location_moved";
+  RETURN TRUE;
+END;
+$$;
+
+-- CreateTable
+CREATE TABLE "BusTrack" (
+    "busId" TEXT NOT NULL,
+    "timestamp" TIMESTAMP(3) NOT NULL,
+    "latitude" DOUBLE PRECISION NOT NULL,
+    "longitude" DOUBLE PRECISION NOT NULL,
+    "speed" DOUBLE PRECISION NOT NULL,
+    "samples" INTEGER NOT NULL,
+
+    CONSTRAINT "BusTrack_pkey" PRIMARY KEY ("busId","timestamp")
+);
+
+-- CreateIndex
+CREATE INDEX "BusTrack_timestamp_idx" ON "BusTrack"("timestamp");
+
+-- Partitions for the last week (kept raw) and the week ahead
+SELECT "bus_location_ensure_partition"((CURRENT_DATE + offset_days)::date)
+FROM generate_series(-7, 7) AS offset_days;
+
+-- Recent points stay raw
+INSERT INTO "BusLocation" ("id", "busId", "latitude", "longitude", "speed", "timestamp", "createdAt")
+SELECT "id", "busId", "latitude", "longitude", "speed", "timestamp", "createdAt"
+FROM "BusLocation_legacy"
+WHERE "timestamp" >= CURRENT_DATE - 7;
+
+-- Older points become per-minute track points. The application's rollup
+-- job also simplifies tracks; this one-off backfill only downsamples.
+INSERT INTO "BusTrack" ("busId", "timestamp", "latitude", "longitude", "speed", "samples")
+SELECT "busId", date_trunc('minute', "timestamp"), AVG("latitude"), AVG("longitude"), AVG("speed"), COUNT(*)
+FROM "BusLocation_legacy"
+WHERE "timestamp" < CURRENT_DATE - 7
+GROUP BY 1, 2;
+
+-- DropTable
+DROP TABLE "BusLocation_legacy";
@@ -0,0 +1,4 @@
+-- Source of collision-free child codes. Each value maps to exactly one
+-- 8-character code (see child-code.service.ts); the range is the 2^40 codes
+-- that 8 characters from a 32-letter alphabet can spell.
+CREATE SEQUENCE IF NOT EXISTS "child_code_seq" AS BIGINT MINVALUE 1 MAXVALUE 1099511627775 NO CYCLE;
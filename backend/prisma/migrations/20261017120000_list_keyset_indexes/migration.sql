@@ -0,0 +1,4 @@
+-- Keyset pagination on the list endpoints walks (createdAt, id) in order
+CREATE INDEX "Child_createdAt_id_idx" ON "Child"("createdAt", "id");
+CREATE INDEX "Trip_createdAt_id_idx" ON "Trip"("createdAt", "id");
+CREATE INDEX "Driver_createdAt_id_idx" ON "Driver"("createdAt", "id");
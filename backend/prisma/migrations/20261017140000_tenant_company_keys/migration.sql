@@ -0,0 +1,238 @@
+-- Denormalised tenant keys. Company-scoped queries used to reach the
+-- company through trip -> bus -> driver -> user, which both costs a
+-- four-table join and follows the bus's *current* driver, so a trip moved
+-- to another company's report when its driver was reassigned. The company
+-- is now stamped on the row when it is written and never follows later
+-- reassignments.
+ALTER TABLE "Trip" ADD COLUMN "companyId" TEXT;
+ALTER TABLE "ChildAttendance" ADD COLUMN "companyId" TEXT;
+ALTER TABLE "BusLocation" ADD COLUMN "companyId" TEXT;
+ALTER TABLE "PaymentIntent" ADD COLUMN "companyId" TEXT;
+
+-- Stamp the company on insert when the writer didn't. Every write path
+-- (createMany, raw inserts, scripts) goes through these, and a writer
+-- that already knows the company skips the lookup.
+CREATE FUNCTION "stamp_trip_company"() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF NEW."companyId" IS NULL THEN
+    SELECT COALESCE(bc."companyId", u."companyId") INTO NEW."companyId"
+    FROM "BusCompany" bc
+    LEFT JOIN "Driver" d ON d."id" = NEW."driverId"
+    LEFT JOIN "User" u ON u."id" = d."userId"
+    WHERE bc."busId" = NEW."busId";
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+CREATE FUNCTION "stamp_attendance_company"() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF NEW."companyId" IS NULL THEN
+    SELECT t."companyId" INTO NEW."companyId" FROM "Trip" t WHERE t."id" = NEW."tripId";
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+CREATE FUNCTION "stamp_bus_location_company"() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF NEW."companyId" IS NULL THEN
+    SELECT bc."companyId" INTO NEW."companyId" FROM "BusCompany" bc WHERE bc."busId" = NEW."busId";
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+CREATE FUNCTION "stamp_payment_company"() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF NEW."companyId" IS NULL THEN
+    SELECT u."companyId" INTO NEW."companyId" FROM "User" u WHERE u."id" = NEW."parentId";
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+CREATE TRIGGER "Trip_stamp_company" BEFORE INSERT ON "Trip"
+  FOR EACH ROW EXECUTE FUNCTION "stamp_trip_company"();
+CREATE TRIGGER "ChildAttendance_stamp_company" BEFORE INSERT ON "ChildAttendance"
+  FOR EACH ROW EXECUTE FUNCTION "stamp_attendance_company"();
+CREATE TRIGGER "BusLocation_stamp_company" BEFORE INSERT ON "BusLocation"
+  FOR EACH ROW EXECUTE FUNCTION "stamp_bus_location_company"();
+CREATE TRIGGER "PaymentIntent_stamp_company" BEFORE INSERT ON "PaymentIntent"
+  FOR EACH ROW EXECUTE FUNCTION "stamp_payment_company"();
+
+-- Backfill. The rollup triggers are paused: the rollups are rebuilt from
+-- the stamped keys below instead.
+ALTER TABLE "Trip" DISABLE TRIGGER "Trip_stats_update";
+ALTER TABLE "ChildAttendance" DISABLE TRIGGER "ChildAttendance_stats_update";
+ALTER TABLE "PaymentIntent" DISABLE TRIGGER "PaymentIntent_stats_update";
+
+-- Same resolution as the insert trigger: the bus's company, else the
+-- company of the trip's own driver
+UPDATE "Trip" t
+SET "companyId" = COALESCE(bc."companyId", u."companyId")
+FROM "Trip" src
+JOIN "BusCompany" bc ON bc."busId" = src."busId"
+LEFT JOIN "Driver" d ON d."id" = src."driverId"
+LEFT JOIN "User" u ON u."id" = d."userId"
+WHERE src."id" = t."id";
+
+UPDATE "ChildAttendance" a
+SET "companyId" = t."companyId"
+FROM "Trip" t
+WHERE t."id" = a."tripId";
+
+UPDATE "BusLocation" l
+SET "companyId" = bc."companyId"
+FROM "BusCompany" bc
+WHERE bc."busId" = l."busId";
+
+UPDATE "PaymentIntent" p
+SET "companyId" = u."companyId"
+FROM "User" u
+WHERE u."id" = p."parentId";
+
+ALTER TABLE "Trip" ENABLE TRIGGER "Trip_stats_update";
+ALTER TABLE "ChildAttendance" ENABLE TRIGGER "ChildAttendance_stats_update";
+ALTER TABLE "PaymentIntent" ENABLE TRIGGER "PaymentIntent_stats_update";
+
+-- CreateIndex
+CREATE INDEX "Trip_companyId_createdAt_idx" ON "Trip"("companyId", "createdAt");
+CREATE INDEX "Trip_companyId_status_idx" ON "Trip"("companyId", "status");
+CREATE INDEX "ChildAttendance_companyId_timestamp_idx" ON "ChildAttendance"("companyId", "timestamp");
+CREATE INDEX "ChildAttendance_companyId_status_idx" ON "ChildAttendance"("companyId", "status");
+CREATE INDEX "BusLocation_companyId_timestamp_idx" ON "BusLocation"("companyId", "timestamp");
+CREATE INDEX "PaymentIntent_companyId_createdAt_idx" ON "PaymentIntent"("companyId", "createdAt");
+CREATE INDEX "PaymentIntent_companyId_status_idx" ON "PaymentIntent"("companyId", "status");
+
+-- The daily rollups now read the stamped key instead of resolving the
+-- company through the bus on every statement
+CREATE OR REPLACE FUNCTION "company_daily_stat_trip"() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT r."companyId", r."createdAt"::date, 'trip', r."status"::text, COUNT(*)
+    FROM new_rows r
+    WHERE r."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  ELSIF TG_OP = 'DELETE' THEN
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT r."companyId", r."createdAt"::date, 'trip', r."status"::text, -COUNT(*)
+    FROM old_rows r
+    WHERE r."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  ELSE
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT r."companyId", r."createdAt"::date, 'trip', r."status"::text, SUM(r."delta")
+    FROM (
+      SELECT "companyId", "createdAt", "status", 1 AS "delta" FROM new_rows
+      UNION ALL
+      SELECT "companyId", "createdAt", "status", -1 AS "delta" FROM old_rows
+    ) r
+    WHERE r."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    HAVING SUM(r."delta") <> 0
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION "company_daily_stat_attendance"() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT r."companyId", r."createdAt"::date, 'attendance', r."status"::text, COUNT(*)
+    FROM new_rows r
+    WHERE r."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  ELSIF TG_OP = 'DELETE' THEN
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT r."companyId", r."createdAt"::date, 'attendance', r."status"::text, -COUNT(*)
+    FROM old_rows r
+    WHERE r."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  ELSE
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT r."companyId", r."createdAt"::date, 'attendance', r."status"::text, SUM(r."delta")
+    FROM (
+      SELECT "companyId", "createdAt", "status", 1 AS "delta" FROM new_rows
+      UNION ALL
+      SELECT "companyId", "createdAt", "status", -1 AS "delta" FROM old_rows
+    ) r
+    WHERE r."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    HAVING SUM(r."delta") <> 0
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION "company_daily_stat_payment"() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT r."companyId", r."createdAt"::date, 'payment', r."status", COUNT(*)
+    FROM new_rows r
+    WHERE r."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  ELSIF TG_OP = 'DELETE' THEN
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT r."companyId", r."createdAt"::date, 'payment', r."status", -COUNT(*)
+    FROM old_rows r
+    WHERE r."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  ELSE
+    INSERT INTO "CompanyDailyStat" AS s ("companyId", "day", "metric", "status", "count")
+    SELECT r."companyId", r."createdAt"::date, 'payment', r."status", SUM(r."delta")
+    FROM (
+      SELECT "companyId", "createdAt", "status", 1 AS "delta" FROM new_rows
+      UNION ALL
+      SELECT "companyId", "createdAt", "status", -1 AS "delta" FROM old_rows
+    ) r
+    WHERE r."companyId" IS NOT NULL
+    GROUP BY 1, 2, 4
+    HAVING SUM(r."delta") <> 0
+    ON CONFLICT ("companyId", "day", "metric", "status") DO UPDATE SET "count" = s."count" + EXCLUDED."count";
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION "rebuild_company_daily_stats"(p_company_id TEXT DEFAULT NULL) RETURNS INTEGER LANGUAGE plpgsql AS $$
+DECLARE
+  rebuilt INTEGER;
+BEGIN
+  LOCK TABLE "CompanyDailyStat" IN EXCLUSIVE MODE;
+
+  DELETE FROM "CompanyDailyStat" WHERE p_company_id IS NULL OR "companyId" = p_company_id;
+
+  INSERT INTO "CompanyDailyStat" ("companyId", "day", "metric", "status", "count")
+  SELECT r."companyId", r."day", r."metric", r."status", COUNT(*)
+  FROM (
+    SELECT t."companyId", t."createdAt"::date AS "day", 'trip' AS "metric", t."status"::text AS "status"
+    FROM "Trip" t
+    UNION ALL
+    SELECT a."companyId", a."createdAt"::date, 'attendance', a."status"::text
+    FROM "ChildAttendance" a
+    UNION ALL
+    SELECT p."companyId", p."createdAt"::date, 'payment', p."status"
+    FROM "PaymentIntent" p
+  ) r
+  WHERE r."companyId" IS NOT NULL AND (p_company_id IS NULL OR r."companyId" = p_company_id)
+  GROUP BY 1, 2, 3, 4;
+
+  GET DIAGNOSTICS rebuilt = ROW_COUNT;
+  RETURN rebuilt;
+END;
+$$;
+
+-- Re-attribute the rollups to the stamped companies
+SELECT "rebuild_company_daily_stats"();
@@ -0,0 +1,10 @@
+-- Idempotency key for generated trips. Every replica runs the daily
+-- generation job, and each used to insert its own copy of every trip.
+-- A schedule now yields at most one trip per service date; trips created
+-- by hand leave both columns NULL and are not constrained.
+ALTER TABLE "Trip" ADD COLUMN "scheduledRouteId" TEXT;
+ALTER TABLE "Trip" ADD COLUMN "serviceDate" DATE;
+
+CREATE UNIQUE INDEX "Trip_scheduledRouteId_serviceDate_key" ON "Trip"("scheduledRouteId", "serviceDate");
+
+ALTER TABLE "Trip" ADD CONSTRAINT "Trip_scheduledRouteId_fkey" FOREIGN KEY ("scheduledRouteId") REFERENCES "ScheduledRoute"("id") ON DELETE SET NULL ON UPDATE CASCADE;
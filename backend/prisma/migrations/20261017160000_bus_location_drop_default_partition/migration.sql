@@ -0,0 +1,27 @@
+-- DETACH PARTITION ... CONCURRENTLY is not allowed while the table has a
+-- default partition, so expired days can't be detached without locking
+-- BusLocation. Give every day still in the default partition its own
+-- partition (the function moves the rows), then drop the default.
+SELECT "bus_location_ensure_partition"(days.day)
+FROM (SELECT DISTINCT "timestamp"::date AS day FROM "BusLocation_default") AS days;
+
+-- DropTable
+DROP TABLE "BusLocation_default";
+
+-- Creates the partition for one UTC day if it doesn't exist yet. Snapshots
+-- for days without a partition are not written (see GpsIngestionService).
+CREATE OR REPLACE FUNCTION "bus_location_ensure_partition"(p_day DATE) RETURNS BOOLEAN LANGUAGE plpgsql AS $$
+DECLARE
+  partition_name TEXT := 'BusLocation_' || to_char(p_day, 'YYYYMMDD');
+BEGIN
+  IF to_regclass(format('%I', partition_name)) IS NOT NULL THEN
+    RETURN FALSE;
+  END IF;
+
+  EXECUTE format(
+    'CREATE TABLE %I PARTITION OF "BusLocation" FOR VALUES FROM (%L) TO (%L)',
+    partition_name, p_day::timestamp, (p_day + 1)::timestamp
+  );
+  RETURN TRUE;
+END;
+$$;
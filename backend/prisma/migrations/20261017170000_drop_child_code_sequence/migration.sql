@@ -0,0 +1,3 @@
+-- Child codes are random again (see child-code.service.ts); sequence-derived
+-- codes could be enumerated
+DROP SEQUENCE IF EXISTS "child_code_seq";
@@ -0,0 +1,5 @@
+-- GpsIngestionService now stamps "companyId" on every BusLocation row it
+-- writes, like the other tenant-keyed writers. The per-row trigger did a
+-- "BusCompany" lookup on each GPS insert, the hottest write path.
+DROP TRIGGER IF EXISTS "BusLocation_stamp_company" ON "BusLocation";
+DROP FUNCTION IF EXISTS "stamp_bus_location_company"();
@@ -0,0 +1,83 @@
+/**
+ * Micro-benchmark for GeoIndex: matches CHILDREN pickup points against
+ * STOPS stops with a linear haversine scan and with the grid index, and
+ * checks that both return the same answers.
+ *
+ * Usage:
+ *   npx ts-node scripts/bench-geo-index.ts
+ *   CHILDREN=10000 STOPS=2000 RADIUS_KM=5 SPREAD_KM=40 npx ts-node scripts/bench-geo-index.ts
+ */
+import { GeoIndex, haversineKm } from '../src/common/geo/geo-index';
+
+const CHILDREN = parseInt(process.env.CHILDREN || '10000', 10);
+const STOPS = parseInt(process.env.STOPS || '2000', 10);
+const RADIUS_KM = parseFloat(process.env.RADIUS_KM || '5');
+const SPREAD_KM = parseFloat(process.env.SPREAD_KM || '40');
+const SEED = parseInt(process.env.SEED || '42', 10);
+
+// Deterministic points around Accra
+let state = SEED;
+const random = () => {
+  state = (state * 1664525 + 1013904223) % 4294967296;
+  return state / 4294967296;
+};
+const spreadDeg = SPREAD_KM / 111.32;
+const point = () => ({ latitude: 5.6 + (random() - 0.5) * spreadDeg, longitude: -0.19 + (random() - 0.5) * spreadDeg });
+
+const children = Array.from({ length: CHILDREN }, point);
+const stops = Array.from({ length: STOPS }, (_, i) => ({ id: i, ...point() }));
+
+function time<T>(label: string, fn: () => T): { result: T; ms: number } {
+  const started = process.hrtime.bigint();
+  const result = fn();
+  const ms = Number(process.hrtime.bigint() - started) / 1e6;
+  console.log(`${label.padEnd(32)} ${ms.toFixed(1).padStart(9)} ms`);
+  return { result, ms };
+}
+
+const linearRadius = time('linear withinRadius', () =>
+  children.map((c) =>
+    stops.filter((s) => haversineKm(c.latitude, c.longitude, s.latitude, s.longitude) <= RADIUS_KM).length,
+  ),
+);
+
+const linearNearest = time('linear nearest', () =>
+  children.map((c) => {
+    let best = -1;
+    let bestDistance = Infinity;
+    for (const s of stops) {
+      const d = haversineKm(c.latitude, c.longitude, s.latitude, s.longitude);
+      if (d < bestDistance) {
+        bestDistance = d;
+        best = s.id;
+      }
+    }
+    return best;
+  }),
+);
+
+const { result: index } = time('index build', () =>
+  GeoIndex.from(stops, (s) => s, RADIUS_KM / 2),
+);
+
+const indexedRadius = time('index withinRadius', () =>
+  children.map((c) => index.withinRadius(c.latitude, c.longitude, RADIUS_KM).length),
+);
+
+const indexedNearest = time('index nearest', () =>
+  children.map((c) => index.nearest(c.latitude, c.longitude)?.item.id ?? -1),
+);
+
+const radiusMismatches = linearRadius.result.filter((n, i) => n !== indexedRadius.result[i]).length;
+const nearestMismatches = linearNearest.result.filter((id, i) => id !== indexedNearest.result[i]).length;
+
+console.log(
+  `\n${CHILDREN} children x ${STOPS} stops, radius ${RADIUS_KM}km: ` +
+    `withinRadius ${(linearRadius.ms / indexedRadius.ms).toFixed(1)}x, ` +
+    `nearest ${(linearNearest.ms / indexedNearest.ms).toFixed(1)}x faster`,
+);
+console.log(`mismatches: withinRadius=${radiusMismatches} nearest=${nearestMismatches}`);
+
+if (radiusMismatches || nearestMismatches) {
+  process.exit(1);
+}
@@ -0,0 +1,152 @@
+/**
+ * Compares the old global location broadcast with the coalesced, room-scoped
+ * fan-out in LocationFanout.
+ *
+ * Starts an in-process socket.io server and connects SOCKETS raw websocket
+ * clients speaking the engine.io v4 protocol (socket.io-client is not a
+ * backend dependency). Parents join one bus room each; admins join their
+ * company room. Every bus pings PING_HZ times per second and the script
+ * reports delivered messages per second for both modes, plus how many
+ * deliveries crossed a company boundary.
+ *
+ * Usage:
+ *   npx ts-node scripts/bench-location-fanout.ts
+ *   SOCKETS=1000 BUSES=50 COMPANIES=5 PING_HZ=2 TICK_MS=1000 DURATION_MS=10000 npx ts-node scripts/bench-location-fanout.ts
+ */
+import { createServer } from 'http';
+import { AddressInfo } from 'net';
+import { Server } from 'socket.io';
+import WebSocket from 'ws';
+import { LocationFanout } from '../src/modules/realtime/location-fanout';
+
+const SOCKETS = parseInt(process.env.SOCKETS || '1000', 10);
+const BUSES = parseInt(process.env.BUSES || '50', 10);
+const COMPANIES = parseInt(process.env.COMPANIES || '5', 10);
+const ADMINS_PER_COMPANY = parseInt(process.env.ADMINS_PER_COMPANY || '10', 10);
+const PING_HZ = parseFloat(process.env.PING_HZ || '2');
+const TICK_MS = parseInt(process.env.TICK_MS || '1000', 10);
+const DURATION_MS = parseInt(process.env.DURATION_MS || '10000', 10);
+
+interface ClientStats {
+  received: number;
+  crossCompany: number;
+}
+
+const companyOfBus = (bus: number) => `company-${bus % COMPANIES}`;
+
+async function connectClients(url: string, stats: ClientStats): Promise<WebSocket[]> {
+  const clients: WebSocket[] = [];
+  const admins = Math.min(ADMINS_PER_COMPANY * COMPANIES, SOCKETS);
+
+  const connect = (auth: Record<string, string>) =>
+    new Promise<WebSocket>((resolve, reject) => {
+      const ws = new WebSocket(`${url}/socket.io/?EIO=4&transport=websocket`);
+      ws.on('error', reject);
+      ws.on('message', (raw: Buffer) => {
+        const frame = raw.toString();
+        if (frame[0] === '0') {
+          ws.send(`40${JSON.stringify(auth)}`);
+        } else if (frame === '2') {
+          ws.send('3');
+        } else if (frame.startsWith('40')) {
+          resolve(ws);
+        } else if (frame.startsWith('42')) {
+          stats.received++;
+          const [, data] = JSON.parse(frame.slice(2));
+          if (auth.companyId && data.companyId !== auth.companyId) {
+            stats.crossCompany++;
+          }
+          if (auth.busId && data.companyId !== companyOfBus(parseInt(auth.busId.slice(4), 10))) {
+            stats.crossCompany++;
+          }
+        }
+      });
+    });
+
+  for (let i = 0; i < SOCKETS; i++) {
+    const auth = i < admins
+      ? { role: 'COMPANY_ADMIN', companyId: `company-${i % COMPANIES}` }
+      : { role: 'PARENT', busId: `bus-${i % BUSES}` };
+    clients.push(await connect(auth));
+  }
+  return clients;
+}
+
+async function runMode(mode: 'global' | 'fanout') {
+  const httpServer = createServer();
+  const io = new Server(httpServer, { transports: ['websocket'] });
+  io.on('connection', (socket) => {
+    const auth = socket.handshake.auth as Record<string, string>;
+    if (auth.companyId) socket.join(`company:${auth.companyId}`);
+    if (auth.busId) socket.join(`bus:${auth.busId}`);
+  });
+
+  await new Promise<void>((resolve) => httpServer.listen(0, '127.0.0.1', resolve));
+  const { port } = httpServer.address() as AddressInfo;
+
+  const stats: ClientStats = { received: 0, crossCompany: 0 };
+  const clients = await connectClients(`ws://127.0.0.1:${port}`, stats);
+
+  const fanout = new LocationFanout(() => io, TICK_MS);
+  if (mode === 'fanout') {
+    fanout.start();
+  }
+
+  let pings = 0;
+  const pingTimer = setInterval(() => {
+    for (let bus = 0; bus < BUSES; bus++) {
+      const data = {
+        busId: `bus-${bus}`,
+        companyId: companyOfBus(bus),
+        latitude: 5.6 + Math.random() / 100,
+        longitude: -0.18 + Math.random() / 100,
+        speed: 30,
+        timestamp: new Date().toISOString(),
+      };
+      pings++;
+      if (mode === 'global') {
+        // Behaviour before LocationFanout
+        io.to(`bus:${data.busId}`).emit('bus_location', data);
+        io.emit('new_location_update', data);
+      } else {
+        fanout.push({ busId: data.busId, companyId: data.companyId }, data);
+      }
+    }
+  }, 1000 / PING_HZ);
+
+  const started = Date.now();
+  await new Promise((resolve) => setTimeout(resolve, DURATION_MS));
+  clearInterval(pingTimer);
+  fanout.stop();
+  // Let in-flight frames arrive
+  await new Promise((resolve) => setTimeout(resolve, 200));
+  const elapsed = (Date.now() - started) / 1000;
+
+  clients.forEach((ws) => ws.terminate());
+  io.close();
+
+  return {
+    mode,
+    pings,
+    delivered: stats.received,
+    deliveredPerSec: Math.round(stats.received / elapsed),
+    perClientPerSec: +(stats.received / elapsed / SOCKETS).toFixed(2),
+    crossCompany: stats.crossCompany,
+  };
+}
+
+async function main() {
+  console.log(
+    `sockets=${SOCKETS} buses=${BUSES} companies=${COMPANIES} ping_hz=${PING_HZ} tick_ms=${TICK_MS} duration_ms=${DURATION_MS}`,
+  );
+  const results = [await runMode('global'), await runMode('fanout')];
+  console.table(results);
+
+  const [before, after] = results;
+  console.log(`Delivered messages reduced ${(before.delivered / Math.max(after.delivered, 1)).toFixed(1)}x`);
+}
+
+main().catch((error) => {
+  console.error(error);
+  process.exit(1);
+});
@@ -0,0 +1,52 @@
+/**
+ * Times the auto-route engine on synthetic pickup points and checks that it
+ * respects capacity and is deterministic for a given seed.
+ *
+ * Usage:
+ *   npx ts-node scripts/bench-route-engine.ts
+ *   CHILDREN=20000 CAPACITY=40 SPREAD_KM=30 SEED=7 npx ts-node scripts/bench-route-engine.ts
+ */
+import { createRandom, generateRoutes } from '../src/modules/routes/route-engine';
+
+const CHILDREN = parseInt(process.env.CHILDREN || '20000', 10);
+const CAPACITY = parseInt(process.env.CAPACITY || '40', 10);
+const SPREAD_KM = parseFloat(process.env.SPREAD_KM || '30');
+const SEED = parseInt(process.env.SEED || '7', 10);
+
+// Clustered neighbourhoods around Accra, like real pickup data
+const random = createRandom(SEED);
+const latitudes = new Float64Array(CHILDREN);
+const longitudes = new Float64Array(CHILDREN);
+const spreadDeg = SPREAD_KM / 111.2;
+const neighbourhoods = Array.from({ length: 60 }, () => [
+  5.6 + (random() - 0.5) * spreadDeg,
+  -0.19 + (random() - 0.5) * spreadDeg,
+]);
+for (let i = 0; i < CHILDREN; i++) {
+  const [lat, lon] = neighbourhoods[Math.floor(random() * neighbourhoods.length)];
+  latitudes[i] = lat + (random() - 0.5) * 0.03;
+  longitudes[i] = lon + (random() - 0.5) * 0.03;
+}
+
+const input = { latitudes, longitudes, capacity: CAPACITY, seed: SEED, school: { lat: 5.6, lon: -0.19 } };
+
+const started = Date.now();
+const result = generateRoutes(input);
+const elapsed = Date.now() - started;
+
+const largest = Math.max(...result.routes.map((r) => r.children.length));
+const totalKm = result.routes.reduce((sum, r) => sum + r.lengthKm, 0);
+const stops = result.routes.reduce((sum, r) => sum + r.stops.length, 0);
+console.log(
+  `${CHILDREN} children, capacity ${CAPACITY}: ${result.routes.length} routes, ${stops} stops, ` +
+    `${result.iterations} iterations in ${elapsed} ms`,
+);
+console.log(`largest route ${largest} children, total route length ${totalKm.toFixed(0)} km`);
+
+const again = generateRoutes(input);
+const deterministic = JSON.stringify(again.routes) === JSON.stringify(result.routes);
+console.log(`deterministic with seed ${SEED}: ${deterministic}`);
+
+if (largest > CAPACITY || !deterministic) {
+  process.exit(1);
+}
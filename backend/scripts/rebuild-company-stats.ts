@@ -0,0 +1,32 @@
+/**
+ * Recomputes the per-company daily rollups (CompanyDailyStat) from the
+ * Trip, ChildAttendance and PaymentIntent tables. The rollups are normally
+ * kept current by triggers; run this after bulk fixes made with triggers
+ * disabled, or if the counters are ever suspected to have drifted.
+ *
+ * Usage:
+ *   npm run stats:rebuild
+ *   npm run stats:rebuild -- <companyId>
+ */
+import { PrismaClient } from '@prisma/client';
+
+const prisma = new PrismaClient();
+
+async function main() {
+  const companyId = process.argv[2] || null;
+  console.log(`Rebuilding daily stats for ${companyId ? `company ${companyId}` : 'all companies'}...`);
+
+  const started = Date.now();
+  const [{ rebuilt }] = await prisma.$queryRaw<Array<{ rebuilt: number }>>`
+    SELECT "rebuild_company_daily_stats"(${companyId}::text) AS rebuilt
+  `;
+
+  console.log(`Wrote ${rebuilt} rollup rows in ${Date.now() - started} ms`);
+}
+
+main()
+  .catch((error) => {
+    console.error('Rebuild failed:', error);
+    process.exit(1);
+  })
+  .finally(() => prisma.$disconnect());
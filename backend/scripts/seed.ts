@@ -157,6 +157,23 @@ async function main() {
 
   console.log(`Created parent user: ${parentUser.email}`);
 
+  // Parents without children for the refresh and logout API tests, which
+  // spend or revoke their sessions and must not share the main parent's
+  for (const email of ['refresh@test.com', 'logout@test.com']) {
+    await prisma.user.create({
+      data: {
+        email,
+        passwordHash,
+        firstName: 'Session',
+        lastName: 'Tester',
+        role: 'PARENT',
+        companyId: company.id,
+      },
+    });
+  }
+
+  console.log('Created session test users: refresh@test.com, logout@test.com');
+
   // Create children for the parent
   const child1 = await prisma.child.create({
     data: {
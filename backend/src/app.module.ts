@@ -1,4 +1,4 @@
-import { Module } from '@nestjs/common';
+import { MiddlewareConsumer, Module, NestModule } from '@nestjs/common';
 import { ConfigModule } from '@nestjs/config';
 import { ScheduleModule } from '@nestjs/schedule';
 import { WinstonModule } from 'nest-winston';
@@ -7,6 +7,8 @@ import { AppController } from './app.controller';
 import { AuthModule } from './modules/auth/auth.module';
 import { RolesModule } from './modules/roles/roles.module';
 import { TenancyModule } from './modules/tenancy/tenancy.module';
+import { TenancyMiddleware } from './modules/tenancy/tenancy.middleware';
+import { TenantCacheModule } from './modules/cache/tenant-cache.module';
 import { UsersModule } from './modules/users/users.module';
 import { DriversModule } from './modules/drivers/drivers.module';
 import { ChildrenModule } from './modules/children/children.module';
@@ -26,6 +28,8 @@ import { ScheduledRoutesModule } from './modules/scheduled-routes/scheduled-rout
 import { HealthModule } from './modules/health/health.module';
 import { EmailModule } from './modules/email/email.module';
 import { CompaniesModule } from './modules/companies/companies.module';
+import { MetricsModule } from './modules/metrics/metrics.module';
+import { HttpMetricsMiddleware } from './modules/metrics/http-metrics.middleware';
 
 @Module({
   imports: [
@@ -37,13 +41,17 @@ import { CompaniesModule } from './modules/companies/companies.module';
     
     // Logging
     WinstonModule.forRoot({
+      level: process.env.LOG_LEVEL || 'info',
       transports: [
         new winston.transports.Console({
           format: winston.format.combine(
             winston.format.colorize(),
             winston.format.timestamp(),
-            winston.format.printf(({ timestamp, level, message }) => {
-              return `[${timestamp}] ${level}: ${message}`;
+            // Fields logged as an object ({ message, busId, ... }) follow the message as JSON
+            winston.format.printf(({ timestamp, level, message, context, ...fields }) => {
+              const scope = context ? `[${context}] ` : '';
+              const extra = Object.keys(fields).length > 0 ? ` ${JSON.stringify(fields)}` : '';
+              return `[${timestamp}] ${level}: ${scope}${message}${extra}`;
             }),
           ),
         }),
@@ -54,6 +62,7 @@ import { CompaniesModule } from './modules/companies/companies.module';
     AuthModule,
     RolesModule,
     TenancyModule,
+    TenantCacheModule,
     UsersModule,
     DriversModule,
     ChildrenModule,
@@ -71,10 +80,15 @@ import { CompaniesModule } from './modules/companies/companies.module';
     EarlyPickupModule,
     ScheduledRoutesModule,
     HealthModule,
+    MetricsModule,
     EmailModule,
     CompaniesModule,
   ],
   controllers: [AppController],
   providers: [],
 })
-export class AppModule {}
+export class AppModule implements NestModule {
+  configure(consumer: MiddlewareConsumer) {
+    consumer.apply(HttpMetricsMiddleware, TenancyMiddleware).forRoutes('*');
+  }
+}
@@ -0,0 +1,47 @@
+import { Logger } from '@nestjs/common';
+import { IoAdapter } from '@nestjs/platform-socket.io';
+import { createAdapter } from '@socket.io/redis-adapter';
+import { Redis } from 'ioredis';
+import { ServerOptions } from 'socket.io';
+
+/**
+ * Multi-instance mode: share socket.io rooms and emits across backend
+ * replicas through Redis pub/sub. Off by default so a single instance does
+ * not pay the extra Redis round-trips.
+ */
+export const isRedisAdapterEnabled = () => process.env.SOCKET_IO_REDIS_ADAPTER === 'true';
+
+export class RedisIoAdapter extends IoAdapter {
+  private readonly logger = new Logger(RedisIoAdapter.name);
+  private adapterConstructor: ReturnType<typeof createAdapter>;
+  private pubClient: Redis;
+  private subClient: Redis;
+
+  async connectToRedis(url: string = process.env.REDIS_URL): Promise<void> {
+    // A connection in subscriber mode rejects normal commands, so the
+    // adapter gets a dedicated connection for each direction
+    this.pubClient = new Redis(url);
+    this.subClient = this.pubClient.duplicate();
+
+    await Promise.all([
+      new Promise((resolve, reject) => this.pubClient.once('ready', resolve).once('error', reject)),
+      new Promise((resolve, reject) => this.subClient.once('ready', resolve).once('error', reject)),
+    ]);
+
+    this.adapterConstructor = createAdapter(this.pubClient, this.subClient);
+    this.logger.log('socket.io Redis adapter connected');
+  }
+
+  createIOServer(port: number, options?: ServerOptions): any {
+    const server = super.createIOServer(port, options);
+    server.adapter(this.adapterConstructor);
+    return server;
+  }
+
+  async close(server: any): Promise<void> {
+    await super.close(server);
+    await Promise.all(
+      [this.pubClient, this.subClient].filter(Boolean).map((client) => client.quit().catch(() => undefined)),
+    );
+  }
+}
@@ -0,0 +1,103 @@
+import { cpus } from 'os';
+import { extname, join } from 'path';
+import { Worker } from 'worker_threads';
+
+interface Task {
+  id: number;
+  op: 'hash' | 'compare';
+  args: [string, string | number];
+  resolve: (value: any) => void;
+  reject: (error: Error) => void;
+}
+
+interface PoolWorker {
+  worker: Worker;
+  task: Task | null;
+}
+
+/**
+ * Fixed pool of worker threads running bcrypt synchronously.
+ *
+ * bcrypt's async API already leaves the event loop, but it runs on the
+ * libuv threadpool (4 threads by default) that fs, dns.lookup and zlib
+ * share, so a login burst queues everything else behind it. Each worker here
+ * blocks only itself, and the pool size bounds how many CPUs hashing can use.
+ */
+class BcryptPool {
+  private readonly workers: PoolWorker[] = [];
+  private readonly queue: Task[] = [];
+  private nextId = 1;
+
+  constructor(private readonly size: number) {}
+
+  run<T>(op: Task['op'], args: Task['args']): Promise<T> {
+    return new Promise<T>((resolve, reject) => {
+      this.queue.push({ id: this.nextId++, op, args, resolve, reject });
+      this.dispatch();
+    });
+  }
+
+  private dispatch() {
+    while (this.queue.length > 0) {
+      let idle = this.workers.find((entry) => entry.task === null);
+      if (!idle && this.workers.length < this.size) {
+        idle = this.spawn();
+      }
+      if (!idle) return;
+
+      const task = this.queue.shift();
+      idle.task = task;
+      idle.worker.ref();
+      idle.worker.postMessage({ id: task.id, op: task.op, args: task.args });
+    }
+  }
+
+  private spawn(): PoolWorker {
+    const extension = extname(__filename);
+    const worker = new Worker(join(__dirname, `bcrypt.worker${extension}`), {
+      // Dev/test runs load TypeScript sources directly
+      execArgv: extension === '.ts' ? ['-r', 'ts-node/register/transpile-only'] : undefined,
+    });
+    // Idle workers shouldn't keep the process alive
+    worker.unref();
+
+    const entry: PoolWorker = { worker, task: null };
+    worker.on('message', (message: { id: number; result?: any; error?: string }) => {
+      const task = entry.task;
+      entry.task = null;
+      worker.unref();
+      if (task && task.id === message.id) {
+        if (message.error) task.reject(new Error(message.error));
+        else task.resolve(message.result);
+      }
+      this.dispatch();
+    });
+    worker.on('error', (error) => {
+      entry.task?.reject(error);
+      entry.task = null;
+    });
+    worker.on('exit', () => {
+      const index = this.workers.indexOf(entry);
+      if (index !== -1) this.workers.splice(index, 1);
+      entry.task?.reject(new Error('bcrypt worker exited'));
+      this.dispatch();
+    });
+
+    this.workers.push(entry);
+    return entry;
+  }
+}
+
+const poolSize = parseInt(
+  process.env.BCRYPT_WORKERS || String(Math.max(1, Math.min(4, cpus().length - 1))),
+  10,
+);
+const pool = new BcryptPool(poolSize);
+
+export function hashPassword(password: string, saltRounds = 10): Promise<string> {
+  return pool.run<string>('hash', [password, saltRounds]);
+}
+
+export function comparePassword(password: string, hash: string): Promise<boolean> {
+  return pool.run<boolean>('compare', [password, hash]);
+}
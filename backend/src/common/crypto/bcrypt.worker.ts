@@ -0,0 +1,13 @@
+import { parentPort } from 'worker_threads';
+import * as bcrypt from 'bcrypt';
+
+// Worker thread entry for bcrypt-pool: one job at a time, synchronously, so
+// hashing never touches the shared libuv threadpool
+parentPort.on('message', ({ id, op, args }) => {
+  try {
+    const result = op === 'hash' ? bcrypt.hashSync(args[0], args[1]) : bcrypt.compareSync(args[0], args[1]);
+    parentPort.postMessage({ id, result });
+  } catch (error) {
+    parentPort.postMessage({ id, error: error.message });
+  }
+});
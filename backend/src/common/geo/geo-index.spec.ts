@@ -0,0 +1,49 @@
+import { GeoIndex, haversineKm } from './geo-index';
+
+describe('GeoIndex', () => {
+  // Around Accra
+  const stops = [
+    { id: 'a', latitude: 5.6037, longitude: -0.187 },
+    { id: 'b', latitude: 5.62, longitude: -0.2 },
+    { id: 'c', latitude: 5.7, longitude: -0.3 },
+    { id: 'd', latitude: 6.7, longitude: -1.6 }, // Kumasi
+  ];
+
+  it('should compute haversine distances in km', () => {
+    expect(haversineKm(5.6037, -0.187, 5.6037, -0.187)).toBe(0);
+    const accraToKumasi = haversineKm(5.6037, -0.187, 6.6885, -1.6244);
+    expect(accraToKumasi).toBeGreaterThan(195);
+    expect(accraToKumasi).toBeLessThan(205);
+  });
+
+  it('should return items within a radius, closest first', () => {
+    const index = GeoIndex.from(stops, (stop) => stop, 1);
+    const matches = index.withinRadius(5.605, -0.188, 5);
+
+    expect(matches.map((m) => m.item.id)).toEqual(['a', 'b']);
+    expect(matches[0].distanceKm).toBeLessThan(matches[1].distanceKm);
+  });
+
+  it('should agree with a linear scan for nearest queries', () => {
+    const index = GeoIndex.from(stops, (stop) => stop, 0.5);
+    const queries = [
+      [5.6, -0.19],
+      [5.69, -0.29],
+      [6.0, -1.0],
+      [7.5, -2.5],
+    ];
+
+    for (const [lat, lon] of queries) {
+      const expected = [...stops].sort(
+        (x, y) => haversineKm(lat, lon, x.latitude, x.longitude) - haversineKm(lat, lon, y.latitude, y.longitude),
+      )[0];
+      expect(index.nearest(lat, lon).item.id).toBe(expected.id);
+    }
+  });
+
+  it('should respect the maximum distance for nearest queries', () => {
+    const index = GeoIndex.from(stops, (stop) => stop);
+    expect(index.nearest(4.0, 1.0, 10)).toBeNull();
+    expect(new GeoIndex().nearest(5.6, -0.19)).toBeNull();
+  });
+});
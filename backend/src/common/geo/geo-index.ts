@@ -0,0 +1,182 @@
+const EARTH_RADIUS_KM = 6371;
+const toRad = (degrees: number) => (degrees * Math.PI) / 180;
+
+// Consistent with haversineKm so grid bounds never cut off a true match
+const KM_PER_DEGREE_LAT = toRad(EARTH_RADIUS_KM);
+
+/**
+ * Great-circle distance between two coordinates, in km
+ */
+export function haversineKm(lat1: number, lon1: number, lat2: number, lon2: number): number {
+  const dLat = toRad(lat2 - lat1);
+  const dLon = toRad(lon2 - lon1);
+  const a =
+    Math.sin(dLat / 2) * Math.sin(dLat / 2) +
+    Math.cos(toRad(lat1)) * Math.cos(toRad(lat2)) * Math.sin(dLon / 2) * Math.sin(dLon / 2);
+  return 2 * EARTH_RADIUS_KM * Math.atan2(Math.sqrt(a), Math.sqrt(1 - a));
+}
+
+export interface GeoMatch<T> {
+  item: T;
+  distanceKm: number;
+}
+
+/**
+ * Static spatial index over points (stops, pickup locations, ...) bucketed
+ * into a fixed lat/lon grid. Radius queries only visit the cells overlapping
+ * the query's bounding box; nearest-neighbour queries search outwards ring
+ * by ring and stop once no unvisited cell can hold a closer point.
+ *
+ * A `cellSizeKm` of about half the typical query radius works well.
+ */
+export class GeoIndex<T> {
+  private readonly cellDeg: number;
+  private readonly lats: number[] = [];
+  private readonly lons: number[] = [];
+  private readonly items: T[] = [];
+  private readonly cells = new Map<number, number[]>();
+  private minRow = Infinity;
+  private maxRow = -Infinity;
+  private minCol = Infinity;
+  private maxCol = -Infinity;
+
+  constructor(cellSizeKm = 1) {
+    this.cellDeg = cellSizeKm / KM_PER_DEGREE_LAT;
+  }
+
+  static from<T>(
+    items: T[],
+    coordinates: (item: T) => { latitude: number; longitude: number } | null,
+    cellSizeKm = 1,
+  ): GeoIndex<T> {
+    const index = new GeoIndex<T>(cellSizeKm);
+    for (const item of items) {
+      const point = coordinates(item);
+      if (point) {
+        index.add(point.latitude, point.longitude, item);
+      }
+    }
+    return index;
+  }
+
+  get size(): number {
+    return this.items.length;
+  }
+
+  add(latitude: number, longitude: number, item: T) {
+    const id = this.items.length;
+    this.lats.push(latitude);
+    this.lons.push(longitude);
+    this.items.push(item);
+
+    const row = this.row(latitude);
+    const col = this.col(longitude);
+    const key = this.key(row, col);
+    const cell = this.cells.get(key);
+    if (cell) {
+      cell.push(id);
+    } else {
+      this.cells.set(key, [id]);
+    }
+
+    this.minRow = Math.min(this.minRow, row);
+    this.maxRow = Math.max(this.maxRow, row);
+    this.minCol = Math.min(this.minCol, col);
+    this.maxCol = Math.max(this.maxCol, col);
+  }
+
+  /**
+   * Every item within `radiusKm` of the point, closest first
+   */
+  withinRadius(latitude: number, longitude: number, radiusKm: number): GeoMatch<T>[] {
+    const dLat = radiusKm / KM_PER_DEGREE_LAT;
+    // Widest longitude span inside the band, i.e. at its most poleward edge
+    const bandCos = Math.cos(toRad(Math.min(Math.abs(latitude) + dLat, 89.999)));
+    const dLon = radiusKm / (KM_PER_DEGREE_LAT * bandCos);
+    const matches: GeoMatch<T>[] = [];
+
+    for (let row = this.row(latitude - dLat); row <= this.row(latitude + dLat); row++) {
+      for (let col = this.col(longitude - dLon); col <= this.col(longitude + dLon); col++) {
+        for (const id of this.cells.get(this.key(row, col)) || []) {
+          // Cheap bounding-box reject before the trigonometry
+          if (Math.abs(this.lats[id] - latitude) > dLat || Math.abs(this.lons[id] - longitude) > dLon) {
+            continue;
+          }
+          const distanceKm = haversineKm(latitude, longitude, this.lats[id], this.lons[id]);
+          if (distanceKm <= radiusKm) {
+            matches.push({ item: this.items[id], distanceKm });
+          }
+        }
+      }
+    }
+
+    return matches.sort((a, b) => a.distanceKm - b.distanceKm);
+  }
+
+  /**
+   * Closest item to the point, optionally no further than `maxDistanceKm`
+   */
+  nearest(latitude: number, longitude: number, maxDistanceKm = Infinity): GeoMatch<T> | null {
+    if (this.items.length === 0) {
+      return null;
+    }
+
+    const originRow = this.row(latitude);
+    const originCol = this.col(longitude);
+    // Smallest ground distance one cell step can cover anywhere between the
+    // query and the indexed points (longitude cells shrink away from the equator)
+    const maxAbsLat = Math.min(
+      Math.max(Math.abs(latitude), Math.abs(this.minRow * this.cellDeg), Math.abs((this.maxRow + 1) * this.cellDeg)),
+      89.999,
+    );
+    const kmPerCell = this.cellDeg * KM_PER_DEGREE_LAT * Math.cos(toRad(maxAbsLat));
+    const maxRing = Math.max(
+      Math.abs(originRow - this.minRow),
+      Math.abs(originRow - this.maxRow),
+      Math.abs(originCol - this.minCol),
+      Math.abs(originCol - this.maxCol),
+    );
+
+    let bestId = -1;
+    let bestDistance = Infinity;
+
+    for (let ring = 0; ring <= maxRing; ring++) {
+      // Any point in this ring is at least (ring - 1) full cells away
+      const ringFloorKm = Math.max(ring - 1, 0) * kmPerCell;
+      if (ringFloorKm > bestDistance || ringFloorKm > maxDistanceKm) {
+        break;
+      }
+
+      for (let row = originRow - ring; row <= originRow + ring; row++) {
+        const onEdge = row === originRow - ring || row === originRow + ring;
+        for (let col = originCol - ring; col <= originCol + ring; col += onEdge || ring === 0 ? 1 : 2 * ring) {
+          for (const id of this.cells.get(this.key(row, col)) || []) {
+            const distanceKm = haversineKm(latitude, longitude, this.lats[id], this.lons[id]);
+            if (distanceKm < bestDistance) {
+              bestDistance = distanceKm;
+              bestId = id;
+            }
+          }
+        }
+      }
+    }
+
+    if (bestId === -1 || bestDistance > maxDistanceKm) {
+      return null;
+    }
+    return { item: this.items[bestId], distanceKm: bestDistance };
+  }
+
+  private row(latitude: number): number {
+    return Math.floor(latitude / this.cellDeg);
+  }
+
+  private col(longitude: number): number {
+    return Math.floor(longitude / this.cellDeg);
+  }
+
+  // Offset rows/columns stay below 2^22 for any cell size >= 10m
+  private key(row: number, col: number): number {
+    return (row + 0x100000) * 0x400000 + (col + 0x100000);
+  }
+}
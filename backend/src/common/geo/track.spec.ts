@@ -0,0 +1,43 @@
+import { decodePolyline, encodePolyline, simplifyTrack } from './track';
+
+describe('track', () => {
+  const point = (latitude: number, longitude: number, second: number) => ({
+    latitude,
+    longitude,
+    timestamp: new Date(second * 1000),
+    speed: 30,
+  });
+
+  it('should encode polylines in the standard format', () => {
+    const encoded = encodePolyline([
+      { latitude: 38.5, longitude: -120.2 },
+      { latitude: 40.7, longitude: -120.95 },
+      { latitude: 43.252, longitude: -126.453 },
+    ]);
+
+    expect(encoded).toBe('_p~iF~ps|U_ulLnnqC_mqNvxq`@');
+    expect(decodePolyline(encoded)).toEqual([
+      { latitude: 38.5, longitude: -120.2 },
+      { latitude: 40.7, longitude: -120.95 },
+      { latitude: 43.252, longitude: -126.453 },
+    ]);
+  });
+
+  it('should drop points along a straight road and keep the corners', () => {
+    const track = [];
+    // North for 100 points (~1.1 km), then east for 100 points
+    for (let i = 0; i < 100; i++) track.push(point(5.6 + i * 1e-4, -0.19, i));
+    for (let i = 0; i < 100; i++) track.push(point(5.6 + 99e-4, -0.19 + (i + 1) * 1e-4, 100 + i));
+
+    const simplified = simplifyTrack(track, 5);
+
+    expect(simplified).toEqual([track[0], track[99], track[199]]);
+  });
+
+  it('should keep detours larger than the tolerance', () => {
+    const track = [point(5.6, -0.19, 0), point(5.6005, -0.1895, 1), point(5.601, -0.19, 2)];
+
+    expect(simplifyTrack(track, 5)).toHaveLength(3);
+    expect(simplifyTrack(track, 100)).toHaveLength(2);
+  });
+});
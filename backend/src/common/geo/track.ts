@@ -0,0 +1,131 @@
+const METERS_PER_DEGREE = 111195; // Same earth radius as haversineKm
+const toRad = (degrees: number) => (degrees * Math.PI) / 180;
+
+export interface TrackPoint {
+  latitude: number;
+  longitude: number;
+  timestamp: Date;
+  speed: number;
+}
+
+/**
+ * Douglas-Peucker simplification: drops every point that lies within
+ * `toleranceM` meters of the line between the points kept around it. The
+ * first and last points are always kept. Distances use an equirectangular
+ * projection around the track's mean latitude, which is accurate to well
+ * under a meter over a city-sized track.
+ */
+export function simplifyTrack<T extends TrackPoint>(points: T[], toleranceM: number): T[] {
+  if (points.length <= 2 || toleranceM <= 0) {
+    return points.slice();
+  }
+
+  const n = points.length;
+  let meanLat = 0;
+  for (const point of points) meanLat += point.latitude;
+  const lonScale = METERS_PER_DEGREE * Math.cos(toRad(meanLat / n));
+
+  const xs = new Float64Array(n);
+  const ys = new Float64Array(n);
+  for (let i = 0; i < n; i++) {
+    xs[i] = points[i].longitude * lonScale;
+    ys[i] = points[i].latitude * METERS_PER_DEGREE;
+  }
+
+  const keep = new Uint8Array(n);
+  keep[0] = 1;
+  keep[n - 1] = 1;
+
+  // Explicit stack instead of recursion: a day-long track can have tens of
+  // thousands of points
+  const stack: number[] = [0, n - 1];
+  const toleranceSq = toleranceM * toleranceM;
+  while (stack.length > 0) {
+    const last = stack.pop();
+    const first = stack.pop();
+
+    const dx = xs[last] - xs[first];
+    const dy = ys[last] - ys[first];
+    const lengthSq = dx * dx + dy * dy;
+
+    let farthest = -1;
+    let farthestSq = toleranceSq;
+    for (let i = first + 1; i < last; i++) {
+      let px = xs[i] - xs[first];
+      let py = ys[i] - ys[first];
+      if (lengthSq > 0) {
+        const t = Math.max(0, Math.min(1, (px * dx + py * dy) / lengthSq));
+        px -= t * dx;
+        py -= t * dy;
+      }
+      const distanceSq = px * px + py * py;
+      if (distanceSq > farthestSq) {
+        farthestSq = distanceSq;
+        farthest = i;
+      }
+    }
+
+    if (farthest !== -1) {
+      keep[farthest] = 1;
+      stack.push(first, farthest, farthest, last);
+    }
+  }
+
+  const simplified: T[] = [];
+  for (let i = 0; i < n; i++) {
+    if (keep[i]) simplified.push(points[i]);
+  }
+  return simplified;
+}
+
+/**
+ * Encoded polyline (precision 5), the format Google Maps and most mobile
+ * map SDKs decode natively
+ */
+export function encodePolyline(points: Array<{ latitude: number; longitude: number }>): string {
+  let encoded = '';
+  let prevLat = 0;
+  let prevLon = 0;
+  for (const point of points) {
+    const lat = Math.round(point.latitude * 1e5);
+    const lon = Math.round(point.longitude * 1e5);
+    encoded += encodeValue(lat - prevLat) + encodeValue(lon - prevLon);
+    prevLat = lat;
+    prevLon = lon;
+  }
+  return encoded;
+}
+
+export function decodePolyline(encoded: string): Array<{ latitude: number; longitude: number }> {
+  const points: Array<{ latitude: number; longitude: number }> = [];
+  let index = 0;
+  let lat = 0;
+  let lon = 0;
+  while (index < encoded.length) {
+    for (let coordinate = 0; coordinate < 2; coordinate++) {
+      let result = 0;
+      let shift = 0;
+      let byte: number;
+      do {
+        byte = encoded.charCodeAt(index++) - 63;
+        result |= (byte & 0x1f) << shift;
+        shift += 5;
+      } while (byte >= 0x20);
+      const delta = result & 1 ? ~(result >> 1) : result >> 1;
+      if (coordinate === 0) lat += delta;
+      else lon += delta;
+    }
+    points.push({ latitude: lat / 1e5, longitude: lon / 1e5 });
+  }
+  return points;
+}
+
+function encodeValue(value: number): string {
+  let v = value < 0 ? ~(value << 1) : value << 1;
+  let chunk = '';
+  while (v >= 0x20) {
+    chunk += String.fromCharCode((0x20 | (v & 0x1f)) + 63);
+    v >>= 5;
+  }
+  return chunk + String.fromCharCode(v + 63);
+}
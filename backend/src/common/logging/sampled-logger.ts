@@ -0,0 +1,39 @@
+import { Logger } from '@nestjs/common';
+
+/**
+ * Logger for hot paths (per GPS ping, per socket event). Debug and info
+ * entries are kept at LOG_SAMPLE_RATE (default 1%) so a busy instance isn't
+ * bound by log I/O; warnings and errors are always written. Pass an object
+ * to get structured fields in the Winston output, e.g.
+ * `logger.debug({ message: 'GPS update', busId })`.
+ */
+export class SampledLogger {
+  private readonly logger: Logger;
+
+  constructor(
+    context: string,
+    private readonly rate = parseFloat(process.env.LOG_SAMPLE_RATE || '0.01'),
+  ) {
+    this.logger = new Logger(context);
+  }
+
+  debug(message: string | Record<string, unknown>) {
+    if (this.sampled()) this.logger.debug(message);
+  }
+
+  log(message: string | Record<string, unknown>) {
+    if (this.sampled()) this.logger.log(message);
+  }
+
+  warn(message: string | Record<string, unknown>) {
+    this.logger.warn(message);
+  }
+
+  error(message: string | Record<string, unknown>, stack?: string) {
+    this.logger.error(message, stack);
+  }
+
+  private sampled(): boolean {
+    return this.rate >= 1 || Math.random() < this.rate;
+  }
+}
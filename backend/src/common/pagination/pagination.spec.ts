@@ -0,0 +1,93 @@
+import { BadRequestException } from '@nestjs/common';
+import { MAX_PAGE_SIZE, decodeCursor, encodeCursor, findPage, selectFields } from './pagination';
+
+interface Row {
+  id: string;
+  name: string;
+  createdAt: Date;
+}
+
+// Evaluates the subset of Prisma where/orderBy/take that findPage produces
+function fakeFindMany(rows: Row[]) {
+  const matches = (row: Row, where: any): boolean => {
+    if (where.AND) return where.AND.every((clause: any) => matches(row, clause));
+    if (where.OR) return where.OR.some((clause: any) => matches(row, clause));
+    return Object.entries(where).every(([key, condition]: [string, any]) => {
+      const value = (row as any)[key];
+      if (condition instanceof Date) return value.getTime() === condition.getTime();
+      if (condition && typeof condition === 'object' && 'lt' in condition) return value < condition.lt;
+      return value === condition;
+    });
+  };
+
+  return jest.fn(async ({ where, select, take }: any) =>
+    rows
+      .filter((row) => matches(row, where))
+      .sort((a, b) => b.createdAt.getTime() - a.createdAt.getTime() || (a.id < b.id ? 1 : -1))
+      .slice(0, take)
+      .map((row) => Object.fromEntries(Object.keys(select).map((key) => [key, (row as any)[key]]))),
+  );
+}
+
+describe('pagination', () => {
+  // Several rows share a timestamp, so paging has to break ties on id
+  const rows: Row[] = Array.from({ length: 23 }, (_, i) => ({
+    id: `row-${String(i).padStart(2, '0')}`,
+    name: `Row ${i}`,
+    createdAt: new Date(Date.UTC(2026, 0, 1, 0, 0, Math.floor(i / 3))),
+  }));
+
+  it('walks every row exactly once, newest first', async () => {
+    const findMany = fakeFindMany(rows);
+    const seen: string[] = [];
+    let cursor: string | undefined;
+    do {
+      const page: any = await findPage(findMany, {}, { id: true, name: true }, { limit: 5, cursor });
+      expect(page.data.length).toBeLessThanOrEqual(5);
+      seen.push(...page.data.map((row: Row) => row.id));
+      cursor = page.nextCursor ?? undefined;
+    } while (cursor);
+
+    const expected = [...rows]
+      .sort((a, b) => b.createdAt.getTime() - a.createdAt.getTime() || (a.id < b.id ? 1 : -1))
+      .map((row) => row.id);
+    expect(seen).toEqual(expected);
+    expect(findMany).toHaveBeenCalledTimes(5);
+  });
+
+  it('drops the keyset columns that were not selected', async () => {
+    const page: any = await findPage(fakeFindMany(rows), {}, { id: true, name: true }, { limit: 2 });
+
+    expect(page.data[0]).toEqual({ id: 'row-22', name: 'Row 22' });
+    expect(page.nextCursor).toEqual(expect.any(String));
+  });
+
+  it('returns a plain array when no page was requested', async () => {
+    const result = await findPage(fakeFindMany(rows), {}, { id: true }, {}, 10);
+
+    expect(Array.isArray(result)).toBe(true);
+    expect(result).toHaveLength(10);
+  });
+
+  it('caps unpaged responses at the maximum page size by default', async () => {
+    const findMany = jest.fn().mockResolvedValue([]);
+    await findPage(findMany, {}, { id: true }, {});
+
+    expect(findMany.mock.calls[0][0].take).toBe(MAX_PAGE_SIZE);
+  });
+
+  it('round-trips cursors and rejects tampered ones', () => {
+    const row = { id: 'abc', createdAt: new Date('2026-01-01T00:00:00.000Z') };
+
+    expect(decodeCursor(encodeCursor(row))).toEqual(row);
+    expect(() => decodeCursor('not-a-cursor')).toThrow(BadRequestException);
+  });
+
+  it('projects only allowed fields', () => {
+    const selectable = { id: true, name: true, school: { select: { id: true, name: true } } };
+
+    expect(selectFields(undefined, selectable)).toBe(selectable);
+    expect(selectFields('name, school', selectable)).toEqual({ id: true, name: true, school: selectable.school });
+    expect(() => selectFields('passwordHash', selectable)).toThrow(BadRequestException);
+  });
+});
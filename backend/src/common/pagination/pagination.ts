@@ -0,0 +1,142 @@
+import { BadRequestException } from '@nestjs/common';
+import { Type } from 'class-transformer';
+import { IsInt, IsOptional, IsString, Max, Min } from 'class-validator';
+
+export const DEFAULT_PAGE_SIZE = 50;
+export const MAX_PAGE_SIZE = 500;
+
+/**
+ * Query parameters shared by the paginated list endpoints. Sending `limit`
+ * or `cursor` switches the response from a plain array to a `Page`.
+ */
+export class PageQueryDto {
+  @IsOptional()
+  @Type(() => Number)
+  @IsInt()
+  @Min(1)
+  @Max(MAX_PAGE_SIZE)
+  limit?: number;
+
+  // `nextCursor` from the previous page
+  @IsOptional()
+  @IsString()
+  cursor?: string;
+
+  // Comma-separated top-level fields to return, e.g. "id,firstName,school"
+  @IsOptional()
+  @IsString()
+  fields?: string;
+}
+
+export interface Page<T> {
+  data: T[];
+  // Pass back as `cursor` for the next page; null on the last page
+  nextCursor: string | null;
+}
+
+interface KeysetRow {
+  id: string;
+  createdAt: Date;
+}
+
+// Newest first; id breaks ties between rows created in the same millisecond
+const KEYSET_ORDER = [{ createdAt: 'desc' as const }, { id: 'desc' as const }];
+
+export function encodeCursor(row: KeysetRow): string {
+  return Buffer.from(JSON.stringify([row.createdAt.toISOString(), row.id])).toString('base64url');
+}
+
+export function decodeCursor(cursor: string): KeysetRow {
+  try {
+    const [createdAt, id] = JSON.parse(Buffer.from(cursor, 'base64url').toString());
+    const date = new Date(createdAt);
+    if (typeof id === 'string' && !isNaN(date.getTime())) {
+      return { id, createdAt: date };
+    }
+  } catch {
+    // Fall through to the error below
+  }
+  throw new BadRequestException('Invalid cursor');
+}
+
+/**
+ * Narrows `selectable` (the endpoint's full select) to the fields named in
+ * a `fields=` parameter. `id` is always included.
+ */
+export function selectFields<S extends Record<string, unknown>>(fields: string | undefined, selectable: S): Partial<S> {
+  if (!fields) {
+    return selectable;
+  }
+
+  const selected: Record<string, unknown> = { id: true };
+  for (const name of fields.split(',').map((field) => field.trim()).filter(Boolean)) {
+    if (!(name in selectable)) {
+      throw new BadRequestException(`Unknown field "${name}". Allowed: ${Object.keys(selectable).join(', ')}`);
+    }
+    selected[name] = selectable[name];
+  }
+  return selected as Partial<S>;
+}
+
+/**
+ * Select of every scalar column of a model, from its Prisma
+ * `<Model>ScalarFieldEnum`
+ */
+export function scalarSelect<F extends string>(fieldEnum: Record<string, F>): Record<F, true> {
+  return Object.fromEntries(Object.values(fieldEnum).map((field) => [field, true])) as Record<F, true>;
+}
+
+/**
+ * Runs a list query with the shared ordering. With `limit` or `cursor` in
+ * the query it returns one keyset page (WHERE (createdAt, id) < cursor, so
+ * the cost doesn't grow with the page number). Otherwise it returns a plain
+ * array of the newest rows, as the endpoints always did, but capped at
+ * `unpagedTake` (MAX_PAGE_SIZE by default) so an old client can't pull a
+ * whole tenant in one response.
+ */
+export async function findPage<T>(
+  findMany: (args: { where: any; select: any; orderBy: any; take?: number }) => Promise<T[]>,
+  where: object,
+  select: Record<string, unknown>,
+  query: PageQueryDto,
+  unpagedTake = MAX_PAGE_SIZE,
+): Promise<Page<T> | T[]> {
+  if (query.limit === undefined && query.cursor === undefined) {
+    return findMany({ where, select, orderBy: KEYSET_ORDER, take: unpagedTake });
+  }
+
+  const limit = query.limit ?? DEFAULT_PAGE_SIZE;
+  const after = query.cursor ? decodeCursor(query.cursor) : null;
+  const rows = await findMany({
+    where: after
+      ? {
+          AND: [
+            where,
+            {
+              OR: [
+                { createdAt: { lt: after.createdAt } },
+                { createdAt: after.createdAt, id: { lt: after.id } },
+              ],
+            },
+          ],
+        }
+      : where,
+    // The keyset columns are needed to build the next cursor
+    select: { ...select, id: true, createdAt: true },
+    orderBy: KEYSET_ORDER,
+    take: limit + 1,
+  });
+
+  const hasMore = rows.length > limit;
+  if (hasMore) {
+    rows.pop();
+  }
+  const nextCursor = hasMore ? encodeCursor(rows[rows.length - 1] as unknown as KeysetRow) : null;
+
+  if (!select.createdAt) {
+    for (const row of rows) {
+      delete (row as any).createdAt;
+    }
+  }
+  return { data: rows, nextCursor };
+}
@@ -4,12 +4,28 @@ import { ValidationPipe } from '@nestjs/common';
 import { WINSTON_MODULE_NEST_PROVIDER } from 'nest-winston';
 import { HttpExceptionFilter } from './common/filters/http-exception.filter';
 import { IoAdapter } from '@nestjs/platform-socket.io';
+import { RedisIoAdapter, isRedisAdapterEnabled } from './common/adapters/redis-io.adapter';
+import { instrumentRedis, startEventLoopMonitor } from './modules/metrics/metrics';
 
 async function bootstrap() {
+  // Before any module creates its Redis clients
+  instrumentRedis();
+  startEventLoopMonitor();
+
   const app = await NestFactory.create(AppModule);
+
+  // Run OnModuleDestroy hooks on SIGTERM so buffered GPS writes are flushed
+  app.enableShutdownHooks();
   
-  // Enable WebSocket adapter
-  app.useWebSocketAdapter(new IoAdapter(app));
+  // Enable WebSocket adapter. With SOCKET_IO_REDIS_ADAPTER=true, rooms and
+  // emits are shared with the other backend replicas through Redis.
+  if (isRedisAdapterEnabled()) {
+    const redisIoAdapter = new RedisIoAdapter(app);
+    await redisIoAdapter.connectToRedis();
+    app.useWebSocketAdapter(redisIoAdapter);
+  } else {
+    app.useWebSocketAdapter(new IoAdapter(app));
+  }
   
   // Set up global logger
   app.useLogger(app.get(WINSTON_MODULE_NEST_PROVIDER));
@@ -23,12 +39,6 @@ async function bootstrap() {
     credentials: true,
   });
 
-  // Add request logging middleware
-  app.use((req, res, next) => {
-    console.log(`[${new Date().toISOString()}] ${req.method} ${req.path}`);
-    next();
-  });
-  
   // Global validation pipe
   app.useGlobalPipes(new ValidationPipe({
     whitelist: true,
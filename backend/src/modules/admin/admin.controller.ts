@@ -5,6 +5,8 @@ import { Roles } from '../roles/roles.decorator';
 import { RolesGuard } from '../roles/roles.guard';
 import { JwtAuthGuard } from '../auth/jwt-auth.guard';
 import { UpdateFareDto } from './dto/fare-management.dto';
+import { ReportPageQueryDto } from './dto/report-query.dto';
+import { PageQueryDto } from '../../common/pagination/pagination';
 
 @Controller('admin')
 @UseGuards(JwtAuthGuard, RolesGuard)
@@ -61,8 +63,8 @@ export class AdminController {
 
   @Get('company/:companyId/children')
   @Roles('PLATFORM_ADMIN', 'COMPANY_ADMIN')
-  async getCompanyChildren(@Param('companyId') companyId: string) {
-    return this.adminService.getCompanyChildren(companyId);
+  async getCompanyChildren(@Param('companyId') companyId: string, @Query() query: PageQueryDto) {
+    return this.adminService.getCompanyChildren(companyId, query);
   }
 
   @Get('company/:companyId/children/payments')
@@ -119,8 +121,8 @@ export class AdminController {
 
   @Get('company/:companyId/trips')
   @Roles('PLATFORM_ADMIN', 'COMPANY_ADMIN')
-  async getCompanyTrips(@Param('companyId') companyId: string) {
-    return this.adminService.getCompanyTrips(companyId);
+  async getCompanyTrips(@Param('companyId') companyId: string, @Query() query: PageQueryDto) {
+    return this.adminService.getCompanyTrips(companyId, query);
   }
 
   @Get('company/:companyId/trips/active')
@@ -131,8 +133,14 @@ export class AdminController {
 
   @Get('company/:companyId/reports/attendance')
   @Roles('PLATFORM_ADMIN', 'COMPANY_ADMIN')
-  async getAttendanceReport(@Param('companyId') companyId: string, @Query('range') range?: string) {
-    return this.adminService.getAttendanceReport(companyId, range);
+  async getAttendanceReport(@Param('companyId') companyId: string, @Query() query: ReportPageQueryDto) {
+    return this.adminService.getAttendanceReport(companyId, query);
+  }
+
+  @Get('company/:companyId/reports/daily-stats')
+  @Roles('PLATFORM_ADMIN', 'COMPANY_ADMIN')
+  async getDailyStatsReport(@Param('companyId') companyId: string, @Query('range') range?: string) {
+    return this.adminService.getDailyStatsReport(companyId, range);
   }
 
   @Get('company/:companyId/reports/payments')
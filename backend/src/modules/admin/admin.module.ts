@@ -3,9 +3,12 @@ import { AdminService } from './admin.service';
 import { AdminController } from './admin.controller';
 import { PrismaModule } from '../../prisma/prisma.module';
 import { NotificationsModule } from '../notifications/notifications.module';
+import { BusMembershipModule } from '../bus-membership/bus-membership.module';
+import { AnalyticsModule } from '../analytics/analytics.module';
+import { TenancyModule } from '../tenancy/tenancy.module';
 
 @Module({
-  imports: [PrismaModule, NotificationsModule],
+  imports: [PrismaModule, NotificationsModule, BusMembershipModule, AnalyticsModule, TenancyModule],
   controllers: [AdminController],
   providers: [AdminService],
   exports: [AdminService],
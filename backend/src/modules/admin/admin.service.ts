@@ -1,17 +1,141 @@
 import { Injectable, NotFoundException, BadRequestException } from '@nestjs/common';
 import { PrismaService } from '../../prisma/prisma.service';
 import { NotificationsService } from '../notifications/notifications.service';
-import * as bcrypt from 'bcrypt';
+import { BusMembershipService } from '../bus-membership/bus-membership.service';
+import { CompanyStatsService, startOfUtcDay, sumCounts } from '../analytics/company-stats.service';
+import { TenancyService } from '../tenancy/tenancy.service';
+import { Cached } from '../cache/cached.decorator';
+import { PLATFORM_TENANT, TenantCacheService } from '../cache/tenant-cache.service';
+import { hashPassword } from '../../common/crypto/bcrypt-pool';
+import { DEFAULT_PAGE_SIZE, Page, PageQueryDto, findPage, scalarSelect, selectFields } from '../../common/pagination/pagination';
+import { ReportPageQueryDto } from './dto/report-query.dto';
+import { Prisma } from '@prisma/client';
 import * as fs from 'fs';
 import * as path from 'path';
 
+const COMPANY_CHILD_SELECT = {
+  id: true,
+  uniqueCode: true,
+  firstName: true,
+  lastName: true,
+  grade: true,
+  parentId: true,
+  parentPhone: true,
+  schoolId: true,
+  pickupType: true,
+  pickupDescription: true,
+  homeLatitude: true,
+  homeLongitude: true,
+  isClaimed: true,
+  daysUntilPayment: true,
+  parent: {
+    select: {
+      id: true,
+      email: true,
+      firstName: true,
+      lastName: true,
+      phone: true,
+    },
+  },
+  school: {
+    select: {
+      id: true,
+      name: true,
+    },
+  },
+  createdAt: true,
+  updatedAt: true,
+};
+
+const COMPANY_TRIP_SELECT = {
+  ...scalarSelect(Prisma.TripScalarFieldEnum),
+  bus: {
+    include: {
+      driver: {
+        include: {
+          user: {
+            select: {
+              firstName: true,
+              lastName: true,
+            },
+          },
+        },
+      },
+    },
+  },
+  route: {
+    select: {
+      id: true,
+      name: true,
+    },
+  },
+  attendances: {
+    include: {
+      child: {
+        select: {
+          id: true,
+          firstName: true,
+          lastName: true,
+        },
+      },
+    },
+  },
+};
+
+const ATTENDANCE_REPORT_SELECT = {
+  timestamp: true,
+  status: true,
+  recordedBy: true,
+  child: {
+    select: {
+      firstName: true,
+      lastName: true,
+      parent: {
+        select: {
+          firstName: true,
+          lastName: true,
+          email: true,
+          phone: true,
+        },
+      },
+      school: {
+        select: {
+          name: true,
+        },
+      },
+    },
+  },
+  trip: {
+    select: {
+      status: true,
+      bus: {
+        select: {
+          plateNumber: true,
+        },
+      },
+      route: {
+        select: {
+          name: true,
+        },
+      },
+    },
+  },
+};
+
 @Injectable()
 export class AdminService {
   constructor(
     private prisma: PrismaService,
     private notificationsService: NotificationsService,
+    private busMembership: BusMembershipService,
+    private companyStats: CompanyStatsService,
+    private tenancy: TenancyService,
+    private cache: TenantCacheService,
   ) {}
 
+  // Entity counts other than trips aren't invalidated; they are at most a
+  // minute old (plus a stale window while a refresh runs)
+  @Cached({ key: 'admin:platform_stats', ttlSeconds: 60, staleSeconds: 300, tags: ['trips'], tenant: () => PLATFORM_TENANT })
   async getPlatformStats(): Promise<any> {
     const [
       totalCompanies,
@@ -50,7 +174,11 @@ export class AdminService {
     if (user && user.role === 'COMPANY_ADMIN' && user.companyId !== companyId) {
       throw new NotFoundException('Company not found');
     }
+    return this.countCompanyStats(companyId);
+  }
 
+  @Cached({ key: 'admin:company_stats', ttlSeconds: 60, staleSeconds: 300, tags: ['trips'], tenant: ([companyId]) => companyId })
+  private async countCompanyStats(companyId: string): Promise<any> {
     const [
       totalSchools,
       totalUsers,
@@ -66,7 +194,7 @@ export class AdminService {
       this.prisma.child.count({ where: { school: { companyId } } }),
       this.prisma.bus.count({ where: { driver: { user: { companyId } } } }),
       this.prisma.route.count({ where: { school: { companyId } } }),
-      this.prisma.trip.count({ where: { bus: { driver: { user: { companyId } } } } }),
+      this.tenancy.forCompany(companyId).trip.count(),
     ]);
 
     return {
@@ -93,7 +221,7 @@ export class AdminService {
     });
 
     if (adminEmail && adminPassword) {
-      const passwordHash = await bcrypt.hash(adminPassword, 10);
+      const passwordHash = await hashPassword(adminPassword, 10);
       await this.prisma.user.create({
         data: {
           firstName: adminName?.split(' ')[0] || 'Admin',
@@ -165,45 +293,13 @@ export class AdminService {
     });
   }
 
-  async getCompanyChildren(companyId: string): Promise<any> {
-    return this.prisma.child.findMany({
-      where: {
-        school: { companyId },
-      },
-      select: {
-        id: true,
-        uniqueCode: true,
-        firstName: true,
-        lastName: true,
-        grade: true,
-        parentId: true,
-        parentPhone: true,
-        schoolId: true,
-        pickupType: true,
-        pickupDescription: true,
-        homeLatitude: true,
-        homeLongitude: true,
-        isClaimed: true,
-        daysUntilPayment: true,
-        parent: {
-          select: {
-            id: true,
-            email: true,
-            firstName: true,
-            lastName: true,
-            phone: true,
-          },
-        },
-        school: {
-          select: {
-            id: true,
-            name: true,
-          },
-        },
-        createdAt: true,
-        updatedAt: true,
-      },
-    });
+  async getCompanyChildren(companyId: string, query: PageQueryDto = {}): Promise<any> {
+    return findPage(
+      (args) => this.prisma.child.findMany(args),
+      { school: { companyId } },
+      selectFields(query.fields, COMPANY_CHILD_SELECT),
+      query,
+    );
   }
 
   async getChildrenPaymentStatus(companyId: string): Promise<any> {
@@ -297,13 +393,9 @@ export class AdminService {
   }
 
   async deleteCompany(companyId: string): Promise<any> {
-    await this.prisma.childAttendance.deleteMany({
-      where: { trip: { bus: { driver: { user: { companyId } } } } },
-    });
-
-    await this.prisma.trip.deleteMany({
-      where: { bus: { driver: { user: { companyId } } } },
-    });
+    const tenant = this.tenancy.forCompany(companyId);
+    await tenant.childAttendance.deleteMany({});
+    await tenant.trip.deleteMany({});
 
     await this.prisma.scheduledRoute.deleteMany({
       where: { driver: { user: { companyId } } },
@@ -329,6 +421,13 @@ export class AdminService {
       where: { companyId },
     });
 
+    await this.prisma.companyDailyStat.deleteMany({
+      where: { companyId },
+    });
+
+    await this.busMembership.invalidateAll();
+    await this.cache.invalidate(['trips', 'attendance', 'payments'], companyId);
+
     return this.prisma.company.delete({
       where: { id: companyId },
     });
@@ -352,6 +451,8 @@ export class AdminService {
       where: { schoolId },
     });
 
+    await this.busMembership.invalidateAll();
+
     return this.prisma.school.delete({
       where: { id: schoolId },
     });
@@ -375,27 +476,9 @@ export class AdminService {
         break;
     }
 
-    const [totalTrips, completedTrips, inProgressTrips, totalChildren, activeChildren, totalPayments, successfulPayments, missedPickups, onTimeTrips] = await Promise.all([
-      this.prisma.trip.count({
-        where: { 
-          bus: { driver: { user: { companyId } } },
-          createdAt: { gte: startDate },
-        },
-      }),
-      this.prisma.trip.count({
-        where: {
-          bus: { driver: { user: { companyId } } },
-          status: 'COMPLETED',
-          createdAt: { gte: startDate },
-        },
-      }),
-      this.prisma.trip.count({
-        where: {
-          bus: { driver: { user: { companyId } } },
-          status: 'IN_PROGRESS',
-          createdAt: { gte: startDate },
-        },
-      }),
+    // Trip, payment and attendance counts come from the daily rollups
+    const [counts, totalChildren, activeChildren] = await Promise.all([
+      this.companyStats.getCounts(companyId, startDate),
       this.prisma.child.count({
         where: { school: { companyId } },
       }),
@@ -411,35 +494,16 @@ export class AdminService {
           },
         },
       }),
-      this.prisma.paymentIntent.count({
-        where: {
-          parent: { companyId },
-          createdAt: { gte: startDate },
-        },
-      }),
-      this.prisma.paymentIntent.count({
-        where: {
-          parent: { companyId },
-          status: 'succeeded',
-          createdAt: { gte: startDate },
-        },
-      }),
-      this.prisma.childAttendance.count({
-        where: {
-          trip: { bus: { driver: { user: { companyId } } } },
-          status: 'MISSED',
-          createdAt: { gte: startDate },
-        },
-      }),
-      this.prisma.trip.count({
-        where: {
-          bus: { driver: { user: { companyId } } },
-          status: 'COMPLETED',
-          createdAt: { gte: startDate },
-        },
-      }),
     ]);
 
+    const totalTrips = sumCounts(counts.trip);
+    const completedTrips = counts.trip.COMPLETED || 0;
+    const inProgressTrips = counts.trip.IN_PROGRESS || 0;
+    const onTimeTrips = completedTrips;
+    const totalPayments = sumCounts(counts.payment);
+    const successfulPayments = counts.payment.succeeded || 0;
+    const missedPickups = counts.attendance.MISSED || 0;
+
     const tripCompletionRate = totalTrips > 0 ? (completedTrips / totalTrips) * 100 : 0;
     const paymentSuccessRate = totalPayments > 0 ? (successfulPayments / totalPayments) * 100 : 0;
     const attendanceRate = totalChildren > 0 ? ((totalChildren - missedPickups) / totalChildren) * 100 : 100;
@@ -471,55 +535,20 @@ export class AdminService {
     };
   }
 
-  async getCompanyTrips(companyId: string): Promise<any> {
-    return this.prisma.trip.findMany({
-      where: {
-        bus: { driver: { user: { companyId } } },
-      },
-      include: {
-        bus: {
-          include: {
-            driver: {
-              include: {
-                user: {
-                  select: {
-                    firstName: true,
-                    lastName: true,
-                  },
-                },
-              },
-            },
-          },
-        },
-        route: {
-          select: {
-            id: true,
-            name: true,
-          },
-        },
-        attendances: {
-          include: {
-            child: {
-              select: {
-                id: true,
-                firstName: true,
-                lastName: true,
-              },
-            },
-          },
-        },
-      },
-      orderBy: {
-        createdAt: 'desc',
-      },
-      take: 100,
-    });
+  async getCompanyTrips(companyId: string, query: PageQueryDto = {}): Promise<any> {
+    return findPage(
+      (args) => this.tenancy.forCompany(companyId).trip.findMany(args),
+      {},
+      selectFields(query.fields, COMPANY_TRIP_SELECT),
+      query,
+      // Unpaged callers get the latest 100, as before pagination existed
+      100,
+    );
   }
 
   async getCompanyActiveTrips(companyId: string): Promise<any> {
-    return this.prisma.trip.findMany({
+    return this.tenancy.forCompany(companyId).trip.findMany({
       where: {
-        bus: { driver: { user: { companyId } } },
         status: 'IN_PROGRESS',
       },
       include: {
@@ -558,90 +587,51 @@ export class AdminService {
     });
   }
 
-  async getAttendanceReport(companyId: string, range?: string): Promise<any> {
-    // Calculate date filter based on range
-    const now = new Date();
-    let startDate: Date;
-    
-    switch (range) {
-      case 'daily':
-        startDate = new Date(now.getTime() - 24 * 60 * 60 * 1000); // Last 24 hours
-        break;
-      case 'weekly':
-        startDate = new Date(now.getTime() - 7 * 24 * 60 * 60 * 1000); // Last 7 days
-        break;
-      case 'monthly':
-      default:
-        startDate = new Date(now.getTime() - 30 * 24 * 60 * 60 * 1000); // Last 30 days (4 weeks)
-        break;
-    }
+  /**
+   * Attendance for the range: status totals from the daily rollups, plus one
+   * keyset page of detail rows (DEFAULT_PAGE_SIZE unless `limit` is sent).
+   * Both count from the start of the range's first UTC day, as the rollups
+   * are kept per day of createdAt.
+   */
+  async getAttendanceReport(companyId: string, query: ReportPageQueryDto = {}): Promise<any> {
+    const days = query.range === 'daily' ? 1 : query.range === 'weekly' ? 7 : 30;
+    const startDate = startOfUtcDay(new Date(Date.now() - days * 24 * 60 * 60 * 1000));
+
+    const [counts, page] = await Promise.all([
+      this.companyStats.getCounts(companyId, startDate),
+      findPage(
+        (args) => this.tenancy.forCompany(companyId).childAttendance.findMany(args),
+        { createdAt: { gte: startDate } },
+        ATTENDANCE_REPORT_SELECT,
+        { ...query, limit: query.limit ?? DEFAULT_PAGE_SIZE },
+      ) as Promise<Page<any>>,
+    ]);
 
-    const attendances = await this.prisma.childAttendance.findMany({
-      where: {
-        trip: { bus: { driver: { user: { companyId } } } },
-        timestamp: {
-          gte: startDate,
-        },
-      },
-      include: {
-        child: {
-          select: {
-            id: true,
-            firstName: true,
-            lastName: true,
-            parent: {
-              select: {
-                firstName: true,
-                lastName: true,
-                email: true,
-                phone: true,
-              },
-            },
-            school: {
-              select: {
-                name: true,
-              },
-            },
-          },
-        },
-        trip: {
-          select: {
-            id: true,
-            startTime: true,
-            endTime: true,
-            status: true,
-            bus: {
-              select: {
-                plateNumber: true,
-              },
-            },
-            route: {
-              select: {
-                name: true,
-              },
-            },
-          },
-        },
-      },
-      orderBy: {
-        timestamp: 'desc',
-      },
-      take: 1000,
-    });
+    return {
+      totals: { ...counts.attendance, total: sumCounts(counts.attendance) },
+      data: page.data.map((att) => ({
+        date: att.timestamp,
+        childName: `${att.child.firstName} ${att.child.lastName}`,
+        parentName: att.child.parent ? `${att.child.parent.firstName} ${att.child.parent.lastName}` : '',
+        parentEmail: att.child.parent?.email,
+        parentPhone: att.child.parent?.phone,
+        schoolName: att.child.school.name,
+        tripRoute: att.trip.route.name,
+        busPlate: att.trip.bus.plateNumber,
+        status: att.status,
+        tripStatus: att.trip.status,
+        recordedBy: att.recordedBy,
+      })),
+      nextCursor: page.nextCursor,
+    };
+  }
 
-    return attendances.map((att) => ({
-      date: att.timestamp,
-      childName: `${att.child.firstName} ${att.child.lastName}`,
-      parentName: `${att.child.parent.firstName} ${att.child.parent.lastName}`,
-      parentEmail: att.child.parent.email,
-      parentPhone: att.child.parent.phone,
-      schoolName: att.child.school.name,
-      tripRoute: att.trip.route.name,
-      busPlate: att.trip.bus.plateNumber,
-      status: att.status,
-      tripStatus: att.trip.status,
-      recordedBy: att.recordedBy,
-    }));
+  async getDailyStatsReport(companyId: string, range?: string): Promise<any> {
+    const now = new Date();
+    const days = range === 'daily' ? 1 : range === 'weekly' ? 7 : 30;
+    const startDate = new Date(now.getTime() - days * 24 * 60 * 60 * 1000);
+
+    return this.companyStats.getDaily(companyId, startDate);
   }
 
   async getPaymentReport(companyId: string, range?: string): Promise<any> {
@@ -662,9 +652,8 @@ export class AdminService {
         break;
     }
 
-    const payments = await this.prisma.paymentIntent.findMany({
+    const payments = await this.tenancy.forCompany(companyId).paymentIntent.findMany({
       where: {
-        parent: { companyId },
         createdAt: {
           gte: startDate,
         },
@@ -0,0 +1,8 @@
+import { IsIn, IsOptional } from 'class-validator';
+import { PageQueryDto } from '../../../common/pagination/pagination';
+
+export class ReportPageQueryDto extends PageQueryDto {
+  @IsOptional()
+  @IsIn(['daily', 'weekly', 'monthly'])
+  range?: string;
+}
@@ -1,12 +1,14 @@
 import { Module } from '@nestjs/common';
 import { AnalyticsService } from './analytics.service';
 import { AnalyticsController } from './analytics.controller';
+import { CompanyStatsService } from './company-stats.service';
 import { PrismaModule } from '../../prisma/prisma.module';
+import { TenancyModule } from '../tenancy/tenancy.module';
 
 @Module({
-  imports: [PrismaModule],
+  imports: [PrismaModule, TenancyModule],
   controllers: [AnalyticsController],
-  providers: [AnalyticsService],
-  exports: [AnalyticsService],
+  providers: [AnalyticsService, CompanyStatsService],
+  exports: [AnalyticsService, CompanyStatsService],
 })
 export class AnalyticsModule {}
\ No newline at end of file
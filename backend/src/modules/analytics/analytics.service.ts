@@ -1,25 +1,17 @@
 import { Injectable } from '@nestjs/common';
-import { PrismaService } from '../../prisma/prisma.service';
-import { Redis } from 'ioredis';
+import { TenancyService } from '../tenancy/tenancy.service';
+import { Cached } from '../cache/cached.decorator';
 
+// Figures are computed over the caller's company (all companies for
+// platform admins) and cached per company
 @Injectable()
 export class AnalyticsService {
-  private readonly redis: Redis;
-
-  constructor(private prisma: PrismaService) {
-    this.redis = new Redis(process.env.REDIS_URL);
-  }
+  constructor(private tenancy: TenancyService) {}
 
+  @Cached({ key: 'analytics:route', ttlSeconds: 3600, tags: ['trips'] })
   async getRoutePerformance(routeId: string): Promise<any> {
-    const cacheKey = `analytics:route:${routeId}`;
-    const cached = await this.redis.get(cacheKey);
-    
-    if (cached) {
-      return JSON.parse(cached);
-    }
-
     // Calculate route performance metrics
-    const trips = await this.prisma.trip.findMany({
+    const trips = await this.tenancy.forCurrentUser().trip.findMany({
       where: { routeId },
       include: {
         histories: true,
@@ -33,42 +25,24 @@ export class AnalyticsService {
       completionRate: trips.length > 0 ? trips.filter(t => t.status === 'COMPLETED').length / trips.length : 0,
     };
 
-    // Cache for 1 hour
-    await this.redis.setex(cacheKey, 3600, JSON.stringify(metrics));
-    
     return metrics;
   }
 
+  @Cached({ key: 'analytics:missed_pickups', ttlSeconds: 1800, tags: ['attendance'] })
   async getMissedPickups(): Promise<any> {
-    const cacheKey = 'analytics:missed_pickups';
-    const cached = await this.redis.get(cacheKey);
-    
-    if (cached) {
-      return JSON.parse(cached);
-    }
-
-    const missedPickups = await this.prisma.childAttendance.count({
+    const missedPickups = await this.tenancy.forCurrentUser().childAttendance.count({
       where: {
         status: 'MISSED',
       },
     });
 
-    // Cache for 30 minutes
-    await this.redis.setex(cacheKey, 1800, JSON.stringify({ count: missedPickups }));
-    
     return { count: missedPickups };
   }
 
+  @Cached({ key: 'analytics:trip_success_rate', ttlSeconds: 3600, tags: ['trips'] })
   async getTripSuccessRate(): Promise<any> {
-    const cacheKey = 'analytics:trip_success_rate';
-    const cached = await this.redis.get(cacheKey);
-    
-    if (cached) {
-      return JSON.parse(cached);
-    }
-
-    const totalTrips = await this.prisma.trip.count();
-    const completedTrips = await this.prisma.trip.count({
+    const totalTrips = await this.tenancy.forCurrentUser().trip.count();
+    const completedTrips = await this.tenancy.forCurrentUser().trip.count({
       where: {
         status: 'COMPLETED',
       },
@@ -82,22 +56,13 @@ export class AnalyticsService {
       successRate,
     };
 
-    // Cache for 1 hour
-    await this.redis.setex(cacheKey, 3600, JSON.stringify(metrics));
-    
     return metrics;
   }
 
+  @Cached({ key: 'analytics:payment_completion_rate', ttlSeconds: 3600, tags: ['payments'] })
   async getPaymentCompletionRate(): Promise<any> {
-    const cacheKey = 'analytics:payment_completion_rate';
-    const cached = await this.redis.get(cacheKey);
-    
-    if (cached) {
-      return JSON.parse(cached);
-    }
-
-    const totalPayments = await this.prisma.paymentIntent.count();
-    const successfulPayments = await this.prisma.paymentIntent.count({
+    const totalPayments = await this.tenancy.forCurrentUser().paymentIntent.count();
+    const successfulPayments = await this.tenancy.forCurrentUser().paymentIntent.count({
       where: {
         status: 'succeeded',
       },
@@ -111,9 +76,6 @@ export class AnalyticsService {
       completionRate,
     };
 
-    // Cache for 1 hour
-    await this.redis.setex(cacheKey, 3600, JSON.stringify(metrics));
-    
     return metrics;
   }
 
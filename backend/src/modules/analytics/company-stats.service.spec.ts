@@ -0,0 +1,46 @@
+import { Test, TestingModule } from '@nestjs/testing';
+import { CompanyStatsService, sumCounts } from './company-stats.service';
+import { PrismaService } from '../../prisma/prisma.service';
+
+describe('CompanyStatsService', () => {
+  let service: CompanyStatsService;
+  let groupBy: jest.Mock;
+
+  beforeEach(async () => {
+    groupBy = jest.fn().mockResolvedValue([
+      { metric: 'trip', status: 'COMPLETED', _sum: { count: 7 } },
+      { metric: 'trip', status: 'IN_PROGRESS', _sum: { count: 2 } },
+      { metric: 'attendance', status: 'MISSED', _sum: { count: 3 } },
+      { metric: 'payment', status: 'succeeded', _sum: { count: null } },
+    ]);
+
+    const module: TestingModule = await Test.createTestingModule({
+      providers: [
+        CompanyStatsService,
+        { provide: PrismaService, useValue: { companyDailyStat: { groupBy } } },
+      ],
+    }).compile();
+
+    service = module.get<CompanyStatsService>(CompanyStatsService);
+  });
+
+  it('should group rollup rows by metric and status', async () => {
+    const counts = await service.getCounts('company-1', new Date('2026-03-10T15:30:00Z'));
+
+    expect(counts).toEqual({
+      trip: { COMPLETED: 7, IN_PROGRESS: 2 },
+      attendance: { MISSED: 3 },
+      payment: { succeeded: 0 },
+    });
+    expect(sumCounts(counts.trip)).toBe(9);
+  });
+
+  it('should read whole UTC days from the start date', async () => {
+    await service.getCounts('company-1', new Date('2026-03-10T15:30:00Z'));
+
+    expect(groupBy.mock.calls[0][0].where).toEqual({
+      companyId: 'company-1',
+      day: { gte: new Date('2026-03-10T00:00:00Z') },
+    });
+  });
+});
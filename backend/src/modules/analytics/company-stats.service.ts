@@ -0,0 +1,85 @@
+import { Injectable } from '@nestjs/common';
+import { PrismaService } from '../../prisma/prisma.service';
+
+export type StatMetric = 'trip' | 'attendance' | 'payment';
+
+// metric -> status -> count
+export type StatCounts = Record<StatMetric, Record<string, number>>;
+
+export interface DailyStatRow {
+  day: string; // YYYY-MM-DD (UTC)
+  metric: StatMetric;
+  status: string;
+  count: number;
+}
+
+/**
+ * Reads the per-company daily rollups in "CompanyDailyStat". The rows are
+ * kept up to date by database triggers (see the company_daily_stats
+ * migration), so reads never touch the trip/attendance/payment tables.
+ *
+ * The triggers upsert one row per (company, day, metric, status), so
+ * concurrent writes of the same status for one company serialise on that
+ * row's lock until each transaction commits. At current write rates (a
+ * handful of trip and attendance changes per second per company) the wait
+ * is negligible. If it shows up in lock waits, add a shard column to the
+ * key, pick the shard from the written row's id, and sum the shards here.
+ */
+@Injectable()
+export class CompanyStatsService {
+  constructor(private prisma: PrismaService) {}
+
+  /**
+   * Totals by metric and status for every day from `since` (inclusive,
+   * rounded down to the UTC day) until today
+   */
+  async getCounts(companyId: string, since: Date): Promise<StatCounts> {
+    const rows = await this.prisma.companyDailyStat.groupBy({
+      by: ['metric', 'status'],
+      where: { companyId, day: { gte: startOfUtcDay(since) } },
+      _sum: { count: true },
+    });
+
+    const counts: StatCounts = { trip: {}, attendance: {}, payment: {} };
+    for (const row of rows) {
+      const byStatus = counts[row.metric as StatMetric];
+      if (byStatus) {
+        byStatus[row.status] = row._sum.count || 0;
+      }
+    }
+    return counts;
+  }
+
+  async getDaily(companyId: string, since: Date): Promise<DailyStatRow[]> {
+    const rows = await this.prisma.companyDailyStat.findMany({
+      where: { companyId, day: { gte: startOfUtcDay(since) }, count: { not: 0 } },
+      orderBy: [{ day: 'asc' }, { metric: 'asc' }, { status: 'asc' }],
+    });
+
+    return rows.map((row) => ({
+      day: row.day.toISOString().slice(0, 10),
+      metric: row.metric as StatMetric,
+      status: row.status,
+      count: row.count,
+    }));
+  }
+
+  /**
+   * Recompute the rollups from scratch, for one company or all of them.
+   * Returns the number of rollup rows written.
+   */
+  async rebuild(companyId?: string): Promise<number> {
+    const [{ rebuilt }] = await this.prisma.$queryRaw<Array<{ rebuilt: number }>>`
+      SELECT "rebuild_company_daily_stats"(${companyId ?? null}::text) AS rebuilt
+    `;
+    return rebuilt;
+  }
+}
+
+export function startOfUtcDay(date: Date): Date {
+  return new Date(Date.UTC(date.getUTCFullYear(), date.getUTCMonth(), date.getUTCDate()));
+}
+
+export function sumCounts(byStatus: Record<string, number>): number {
+  return Object.values(byStatus).reduce((sum, count) => sum + count, 0);
+}
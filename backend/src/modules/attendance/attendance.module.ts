@@ -3,9 +3,12 @@ import { AttendanceService } from './attendance.service';
 import { AttendanceController } from './attendance.controller';
 import { PrismaModule } from '../../prisma/prisma.module';
 import { RealtimeModule } from '../realtime/realtime.module';
+import { DriverManifestModule } from '../driver-manifest/driver-manifest.module';
+import { OutboxModule } from '../outbox/outbox.module';
+import { NotificationsModule } from '../notifications/notifications.module';
 
 @Module({
-  imports: [PrismaModule, RealtimeModule],
+  imports: [PrismaModule, RealtimeModule, DriverManifestModule, OutboxModule, NotificationsModule],
   controllers: [AttendanceController],
   providers: [AttendanceService],
   exports: [AttendanceService],
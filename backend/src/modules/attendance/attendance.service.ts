@@ -1,15 +1,47 @@
-import { Injectable, Optional } from '@nestjs/common';
+import { Injectable, Logger, OnModuleInit, Optional } from '@nestjs/common';
 import { PrismaService } from '../../prisma/prisma.service';
-import { ChildAttendance, AttendanceStatus, NotificationType } from '@prisma/client';
+import { ChildAttendance, AttendanceStatus, NotificationType, Prisma } from '@prisma/client';
 import { RealtimeGateway } from '../realtime/realtime.gateway';
+import { PLATFORM_ADMIN_ROOM } from '../realtime/location-fanout';
+import { DriverManifestService } from '../driver-manifest/driver-manifest.service';
+import { OutboxEventRecord, OutboxService } from '../outbox/outbox.service';
+import { NotificationsService } from '../notifications/notifications.service';
+import { NotificationCountersService } from '../notifications/notification-counters.service';
+import { TenantCacheService } from '../cache/tenant-cache.service';
+
+export const ATTENDANCE_UPDATED = 'attendance.updated';
+
+export interface AttendanceUpdatedEvent {
+  attendanceId: string;
+  childId: string;
+  childName: string;
+  parentId: string | null;
+  tripId: string;
+  status: AttendanceStatus;
+  previousStatus?: AttendanceStatus;
+  timestamp: string;
+}
 
 @Injectable()
-export class AttendanceService {
+export class AttendanceService implements OnModuleInit {
+  private readonly logger = new Logger(AttendanceService.name);
+
   constructor(
     private prisma: PrismaService,
+    private driverManifest: DriverManifestService,
+    private outbox: OutboxService,
+    private notifications: NotificationsService,
+    private notificationCounters: NotificationCountersService,
+    private cache: TenantCacheService,
     @Optional() private realtimeGateway?: RealtimeGateway,
   ) {}
 
+  onModuleInit() {
+    this.outbox.registerHandler<AttendanceUpdatedEvent>(ATTENDANCE_UPDATED, (events, tx) =>
+      this.dispatchAttendanceEvents(events, tx),
+    );
+  }
+
   // Map status to human-readable text
   private getStatusText(status: AttendanceStatus): string {
     switch (status) {
@@ -21,7 +53,7 @@ export class AttendanceService {
   }
 
   async recordAttendance(childId: string, tripId: string, status: AttendanceStatus, recordedBy: string): Promise<ChildAttendance> {
-    return this.prisma.childAttendance.create({
+    const attendance = await this.prisma.childAttendance.create({
       data: {
         childId,
         tripId,
@@ -29,81 +61,113 @@ export class AttendanceService {
         recordedBy,
       },
     });
+    await this.driverManifest.invalidate(tripId);
+    await this.cache.invalidate('attendance', attendance.companyId);
+    return attendance;
   }
 
   async updateAttendance(id: string, status: AttendanceStatus, recordedBy: string): Promise<ChildAttendance> {
-    // Get current attendance to store previous status
-    const currentAttendance = await this.prisma.childAttendance.findUnique({
-      where: { id },
-      include: { child: true },
+    // The parent notification and socket events are recorded in the outbox
+    // with the update and sent by dispatchAttendanceEvents after the response
+    const attendance = await this.prisma.$transaction(async (tx) => {
+      const current = await tx.childAttendance.findUnique({
+        where: { id },
+        select: { status: true },
+      });
+
+      const updated = await tx.childAttendance.update({
+        where: { id },
+        data: {
+          status,
+          recordedBy,
+        },
+        include: {
+          child: true,
+          trip: true,
+        },
+      });
+
+      const event: AttendanceUpdatedEvent = {
+        attendanceId: updated.id,
+        childId: updated.childId,
+        childName: `${updated.child.firstName} ${updated.child.lastName}`,
+        parentId: updated.child.parentId,
+        tripId: updated.tripId,
+        status: updated.status,
+        previousStatus: current?.status,
+        timestamp: new Date().toISOString(),
+      };
+      await this.outbox.add(tx, ATTENDANCE_UPDATED, { ...event });
+      return updated;
     });
 
-    const previousStatus = currentAttendance?.status;
+    this.outbox.wake();
+    await this.driverManifest.invalidate(attendance.tripId);
+    return attendance;
+  }
 
-    const attendance = await this.prisma.childAttendance.update({
-      where: { id },
-      data: {
-        status,
-        recordedBy,
-      },
-      include: {
-        child: true,
-        trip: true,
-      },
+  /**
+   * Outbox handler for attendance changes. Notifications for the whole
+   * batch go in with one insert and are counted and queued for delivery
+   * once it commits. Socket events are coalesced to the
+   * latest status per child and trip, and each goes out in a single emit to
+   * the parent, the trip room and the trip's company dashboards.
+   */
+  private async dispatchAttendanceEvents(
+    events: OutboxEventRecord<AttendanceUpdatedEvent>[],
+    tx: Prisma.TransactionClient,
+  ): Promise<() => void> {
+    const payloads = events.map((event) => event.payload);
+
+    const notifications = payloads
+      .filter((event) => event.parentId)
+      .map((event) => ({
+        userId: event.parentId,
+        title: event.status === 'PICKED_UP' ? 'Child Picked Up' : 'Child Dropped Off',
+        message: `${event.childName} has been ${this.getStatusText(event.status)}.`,
+        type: event.status === 'PICKED_UP' ? NotificationType.PICKUP : NotificationType.DROPOFF,
+      }));
+    const created =
+      notifications.length > 0
+        ? await tx.notification.createManyAndReturn({ data: notifications, select: { id: true, userId: true } })
+        : [];
+
+    const latest = new Map<string, AttendanceUpdatedEvent>();
+    for (const event of payloads) {
+      latest.set(`${event.tripId}:${event.childId}`, event);
+    }
+
+    const tripIds = [...new Set(payloads.map((event) => event.tripId))];
+    const trips = await tx.trip.findMany({
+      where: { id: { in: tripIds } },
+      select: { id: true, companyId: true },
     });
+    const tripCompany = new Map(trips.map((trip) => [trip.id, trip.companyId]));
 
-    // Create persistent notification for parent and emit WebSocket event
-    try {
-      if (attendance.child) {
-        const parentUserId = attendance.child.parentId;
-        const childName = `${attendance.child.firstName} ${attendance.child.lastName}`;
-        const statusText = this.getStatusText(status);
-
-        // Create persistent notification in database
-        const notificationType = status === 'PICKED_UP' ? NotificationType.PICKUP : NotificationType.DROPOFF;
-        const notificationTitle = status === 'PICKED_UP' ? 'Child Picked Up' : 'Child Dropped Off';
-        const notificationMessage = `${childName} has been ${statusText}.`;
-
-        await this.prisma.notification.create({
-          data: {
-            userId: parentUserId,
-            title: notificationTitle,
-            message: notificationMessage,
-            type: notificationType,
-          },
-        });
-
-        console.log(`[Attendance] Created notification for parent ${parentUserId}: ${notificationMessage}`);
-
-        // Emit WebSocket event for real-time updates
-        if (this.realtimeGateway?.server) {
-          const eventData = {
-            childId: attendance.childId,
-            childName,
-            status: attendance.status,
-            previousStatus,
-            tripId: attendance.tripId,
-            timestamp: new Date().toISOString(),
-          };
-
-          console.log(`[Attendance] Emitting status update to parent ${parentUserId}:`, eventData);
-
-          // Emit to specific parent
-          this.realtimeGateway.server.to(`user:${parentUserId}`).emit('attendance_updated', eventData);
-          
-          // Also emit to trip room for dashboard updates
-          this.realtimeGateway.server.to(`trip:${attendance.tripId}`).emit('attendance_updated', eventData);
-          
-          // Broadcast to all connected clients (admin dashboards)
-          this.realtimeGateway.server.emit('attendance_updated', eventData);
-        }
+    return () => {
+      for (const companyId of new Set(tripCompany.values())) {
+        void this.cache.invalidate('attendance', companyId);
+      }
+      if (created.length > 0) {
+        void this.notificationCounters.recordCreated(created);
+        this.notifications
+          .enqueue(created)
+          .catch((error) => this.logger.warn(`Failed to add notifications to queue: ${error.message}`));
       }
-    } catch (error) {
-      console.error('[Attendance] Error creating notification or emitting event:', error);
-      // Don't fail the entire request if notification fails
-    }
 
-    return attendance;
+      const server = this.realtimeGateway?.server;
+      if (!server) return;
+
+      for (const event of latest.values()) {
+        const { attendanceId, parentId, ...eventData } = event;
+        const companyId = tripCompany.get(event.tripId);
+        const rooms = [`trip:${event.tripId}`, PLATFORM_ADMIN_ROOM];
+        if (parentId) rooms.push(`user:${parentId}`);
+        if (companyId) rooms.push(`company:${companyId}`);
+        // One emit; sockets in several of the rooms still get it once
+        server.to(rooms).emit('attendance_updated', eventData);
+      }
+    };
   }
 
   async getAttendanceByChild(childId: string): Promise<ChildAttendance[]> {
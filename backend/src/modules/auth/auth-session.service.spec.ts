@@ -0,0 +1,128 @@
+import { Test, TestingModule } from '@nestjs/testing';
+import { AuthSessionService, parseDurationSeconds } from './auth-session.service';
+
+const hashes = new Map<string, Record<string, string>>();
+const sets = new Map<string, Set<string>>();
+const strings = new Map<string, string>();
+
+const commands = {
+  hset: (key: string, values: Record<string, string>) => hashes.set(key, { ...hashes.get(key), ...values }),
+  hget: (key: string, field: string) => hashes.get(key)?.[field] ?? null,
+  expire: () => 1,
+  sadd: (key: string, member: string) => sets.set(key, (sets.get(key) || new Set()).add(member)),
+  srem: (key: string, member: string) => sets.get(key)?.delete(member),
+  smembers: (key: string) => [...(sets.get(key) || [])],
+  set: (key: string, value: string) => strings.set(key, value),
+  exists: (key: string) => (strings.has(key) ? 1 : 0),
+  del: (key: string) => [hashes, sets, strings].some((store) => store.delete(key)),
+};
+
+// Chainable MULTI/pipeline that applies each command immediately
+const chain = () => {
+  const batch: any = { exec: async () => [] };
+  for (const [name, fn] of Object.entries(commands)) {
+    batch[name] = (...args: any[]) => {
+      (fn as any)(...args);
+      return batch;
+    };
+  }
+  return batch;
+};
+
+jest.mock('ioredis', () => ({
+  Redis: jest.fn().mockImplementation(() => ({
+    hget: async (key: string, field: string) => commands.hget(key, field),
+    smembers: async (key: string) => commands.smembers(key),
+    exists: async (key: string) => commands.exists(key),
+    multi: chain,
+    pipeline: chain,
+    // Mirrors ROTATE_SCRIPT
+    eval: async (_script: string, _keys: number, key: string, ...argv: string[]) => {
+      const session = hashes.get(key);
+      if (!session) return 0;
+      if (session.tokenId !== argv[0] || session.tokenHash !== argv[1]) return -1;
+      commands.hset(key, { tokenId: argv[2], tokenHash: argv[3], rotatedAt: argv[5] });
+      return 1;
+    },
+    quit: jest.fn().mockResolvedValue('OK'),
+  })),
+}));
+
+describe('AuthSessionService', () => {
+  let service: AuthSessionService;
+
+  beforeEach(async () => {
+    hashes.clear();
+    sets.clear();
+    strings.clear();
+
+    const module: TestingModule = await Test.createTestingModule({
+      providers: [AuthSessionService],
+    }).compile();
+
+    service = module.get<AuthSessionService>(AuthSessionService);
+  });
+
+  it('rotates the current refresh token', async () => {
+    const session = service.newSession();
+    await service.activate('user-1', session, 'token-1');
+
+    await expect(service.rotate(session.sessionId, session.tokenId, 'token-1', 'jti-2', 'token-2')).resolves.toBe(
+      'rotated',
+    );
+    await expect(service.rotate(session.sessionId, 'jti-2', 'token-2', 'jti-3', 'token-3')).resolves.toBe('rotated');
+  });
+
+  it('revokes the session when a rotated-away token is replayed', async () => {
+    const session = service.newSession();
+    await service.activate('user-1', session, 'token-1');
+    await service.rotate(session.sessionId, session.tokenId, 'token-1', 'jti-2', 'token-2');
+
+    await expect(service.rotate(session.sessionId, session.tokenId, 'token-1', 'jti-x', 'token-x')).resolves.toBe(
+      'reused',
+    );
+    await expect(service.isRevoked(session.sessionId)).resolves.toBe(true);
+    // The legitimate holder is signed out too
+    await expect(service.rotate(session.sessionId, 'jti-2', 'token-2', 'jti-3', 'token-3')).resolves.toBe('unknown');
+  });
+
+  it('keeps independent sessions per device', async () => {
+    const phone = service.newSession();
+    const laptop = service.newSession();
+    await service.activate('user-1', phone, 'phone-token');
+    await service.activate('user-1', laptop, 'laptop-token');
+
+    await service.revoke(phone.sessionId);
+
+    await expect(service.isRevoked(phone.sessionId)).resolves.toBe(true);
+    await expect(service.isRevoked(laptop.sessionId)).resolves.toBe(false);
+    await expect(service.rotate(laptop.sessionId, laptop.tokenId, 'laptop-token', 'jti-2', 'token-2')).resolves.toBe(
+      'rotated',
+    );
+  });
+
+  it('revokes every session of a user', async () => {
+    const phone = service.newSession();
+    const laptop = service.newSession();
+    await service.activate('user-1', phone, 'phone-token');
+    await service.activate('user-1', laptop, 'laptop-token');
+
+    await service.revokeAll('user-1');
+
+    await expect(service.isRevoked(phone.sessionId)).resolves.toBe(true);
+    await expect(service.isRevoked(laptop.sessionId)).resolves.toBe(true);
+  });
+
+  it('parses JWT-style durations', () => {
+    expect(parseDurationSeconds('15m')).toBe(900);
+    expect(parseDurationSeconds('7d')).toBe(604800);
+    expect(parseDurationSeconds('3600')).toBe(3600);
+    expect(parseDurationSeconds('900000ms')).toBe(900);
+    expect(parseDurationSeconds('1.5 hours')).toBe(5400);
+    expect(parseDurationSeconds('2 Weeks')).toBe(1209600);
+    expect(parseDurationSeconds('1y')).toBe(31557600);
+    expect(parseDurationSeconds('1500ms')).toBe(2);
+    expect(() => parseDurationSeconds('soon')).toThrow();
+    expect(() => parseDurationSeconds('15 fortnights')).toThrow();
+  });
+});
@@ -0,0 +1,204 @@
+import { Injectable, Logger, OnModuleDestroy } from '@nestjs/common';
+import { Redis } from 'ioredis';
+import { createHmac, randomUUID } from 'crypto';
+
+export interface IssuedSession {
+  sessionId: string;
+  tokenId: string;
+}
+
+export type RotationResult = 'rotated' | 'unknown' | 'reused';
+
+// Compare-and-swap of the session's current refresh token. Returns 1 when
+// the presented token was current and has been replaced, 0 when the session
+// doesn't exist (expired or revoked), -1 when an older token was replayed.
+const ROTATE_SCRIPT = `
+local current = redis.call('HMGET', KEYS[1], 'tokenId', 'tokenHash')
+if not current[1] then return 0 end
+if current[1] ~= ARGV[1] or current[2] ~= ARGV[2] then return -1 end
+redis.call('HSET', KEYS[1], 'tokenId', ARGV[3], 'tokenHash', ARGV[4], 'rotatedAt', ARGV[6])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[5]))
+return 1
+`;
+
+/**
+ * Refresh-token sessions, one per device login, kept in Redis.
+ *
+ * Each session stores the id of its current refresh token and an HMAC of
+ * the token, never the token itself. Refreshing rotates the token; presenting
+ * a token that has already been rotated away means it leaked (or a client
+ * replayed it), so the whole session is revoked.
+ *
+ * Access tokens carry the session id. Revoking a session puts that id on a
+ * denylist for the lifetime of an access token, which JwtStrategy checks
+ * with a single EXISTS per request.
+ */
+@Injectable()
+export class AuthSessionService implements OnModuleDestroy {
+  private readonly logger = new Logger(AuthSessionService.name);
+  private readonly redis: Redis;
+
+  readonly accessTtlSeconds = parseDurationSeconds(process.env.JWT_ACCESS_EXPIRES_IN || '15m');
+  readonly refreshTtlSeconds = parseDurationSeconds(process.env.JWT_REFRESH_EXPIRES_IN || '7d');
+
+  constructor() {
+    this.redis = new Redis(process.env.REDIS_URL);
+  }
+
+  async onModuleDestroy() {
+    await this.redis.quit().catch(() => undefined);
+  }
+
+  /**
+   * Reserve ids for a new session. The session is stored by `activate` once
+   * the refresh token carrying these ids has been signed.
+   */
+  newSession(): IssuedSession {
+    return { sessionId: randomUUID(), tokenId: randomUUID() };
+  }
+
+  async activate(userId: string, session: IssuedSession, refreshToken: string): Promise<void> {
+    const now = Date.now().toString();
+    await this.redis
+      .multi()
+      .hset(this.sessionKey(session.sessionId), {
+        userId,
+        tokenId: session.tokenId,
+        tokenHash: this.hashToken(refreshToken),
+        createdAt: now,
+        rotatedAt: now,
+      })
+      .expire(this.sessionKey(session.sessionId), this.refreshTtlSeconds)
+      .sadd(this.userSessionsKey(userId), session.sessionId)
+      .expire(this.userSessionsKey(userId), this.refreshTtlSeconds)
+      .exec();
+  }
+
+  /**
+   * Swap the presented refresh token for `nextRefreshToken` if it is the
+   * session's current one. A replayed token revokes the session.
+   */
+  async rotate(
+    sessionId: string,
+    tokenId: string,
+    refreshToken: string,
+    nextTokenId: string,
+    nextRefreshToken: string,
+  ): Promise<RotationResult> {
+    const result = (await this.redis.eval(
+      ROTATE_SCRIPT,
+      1,
+      this.sessionKey(sessionId),
+      tokenId,
+      this.hashToken(refreshToken),
+      nextTokenId,
+      this.hashToken(nextRefreshToken),
+      this.refreshTtlSeconds,
+      Date.now().toString(),
+    )) as number;
+
+    if (result === 1) return 'rotated';
+    if (result === 0) return 'unknown';
+
+    this.logger.warn(`Refresh token reuse detected for session ${sessionId}; revoking it`);
+    await this.revoke(sessionId);
+    return 'reused';
+  }
+
+  async revoke(sessionId: string): Promise<void> {
+    const userId = await this.redis.hget(this.sessionKey(sessionId), 'userId');
+    const pipeline = this.redis
+      .pipeline()
+      .del(this.sessionKey(sessionId))
+      .set(this.revokedKey(sessionId), '1', 'EX', this.accessTtlSeconds);
+    if (userId) {
+      pipeline.srem(this.userSessionsKey(userId), sessionId);
+    }
+    await pipeline.exec();
+  }
+
+  /**
+   * Sign the user out everywhere (e.g. after a password reset)
+   */
+  async revokeAll(userId: string): Promise<void> {
+    const sessionIds = await this.redis.smembers(this.userSessionsKey(userId));
+    const pipeline = this.redis.pipeline();
+    for (const sessionId of sessionIds) {
+      pipeline.del(this.sessionKey(sessionId)).set(this.revokedKey(sessionId), '1', 'EX', this.accessTtlSeconds);
+    }
+    pipeline.del(this.userSessionsKey(userId));
+    await pipeline.exec();
+  }
+
+  async isRevoked(sessionId: string): Promise<boolean> {
+    return (await this.redis.exists(this.revokedKey(sessionId))) === 1;
+  }
+
+  private hashToken(token: string): string {
+    return createHmac('sha256', process.env.JWT_REFRESH_SECRET || '').update(token).digest('base64');
+  }
+
+  private sessionKey(sessionId: string): string {
+    return `auth:session:${sessionId}`;
+  }
+
+  private userSessionsKey(userId: string): string {
+    return `auth:user_sessions:${userId}`;
+  }
+
+  private revokedKey(sessionId: string): string {
+    return `auth:revoked:${sessionId}`;
+  }
+}
+
+// Units accepted by the `ms` package, which jsonwebtoken uses for string
+// `expiresIn` values
+const DURATION_UNIT_MS: Record<string, number> = {
+  ms: 1,
+  msec: 1,
+  msecs: 1,
+  millisecond: 1,
+  milliseconds: 1,
+  s: 1000,
+  sec: 1000,
+  secs: 1000,
+  second: 1000,
+  seconds: 1000,
+  m: 60_000,
+  min: 60_000,
+  mins: 60_000,
+  minute: 60_000,
+  minutes: 60_000,
+  h: 3_600_000,
+  hr: 3_600_000,
+  hrs: 3_600_000,
+  hour: 3_600_000,
+  hours: 3_600_000,
+  d: 86_400_000,
+  day: 86_400_000,
+  days: 86_400_000,
+  w: 604_800_000,
+  week: 604_800_000,
+  weeks: 604_800_000,
+  y: 31_557_600_000,
+  yr: 31_557_600_000,
+  yrs: 31_557_600_000,
+  year: 31_557_600_000,
+  years: 31_557_600_000,
+};
+
+/**
+ * A JWT `expiresIn` setting ('15m', '900000ms', '1.5 hours', '7d') ->
+ * whole seconds, rounded up. A bare number is read as seconds; jsonwebtoken
+ * reads a numeric string as milliseconds, so this is the longer of the two
+ * and a denylist entry never expires before the token it covers.
+ */
+export function parseDurationSeconds(value: string): number {
+  const match = /^(\d*\.?\d+)\s*([a-z]+)?$/i.exec(value.trim());
+  const unit = match?.[2]?.toLowerCase() ?? 's';
+  const unitMs = Object.prototype.hasOwnProperty.call(DURATION_UNIT_MS, unit) ? DURATION_UNIT_MS[unit] : undefined;
+  if (!match || !unitMs) {
+    throw new Error(`Unsupported duration: ${value}`);
+  }
+  return Math.ceil((parseFloat(match[1]) * unitMs) / 1000);
+}
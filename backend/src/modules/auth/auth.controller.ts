@@ -38,7 +38,11 @@ export class AuthController {
   @HttpCode(HttpStatus.OK)
   @Post('refresh')
   async refresh(@Body() refreshTokenDto: RefreshTokenDto) {
-    return this.authService.refreshAccessToken(refreshTokenDto.refreshToken);
+    const refreshToken = refreshTokenDto.refreshToken || refreshTokenDto.refresh_token;
+    if (!refreshToken) {
+      throw new BadRequestException('refreshToken is required');
+    }
+    return this.authService.refreshAccessToken(refreshToken);
   }
 
   @HttpCode(HttpStatus.OK)
@@ -57,12 +61,19 @@ export class AuthController {
   @Post('logout')
   @UseGuards(JwtAuthGuard)
   async logout(@Req() req: any) {
-    // In a stateless JWT system, logout is handled client-side by removing the token
-    // However, we can invalidate the refresh token in the database
-    const userId = req.user.userId;
-    if (userId) {
-      await this.usersService.clearRefreshToken(userId);
+    // Revoking the session kills its refresh token and, through the
+    // denylist JwtStrategy checks, every access token issued for it
+    if (req.user.sessionId) {
+      await this.authService.logout(req.user.sessionId);
     }
     return { message: 'Logged out successfully' };
   }
+
+  @HttpCode(HttpStatus.OK)
+  @Post('logout-all')
+  @UseGuards(JwtAuthGuard)
+  async logoutAll(@Req() req: any) {
+    await this.authService.logoutAll(req.user.userId);
+    return { message: 'Logged out of all sessions' };
+  }
 }
\ No newline at end of file
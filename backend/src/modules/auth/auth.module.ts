@@ -4,6 +4,7 @@ import { PassportModule } from '@nestjs/passport';
 import { AuthService } from './auth.service';
 import { AuthController } from './auth.controller';
 import { JwtStrategy } from './jwt.strategy';
+import { AuthSessionService } from './auth-session.service';
 import { UsersModule } from '../users/users.module';
 
 @Module({
@@ -16,7 +17,7 @@ import { UsersModule } from '../users/users.module';
     }),
   ],
   controllers: [AuthController],
-  providers: [AuthService, JwtStrategy],
-  exports: [AuthService],
+  providers: [AuthService, AuthSessionService, JwtStrategy],
+  exports: [AuthService, AuthSessionService],
 })
 export class AuthModule {}
\ No newline at end of file
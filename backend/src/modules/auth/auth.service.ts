@@ -1,9 +1,11 @@
 import { Injectable, UnauthorizedException, BadRequestException, ConflictException } from '@nestjs/common';
 import { JwtService } from '@nestjs/jwt';
-import * as bcrypt from 'bcrypt';
+import { randomUUID } from 'crypto';
 import { UsersService } from '../users/users.service';
 import { EmailService } from '../email/email.service';
 import { User, Role } from '@prisma/client';
+import { AuthSessionService, IssuedSession } from './auth-session.service';
+import { comparePassword, hashPassword } from '../../common/crypto/bcrypt-pool';
 
 @Injectable()
 export class AuthService {
@@ -13,6 +15,7 @@ export class AuthService {
     private usersService: UsersService,
     private jwtService: JwtService,
     private emailService: EmailService,
+    private sessions: AuthSessionService,
   ) {}
 
   async validateUser(email: string, password: string): Promise<any> {
@@ -58,17 +61,13 @@ export class AuthService {
   }
 
   async login(user: User) {
-    const payload = { 
-      email: user.email, 
-      sub: user.id,
-      role: user.role,
-      companyId: user.companyId,
-      schoolId: user.schoolId
-    };
-    
+    const session = this.sessions.newSession();
+    const refreshToken = this.signRefreshToken(user, session);
+    await this.sessions.activate(user.id, session, refreshToken);
+
     return {
-      access_token: this.jwtService.sign(payload),
-      refresh_token: await this.generateRefreshToken(user),
+      access_token: this.signAccessToken(user, session.sessionId),
+      refresh_token: refreshToken,
       role: user.role,
       companyId: user.companyId,
       userId: user.id,
@@ -85,62 +84,81 @@ export class AuthService {
   }
 
   async hashPassword(password: string): Promise<string> {
-    return bcrypt.hash(password, this.saltRounds);
+    return hashPassword(password, this.saltRounds);
   }
 
   async comparePasswords(password: string, hash: string): Promise<boolean> {
-    return bcrypt.compare(password, hash);
+    return comparePassword(password, hash);
   }
 
-  private async generateRefreshToken(user: User): Promise<string> {
+  private signAccessToken(user: User, sessionId: string): string {
     const payload = { 
       email: user.email, 
-      sub: user.id 
+      sub: user.id,
+      role: user.role,
+      companyId: user.companyId,
+      schoolId: user.schoolId,
+      sid: sessionId,
+    };
+    return this.jwtService.sign(payload);
+  }
+
+  private signRefreshToken(user: User, session: IssuedSession): string {
+    const payload = { 
+      sub: user.id,
+      sid: session.sessionId,
+      jti: session.tokenId,
     };
     
-    const refreshToken = this.jwtService.sign(payload, {
+    return this.jwtService.sign(payload, {
       secret: process.env.JWT_REFRESH_SECRET,
       expiresIn: process.env.JWT_REFRESH_EXPIRES_IN || '7d',
     });
-    
-    // Hash the refresh token before storing
-    const hashedRefreshToken = await this.hashPassword(refreshToken);
-    await this.usersService.update(user.id, { refreshToken: hashedRefreshToken });
-    
-    return refreshToken;
   }
 
-  async refreshAccessToken(refreshToken: string): Promise<{ access_token: string }> {
+  /**
+   * Exchanges a refresh token for a new access/refresh pair. The old refresh
+   * token stops working; presenting it again revokes the whole session.
+   */
+  async refreshAccessToken(refreshToken: string): Promise<{ access_token: string; refresh_token: string }> {
+    let payload: { sub: string; sid?: string; jti?: string };
     try {
-      const payload = this.jwtService.verify(refreshToken, {
+      payload = this.jwtService.verify(refreshToken, {
         secret: process.env.JWT_REFRESH_SECRET,
       });
-      
-      const user = await this.usersService.findOne(payload.sub);
-      if (!user || !user.refreshToken) {
-        throw new UnauthorizedException('Invalid refresh token');
-      }
-      
-      // Verify the refresh token matches the stored hash
-      const isValid = await this.comparePasswords(refreshToken, user.refreshToken);
-      if (!isValid) {
-        throw new UnauthorizedException('Invalid refresh token');
-      }
-      
-      const newPayload = { 
-        email: user.email, 
-        sub: user.id,
-        role: user.role,
-        companyId: user.companyId,
-        schoolId: user.schoolId
-      };
-      
-      return {
-        access_token: this.jwtService.sign(newPayload),
-      };
     } catch (error) {
       throw new UnauthorizedException('Invalid refresh token');
     }
+
+    // Tokens issued before sessions existed carry no session id
+    if (!payload.sid || !payload.jti) {
+      throw new UnauthorizedException('Invalid refresh token');
+    }
+
+    const user = await this.usersService.findOne(payload.sub);
+    if (!user) {
+      throw new UnauthorizedException('Invalid refresh token');
+    }
+
+    const next: IssuedSession = { sessionId: payload.sid, tokenId: randomUUID() };
+    const nextRefreshToken = this.signRefreshToken(user, next);
+    const rotation = await this.sessions.rotate(payload.sid, payload.jti, refreshToken, next.tokenId, nextRefreshToken);
+    if (rotation !== 'rotated') {
+      throw new UnauthorizedException('Invalid refresh token');
+    }
+
+    return {
+      access_token: this.signAccessToken(user, payload.sid),
+      refresh_token: nextRefreshToken,
+    };
+  }
+
+  async logout(sessionId: string): Promise<void> {
+    await this.sessions.revoke(sessionId);
+  }
+
+  async logoutAll(userId: string): Promise<void> {
+    await this.sessions.revokeAll(userId);
   }
 
   async requestPasswordReset(email: string): Promise<{ message: string }> {
@@ -194,6 +212,8 @@ export class AuthService {
 
       const passwordHash = await this.hashPassword(newPassword);
       await this.usersService.update(user.id, { passwordHash });
+      // Anyone holding the old password may still hold a session
+      await this.sessions.revokeAll(user.id);
 
       return { message: 'Password reset successfully' };
     } catch (error) {
@@ -34,8 +34,14 @@ export class SignupDto {
 }
 
 export class RefreshTokenDto {
+  @IsOptional()
+  @IsString()
+  refreshToken?: string;
+
+  // Same token under the name the login response uses
+  @IsOptional()
   @IsString()
-  refreshToken: string;
+  refresh_token?: string;
 }
 
 export class ForgotPasswordDto {
@@ -1,7 +1,8 @@
 import { ExtractJwt, Strategy } from 'passport-jwt';
 import { PassportStrategy } from '@nestjs/passport';
-import { Injectable } from '@nestjs/common';
+import { Injectable, UnauthorizedException } from '@nestjs/common';
 import { UsersService } from '../users/users.service';
+import { AuthSessionService } from './auth-session.service';
 
 export type JwtPayload = {
   email: string;
@@ -9,11 +10,16 @@ export type JwtPayload = {
   role: string;
   companyId: string;
   schoolId: string;
+  // Login session the token belongs to; absent on tokens issued before sessions
+  sid?: string;
 };
 
 @Injectable()
 export class JwtStrategy extends PassportStrategy(Strategy) {
-  constructor(private usersService: UsersService) {
+  constructor(
+    private usersService: UsersService,
+    private sessions: AuthSessionService,
+  ) {
     super({
       jwtFromRequest: ExtractJwt.fromAuthHeaderAsBearerToken(),
       ignoreExpiration: false,
@@ -22,13 +28,18 @@ export class JwtStrategy extends PassportStrategy(Strategy) {
   }
 
   async validate(payload: JwtPayload) {
-    // You can fetch additional user details here if needed
+    // Single EXISTS against the logout denylist
+    if (payload.sid && (await this.sessions.isRevoked(payload.sid))) {
+      throw new UnauthorizedException('Session has been revoked');
+    }
+
     return { 
       userId: payload.sub, 
       email: payload.email,
       role: payload.role,
       companyId: payload.companyId,
-      schoolId: payload.schoolId
+      schoolId: payload.schoolId,
+      sessionId: payload.sid,
     };
   }
 }
\ No newline at end of file
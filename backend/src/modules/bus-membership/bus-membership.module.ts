@@ -0,0 +1,10 @@
+import { Module } from '@nestjs/common';
+import { BusMembershipService } from './bus-membership.service';
+import { PrismaModule } from '../../prisma/prisma.module';
+
+@Module({
+  imports: [PrismaModule],
+  providers: [BusMembershipService],
+  exports: [BusMembershipService],
+})
+export class BusMembershipModule {}
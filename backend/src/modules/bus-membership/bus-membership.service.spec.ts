@@ -0,0 +1,122 @@
+import { Test, TestingModule } from '@nestjs/testing';
+import { BusMembershipService } from './bus-membership.service';
+import { PrismaService } from '../../prisma/prisma.service';
+
+const store = new Map<string, string>();
+
+const incr = (key: string) => {
+  const next = String(Number(store.get(key) || '0') + 1);
+  store.set(key, next);
+  return next;
+};
+
+jest.mock('ioredis', () => ({
+  Redis: jest.fn().mockImplementation(() => ({
+    mget: async (...keys: string[]) => keys.map((key) => store.get(key) ?? null),
+    incr: async (key: string) => Number(incr(key)),
+    // FILL_IF_CURRENT
+    eval: async (_script: string, _numKeys: number, ...args: any[]) => {
+      const [generationKey, versionKey, entryKey, generation, version, value] = args;
+      if ((store.get(generationKey) || '0') !== generation || (store.get(versionKey) || '0') !== version) {
+        return 0;
+      }
+      store.set(entryKey, value);
+      return 1;
+    },
+    pipeline: () => {
+      const ops: Array<() => void> = [];
+      const chain = {
+        incr: (key: string) => {
+          ops.push(() => incr(key));
+          return chain;
+        },
+        expire: () => chain,
+        del: (key: string) => {
+          ops.push(() => store.delete(key));
+          return chain;
+        },
+        exec: async () => ops.map((op) => [null, op()]),
+      };
+      return chain;
+    },
+    quit: jest.fn().mockResolvedValue('OK'),
+  })),
+}));
+
+describe('BusMembershipService', () => {
+  let service: BusMembershipService;
+  let childFindMany: jest.Mock;
+  let driverFindUnique: jest.Mock;
+
+  beforeEach(async () => {
+    store.clear();
+    childFindMany = jest.fn().mockResolvedValue([
+      { route: { busId: 'bus-1', scheduledRoutes: [{ busId: 'bus-2' }] } },
+      { route: { busId: 'bus-1', scheduledRoutes: [] } },
+    ]);
+    driverFindUnique = jest.fn().mockResolvedValue({
+      buses: [{ id: 'bus-3' }],
+      scheduledRoutes: [{ busId: 'bus-3' }, { busId: 'bus-4' }],
+    });
+
+    const module: TestingModule = await Test.createTestingModule({
+      providers: [
+        BusMembershipService,
+        {
+          provide: PrismaService,
+          useValue: {
+            child: { findMany: childFindMany },
+            driver: { findUnique: driverFindUnique },
+          },
+        },
+      ],
+    }).compile();
+
+    service = module.get<BusMembershipService>(BusMembershipService);
+  });
+
+  it('should resolve parent buses from routes and schedules', async () => {
+    await expect(service.getBusIds('parent-1', 'PARENT')).resolves.toEqual(['bus-1', 'bus-2']);
+  });
+
+  it('should resolve driver buses from assignments and schedules', async () => {
+    await expect(service.getBusIds('driver-1', 'DRIVER')).resolves.toEqual(['bus-3', 'bus-4']);
+  });
+
+  it('should serve repeat lookups from the cache until invalidated', async () => {
+    await service.getBusIds('parent-1', 'PARENT');
+    await service.getBusIds('parent-1', 'PARENT');
+    expect(childFindMany).toHaveBeenCalledTimes(1);
+
+    await service.invalidateUsers(['parent-1']);
+    await service.getBusIds('parent-1', 'PARENT');
+    expect(childFindMany).toHaveBeenCalledTimes(2);
+
+    await service.invalidateAll();
+    await service.getBusIds('parent-1', 'PARENT');
+    expect(childFindMany).toHaveBeenCalledTimes(3);
+  });
+
+  it('should not let a fill that raced an invalidation overwrite it', async () => {
+    let release: () => void;
+    childFindMany.mockImplementationOnce(
+      () => new Promise((resolve) => (release = () => resolve([{ route: { busId: 'bus-old', scheduledRoutes: [] } }]))),
+    );
+
+    const stale = service.getBusIds('parent-1', 'PARENT');
+    await new Promise((resolve) => setImmediate(resolve));
+    await service.invalidateUsers(['parent-1']);
+    release();
+    await expect(stale).resolves.toEqual(['bus-old']);
+    await new Promise((resolve) => setImmediate(resolve));
+
+    await expect(service.getBusIds('parent-1', 'PARENT')).resolves.toEqual(['bus-1', 'bus-2']);
+    expect(childFindMany).toHaveBeenCalledTimes(2);
+  });
+
+  it('should not look up other roles', async () => {
+    await expect(service.getBusIds('admin-1', 'COMPANY_ADMIN')).resolves.toEqual([]);
+    expect(childFindMany).not.toHaveBeenCalled();
+    expect(driverFindUnique).not.toHaveBeenCalled();
+  });
+});
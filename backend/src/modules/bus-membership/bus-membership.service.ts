@@ -0,0 +1,156 @@
+import { Injectable, Logger, OnModuleDestroy } from '@nestjs/common';
+import { ScheduleStatus } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { PrismaService } from '../../prisma/prisma.service';
+
+// Writes a user's entry only if neither the index generation nor the user's
+// version moved since the entry was loaded, so a fill that raced an
+// invalidation cannot put stale buses back.
+const FILL_IF_CURRENT = `
+if (redis.call('GET', KEYS[1]) or '0') == ARGV[1] and (redis.call('GET', KEYS[2]) or '0') == ARGV[2] then
+  redis.call('SET', KEYS[3], ARGV[3], 'EX', ARGV[4])
+  return 1
+end
+return 0
+`;
+
+interface MembershipEntry {
+  // `${generation}:${version}` the entry was loaded under
+  stamp: string;
+  busIds: string[];
+}
+
+/**
+ * User -> bus index used to join socket rooms on connect.
+ *
+ * Parents map to the buses of their children's routes (Child.routeId ->
+ * Route.busId, plus the buses of the route's active schedules). Drivers map
+ * to the buses assigned to them and the buses of their active schedules.
+ *
+ * Entries are computed on first lookup and kept under a per-user key with
+ * its own TTL, so a reconnect costs one MGET instead of several Prisma
+ * joins. Child changes bump the affected parents' versions. Route, schedule
+ * and bus changes bump the index generation, which retires every entry at
+ * once, because they can affect any number of users and happen rarely. An
+ * entry is only served, and only written, under the current generation and
+ * version.
+ */
+@Injectable()
+export class BusMembershipService implements OnModuleDestroy {
+  private readonly logger = new Logger(BusMembershipService.name);
+  private readonly redis: Redis;
+
+  private readonly GENERATION_KEY = 'bus_membership:generation';
+  // Safety net in case an invalidation is missed
+  private readonly ENTRY_TTL_SECONDS = 24 * 60 * 60;
+
+  constructor(private prisma: PrismaService) {
+    this.redis = new Redis(process.env.REDIS_URL);
+  }
+
+  async onModuleDestroy() {
+    await this.redis.quit().catch(() => undefined);
+  }
+
+  async getBusIds(userId: string, role: string): Promise<string[]> {
+    if (role !== 'PARENT' && role !== 'DRIVER') {
+      return [];
+    }
+
+    const keys = [this.GENERATION_KEY, this.versionKey(userId), this.entryKey(userId)];
+    let generation = '0';
+    let version = '0';
+    try {
+      const [storedGeneration, storedVersion, cached] = await this.redis.mget(...keys);
+      generation = storedGeneration || '0';
+      version = storedVersion || '0';
+      if (cached) {
+        const entry: MembershipEntry = JSON.parse(cached);
+        if (entry.stamp === `${generation}:${version}`) {
+          return entry.busIds;
+        }
+      }
+    } catch (error) {
+      this.logger.warn(`Bus membership cache unavailable: ${error.message}`);
+    }
+
+    const busIds = role === 'PARENT' ? await this.loadParentBuses(userId) : await this.loadDriverBuses(userId);
+
+    const entry: MembershipEntry = { stamp: `${generation}:${version}`, busIds };
+    this.redis
+      .eval(FILL_IF_CURRENT, keys.length, ...keys, generation, version, JSON.stringify(entry), this.ENTRY_TTL_SECONDS)
+      .catch(() => undefined);
+
+    return busIds;
+  }
+
+  async invalidateUsers(userIds: Array<string | null | undefined>) {
+    const ids = [...new Set(userIds.filter(Boolean))] as string[];
+    if (ids.length === 0) {
+      return;
+    }
+    const pipeline = this.redis.pipeline();
+    for (const id of ids) {
+      pipeline.incr(this.versionKey(id)).expire(this.versionKey(id), this.ENTRY_TTL_SECONDS).del(this.entryKey(id));
+    }
+    await pipeline.exec().catch((error) => {
+      this.logger.warn(`Failed to invalidate bus membership for ${ids.length} users: ${error.message}`);
+    });
+  }
+
+  async invalidateAll() {
+    await this.redis.incr(this.GENERATION_KEY).catch((error) => {
+      this.logger.warn(`Failed to invalidate bus membership index: ${error.message}`);
+    });
+  }
+
+  private entryKey(userId: string) {
+    return `bus_membership:user:${userId}`;
+  }
+
+  private versionKey(userId: string) {
+    return `bus_membership:user:${userId}:version`;
+  }
+
+  private async loadParentBuses(userId: string): Promise<string[]> {
+    const children = await this.prisma.child.findMany({
+      where: { parentId: userId, routeId: { not: null } },
+      select: {
+        route: {
+          select: {
+            busId: true,
+            scheduledRoutes: {
+              where: { status: ScheduleStatus.ACTIVE },
+              select: { busId: true },
+            },
+          },
+        },
+      },
+    });
+
+    const busIds = new Set<string>();
+    for (const { route } of children) {
+      if (route?.busId) busIds.add(route.busId);
+      route?.scheduledRoutes.forEach((schedule) => busIds.add(schedule.busId));
+    }
+    return [...busIds];
+  }
+
+  private async loadDriverBuses(userId: string): Promise<string[]> {
+    const driver = await this.prisma.driver.findUnique({
+      where: { userId },
+      select: {
+        buses: { select: { id: true } },
+        scheduledRoutes: {
+          where: { status: ScheduleStatus.ACTIVE },
+          select: { busId: true },
+        },
+      },
+    });
+
+    if (!driver) {
+      return [];
+    }
+    return [...new Set([...driver.buses.map((bus) => bus.id), ...driver.scheduledRoutes.map((s) => s.busId)])];
+  }
+}
@@ -2,9 +2,10 @@ import { Module } from '@nestjs/common';
 import { BusesService } from './buses.service';
 import { BusesController } from './buses.controller';
 import { PrismaModule } from '../../prisma/prisma.module';
+import { BusMembershipModule } from '../bus-membership/bus-membership.module';
 
 @Module({
-  imports: [PrismaModule],
+  imports: [PrismaModule, BusMembershipModule],
   controllers: [BusesController],
   providers: [BusesService],
   exports: [BusesService],
@@ -1,10 +1,14 @@
 import { Injectable } from '@nestjs/common';
 import { PrismaService } from '../../prisma/prisma.service';
 import { Bus } from '@prisma/client';
+import { BusMembershipService } from '../bus-membership/bus-membership.service';
 
 @Injectable()
 export class BusesService {
-  constructor(private prisma: PrismaService) {}
+  constructor(
+    private prisma: PrismaService,
+    private busMembership: BusMembershipService,
+  ) {}
 
   async findOne(id: string): Promise<Bus | null> {
     return this.prisma.bus.findUnique({
@@ -26,9 +30,13 @@ export class BusesService {
 
   async create(data: any): Promise<Bus> {
     try {
-      return await this.prisma.bus.create({
+      const bus = await this.prisma.bus.create({
         data,
       });
+      if (data.driverId) {
+        await this.busMembership.invalidateAll();
+      }
+      return bus;
     } catch (error) {
       if (error.code === 'P2002') {
         throw new Error(`A bus with plate number "${data.plateNumber}" already exists`);
@@ -38,10 +46,14 @@ export class BusesService {
   }
 
   async update(id: string, data: any): Promise<Bus> {
-    return this.prisma.bus.update({
+    const bus = await this.prisma.bus.update({
       where: { id },
       data,
     });
+    if (data.driverId !== undefined) {
+      await this.busMembership.invalidateAll();
+    }
+    return bus;
   }
 
   async findAll(): Promise<any[]> {
@@ -92,8 +104,10 @@ export class BusesService {
   }
 
   async remove(id: string): Promise<Bus> {
-    return this.prisma.bus.delete({
+    const bus = await this.prisma.bus.delete({
       where: { id },
     });
+    await this.busMembership.invalidateAll();
+    return bus;
   }
 }
\ No newline at end of file
@@ -0,0 +1,41 @@
+import { CacheTag, TenantCacheService } from './tenant-cache.service';
+
+export interface CachedOptions {
+  // Key prefix; the method's arguments are appended, e.g. "analytics:route:<routeId>"
+  key: string;
+  ttlSeconds: number;
+  staleSeconds?: number;
+  tags: CacheTag[];
+  // Picks the owning company from the arguments; defaults to the current
+  // request's company
+  tenant?: (args: any[]) => string | null;
+}
+
+/**
+ * Caches an async method's result through TenantCacheService. Arguments
+ * become part of the key, so they should be plain ids. Anything that must
+ * run on every call, such as an authorization check, belongs outside the
+ * decorated method.
+ */
+export function Cached(options: CachedOptions): MethodDecorator {
+  return (_target, _propertyKey, descriptor: PropertyDescriptor) => {
+    const original = descriptor.value;
+    descriptor.value = function (...args: any[]) {
+      const cache = TenantCacheService.instance;
+      if (!cache) {
+        return original.apply(this, args);
+      }
+      return cache.wrap(
+        {
+          key: [options.key, ...args.map(String)].join(':'),
+          ttlSeconds: options.ttlSeconds,
+          staleSeconds: options.staleSeconds,
+          tags: options.tags,
+          tenant: options.tenant ? options.tenant(args) : undefined,
+        },
+        () => original.apply(this, args),
+      );
+    };
+    return descriptor;
+  };
+}
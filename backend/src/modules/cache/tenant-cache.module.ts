@@ -0,0 +1,12 @@
+import { Global, Module } from '@nestjs/common';
+import { TenantCacheService } from './tenant-cache.service';
+import { TenancyModule } from '../tenancy/tenancy.module';
+
+// Global so any service can invalidate without importing the module
+@Global()
+@Module({
+  imports: [TenancyModule],
+  providers: [TenantCacheService],
+  exports: [TenantCacheService],
+})
+export class TenantCacheModule {}
@@ -0,0 +1,104 @@
+import { Test, TestingModule } from '@nestjs/testing';
+import { TenantCacheService } from './tenant-cache.service';
+import { TenancyService } from '../tenancy/tenancy.service';
+
+const strings = new Map<string, string>();
+const sets = new Map<string, Set<string>>();
+
+// Chainable MULTI that applies each command immediately
+const multi = () => {
+  const batch: any = {
+    set: (key: string, value: string) => (strings.set(key, value), batch),
+    sadd: (key: string, member: string) => (sets.set(key, (sets.get(key) || new Set()).add(member)), batch),
+    expire: () => batch,
+    del: (...keys: string[]) => (keys.forEach((key) => strings.delete(key)), batch),
+    srem: (key: string, ...members: string[]) => (members.forEach((member) => sets.get(key)?.delete(member)), batch),
+    exec: async () => [],
+  };
+  return batch;
+};
+
+jest.mock('ioredis', () => ({
+  Redis: jest.fn().mockImplementation(() => {
+    const client = {
+      get: async (key: string) => strings.get(key) ?? null,
+      smembers: async (key: string) => [...(sets.get(key) || [])],
+      multi,
+      publish: jest.fn().mockResolvedValue(1),
+      subscribe: jest.fn(),
+      on: jest.fn(),
+      duplicate: () => client,
+      quit: jest.fn().mockResolvedValue('OK'),
+    };
+    return client;
+  }),
+}));
+
+describe('TenantCacheService', () => {
+  let service: TenantCacheService;
+  let currentCompanyId: jest.Mock;
+
+  beforeEach(async () => {
+    strings.clear();
+    sets.clear();
+    currentCompanyId = jest.fn().mockReturnValue('company-1');
+
+    const module: TestingModule = await Test.createTestingModule({
+      providers: [TenantCacheService, { provide: TenancyService, useValue: { currentCompanyId } }],
+    }).compile();
+
+    service = module.get<TenantCacheService>(TenantCacheService);
+  });
+
+  afterEach(() => jest.useRealTimers());
+
+  const options = { key: 'stats', ttlSeconds: 60, tags: ['trips' as const] };
+
+  it('computes a key once for concurrent misses', async () => {
+    let resolve: (value: number) => void;
+    const compute = jest.fn(() => new Promise<number>((r) => (resolve = r)));
+
+    const reads = [service.wrap(options, compute), service.wrap(options, compute), service.wrap(options, compute)];
+    await new Promise((r) => setImmediate(r));
+    resolve(42);
+
+    await expect(Promise.all(reads)).resolves.toEqual([42, 42, 42]);
+    expect(compute).toHaveBeenCalledTimes(1);
+    await expect(service.wrap(options, compute)).resolves.toBe(42);
+    expect(compute).toHaveBeenCalledTimes(1);
+  });
+
+  it('keeps tenants apart', async () => {
+    await service.wrap(options, async () => 'company-1 stats');
+    currentCompanyId.mockReturnValue('company-2');
+
+    await expect(service.wrap(options, async () => 'company-2 stats')).resolves.toBe('company-2 stats');
+    expect(strings.has('cache:company-1:stats')).toBe(true);
+    expect(strings.has('cache:company-2:stats')).toBe(true);
+  });
+
+  it('serves a stale value while it refreshes in the background', async () => {
+    jest.useFakeTimers({ now: 0, doNotFake: ['setImmediate'] });
+    await service.wrap(options, async () => 'old');
+
+    jest.setSystemTime(61_000);
+    const compute = jest.fn(async () => 'new');
+    await expect(service.wrap(options, compute)).resolves.toBe('old');
+    expect(compute).toHaveBeenCalledTimes(1);
+
+    await new Promise((r) => setImmediate(r));
+    await expect(service.wrap(options, compute)).resolves.toBe('new');
+  });
+
+  it("invalidates a tenant's tagged entries and the platform-wide ones", async () => {
+    await service.wrap(options, async () => 1);
+    await service.wrap({ ...options, tenant: 'platform' }, async () => 1);
+    await service.wrap({ ...options, tenant: 'company-2' }, async () => 1);
+    await service.wrap({ ...options, key: 'payments', tags: ['payments'] }, async () => 1);
+
+    await service.invalidate('trips', 'company-1');
+
+    expect([...strings.keys()].sort()).toEqual(['cache:company-1:payments', 'cache:company-2:stats']);
+    await expect(service.wrap(options, async () => 2)).resolves.toBe(2);
+  });
+});
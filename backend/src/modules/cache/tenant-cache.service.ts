@@ -0,0 +1,236 @@
+import { Injectable, Logger, OnModuleDestroy, OnModuleInit } from '@nestjs/common';
+import { Redis } from 'ioredis';
+import { TenancyService } from '../tenancy/tenancy.service';
+
+// Events that invalidate cached reads, by the data they change
+export type CacheTag = 'trips' | 'attendance' | 'payments';
+
+// Tenant of entries computed without a company (platform admins, jobs).
+// Every company's writes invalidate them too.
+export const PLATFORM_TENANT = 'platform';
+
+const INVALIDATION_CHANNEL = 'cache_invalidations';
+// Outlives every entry, so a tag's index never expires before its entries
+const TAG_INDEX_TTL_SECONDS = 24 * 60 * 60;
+
+export interface CacheOptions {
+  // Namespaced key within the tenant, e.g. "analytics:trip_success_rate"
+  key: string;
+  ttlSeconds: number;
+  // How long past the TTL a stale value is still served while it refreshes
+  // in the background (defaults to the TTL)
+  staleSeconds?: number;
+  tags: CacheTag[];
+  // Company the entry belongs to; defaults to the current request's company
+  tenant?: string | null;
+}
+
+interface CacheEntry {
+  value: unknown;
+  freshUntil: number;
+  staleUntil: number;
+  tenant: string;
+  tags: CacheTag[];
+}
+
+interface Flight {
+  promise: Promise<unknown>;
+  tenant: string;
+  tags: CacheTag[];
+  // Set when an invalidation arrives mid-computation: the result may be
+  // outdated, so it is returned but not stored
+  invalidated: boolean;
+}
+
+interface InvalidationMessage {
+  tags: CacheTag[];
+  // null: every tenant
+  tenants: string[] | null;
+}
+
+/**
+ * Read-through cache with tenant-scoped keys. An in-process L1 sits in front
+ * of Redis (L2), so repeat reads on an instance don't leave the process.
+ *
+ * - Concurrent misses for a key share one computation (single-flight).
+ * - Past its TTL an entry is served stale while one background refresh runs,
+ *   so an expiry doesn't make every dashboard recompute at once.
+ * - Writers call invalidate(tag, companyId). That deletes the tenant's
+ *   tagged L2 entries (and platform-wide ones) and tells every instance,
+ *   over Redis pub/sub, to drop them from L1.
+ *
+ * Cache errors never fail a read: without Redis every read computes.
+ */
+@Injectable()
+export class TenantCacheService implements OnModuleInit, OnModuleDestroy {
+  private static active: TenantCacheService | null = null;
+
+  private readonly logger = new Logger(TenantCacheService.name);
+  private readonly redis: Redis;
+  // Subscriber mode blocks normal commands, so invalidations get their own connection
+  private readonly subscriber: Redis;
+
+  private readonly l1MaxEntries = parseInt(process.env.CACHE_L1_MAX_ENTRIES || '1000', 10);
+  private readonly l1 = new Map<string, CacheEntry>();
+  private readonly inflight = new Map<string, Flight>();
+
+  constructor(private tenancy: TenancyService) {
+    this.redis = new Redis(process.env.REDIS_URL);
+    this.subscriber = this.redis.duplicate();
+    TenantCacheService.active = this;
+  }
+
+  /**
+   * The application's cache, for the @Cached decorator. Null outside a
+   * running app (e.g. a service constructed directly in a test).
+   */
+  static get instance(): TenantCacheService | null {
+    return TenantCacheService.active;
+  }
+
+  onModuleInit() {
+    this.subscriber.subscribe(INVALIDATION_CHANNEL, (err) => {
+      if (err) {
+        this.logger.error(`Cache invalidation subscription failed: ${err.message}`);
+      }
+    });
+    this.subscriber.on('message', (channel, message) => {
+      if (channel === INVALIDATION_CHANNEL) {
+        const { tags, tenants }: InvalidationMessage = JSON.parse(message);
+        this.dropLocal(tags, tenants);
+      }
+    });
+  }
+
+  async onModuleDestroy() {
+    if (TenantCacheService.active === this) {
+      TenantCacheService.active = null;
+    }
+    await Promise.all([this.redis, this.subscriber].map((client) => client.quit().catch(() => undefined)));
+  }
+
+  async wrap<T>(options: CacheOptions, compute: () => Promise<T>): Promise<T> {
+    const tenant = options.tenant || this.tenancy.currentCompanyId() || PLATFORM_TENANT;
+    const key = `cache:${tenant}:${options.key}`;
+    const now = Date.now();
+
+    let entry = this.l1.get(key);
+    if (!entry || entry.staleUntil <= now) {
+      entry = await this.readL2(key);
+      if (entry) this.remember(key, entry);
+    }
+
+    if (entry && entry.staleUntil > now) {
+      if (entry.freshUntil <= now) {
+        this.refresh(key, tenant, options, compute).catch((error) =>
+          this.logger.warn(`Background refresh of ${key} failed: ${error.message}`),
+        );
+      }
+      return entry.value as T;
+    }
+    return this.refresh(key, tenant, options, compute);
+  }
+
+  /**
+   * Drop cached reads that depend on `tags`, for one company (plus the
+   * platform-wide entries) or, without a companyId, for every tenant
+   */
+  async invalidate(tags: CacheTag | CacheTag[], companyId?: string | null): Promise<void> {
+    const message: InvalidationMessage = {
+      tags: Array.isArray(tags) ? tags : [tags],
+      tenants: companyId ? [companyId, PLATFORM_TENANT] : null,
+    };
+    this.dropLocal(message.tags, message.tenants);
+
+    try {
+      for (const tag of message.tags) {
+        const members = await this.redis.smembers(`cache:tag:${tag}`);
+        const keys = message.tenants
+          ? members.filter((key) => message.tenants.some((tenant) => key.startsWith(`cache:${tenant}:`)))
+          : members;
+        if (keys.length > 0) {
+          await this.redis.multi().del(...keys).srem(`cache:tag:${tag}`, ...keys).exec();
+        }
+      }
+      await this.redis.publish(INVALIDATION_CHANNEL, JSON.stringify(message));
+    } catch (error) {
+      this.logger.warn(`Cache invalidation failed: ${error.message}`);
+    }
+  }
+
+  private refresh<T>(key: string, tenant: string, options: CacheOptions, compute: () => Promise<T>): Promise<T> {
+    const pending = this.inflight.get(key);
+    if (pending) {
+      return pending.promise as Promise<T>;
+    }
+
+    const flight: Flight = { promise: null, tenant, tags: options.tags, invalidated: false };
+    this.inflight.set(key, flight);
+    flight.promise = (async () => {
+      try {
+        const value = await compute();
+        if (!flight.invalidated) {
+          const now = Date.now();
+          const freshMs = options.ttlSeconds * 1000;
+          const staleMs = (options.staleSeconds ?? options.ttlSeconds) * 1000;
+          const entry: CacheEntry = {
+            value,
+            freshUntil: now + freshMs,
+            staleUntil: now + freshMs + staleMs,
+            tenant,
+            tags: options.tags,
+          };
+          this.remember(key, entry);
+          await this.writeL2(key, entry, Math.ceil((freshMs + staleMs) / 1000));
+        }
+        return value;
+      } finally {
+        this.inflight.delete(key);
+      }
+    })();
+    return flight.promise as Promise<T>;
+  }
+
+  private remember(key: string, entry: CacheEntry) {
+    // Map order doubles as LRU order: re-inserting moves the key to the end
+    this.l1.delete(key);
+    this.l1.set(key, entry);
+    if (this.l1.size > this.l1MaxEntries) {
+      this.l1.delete(this.l1.keys().next().value);
+    }
+  }
+
+  private dropLocal(tags: CacheTag[], tenants: string[] | null) {
+    const affected = (entry: { tenant: string; tags: CacheTag[] }) =>
+      (!tenants || tenants.includes(entry.tenant)) && entry.tags.some((tag) => tags.includes(tag));
+
+    for (const [key, entry] of this.l1) {
+      if (affected(entry)) this.l1.delete(key);
+    }
+    for (const flight of this.inflight.values()) {
+      if (affected(flight)) flight.invalidated = true;
+    }
+  }
+
+  private async readL2(key: string): Promise<CacheEntry | undefined> {
+    try {
+      const cached = await this.redis.get(key);
+      return cached ? JSON.parse(cached) : undefined;
+    } catch (error) {
+      this.logger.warn(`Cache read failed, computing: ${error.message}`);
+      return undefined;
+    }
+  }
+
+  private async writeL2(key: string, entry: CacheEntry, ttlSeconds: number) {
+    try {
+      const multi = this.redis.multi().set(key, JSON.stringify(entry), 'EX', ttlSeconds);
+      for (const tag of entry.tags) {
+        multi.sadd(`cache:tag:${tag}`, key).expire(`cache:tag:${tag}`, TAG_INDEX_TTL_SECONDS);
+      }
+      await multi.exec();
+    } catch (error) {
+      this.logger.warn(`Cache write failed: ${error.message}`);
+    }
+  }
+}
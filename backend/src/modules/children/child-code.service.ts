@@ -0,0 +1,59 @@
+import { Injectable } from '@nestjs/common';
+import { randomBytes } from 'crypto';
+import { PrismaService } from '../../prisma/prisma.service';
+
+// No 0/O or 1/I, so codes survive being read out over the phone
+const CODE_ALPHABET = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789';
+const CODE_LENGTH = 8;
+
+/**
+ * A random 8-character child code: 40 bits from the CSPRNG. A code is
+ * enough to claim an unclaimed child, so codes must not be guessable from
+ * one another.
+ */
+export function randomChildCode(): string {
+  // 256 is a multiple of 32, so the low 5 bits of each byte are uniform
+  const bytes = randomBytes(CODE_LENGTH);
+  let code = '';
+  for (const byte of bytes) {
+    code += CODE_ALPHABET[byte & 31];
+  }
+  return code;
+}
+
+/**
+ * Allocates child registration codes. A block of any size is drawn at
+ * random and checked against existing children with one lookup; the rare
+ * clash is redrawn. The unique index on Child.uniqueCode backs this up for
+ * two allocations racing on the same code (see ChildImportService).
+ */
+@Injectable()
+export class ChildCodeService {
+  constructor(private prisma: PrismaService) {}
+
+  async reserve(count: number): Promise<string[]> {
+    const codes = new Set<string>();
+    while (codes.size < count) {
+      const candidates = new Set<string>();
+      while (candidates.size < count - codes.size) {
+        const code = randomChildCode();
+        if (!codes.has(code)) candidates.add(code);
+      }
+
+      const taken = await this.prisma.child.findMany({
+        where: { uniqueCode: { in: [...candidates] } },
+        select: { uniqueCode: true },
+      });
+      const takenCodes = new Set(taken.map((child) => child.uniqueCode));
+      for (const code of candidates) {
+        if (!takenCodes.has(code)) codes.add(code);
+      }
+    }
+    return [...codes];
+  }
+
+  async next(): Promise<string> {
+    const [code] = await this.reserve(1);
+    return code;
+  }
+}
@@ -0,0 +1,145 @@
+import { Injectable, Logger, NotFoundException } from '@nestjs/common';
+import { Prisma } from '@prisma/client';
+import { randomUUID } from 'crypto';
+import { PrismaService } from '../../prisma/prisma.service';
+import { ChildCodeService } from './child-code.service';
+import { ImportRecord, ImportRowData, validateImportRecord } from './child-import';
+
+export interface ImportRowError {
+  row: number;
+  message: string;
+}
+
+export interface ImportResult {
+  received: number;
+  created: number;
+  failed: number;
+  // The first IMPORT_MAX_ERRORS failures; `failed` has the full count
+  errors: ImportRowError[];
+  children: Array<{ row: number; id: string; uniqueCode: string }>;
+}
+
+interface PendingRow {
+  row: number;
+  data: ImportRowData;
+}
+
+/**
+ * Imports children into a school from a stream of records. Rows are
+ * validated as they arrive and inserted with one createMany per chunk, each
+ * in its own statement, so an intake of tens of thousands of children never
+ * holds a long transaction and a bad row only fails itself.
+ */
+@Injectable()
+export class ChildImportService {
+  private readonly logger = new Logger(ChildImportService.name);
+
+  private readonly chunkSize = parseInt(process.env.CHILD_IMPORT_CHUNK_SIZE || '1000', 10);
+  private readonly maxErrors = parseInt(process.env.CHILD_IMPORT_MAX_ERRORS || '1000', 10);
+
+  constructor(
+    private prisma: PrismaService,
+    private childCodes: ChildCodeService,
+  ) {}
+
+  async importChildren(
+    schoolId: string,
+    companyId: string | undefined,
+    records: AsyncIterable<ImportRecord> | Iterable<ImportRecord>,
+  ): Promise<ImportResult> {
+    const school = await this.prisma.school.findFirst({
+      where: { id: schoolId, companyId },
+      select: { id: true },
+    });
+    if (!school) {
+      throw new NotFoundException('School not found or does not belong to this company');
+    }
+
+    const routes = new Map<string, string>();
+    const schoolRoutes = await this.prisma.route.findMany({
+      where: { schoolId },
+      select: { id: true, name: true },
+    });
+    for (const route of schoolRoutes) {
+      routes.set(route.name.toLowerCase(), route.id);
+      routes.set(route.id, route.id);
+    }
+
+    const started = Date.now();
+    const result: ImportResult = { received: 0, created: 0, failed: 0, errors: [], children: [] };
+    let chunk: PendingRow[] = [];
+
+    for await (const record of records) {
+      result.received++;
+      const checked = record.error ? { error: record.error } : validateImportRecord(record.fields, routes);
+      if ('error' in checked) {
+        this.fail(result, record.row, checked.error);
+        continue;
+      }
+
+      chunk.push({ row: record.row, data: checked.data });
+      if (chunk.length >= this.chunkSize) {
+        await this.insertChunk(schoolId, chunk, result);
+        chunk = [];
+      }
+    }
+    if (chunk.length > 0) {
+      await this.insertChunk(schoolId, chunk, result);
+    }
+
+    this.logger.log(
+      `Imported ${result.created}/${result.received} children into school ${schoolId} in ${Date.now() - started}ms`,
+    );
+    return result;
+  }
+
+  private async insertChunk(schoolId: string, chunk: PendingRow[], result: ImportResult) {
+    const codes = await this.childCodes.reserve(chunk.length);
+    const rows = chunk.map((pending, index) => ({
+      row: pending.row,
+      data: { ...pending.data, id: randomUUID(), uniqueCode: codes[index], schoolId },
+    }));
+
+    try {
+      await this.prisma.child.createMany({ data: rows.map((row) => row.data) });
+      for (const { row, data } of rows) {
+        result.children.push({ row, id: data.id, uniqueCode: data.uniqueCode });
+      }
+      result.created += rows.length;
+    } catch (error) {
+      // Validation catches almost everything up front; if the database still
+      // rejects the chunk, insert row by row to find the offending ones
+      this.logger.warn(`Chunk insert failed, retrying rows individually: ${error.message}`);
+      for (const { row, data } of rows) {
+        try {
+          await this.createRow(data);
+          result.children.push({ row, id: data.id, uniqueCode: data.uniqueCode });
+          result.created++;
+        } catch (rowError) {
+          this.fail(result, row, rowError.message);
+        }
+      }
+    }
+  }
+
+  // A code drawn by a concurrent allocation between our lookup and insert
+  // trips the unique index; draw a fresh one and try once more
+  private async createRow(data: Prisma.ChildCreateManyInput) {
+    try {
+      await this.prisma.child.create({ data, select: { id: true } });
+    } catch (error) {
+      if (error.code !== 'P2002' || !String(error.meta?.target).includes('uniqueCode')) {
+        throw error;
+      }
+      data.uniqueCode = await this.childCodes.next();
+      await this.prisma.child.create({ data, select: { id: true } });
+    }
+  }
+
+  private fail(result: ImportResult, row: number, message: string) {
+    result.failed++;
+    if (result.errors.length < this.maxErrors) {
+      result.errors.push({ row, message });
+    }
+  }
+}
@@ -0,0 +1,94 @@
+import { Readable } from 'stream';
+import { parseCsvRecord, readImportRecords, validateImportRecord } from './child-import';
+import { ChildCodeService, randomChildCode } from './child-code.service';
+
+async function collect(input: string[], format: 'csv' | 'ndjson') {
+  const records = [];
+  for await (const record of readImportRecords(Readable.from(input.map((chunk) => Buffer.from(chunk))), format)) {
+    records.push(record);
+  }
+  return records;
+}
+
+describe('child import', () => {
+  const routes = new Map([
+    ['route-1', 'route-1'],
+    ['r1-morning', 'route-1'],
+  ]);
+
+  it('parses quoted CSV fields', () => {
+    expect(parseCsvRecord('"Mary, Ann","O""Neil", Grade 1 ,')).toEqual(['Mary, Ann', 'O"Neil', 'Grade 1', '']);
+  });
+
+  it('reads CSV records across chunk boundaries and multi-line fields', async () => {
+    const records = await collect(
+      ['First Name,Last Name,Gra', 'de\r\nJohn,Doe,Grade 1\r\n"Ama","Mensah\nJr",\n\nKofi,Boateng,Grade 2'],
+      'csv',
+    );
+
+    expect(records).toEqual([
+      { row: 1, fields: { 'First Name': 'John', 'Last Name': 'Doe', Grade: 'Grade 1' } },
+      { row: 2, fields: { 'First Name': 'Ama', 'Last Name': 'Mensah\nJr' } },
+      { row: 3, fields: { 'First Name': 'Kofi', 'Last Name': 'Boateng', Grade: 'Grade 2' } },
+    ]);
+  });
+
+  it('reports malformed NDJSON lines without stopping', async () => {
+    const records = await collect(['{"firstName":"A","lastName":"B"}\nnot json\n[1]\n'], 'ndjson');
+
+    expect(records).toEqual([
+      { row: 1, fields: { firstName: 'A', lastName: 'B' } },
+      { row: 2, error: 'Invalid JSON' },
+      { row: 3, error: 'Expected a JSON object' },
+    ]);
+  });
+
+  it('maps template, camelCase and snake_case columns', () => {
+    const fromTemplate = validateImportRecord(
+      { 'First Name': 'John', 'Last Name': 'Doe', 'Days Until Payment': '30', 'Route Code': 'R1-MORNING' },
+      routes,
+    );
+    const fromSnakeCase = validateImportRecord({ first_name: 'John', last_name: 'Doe', dob: '2015-03-15', grade: 1 }, routes);
+
+    expect(fromTemplate).toMatchObject({ data: { firstName: 'John', daysUntilPayment: 30, routeId: 'route-1' } });
+    expect(fromSnakeCase).toMatchObject({ data: { lastName: 'Doe', grade: '1', dateOfBirth: new Date('2015-03-15') } });
+  });
+
+  it('rejects invalid rows with a reason', () => {
+    expect(validateImportRecord({ firstName: 'A' }, routes)).toEqual({ error: 'lastName is required' });
+    expect(validateImportRecord({ firstName: 'A', lastName: 'B', dob: 'someday' }, routes)).toEqual({
+      error: 'Invalid dateOfBirth "someday"',
+    });
+    expect(validateImportRecord({ firstName: 'A', lastName: 'B', routeId: 'other-school-route' }, routes)).toEqual({
+      error: 'Unknown route "other-school-route" for this school',
+    });
+  });
+
+  it('draws random 8-character codes from the unambiguous alphabet', () => {
+    const codes = new Set<string>();
+    for (let i = 0; i < 10000; i++) {
+      codes.add(randomChildCode());
+    }
+
+    // 10k draws from 2^40 codes: a repeat is a ~5e-5 event
+    expect(codes.size).toBeGreaterThanOrEqual(9999);
+    for (const code of [...codes].slice(0, 100)) {
+      expect(code).toMatch(/^[A-HJ-NP-Z2-9]{8}$/);
+    }
+  });
+
+  it('redraws codes that are already taken', async () => {
+    const findMany = jest
+      .fn()
+      .mockImplementationOnce(async ({ where }) => [{ uniqueCode: where.uniqueCode.in[0] }])
+      .mockResolvedValue([]);
+    const childCodes = new ChildCodeService({ child: { findMany } } as any);
+
+    const codes = await childCodes.reserve(5);
+
+    expect(findMany).toHaveBeenCalledTimes(2);
+    expect(findMany.mock.calls[1][0].where.uniqueCode.in).toHaveLength(1);
+    expect(new Set(codes).size).toBe(5);
+    expect(codes).not.toContain(findMany.mock.calls[0][0].where.uniqueCode.in[0]);
+  });
+});
@@ -0,0 +1,194 @@
+import { Prisma } from '@prisma/client';
+
+export type ImportFormat = 'csv' | 'ndjson';
+
+export interface ImportRecord {
+  // 1-based position among the data rows (the CSV header doesn't count)
+  row: number;
+  fields?: Record<string, unknown>;
+  error?: string;
+}
+
+export type ImportRowData = Omit<Prisma.ChildCreateManyInput, 'id' | 'uniqueCode' | 'schoolId'>;
+
+// Normalized column name -> Child field. Covers the admin-web CSV template
+// ("First Name", "Route Code", ...) as well as camelCase and snake_case keys.
+const FIELD_ALIASES: Record<string, string> = {
+  firstname: 'firstName',
+  lastname: 'lastName',
+  dateofbirth: 'dateOfBirth',
+  dob: 'dateOfBirth',
+  grade: 'grade',
+  parentphone: 'parentPhone',
+  phone: 'parentPhone',
+  routeid: 'route',
+  routecode: 'route',
+  route: 'route',
+  daysuntilpayment: 'daysUntilPayment',
+  allergies: 'allergies',
+  specialinstructions: 'specialInstructions',
+};
+
+function normalizeKey(key: string): string | undefined {
+  return FIELD_ALIASES[key.toLowerCase().replace(/[^a-z]/g, '')];
+}
+
+/**
+ * Splits one CSV record into fields. Handles quoted fields with commas,
+ * doubled quotes and line breaks (the caller joins physical lines first).
+ */
+export function parseCsvRecord(line: string): string[] {
+  const fields: string[] = [];
+  let field = '';
+  let quoted = false;
+  for (let i = 0; i < line.length; i++) {
+    const char = line[i];
+    if (quoted) {
+      if (char === '"' && line[i + 1] === '"') {
+        field += '"';
+        i++;
+      } else if (char === '"') {
+        quoted = false;
+      } else {
+        field += char;
+      }
+    } else if (char === '"') {
+      quoted = true;
+    } else if (char === ',') {
+      fields.push(field);
+      field = '';
+    } else {
+      field += char;
+    }
+  }
+  fields.push(field);
+  return fields.map((value) => value.trim());
+}
+
+async function* readLines(input: AsyncIterable<Buffer | string>): AsyncGenerator<string> {
+  const decoder = new TextDecoder();
+  let buffered = '';
+  for await (const chunk of input) {
+    buffered += typeof chunk === 'string' ? chunk : decoder.decode(chunk, { stream: true });
+    let newline: number;
+    while ((newline = buffered.indexOf('\n')) !== -1) {
+      yield buffered.slice(0, newline).replace(/\r$/, '');
+      buffered = buffered.slice(newline + 1);
+    }
+  }
+  buffered += decoder.decode();
+  if (buffered.length > 0) {
+    yield buffered.replace(/\r$/, '');
+  }
+}
+
+/**
+ * Reads records from a CSV (with a header row) or NDJSON stream one at a
+ * time. Lines are pulled from `input` only as fast as the caller consumes
+ * records, so an upload is never held in memory as a whole.
+ */
+export async function* readImportRecords(
+  input: AsyncIterable<Buffer | string>,
+  format: ImportFormat,
+): AsyncGenerator<ImportRecord> {
+  let row = 0;
+  let header: string[] | null = null;
+  let pending = '';
+
+  for await (const line of readLines(input)) {
+    if (format === 'ndjson') {
+      if (!line.trim()) continue;
+      row++;
+      try {
+        const fields = JSON.parse(line);
+        if (!fields || typeof fields !== 'object' || Array.isArray(fields)) {
+          yield { row, error: 'Expected a JSON object' };
+        } else {
+          yield { row, fields };
+        }
+      } catch {
+        yield { row, error: 'Invalid JSON' };
+      }
+      continue;
+    }
+
+    // A quoted CSV field may span lines: keep joining until quotes balance
+    pending = pending ? `${pending}\n${line}` : line;
+    if ((pending.match(/"/g) || []).length % 2 === 1) continue;
+    const record = pending;
+    pending = '';
+    if (!record.trim()) continue;
+
+    const values = parseCsvRecord(record);
+    if (!header) {
+      header = values;
+      continue;
+    }
+    row++;
+    const fields: Record<string, unknown> = {};
+    header.forEach((column, index) => {
+      if (values[index] !== undefined && values[index] !== '') fields[column] = values[index];
+    });
+    yield { row, fields };
+  }
+
+  if (pending.trim()) {
+    yield { row: row + 1, error: 'Unterminated quoted field' };
+  }
+}
+
+/**
+ * Checks one record and turns it into Child columns. `routes` maps route
+ * ids and lower-cased route names of the target school to route ids.
+ */
+export function validateImportRecord(
+  fields: Record<string, unknown>,
+  routes: Map<string, string>,
+): { data: ImportRowData } | { error: string } {
+  const values: Record<string, string> = {};
+  for (const [key, value] of Object.entries(fields)) {
+    const field = normalizeKey(key);
+    if (field && value !== null && value !== undefined && String(value).trim() !== '') {
+      values[field] = String(value).trim();
+    }
+  }
+
+  if (!values.firstName) return { error: 'firstName is required' };
+  if (!values.lastName) return { error: 'lastName is required' };
+
+  let dateOfBirth = new Date();
+  if (values.dateOfBirth) {
+    dateOfBirth = new Date(values.dateOfBirth);
+    if (isNaN(dateOfBirth.getTime())) return { error: `Invalid dateOfBirth "${values.dateOfBirth}"` };
+  }
+
+  let daysUntilPayment = 0;
+  if (values.daysUntilPayment) {
+    if (!/^-?\d+$/.test(values.daysUntilPayment)) {
+      return { error: `Invalid daysUntilPayment "${values.daysUntilPayment}"` };
+    }
+    daysUntilPayment = parseInt(values.daysUntilPayment, 10);
+  }
+
+  let routeId: string | null = null;
+  if (values.route) {
+    routeId = routes.get(values.route) || routes.get(values.route.toLowerCase()) || null;
+    if (!routeId) return { error: `Unknown route "${values.route}" for this school` };
+  }
+
+  return {
+    data: {
+      firstName: values.firstName,
+      lastName: values.lastName,
+      dateOfBirth,
+      grade: values.grade || null,
+      parentPhone: values.parentPhone || null,
+      routeId,
+      daysUntilPayment,
+      allergies: values.allergies || null,
+      specialInstructions: values.specialInstructions || null,
+      pickupType: 'SCHOOL',
+      isClaimed: false,
+    },
+  };
+}
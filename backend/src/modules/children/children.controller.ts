@@ -1,4 +1,4 @@
-import { Controller, Get, Post, Body, Patch, Param, Delete, UseGuards, Req } from '@nestjs/common';
+import { Controller, Get, Post, Body, Patch, Param, Delete, UseGuards, Req, Query, UnsupportedMediaTypeException } from '@nestjs/common';
 import { ChildrenService } from './children.service';
 import { Roles } from '../roles/roles.decorator';
 import { RolesGuard } from '../roles/roles.guard';
@@ -6,11 +6,24 @@ import { JwtAuthGuard } from '../auth/jwt-auth.guard';
 import { PrismaService } from '../../prisma/prisma.service';
 import { LinkChildDto, BulkUpdateGradesDto } from './dto/link-child.dto';
 import { RequestLocationChangeDto, ReviewLocationChangeDto } from './dto/location-change.dto';
+import { ChildImportService } from './child-import.service';
+import { ImportFormat, readImportRecords } from './child-import';
+import { PageQueryDto } from '../../common/pagination/pagination';
+
+const IMPORT_FORMATS: Record<string, ImportFormat> = {
+  'text/csv': 'csv',
+  'application/x-ndjson': 'ndjson',
+  'application/ndjson': 'ndjson',
+};
 
 @Controller('children')
 @UseGuards(JwtAuthGuard, RolesGuard)
 export class ChildrenController {
-  constructor(private readonly childrenService: ChildrenService, private prisma: PrismaService) {}
+  constructor(
+    private readonly childrenService: ChildrenService,
+    private readonly childImport: ChildImportService,
+    private prisma: PrismaService,
+  ) {}
 
   @Post()
   @Roles('PLATFORM_ADMIN', 'COMPANY_ADMIN', 'PARENT')
@@ -24,10 +37,24 @@ export class ChildrenController {
     return this.childrenService.bulkOnboard(bulkOnboardDto);
   }
 
+  // Streaming import for large intakes: the body is a CSV file with a header
+  // row or NDJSON, read and inserted chunk by chunk as it arrives
+  @Post('import/:schoolId')
+  @Roles('PLATFORM_ADMIN', 'COMPANY_ADMIN')
+  importChildren(@Param('schoolId') schoolId: string, @Req() req: any) {
+    const contentType = (req.headers['content-type'] || '').split(';')[0].trim().toLowerCase();
+    const format = IMPORT_FORMATS[contentType];
+    if (!format) {
+      throw new UnsupportedMediaTypeException('Upload the children as text/csv or application/x-ndjson');
+    }
+    const companyId = req.user.role === 'COMPANY_ADMIN' ? req.user.companyId : undefined;
+    return this.childImport.importChildren(schoolId, companyId, readImportRecords(req, format));
+  }
+
   @Get()
   @Roles('PLATFORM_ADMIN', 'COMPANY_ADMIN')
-  findAll() {
-    return this.childrenService.findAll();
+  findAll(@Query() query: PageQueryDto) {
+    return this.childrenService.findAll(query);
   }
 
   @Get(':id')
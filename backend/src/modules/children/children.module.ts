@@ -1,13 +1,17 @@
 import { Module } from '@nestjs/common';
 import { ChildrenService } from './children.service';
 import { ChildrenController } from './children.controller';
+import { ChildCodeService } from './child-code.service';
+import { ChildImportService } from './child-import.service';
 import { PrismaModule } from '../../prisma/prisma.module';
 import { NotificationsModule } from '../notifications/notifications.module';
+import { BusMembershipModule } from '../bus-membership/bus-membership.module';
+import { DriverManifestModule } from '../driver-manifest/driver-manifest.module';
 
 @Module({
-  imports: [PrismaModule, NotificationsModule],
+  imports: [PrismaModule, NotificationsModule, BusMembershipModule, DriverManifestModule],
   controllers: [ChildrenController],
-  providers: [ChildrenService],
+  providers: [ChildrenService, ChildCodeService, ChildImportService],
   exports: [ChildrenService],
 })
 export class ChildrenModule {}
\ No newline at end of file
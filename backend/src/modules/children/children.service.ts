@@ -1,15 +1,25 @@
 import { Injectable, BadRequestException, NotFoundException } from '@nestjs/common';
 import { PrismaService } from '../../prisma/prisma.service';
-import { Child, NotificationType } from '@prisma/client';
+import { Child, NotificationType, Prisma } from '@prisma/client';
 import { LinkChildDto, BulkUpdateGradesDto } from './dto/link-child.dto';
 import { RequestLocationChangeDto, ReviewLocationChangeDto } from './dto/location-change.dto';
 import { NotificationsService } from '../notifications/notifications.service';
+import { BusMembershipService } from '../bus-membership/bus-membership.service';
+import { DriverManifestService } from '../driver-manifest/driver-manifest.service';
+import { GeoIndex } from '../../common/geo/geo-index';
+import { Page, PageQueryDto, findPage, scalarSelect, selectFields } from '../../common/pagination/pagination';
+import { ChildCodeService } from './child-code.service';
+import { ChildImportService, ImportRowError } from './child-import.service';
 
 @Injectable()
 export class ChildrenService {
   constructor(
     private prisma: PrismaService,
     private notificationsService: NotificationsService,
+    private busMembership: BusMembershipService,
+    private driverManifest: DriverManifestService,
+    private childCodes: ChildCodeService,
+    private childImport: ChildImportService,
   ) {}
 
   async findOne(id: string): Promise<Child | null> {
@@ -31,12 +41,16 @@ export class ChildrenService {
   }
 
   async create(data: any): Promise<Child> {
-    return this.prisma.child.create({
+    const child = await this.prisma.child.create({
       data,
     });
+    if (child.parentId && child.routeId) {
+      await this.busMembership.invalidateUsers([child.parentId]);
+    }
+    return child;
   }
 
-  async bulkOnboard(bulkData: any): Promise<{ created: number; children: Child[] }> {
+  async bulkOnboard(bulkData: any): Promise<{ created: number; failed: number; errors: ImportRowError[]; children: Child[] }> {
     const { companyId, schoolId, children } = bulkData;
 
     if (!children || !Array.isArray(children) || children.length === 0) {
@@ -47,58 +61,28 @@ export class ChildrenService {
       throw new BadRequestException('School ID is required');
     }
 
-    // Verify school exists and belongs to company
-    const school = await this.prisma.school.findFirst({
-      where: {
-        id: schoolId,
-        companyId: companyId,
-      },
-    });
-
-    if (!school) {
-      throw new NotFoundException('School not found or does not belong to this company');
-    }
-
-    // Create all children in a transaction
-    const createdChildren = await this.prisma.$transaction(
-      children.map((childData: any) => {
-        // Generate unique code for each child
-        const uniqueCode = this.generateCodeSync();
-        
-        return this.prisma.child.create({
-          data: {
-            firstName: childData.firstName,
-            lastName: childData.lastName,
-            dateOfBirth: childData.dateOfBirth ? new Date(childData.dateOfBirth) : new Date(),
-            grade: childData.grade || null,
-            schoolId: schoolId,
-            parentPhone: childData.parentPhone || null,
-            routeId: childData.routeId || null,
-            daysUntilPayment: parseInt(childData.daysUntilPayment) || 0,
-            uniqueCode: uniqueCode,
-            pickupType: 'SCHOOL',
-            isClaimed: false,
-          },
-        });
-      })
+    const result = await this.childImport.importChildren(
+      schoolId,
+      companyId,
+      children.map((fields: any, index: number) =>
+        fields && typeof fields === 'object' ? { row: index + 1, fields } : { row: index + 1, error: 'Expected an object' },
+      ),
     );
 
+    // JSON bodies are small (the body parser caps them), so return full records
+    const createdChildren = await this.prisma.child.findMany({
+      where: { id: { in: result.children.map((child) => child.id) } },
+    });
+    const byId = new Map(createdChildren.map((child) => [child.id, child]));
+
     return {
-      created: createdChildren.length,
-      children: createdChildren,
+      created: result.created,
+      failed: result.failed,
+      errors: result.errors,
+      children: result.children.map((child) => byId.get(child.id)),
     };
   }
 
-  // Helper method to generate code synchronously
-  private generateCodeSync(): string {
-    const chars = 'ABCDEFGHJKLMNPQRSTUVWXYZ23456789';
-    let code = '';
-    for (let i = 0; i < 8; i++) {
-      code += chars.charAt(Math.floor(Math.random() * chars.length));
-    }
-    return code;
-  }
-
   async update(id: string, data: any): Promise<Child> {
     const previousChild = await this.prisma.child.findUnique({ where: { id } });
     
@@ -112,6 +96,10 @@ export class ChildrenService {
       await this.addChildToTodayTrips(id, data.routeId);
     }
 
+    if (updatedChild.routeId !== previousChild?.routeId || updatedChild.parentId !== previousChild?.parentId) {
+      await this.busMembership.invalidateUsers([previousChild?.parentId, updatedChild.parentId]);
+    }
+
     return updatedChild;
   }
 
@@ -139,30 +127,18 @@ export class ChildrenService {
         },
       });
 
-      // Create attendance records for each trip if they don't exist
-      for (const trip of todayTrips) {
-        const existingAttendance = await this.prisma.childAttendance.findUnique({
-          where: {
-            childId_tripId: {
-              childId,
-              tripId: trip.id,
-            },
-          },
-        });
-
-        if (!existingAttendance) {
-          await this.prisma.childAttendance.create({
-            data: {
-              childId,
-              tripId: trip.id,
-              status: 'PENDING',
-              recordedBy: 'system',
-            },
-          });
-
-          console.log(`Added child ${childId} to trip ${trip.id}`);
-        }
-      }
+      // Create attendance records for each trip; existing ones are skipped
+      // by the (childId, tripId) unique constraint
+      await this.prisma.childAttendance.createMany({
+        data: todayTrips.map((trip) => ({
+          childId,
+          tripId: trip.id,
+          status: 'PENDING' as const,
+          recordedBy: 'system',
+        })),
+        skipDuplicates: true,
+      });
+      await Promise.all(todayTrips.map((trip) => this.driverManifest.invalidate(trip.id)));
 
       if (todayTrips.length > 0) {
         console.log(`Successfully added child ${childId} to ${todayTrips.length} trip(s) for today`);
@@ -173,34 +149,26 @@ export class ChildrenService {
     }
   }
 
-  async findAll(): Promise<Child[]> {
-    return this.prisma.child.findMany();
+  async findAll(query: PageQueryDto = {}): Promise<Page<Child> | Child[]> {
+    return findPage(
+      (args) => this.prisma.child.findMany(args) as Promise<Child[]>,
+      {},
+      selectFields(query.fields, scalarSelect(Prisma.ChildScalarFieldEnum)),
+      query,
+    );
   }
 
   async remove(id: string): Promise<Child> {
-    return this.prisma.child.delete({
+    const child = await this.prisma.child.delete({
       where: { id },
     });
+    await this.busMembership.invalidateUsers([child.parentId]);
+    return child;
   }
 
-  // Generate unique code for child (e.g., ROSxxxx)
+  // Generate unique code for child
   async generateUniqueCode(): Promise<string> {
-    const prefix = 'ROS';
-    let code: string;
-    let exists = true;
-
-    while (exists) {
-      const randomNum = Math.floor(1000 + Math.random() * 9000); // 4-digit number
-      code = `${prefix}${randomNum}`;
-      
-      const existing = await this.prisma.child.findUnique({
-        where: { uniqueCode: code },
-      });
-      
-      exists = !!existing;
-    }
-
-    return code;
+    return this.childCodes.next();
   }
 
   // Link child to parent using unique code
@@ -240,6 +208,8 @@ export class ChildrenService {
       },
     });
 
+    await this.busMembership.invalidateUsers([parentId]);
+
     return updatedChild;
   }
 
@@ -415,6 +385,8 @@ export class ChildrenService {
       },
     });
 
+    let nearestStop = null;
+
     // If approved, update child's location
     if (reviewDto.status === 'APPROVED') {
       await this.prisma.child.update({
@@ -426,6 +398,13 @@ export class ChildrenService {
         },
       });
 
+      // Tell the reviewer which stop now serves the child best
+      nearestStop = await this.findNearestStop(
+        request.child.schoolId,
+        request.newLatitude,
+        request.newLongitude,
+      );
+
       // Notify parent
       await this.notificationsService.create({
         userId: request.requestedBy,
@@ -443,7 +422,34 @@ export class ChildrenService {
       });
     }
 
-    return updatedRequest;
+    return { ...updatedRequest, nearestStop };
+  }
+
+  // Closest stop on any of the school's routes to a location
+  private async findNearestStop(schoolId: string, latitude: number, longitude: number) {
+    const stops = await this.prisma.stop.findMany({
+      where: { route: { schoolId } },
+      select: {
+        id: true,
+        name: true,
+        latitude: true,
+        longitude: true,
+        route: { select: { id: true, name: true } },
+      },
+    });
+
+    const match = GeoIndex.from(stops, (stop) => stop).nearest(latitude, longitude);
+    if (!match) {
+      return null;
+    }
+
+    return {
+      stopId: match.item.id,
+      stopName: match.item.name,
+      routeId: match.item.route.id,
+      routeName: match.item.route.name,
+      distanceKm: Math.round(match.distanceKm * 100) / 100,
+    };
   }
 
   // Get pending location change requests for a company
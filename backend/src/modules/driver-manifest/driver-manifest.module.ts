@@ -0,0 +1,10 @@
+import { Module } from '@nestjs/common';
+import { DriverManifestService } from './driver-manifest.service';
+import { PrismaModule } from '../../prisma/prisma.module';
+
+@Module({
+  imports: [PrismaModule],
+  providers: [DriverManifestService],
+  exports: [DriverManifestService],
+})
+export class DriverManifestModule {}
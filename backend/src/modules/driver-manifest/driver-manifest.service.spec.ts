@@ -0,0 +1,115 @@
+import { Test, TestingModule } from '@nestjs/testing';
+import { DriverManifestService } from './driver-manifest.service';
+import { PrismaService } from '../../prisma/prisma.service';
+
+const store = new Map<string, string>();
+
+jest.mock('ioredis', () => ({
+  Redis: jest.fn().mockImplementation(() => ({
+    get: async (key: string) => store.get(key) ?? null,
+    getBuffer: async (key: string) => (store.has(key) ? Buffer.from(store.get(key)) : null),
+    setex: async (key: string, _ttl: number, value: string) => {
+      store.set(key, value);
+      return 'OK';
+    },
+    del: async (key: string) => (store.delete(key) ? 1 : 0),
+    quit: jest.fn().mockResolvedValue('OK'),
+  })),
+}));
+
+describe('DriverManifestService', () => {
+  let service: DriverManifestService;
+  let tripFindUnique: jest.Mock;
+  let locationFindFirst: jest.Mock;
+
+  const child = (id: string) => ({ id, firstName: id, lastName: 'Doe', parentId: `parent-${id}` });
+  const trip = {
+    id: 'trip-1',
+    busId: 'bus-1',
+    routeId: 'route-1',
+    driverId: 'driver-1',
+    status: 'IN_PROGRESS',
+    startTime: null,
+    endTime: null,
+    bus: { id: 'bus-1', plateNumber: 'GR-1', capacity: 40 },
+    route: { id: 'route-1', name: 'Route A', shift: 'MORNING', stops: [] },
+    attendances: [
+      { id: 'a1', childId: 'c1', status: 'PENDING', timestamp: new Date(0), child: child('c1') },
+      { id: 'a2', childId: 'c2', status: 'PENDING', timestamp: new Date(0), child: child('c2') },
+      { id: 'a3', childId: 'c3', status: 'PENDING', timestamp: new Date(0), child: child('c3') },
+    ],
+    exceptions: [{ childId: 'c2' }],
+    earlyPickupRequests: [{ childId: 'c3' }],
+  };
+
+  beforeEach(async () => {
+    store.clear();
+    tripFindUnique = jest.fn().mockResolvedValue(trip);
+    locationFindFirst = jest
+      .fn()
+      .mockResolvedValue({ latitude: 5.6, longitude: -0.19, speed: 20, timestamp: new Date(0) });
+
+    const module: TestingModule = await Test.createTestingModule({
+      providers: [
+        DriverManifestService,
+        {
+          provide: PrismaService,
+          useValue: {
+            trip: {
+              findMany: jest.fn().mockResolvedValue([{ id: 'trip-1', status: 'IN_PROGRESS' }]),
+              findUnique: tripFindUnique,
+            },
+            busLocation: {
+              findFirst: locationFindFirst,
+            },
+          },
+        },
+      ],
+    }).compile();
+
+    service = module.get<DriverManifestService>(DriverManifestService);
+  });
+
+  it('should leave out skipped children and pending early pickups', async () => {
+    const { manifest, currentLocation } = await service.getTodayManifest('driver-1');
+
+    expect(manifest.attendances.map((attendance) => attendance.childId)).toEqual(['c1']);
+    expect(currentLocation).toEqual({ latitude: 5.6, longitude: -0.19, speed: 20, timestamp: new Date(0).toISOString() });
+    expect(manifest).not.toHaveProperty('exceptions');
+    expect(manifest).not.toHaveProperty('currentLocation');
+  });
+
+  it('should serve repeat polls from the cache with the same ETag', async () => {
+    const first = await service.getTodayManifest('driver-1');
+    const second = await service.getTodayManifest('driver-1');
+
+    expect(tripFindUnique).toHaveBeenCalledTimes(1);
+    expect(second.etag).toBe(first.etag);
+    expect(first.etag).toBe(`"${first.manifest.version}"`);
+  });
+
+  it('should rebuild after invalidation and keep the ETag if nothing changed', async () => {
+    const first = await service.getTodayManifest('driver-1');
+    await service.invalidate('trip-1');
+    const unchanged = await service.getTodayManifest('driver-1');
+
+    tripFindUnique.mockResolvedValueOnce({ ...trip, status: 'ARRIVED_SCHOOL' });
+    await service.invalidate('trip-1');
+    const changed = await service.getTodayManifest('driver-1');
+
+    expect(tripFindUnique).toHaveBeenCalledTimes(3);
+    expect(unchanged.etag).toBe(first.etag);
+    expect(changed.etag).not.toBe(first.etag);
+  });
+
+  it('should read the live position on every poll without changing the ETag', async () => {
+    const first = await service.getTodayManifest('driver-1');
+    locationFindFirst.mockResolvedValueOnce({ latitude: 5.7, longitude: -0.2, speed: 35, timestamp: new Date(60_000) });
+    const moved = await service.getTodayManifest('driver-1');
+
+    expect(tripFindUnique).toHaveBeenCalledTimes(1);
+    expect(moved.etag).toBe(first.etag);
+    expect(moved.currentLocation).toEqual({ latitude: 5.7, longitude: -0.2, speed: 35, timestamp: new Date(60_000).toISOString() });
+    expect(JSON.parse(store.get('driver_manifest:trip-1'))).not.toHaveProperty('currentLocation');
+  });
+});
@@ -0,0 +1,236 @@
+import { Injectable, Logger, OnModuleDestroy } from '@nestjs/common';
+import { Redis } from 'ioredis';
+import { createHash } from 'crypto';
+import { PrismaService } from '../../prisma/prisma.service';
+import { decodeLocation } from '../gps/location-codec';
+
+export interface DriverManifest {
+  id: string;
+  busId: string;
+  routeId: string;
+  driverId: string;
+  status: string;
+  startTime: Date | null;
+  endTime: Date | null;
+  bus: { id: string; plateNumber: string; capacity: number };
+  route: {
+    id: string;
+    name: string;
+    shift: string | null;
+    stops: Array<{ id: string; name: string; latitude: number; longitude: number; order: number }>;
+  };
+  attendances: Array<{
+    id: string;
+    childId: string;
+    status: string;
+    timestamp: Date;
+    child: Record<string, any>;
+  }>;
+  version: string;
+}
+
+export interface BusPosition {
+  latitude: number;
+  longitude: number;
+  speed: number;
+  timestamp: string;
+}
+
+export interface VersionedManifest {
+  manifest: DriverManifest;
+  etag: string;
+  // Read fresh on every call; not part of the cached manifest or its ETag
+  currentLocation: BusPosition | null;
+}
+
+/**
+ * Compact trip manifest for the driver app: the trip, its ordered stops and
+ * the children to pick up (minus skips and pending early pickups) with only
+ * the fields the app shows. The bus's latest position is looked up on every
+ * call and returned next to the manifest.
+ *
+ * Manifests are built with a single Prisma query and cached per trip. The
+ * ETag is a hash of the content, so a rebuild that changes nothing still
+ * answers 304. Services that change a trip's status, attendance, skips or
+ * early pickups call invalidate(tripId); child and stop edits are picked up
+ * when the cache entry expires.
+ */
+@Injectable()
+export class DriverManifestService implements OnModuleDestroy {
+  private readonly logger = new Logger(DriverManifestService.name);
+  private readonly redis: Redis;
+
+  private readonly MANIFEST_TTL_SECONDS = 5 * 60;
+
+  constructor(private prisma: PrismaService) {
+    this.redis = new Redis(process.env.REDIS_URL);
+  }
+
+  async onModuleDestroy() {
+    await this.redis.quit().catch(() => undefined);
+  }
+
+  /**
+   * The driver's current trip: an IN_PROGRESS trip if there is one,
+   * otherwise today's first trip that isn't completed
+   */
+  async getTodayManifest(driverId: string): Promise<VersionedManifest | null> {
+    const tripId = await this.findTodayTripId(driverId);
+    if (!tripId) return null;
+
+    const versioned = await this.getVersionedManifest(tripId);
+    if (!versioned) return null;
+
+    return {
+      ...versioned,
+      currentLocation: await this.getLatestPosition(versioned.manifest.busId),
+    };
+  }
+
+  private async getVersionedManifest(tripId: string): Promise<Omit<VersionedManifest, 'currentLocation'> | null> {
+    try {
+      const cached = await this.redis.get(this.cacheKey(tripId));
+      if (cached) {
+        return JSON.parse(cached);
+      }
+    } catch (error) {
+      this.logger.warn(`Manifest cache unavailable: ${error.message}`);
+    }
+
+    const versioned = await this.buildManifest(tripId);
+    if (versioned) {
+      this.redis
+        .setex(this.cacheKey(tripId), this.MANIFEST_TTL_SECONDS, JSON.stringify(versioned))
+        .catch(() => undefined);
+    }
+    return versioned;
+  }
+
+  async invalidate(tripId: string): Promise<void> {
+    await this.redis.del(this.cacheKey(tripId)).catch(() => undefined);
+  }
+
+  private async findTodayTripId(driverId: string): Promise<string | null> {
+    const today = new Date();
+    today.setHours(0, 0, 0, 0);
+    const tomorrow = new Date(today);
+    tomorrow.setDate(tomorrow.getDate() + 1);
+
+    const candidates = await this.prisma.trip.findMany({
+      where: {
+        driverId,
+        OR: [
+          { status: 'IN_PROGRESS' },
+          {
+            startTime: { gte: today, lt: tomorrow },
+            status: { notIn: ['COMPLETED'] },
+          },
+        ],
+      },
+      select: { id: true, status: true },
+      orderBy: { startTime: 'asc' },
+    });
+
+    const active = candidates.find((trip) => trip.status === 'IN_PROGRESS');
+    return (active || candidates[0])?.id ?? null;
+  }
+
+  private async buildManifest(tripId: string): Promise<Omit<VersionedManifest, 'currentLocation'> | null> {
+    const trip = await this.prisma.trip.findUnique({
+      where: { id: tripId },
+      select: {
+        id: true,
+        busId: true,
+        routeId: true,
+        driverId: true,
+        status: true,
+        startTime: true,
+        endTime: true,
+        bus: { select: { id: true, plateNumber: true, capacity: true } },
+        route: {
+          select: {
+            id: true,
+            name: true,
+            shift: true,
+            stops: {
+              select: { id: true, name: true, latitude: true, longitude: true, order: true },
+              orderBy: { order: 'asc' },
+            },
+          },
+        },
+        attendances: {
+          select: {
+            id: true,
+            childId: true,
+            status: true,
+            timestamp: true,
+            child: {
+              select: {
+                id: true,
+                firstName: true,
+                lastName: true,
+                parentId: true,
+                pickupType: true,
+                pickupLatitude: true,
+                pickupLongitude: true,
+                pickupDescription: true,
+                homeAddress: true,
+                homeLatitude: true,
+                homeLongitude: true,
+                colorCode: true,
+                allergies: true,
+                specialInstructions: true,
+              },
+            },
+          },
+          orderBy: { childId: 'asc' },
+        },
+        exceptions: { where: { status: 'ACTIVE' }, select: { childId: true } },
+        earlyPickupRequests: { where: { status: 'PENDING' }, select: { childId: true } },
+      },
+    });
+
+    if (!trip) return null;
+
+    // Children with an active skip or a pending early pickup aren't picked up
+    const exempted = new Set([
+      ...trip.exceptions.map((exception) => exception.childId),
+      ...trip.earlyPickupRequests.map((request) => request.childId),
+    ]);
+
+    const { exceptions, earlyPickupRequests, ...rest } = trip;
+    const content = {
+      ...rest,
+      attendances: trip.attendances.filter((attendance) => !exempted.has(attendance.childId)),
+    };
+
+    const version = createHash('sha1').update(JSON.stringify(content)).digest('base64url').slice(0, 22);
+    return {
+      manifest: { ...content, version },
+      etag: `"${version}"`,
+    };
+  }
+
+  private async getLatestPosition(busId: string): Promise<BusPosition | null> {
+    try {
+      const live = await this.redis.getBuffer(`bus:${busId}:location`);
+      if (live) {
+        const { latitude, longitude, speed, timestamp } = decodeLocation(live);
+        return { latitude, longitude, speed, timestamp };
+      }
+    } catch (error) {
+      this.logger.warn(`Live location unavailable for bus ${busId}: ${error.message}`);
+    }
+
+    const last = await this.prisma.busLocation.findFirst({
+      where: { busId },
+      orderBy: { timestamp: 'desc' },
+      select: { latitude: true, longitude: true, speed: true, timestamp: true },
+    });
+    return last ? { ...last, timestamp: last.timestamp.toISOString() } : null;
+  }
+
+  private cacheKey(tripId: string): string {
+    return `driver_manifest:${tripId}`;
+  }
+}
@@ -1,12 +1,16 @@
-import { Controller, Get, Post, Body, Patch, Param, Delete, UseGuards } from '@nestjs/common';
+import { Controller, Get, Post, Body, Patch, Param, Delete, UseGuards, Headers, Res, HttpStatus, Query, Logger } from '@nestjs/common';
+import { Response } from 'express';
 import { DriversService } from './drivers.service';
 import { Roles } from '../roles/roles.decorator';
 import { RolesGuard } from '../roles/roles.guard';
 import { JwtAuthGuard } from '../auth/jwt-auth.guard';
+import { PageQueryDto } from '../../common/pagination/pagination';
 
 @Controller('drivers')
 @UseGuards(JwtAuthGuard, RolesGuard)
 export class DriversController {
+  private readonly logger = new Logger(DriversController.name);
+
   constructor(private readonly driversService: DriversService) {}
 
   @Post()
@@ -17,24 +21,36 @@ export class DriversController {
 
   @Get()
   @Roles('PLATFORM_ADMIN', 'COMPANY_ADMIN')
-  findAll() {
-    return this.driversService.findAll();
+  findAll(@Query() query: PageQueryDto) {
+    return this.driversService.findAll(query);
   }
 
   @Get(':id/today-trip')
   @Roles('DRIVER')
-  async getTodayTrip(@Param('id') userId: string) {
-    console.log('[DriversController] getTodayTrip called with userId:', userId);
+  async getTodayTrip(
+    @Param('id') userId: string,
+    @Headers('if-none-match') ifNoneMatch: string | undefined,
+    @Res({ passthrough: true }) res: Response,
+  ) {
     // Find the driver record by user ID
     const driver = await this.driversService.findByUserId(userId);
-    console.log('[DriversController] Found driver:', driver);
     if (!driver) {
-      console.log('[DriversController] No driver found for userId:', userId);
+      this.logger.debug(`No driver found for userId ${userId}`);
       return null;
     }
-    const trip = await this.driversService.getTodayTrip(driver.id);
-    console.log('[DriversController] Found trip:', trip);
-    return trip;
+
+    const today = await this.driversService.getTodayTrip(driver.id);
+    if (!today) return null;
+
+    // The app polls with If-None-Match and gets 304 until the manifest changes.
+    // The ETag covers the manifest only; the live position rides alongside it.
+    res.setHeader('ETag', today.etag);
+    res.setHeader('Cache-Control', 'private, no-cache');
+    if (ifNoneMatch && ifNoneMatch.split(/\s*,\s*/).some((tag) => tag.replace(/^W\//, '') === today.etag)) {
+      res.status(HttpStatus.NOT_MODIFIED);
+      return;
+    }
+    return { ...today.manifest, currentLocation: today.currentLocation };
   }
 
   @Get(':id')
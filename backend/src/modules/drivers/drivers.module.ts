@@ -2,9 +2,10 @@ import { Module } from '@nestjs/common';
 import { DriversService } from './drivers.service';
 import { DriversController } from './drivers.controller';
 import { PrismaModule } from '../../prisma/prisma.module';
+import { DriverManifestModule } from '../driver-manifest/driver-manifest.module';
 
 @Module({
-  imports: [PrismaModule],
+  imports: [PrismaModule, DriverManifestModule],
   controllers: [DriversController],
   providers: [DriversService],
   exports: [DriversService],
@@ -1,11 +1,29 @@
 import { Injectable, BadRequestException } from '@nestjs/common';
 import { PrismaService } from '../../prisma/prisma.service';
-import { Driver } from '@prisma/client';
-import * as bcrypt from 'bcrypt';
+import { Driver, Prisma } from '@prisma/client';
+import { hashPassword } from '../../common/crypto/bcrypt-pool';
+import { DriverManifestService, VersionedManifest } from '../driver-manifest/driver-manifest.service';
+import { Page, PageQueryDto, findPage, scalarSelect, selectFields } from '../../common/pagination/pagination';
+
+const DRIVER_LIST_SELECT = {
+  ...scalarSelect(Prisma.DriverScalarFieldEnum),
+  user: {
+    select: {
+      firstName: true,
+      lastName: true,
+      email: true,
+      phone: true,
+    },
+  },
+  buses: true,
+};
 
 @Injectable()
 export class DriversService {
-  constructor(private prisma: PrismaService) {}
+  constructor(
+    private prisma: PrismaService,
+    private driverManifest: DriverManifestService,
+  ) {}
 
   async findOne(id: string): Promise<Driver | null> {
     return this.prisma.driver.findUnique({
@@ -64,7 +82,7 @@ export class DriversService {
     }
 
     // Hash password
-    const passwordHash = await bcrypt.hash(password, 10);
+    const passwordHash = await hashPassword(password, 10);
 
     // Create user and driver in transaction
     return this.prisma.$transaction(async (tx) => {
@@ -99,20 +117,13 @@ export class DriversService {
     });
   }
 
-  async findAll(): Promise<any[]> {
-    return this.prisma.driver.findMany({
-      include: {
-        user: {
-          select: {
-            firstName: true,
-            lastName: true,
-            email: true,
-            phone: true,
-          },
-        },
-        buses: true,
-      },
-    });
+  async findAll(query: PageQueryDto = {}): Promise<Page<any> | any[]> {
+    return findPage(
+      (args) => this.prisma.driver.findMany(args),
+      {},
+      selectFields(query.fields, DRIVER_LIST_SELECT),
+      query,
+    );
   }
 
   async remove(id: string): Promise<Driver> {
@@ -137,115 +148,10 @@ export class DriversService {
     });
   }
 
-  async getTodayTrip(driverId: string): Promise<any> {
-    const today = new Date();
-    today.setHours(0, 0, 0, 0);
-    const tomorrow = new Date(today);
-    tomorrow.setDate(tomorrow.getDate() + 1);
-
-    // Priority 1: Find any IN_PROGRESS trip for this driver (active trip)
-    let trip = await this.prisma.trip.findFirst({
-      where: {
-        driverId,
-        status: 'IN_PROGRESS',
-      },
-      include: {
-        bus: {
-          include: {
-            locations: true,
-          },
-        },
-        route: {
-          include: {
-            stops: true,
-          },
-        },
-        attendances: {
-          include: {
-            child: true,
-          },
-        },
-      },
-    });
-
-    // Priority 2: If no IN_PROGRESS trip, look for today's SCHEDULED trips (not COMPLETED)
-    if (!trip) {
-      trip = await this.prisma.trip.findFirst({
-        where: {
-          driverId,
-          startTime: {
-            gte: today,
-            lt: tomorrow,
-          },
-          status: {
-            notIn: ['COMPLETED'], // Exclude completed trips to show next available trip
-          },
-        },
-        include: {
-          bus: {
-            include: {
-              locations: true,
-            },
-          },
-          route: {
-            include: {
-              stops: true,
-            },
-          },
-          attendances: {
-            include: {
-              child: true,
-            },
-          },
-        },
-      });
-    }
-
-    // If no trip found, return null
-    if (!trip) return null;
-
-    // Filter out children with pending parent pickup requests or trip exceptions
-    if (trip.attendances && trip.attendances.length > 0) {
-      const childIds = trip.attendances.map((a: any) => a.childId);
-
-      // Get all pending parent pickup requests for this trip
-      const pickupRequests = await this.prisma.earlyPickupRequest.findMany({
-        where: {
-          tripId: trip.id,
-          status: 'PENDING',
-          childId: { in: childIds },
-        },
-        select: { childId: true },
-      });
-
-      // Get all trip exceptions (skips) for this trip
-      const tripExceptions = await this.prisma.tripException.findMany({
-        where: {
-          tripId: trip.id,
-          status: 'ACTIVE',
-          childId: { in: childIds },
-        },
-        select: { childId: true },
-      });
-
-      const exemptedChildIds = new Set();
-
-      // Add children with pending pickup requests to exempted list
-      pickupRequests.forEach((req: any) => {
-        exemptedChildIds.add(req.childId);
-      });
-
-      // Add children with trip exceptions to exempted list
-      tripExceptions.forEach((exc: any) => {
-        exemptedChildIds.add(exc.childId);
-      });
-
-      // Filter attendances to exclude exempted children
-      trip.attendances = trip.attendances.filter(
-        (attendance: any) => !exemptedChildIds.has(attendance.childId)
-      );
-    }
-
-    return trip;
+  /**
+   * Today's trip manifest for a driver, with its ETag (see DriverManifestService)
+   */
+  async getTodayTrip(driverId: string): Promise<VersionedManifest | null> {
+    return this.driverManifest.getTodayManifest(driverId);
   }
 }
\ No newline at end of file
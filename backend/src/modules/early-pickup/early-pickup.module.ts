@@ -3,9 +3,10 @@ import { EarlyPickupRequestsService } from './early-pickup.service';
 import { EarlyPickupController } from './early-pickup.controller';
 import { PrismaModule } from '../../prisma/prisma.module';
 import { RealtimeModule } from '../realtime/realtime.module';
+import { DriverManifestModule } from '../driver-manifest/driver-manifest.module';
 
 @Module({
-  imports: [PrismaModule, RealtimeModule],
+  imports: [PrismaModule, RealtimeModule, DriverManifestModule],
   controllers: [EarlyPickupController],
   providers: [EarlyPickupRequestsService],
   exports: [EarlyPickupRequestsService],
@@ -2,11 +2,13 @@ import { Injectable, Optional } from '@nestjs/common';
 import { PrismaService } from '../../prisma/prisma.service';
 import { RequestStatus } from '@prisma/client';
 import { RealtimeGateway } from '../realtime/realtime.gateway';
+import { DriverManifestService } from '../driver-manifest/driver-manifest.service';
 
 @Injectable()
 export class EarlyPickupRequestsService {
   constructor(
     private prisma: PrismaService,
+    private driverManifest: DriverManifestService,
     @Optional() private realtimeGateway?: RealtimeGateway,
   ) {}
 
@@ -44,6 +46,7 @@ export class EarlyPickupRequestsService {
         },
       },
     });
+    await this.driverManifest.invalidate(tripId);
 
     // Notify driver via WebSocket
     if (this.realtimeGateway) {
@@ -76,6 +79,7 @@ export class EarlyPickupRequestsService {
         requestedByUser: true,
       },
     });
+    await this.driverManifest.invalidate(request.tripId);
 
     // Notify parent
     if (this.realtimeGateway) {
@@ -103,6 +107,7 @@ export class EarlyPickupRequestsService {
         requestedByUser: true,
       },
     });
+    await this.driverManifest.invalidate(request.tripId);
 
     // Notify parent
     if (this.realtimeGateway) {
@@ -128,12 +133,14 @@ export class EarlyPickupRequestsService {
       throw new Error('Cannot cancel this request');
     }
 
-    return this.prisma.earlyPickupRequest.update({
+    const cancelled = await this.prisma.earlyPickupRequest.update({
       where: { id: requestId },
       data: {
         status: RequestStatus.CANCELLED,
       },
     });
+    await this.driverManifest.invalidate(request.tripId);
+    return cancelled;
   }
 
   // Get pending requests for a trip
@@ -0,0 +1,138 @@
+import { Test, TestingModule } from '@nestjs/testing';
+import { GpsIngestionService } from './gps-ingestion.service';
+import { PrismaService } from '../../prisma/prisma.service';
+
+const counters = new Map<string, number>();
+
+jest.mock('ioredis', () => ({
+  Redis: jest.fn().mockImplementation(() => ({
+    pipeline: () => {
+      const ops: Array<() => [null, any]> = [];
+      const chain = {
+        setex: () => {
+          ops.push(() => [null, 'OK']);
+          return chain;
+        },
+        incr: (key: string) => {
+          ops.push(() => {
+            const next = (counters.get(key) || 0) + 1;
+            counters.set(key, next);
+            return [null, next];
+          });
+          return chain;
+        },
+        exec: async () => ops.map((op) => op()),
+      };
+      return chain;
+    },
+    quit: jest.fn().mockResolvedValue('OK'),
+  })),
+}));
+
+describe('GpsIngestionService', () => {
+  let service: GpsIngestionService;
+  let createMany: jest.Mock;
+  let findUnique: jest.Mock;
+
+  const ping = (busId: string) => ({
+    busId,
+    latitude: 5.6037,
+    longitude: -0.187,
+    speed: 30,
+    timestamp: new Date(),
+  });
+
+  beforeEach(async () => {
+    counters.clear();
+    createMany = jest.fn().mockResolvedValue({ count: 0 });
+    findUnique = jest.fn().mockResolvedValue({ companyId: 'company-1', driver: null });
+
+    const module: TestingModule = await Test.createTestingModule({
+      providers: [
+        GpsIngestionService,
+        {
+          provide: PrismaService,
+          useValue: { busLocation: { createMany }, bus: { findUnique } },
+        },
+      ],
+    }).compile();
+
+    service = module.get<GpsIngestionService>(GpsIngestionService);
+  });
+
+  it('should only queue every fifth heartbeat per bus', async () => {
+    const results = [];
+    for (let i = 0; i < 10; i++) {
+      results.push(await service.ingest(ping('bus-1')));
+    }
+
+    expect(results.filter((r) => r.snapshot).length).toBe(2);
+    expect(results[4].heartbeatCount).toBe(5);
+    expect(results[4].snapshot.id).toBeTruthy();
+    expect(service.pendingCount).toBe(2);
+    expect(createMany).not.toHaveBeenCalled();
+  });
+
+  it('should persist buffered snapshots in one createMany on flush', async () => {
+    for (let i = 0; i < 5; i++) {
+      await service.ingest(ping('bus-1'));
+      await service.ingest(ping('bus-2'));
+    }
+
+    await service.flush();
+
+    expect(createMany).toHaveBeenCalledTimes(1);
+    expect(createMany.mock.calls[0][0].data).toHaveLength(2);
+    expect(service.pendingCount).toBe(0);
+  });
+
+  it('should stamp snapshots with the bus company, looked up once per bus', async () => {
+    for (let i = 0; i < 10; i++) {
+      await service.ingest(ping('bus-1'));
+    }
+    for (let i = 0; i < 5; i++) {
+      await service.ingest({ ...ping('bus-2'), companyId: 'company-2' });
+    }
+
+    await service.flush();
+
+    const rows = createMany.mock.calls[0][0].data;
+    expect(rows.map((r) => r.companyId)).toEqual(['company-1', 'company-1', 'company-2']);
+    expect(findUnique).toHaveBeenCalledTimes(1);
+  });
+
+  it('should keep failed snapshots for a later flush', async () => {
+    createMany.mockRejectedValueOnce(new Error('pool exhausted'));
+    for (let i = 0; i < 5; i++) {
+      await service.ingest(ping('bus-1'));
+    }
+
+    await service.flush();
+    expect(service.pendingCount).toBe(1);
+
+    await service.flush();
+    expect(createMany).toHaveBeenCalledTimes(2);
+    expect(service.pendingCount).toBe(0);
+  });
+
+  it('should not queue snapshots from a device clock more than a day off', async () => {
+    const results = [];
+    for (let i = 0; i < 5; i++) {
+      results.push(await service.ingest({ ...ping('bus-1'), timestamp: new Date(Date.now() - 3 * 24 * 60 * 60 * 1000) }));
+    }
+
+    expect(results[4].heartbeatCount).toBe(5);
+    expect(results[4].snapshot).toBeNull();
+    expect(service.pendingCount).toBe(0);
+  });
+
+  it('should flush on shutdown', async () => {
+    for (let i = 0; i < 5; i++) {
+      await service.ingest(ping('bus-1'));
+    }
+
+    await service.onModuleDestroy();
+
+    expect(createMany).toHaveBeenCalledTimes(1);
+  });
+});
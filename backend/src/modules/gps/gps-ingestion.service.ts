@@ -0,0 +1,231 @@
+import { Injectable, Logger, OnModuleDestroy, OnModuleInit } from '@nestjs/common';
+import { Prisma } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { randomUUID } from 'crypto';
+import { PrismaService } from '../../prisma/prisma.service';
+import { gpsPointsIngested, gpsPointsPersisted } from '../metrics/metrics';
+import { LiveLocation, encodeLocation } from './location-codec';
+
+export interface GpsPoint {
+  busId: string;
+  latitude: number;
+  longitude: number;
+  speed: number;
+  heading?: number;
+  accuracy?: number;
+  timestamp: Date;
+  // Company the bus belongs to; looked up (and cached) when omitted
+  companyId?: string | null;
+}
+
+export interface IngestResult {
+  heartbeatCount: number;
+  // Row queued for persistence on this heartbeat, if any
+  snapshot: Prisma.BusLocationCreateManyInput | null;
+}
+
+interface PendingRow {
+  row: Prisma.BusLocationCreateManyInput;
+  attempts: number;
+}
+
+/**
+ * Single entry point for GPS pings from both the REST heartbeat endpoint and
+ * the realtime gateway.
+ *
+ * Each ping costs one pipelined Redis round-trip: the live location is cached
+ * (in the compact location encoding) and the per-bus heartbeat counter is
+ * incremented. Because the counter lives
+ * in Redis, every backend instance samples the same pings. Every Nth
+ * heartbeat is queued in a write-behind buffer. The buffer is flushed with
+ * `createMany` when it reaches the batch size or when the flush interval
+ * elapses, whichever comes first. Rows are stamped with the bus's company
+ * here rather than by a per-row database trigger, so the hot insert path
+ * does no lookups in Postgres.
+ */
+@Injectable()
+export class GpsIngestionService implements OnModuleInit, OnModuleDestroy {
+  private readonly logger = new Logger(GpsIngestionService.name);
+  private readonly redis: Redis;
+
+  private readonly HEARTBEAT_THRESHOLD = 5; // Save to DB every 5 heartbeats
+  private readonly LOCATION_TTL_SECONDS = 300;
+  private readonly MAX_FLUSH_ATTEMPTS = 3;
+  // BusLocation has no default partition, so only days with a partition
+  // (yesterday through the days created ahead) can be stored
+  private readonly MAX_CLOCK_SKEW_MS = 24 * 60 * 60 * 1000;
+  private readonly batchSize = parseInt(process.env.GPS_FLUSH_BATCH_SIZE || '500', 10);
+  private readonly flushIntervalMs = parseInt(process.env.GPS_FLUSH_INTERVAL_MS || '2000', 10);
+  private readonly maxBuffered = parseInt(process.env.GPS_MAX_BUFFERED || '20000', 10);
+  private readonly BUS_COMPANY_TTL_MS = 5 * 60 * 1000;
+  private readonly busCompanyCache = new Map<string, { companyId: string | null; expiresAt: number }>();
+
+  private buffer: PendingRow[] = [];
+  private flushing: Promise<void> | null = null;
+  private flushTimer: NodeJS.Timeout | null = null;
+  // Only used while Redis is unreachable
+  private readonly fallbackCounter = new Map<string, number>();
+
+  constructor(private prisma: PrismaService) {
+    this.redis = new Redis(process.env.REDIS_URL);
+  }
+
+  onModuleInit() {
+    this.flushTimer = setInterval(() => {
+      this.flush().catch(() => undefined);
+    }, this.flushIntervalMs);
+    this.flushTimer.unref();
+  }
+
+  async onModuleDestroy() {
+    if (this.flushTimer) {
+      clearInterval(this.flushTimer);
+      this.flushTimer = null;
+    }
+    await this.flush();
+    if (this.buffer.length > 0) {
+      this.logger.error(`Dropping ${this.buffer.length} unflushed GPS snapshots on shutdown`);
+    }
+    await this.redis.quit().catch(() => undefined);
+  }
+
+  async ingest(point: GpsPoint): Promise<IngestResult> {
+    gpsPointsIngested.inc();
+    const heartbeatCount = await this.cacheAndCount(point);
+
+    if (heartbeatCount % this.HEARTBEAT_THRESHOLD !== 0) {
+      return { heartbeatCount, snapshot: null };
+    }
+
+    if (Math.abs(point.timestamp.getTime() - Date.now()) > this.MAX_CLOCK_SKEW_MS) {
+      this.logger.warn(`Not storing snapshot for bus ${point.busId}: device clock reads ${point.timestamp.toISOString()}`);
+      return { heartbeatCount, snapshot: null };
+    }
+
+    // Backpressure: wait for the in-flight flush before growing the buffer
+    // further. If the database still cannot keep up, shed the snapshot. The
+    // live position in Redis is unaffected.
+    if (this.buffer.length >= this.maxBuffered) {
+      await this.flush();
+      if (this.buffer.length >= this.maxBuffered) {
+        this.logger.warn(`GPS write buffer full (${this.buffer.length}), dropping snapshot for bus ${point.busId}`);
+        return { heartbeatCount, snapshot: null };
+      }
+    }
+
+    const companyId = point.companyId !== undefined ? point.companyId : await this.resolveBusCompanyId(point.busId);
+    const snapshot: Prisma.BusLocationCreateManyInput = {
+      id: randomUUID(),
+      busId: point.busId,
+      companyId,
+      latitude: point.latitude,
+      longitude: point.longitude,
+      speed: point.speed,
+      timestamp: point.timestamp,
+    };
+    this.buffer.push({ row: snapshot, attempts: 0 });
+
+    if (this.buffer.length >= this.batchSize) {
+      this.flush().catch(() => undefined);
+    }
+
+    return { heartbeatCount, snapshot };
+  }
+
+  get pendingCount(): number {
+    return this.buffer.length;
+  }
+
+  /**
+   * Persist everything currently buffered. Concurrent callers share the
+   * same in-flight flush.
+   */
+  flush(): Promise<void> {
+    if (this.flushing) {
+      return this.flushing;
+    }
+    if (this.buffer.length === 0) {
+      return Promise.resolve();
+    }
+    this.flushing = this.drain().finally(() => {
+      this.flushing = null;
+    });
+    return this.flushing;
+  }
+
+  private async drain() {
+    while (this.buffer.length > 0) {
+      const batch = this.buffer.splice(0, this.batchSize);
+      try {
+        await this.prisma.busLocation.createMany({ data: batch.map((p) => p.row) });
+        gpsPointsPersisted.inc(undefined, batch.length);
+      } catch (error) {
+        const retry = batch.filter((p) => ++p.attempts < this.MAX_FLUSH_ATTEMPTS);
+        const dropped = batch.length - retry.length;
+        this.buffer.unshift(...retry);
+        this.logger.error(
+          `Failed to flush ${batch.length} GPS snapshots (${dropped} dropped after ${this.MAX_FLUSH_ATTEMPTS} attempts): ${error.message}`,
+        );
+        // Leave the rest for the next tick rather than hammering the database
+        return;
+      }
+    }
+  }
+
+  // Same rule as the BusCompany view: the bus's own company, else its driver's
+  private async resolveBusCompanyId(busId: string): Promise<string | null> {
+    const cached = this.busCompanyCache.get(busId);
+    if (cached && cached.expiresAt > Date.now()) {
+      return cached.companyId;
+    }
+
+    let companyId: string | null = null;
+    try {
+      const bus = await this.prisma.bus.findUnique({
+        where: { id: busId },
+        select: {
+          companyId: true,
+          driver: { select: { user: { select: { companyId: true } } } },
+        },
+      });
+      companyId = bus?.companyId || bus?.driver?.user?.companyId || null;
+    } catch (error) {
+      // Store the snapshot unstamped rather than lose it
+      this.logger.warn(`Failed to resolve company for bus ${busId}: ${error.message}`);
+      return null;
+    }
+
+    this.busCompanyCache.set(busId, { companyId, expiresAt: Date.now() + this.BUS_COMPANY_TTL_MS });
+    return companyId;
+  }
+
+  private async cacheAndCount(point: GpsPoint): Promise<number> {
+    const locationData: LiveLocation = {
+      busId: point.busId,
+      latitude: point.latitude,
+      longitude: point.longitude,
+      speed: point.speed,
+      heading: point.heading,
+      accuracy: point.accuracy,
+      timestamp: point.timestamp.toISOString(),
+    };
+
+    try {
+      const results = await this.redis
+        .pipeline()
+        .setex(`bus:${point.busId}:location`, this.LOCATION_TTL_SECONDS, encodeLocation(locationData))
+        .incr(`bus:${point.busId}:heartbeat_count`)
+        .exec();
+      const [incrError, count] = results[1];
+      if (incrError) {
+        throw incrError;
+      }
+      return count as number;
+    } catch (error) {
+      this.logger.warn(`Redis unavailable, counting heartbeats locally: ${error.message}`);
+      const count = (this.fallbackCounter.get(point.busId) || 0) + 1;
+      this.fallbackCounter.set(point.busId, count);
+      return count;
+    }
+  }
+}
@@ -1,5 +1,6 @@
-import { Controller, Post, Body, Get, Param, UseGuards } from '@nestjs/common';
+import { Controller, Post, Body, Get, Param, Query, UseGuards, Req } from '@nestjs/common';
 import { GpsService } from './gps.service';
+import { LocationHistoryService } from './location-history.service';
 import { Roles } from '../roles/roles.decorator';
 import { RolesGuard } from '../roles/roles.guard';
 import { JwtAuthGuard } from '../auth/jwt-auth.guard';
@@ -15,7 +16,10 @@ class HeartbeatDto {
 @Controller('gps')
 @UseGuards(JwtAuthGuard, RolesGuard)
 export class GpsController {
-  constructor(private readonly gpsService: GpsService) {}
+  constructor(
+    private readonly gpsService: GpsService,
+    private readonly locationHistory: LocationHistoryService,
+  ) {}
 
   @Post('heartbeat')
   @Roles('DRIVER')
@@ -40,4 +44,32 @@ export class GpsController {
   async getRecentLocations(@Param('busId') busId: string) {
     return this.gpsService.getRecentLocations(busId);
   }
-}
\ No newline at end of file
+
+  @Get('trajectory/:busId')
+  @Roles('PLATFORM_ADMIN', 'COMPANY_ADMIN', 'DRIVER')
+  async getTrajectory(
+    @Param('busId') busId: string,
+    @Req() req: any,
+    @Query('from') from: string,
+    @Query('to') to?: string,
+    @Query('tolerance') tolerance?: string,
+  ) {
+    await this.locationHistory.assertCanViewBus(req.user, busId);
+    return this.locationHistory.getTrajectory(
+      busId,
+      new Date(from),
+      to ? new Date(to) : new Date(),
+      tolerance ? parseFloat(tolerance) : undefined,
+    );
+  }
+
+  @Get('trips/:tripId/trajectory')
+  @Roles('PLATFORM_ADMIN', 'COMPANY_ADMIN', 'DRIVER', 'PARENT')
+  async getTripTrajectory(
+    @Param('tripId') tripId: string,
+    @Req() req: any,
+    @Query('tolerance') tolerance?: string,
+  ) {
+    return this.locationHistory.getTripTrajectory(tripId, tolerance ? parseFloat(tolerance) : undefined, req.user);
+  }
+}
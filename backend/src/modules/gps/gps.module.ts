@@ -1,12 +1,14 @@
 import { Module } from '@nestjs/common';
 import { GpsService } from './gps.service';
+import { GpsIngestionService } from './gps-ingestion.service';
+import { LocationHistoryService } from './location-history.service';
 import { GpsController } from './gps.controller';
 import { PrismaModule } from '../../prisma/prisma.module';
 
 @Module({
   imports: [PrismaModule],
   controllers: [GpsController],
-  providers: [GpsService],
-  exports: [GpsService],
+  providers: [GpsService, GpsIngestionService, LocationHistoryService],
+  exports: [GpsService, GpsIngestionService, LocationHistoryService],
 })
 export class GpsModule {}
\ No newline at end of file
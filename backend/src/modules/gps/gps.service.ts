@@ -2,13 +2,17 @@ import { Injectable } from '@nestjs/common';
 import { PrismaService } from '../../prisma/prisma.service';
 import { BusLocation } from '@prisma/client';
 import { Redis } from 'ioredis';
+import { GpsIngestionService } from './gps-ingestion.service';
+import { decodeLocation } from './location-codec';
 
 @Injectable()
 export class GpsService {
   private readonly redis: Redis;
-  private readonly HEARTBEAT_THRESHOLD = 5; // Save to DB every 5 heartbeats
 
-  constructor(private prisma: PrismaService) {
+  constructor(
+    private prisma: PrismaService,
+    private gpsIngestion: GpsIngestionService,
+  ) {
     this.redis = new Redis(process.env.REDIS_URL);
   }
 
@@ -18,36 +22,12 @@ export class GpsService {
       throw new Error('Missing required GPS data');
     }
 
-    // Store in Redis for real-time access
-    const locationData = {
-      busId,
-      latitude,
-      longitude,
-      speed,
-      timestamp: timestamp.toISOString(),
-    };
-
-    await this.redis.setex(`bus:${busId}:location`, 300, JSON.stringify(locationData)); // Expire in 5 minutes
-
-    // Increment heartbeat counter
-    const heartbeatCount = await this.redis.incr(`bus:${busId}:heartbeat_count`);
-    
-    // Save to database every N heartbeats
-    if (heartbeatCount % this.HEARTBEAT_THRESHOLD === 0) {
-      return this.prisma.busLocation.create({
-        data: {
-          busId,
-          latitude,
-          longitude,
-          speed,
-          timestamp,
-        },
-      });
-    }
+    // Cache the live location and queue every Nth heartbeat for batched persistence
+    const { snapshot } = await this.gpsIngestion.ingest({ busId, latitude, longitude, speed, timestamp });
 
-    // Return a minimal response for non-snapshot heartbeats
+    // Snapshots carry the id they will be persisted under; other heartbeats get a minimal response
     return {
-      id: '',
+      id: snapshot ? snapshot.id : '',
       busId,
       latitude,
       longitude,
@@ -58,8 +38,8 @@ export class GpsService {
   }
 
   async getCurrentLocation(busId: string): Promise<any> {
-    const location = await this.redis.get(`bus:${busId}:location`);
-    return location ? JSON.parse(location) : null;
+    const location = await this.redis.getBuffer(`bus:${busId}:location`);
+    return location ? decodeLocation(location) : null;
   }
 
   async getRecentLocations(busId: string, limit: number = 10): Promise<BusLocation[]> {
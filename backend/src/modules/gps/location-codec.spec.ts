@@ -0,0 +1,46 @@
+import { decodeLocation, encodeLocation, resolveWireFormat } from './location-codec';
+
+describe('location codec', () => {
+  const location = {
+    busId: 'bus-1',
+    latitude: 5.6037123,
+    longitude: -0.1870456,
+    speed: 45.23,
+    heading: 270.4,
+    timestamp: '2026-10-17T10:00:00.123Z',
+  };
+  const now = Date.parse('2026-10-17T10:00:05Z');
+
+  it('round-trips at fixed-point precision in a fraction of the JSON size', () => {
+    const encoded = encodeLocation(location);
+
+    expect(encoded.length).toBeLessThan(JSON.stringify(location).length / 3);
+    expect(decodeLocation(encoded, now)).toEqual({
+      busId: 'bus-1',
+      latitude: 5.603712,
+      longitude: -0.187046,
+      speed: 45.2,
+      heading: 270,
+      timestamp: '2026-10-17T10:00:00.123Z',
+    });
+  });
+
+  it('restores timestamps across the 2^32 ms wrap and from a clock running behind', () => {
+    const wrap = Math.ceil(now / 2 ** 32) * 2 ** 32;
+    const before = new Date(wrap - 5).toISOString();
+    const after = new Date(wrap + 5).toISOString();
+
+    expect(decodeLocation(encodeLocation({ ...location, timestamp: before }), wrap + 1000).timestamp).toBe(before);
+    expect(decodeLocation(encodeLocation({ ...location, timestamp: after }), wrap - 1000).timestamp).toBe(after);
+  });
+
+  it('reads JSON written before the compact format', () => {
+    expect(decodeLocation(Buffer.from(JSON.stringify(location)))).toEqual(location);
+  });
+
+  it('defaults clients to JSON unless they ask for msgpack', () => {
+    expect(resolveWireFormat({ auth: { wire: 'msgpack' } })).toBe('msgpack');
+    expect(resolveWireFormat({ auth: {}, query: { wire: 'msgpack' } })).toBe('msgpack');
+    expect(resolveWireFormat({ auth: { token: 'jwt' }, query: {} })).toBe('json');
+  });
+});
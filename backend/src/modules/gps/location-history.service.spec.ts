@@ -0,0 +1,96 @@
+import { Test, TestingModule } from '@nestjs/testing';
+import { ForbiddenException } from '@nestjs/common';
+import { LocationHistoryService } from './location-history.service';
+import { PrismaService } from '../../prisma/prisma.service';
+
+jest.mock('ioredis', () => ({
+  Redis: jest.fn().mockImplementation(() => ({
+    quit: jest.fn().mockResolvedValue('OK'),
+  })),
+}));
+
+describe('LocationHistoryService', () => {
+  let service: LocationHistoryService;
+  let prisma: any;
+
+  const trip = {
+    busId: 'bus-1',
+    companyId: 'company-1',
+    startTime: new Date(Date.now() - 60 * 60 * 1000),
+    endTime: new Date(),
+    createdAt: new Date(),
+    bus: { companyId: 'company-1' },
+    driver: { userId: 'driver-user-1' },
+  };
+
+  beforeEach(async () => {
+    prisma = {
+      $queryRaw: jest.fn().mockResolvedValue([]),
+      $executeRawUnsafe: jest.fn().mockResolvedValue(0),
+      bus: {
+        findUnique: jest.fn().mockResolvedValue({ companyId: 'company-1', driver: { userId: 'driver-user-1' } }),
+      },
+      trip: { findUnique: jest.fn().mockResolvedValue(trip) },
+      childAttendance: { count: jest.fn().mockResolvedValue(0) },
+      busTrack: { findMany: jest.fn().mockResolvedValue([]), createMany: jest.fn() },
+      busLocation: { findMany: jest.fn().mockResolvedValue([]) },
+    };
+
+    const module: TestingModule = await Test.createTestingModule({
+      providers: [LocationHistoryService, { provide: PrismaService, useValue: prisma }],
+    }).compile();
+
+    service = module.get<LocationHistoryService>(LocationHistoryService);
+  });
+
+  describe('rollupExpiredPartitions', () => {
+    it('should detach expired partitions concurrently before dropping them', async () => {
+      prisma.$queryRaw.mockResolvedValueOnce([
+        { name: 'BusLocation_20200101', detachPending: false },
+        { name: 'BusLocation_20200102', detachPending: true },
+        { name: 'BusLocation_29991231', detachPending: false },
+      ]);
+
+      await service.rollupExpiredPartitions();
+
+      expect(prisma.$executeRawUnsafe.mock.calls.map(([sql]) => sql)).toEqual([
+        'ALTER TABLE "BusLocation" DETACH PARTITION "BusLocation_20200101" CONCURRENTLY',
+        'DROP TABLE "BusLocation_20200101"',
+        'ALTER TABLE "BusLocation" DETACH PARTITION "BusLocation_20200102" FINALIZE',
+        'DROP TABLE "BusLocation_20200102"',
+      ]);
+    });
+  });
+
+  describe('trajectory access', () => {
+    it('should limit company admins to their own buses', async () => {
+      await expect(
+        service.assertCanViewBus({ userId: 'admin-1', role: 'COMPANY_ADMIN', companyId: 'company-1' }, 'bus-1'),
+      ).resolves.toBeUndefined();
+      await expect(
+        service.assertCanViewBus({ userId: 'admin-2', role: 'COMPANY_ADMIN', companyId: 'company-2' }, 'bus-1'),
+      ).rejects.toThrow(ForbiddenException);
+    });
+
+    it('should limit drivers to the buses assigned to them', async () => {
+      await expect(service.assertCanViewBus({ userId: 'driver-user-1', role: 'DRIVER' }, 'bus-1')).resolves.toBeUndefined();
+      await expect(service.assertCanViewBus({ userId: 'driver-user-2', role: 'DRIVER' }, 'bus-1')).rejects.toThrow(
+        ForbiddenException,
+      );
+    });
+
+    it('should only show parents trips their children are on', async () => {
+      await expect(service.getTripTrajectory('trip-1', undefined, { userId: 'parent-1', role: 'PARENT' })).rejects.toThrow(
+        ForbiddenException,
+      );
+
+      prisma.childAttendance.count.mockResolvedValueOnce(1);
+      const trajectory = await service.getTripTrajectory('trip-1', undefined, { userId: 'parent-1', role: 'PARENT' });
+
+      expect(trajectory.busId).toBe('bus-1');
+      expect(prisma.childAttendance.count).toHaveBeenLastCalledWith({
+        where: { tripId: 'trip-1', child: { parentId: 'parent-1' } },
+      });
+    });
+  });
+});
@@ -0,0 +1,344 @@
+import {
+  BadRequestException,
+  ForbiddenException,
+  Injectable,
+  Logger,
+  NotFoundException,
+  OnModuleDestroy,
+  OnModuleInit,
+} from '@nestjs/common';
+import { Cron } from '@nestjs/schedule';
+import { Prisma } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { randomUUID } from 'crypto';
+import { PrismaService } from '../../prisma/prisma.service';
+import { TrackPoint, encodePolyline, simplifyTrack } from '../../common/geo/track';
+
+export interface Trajectory {
+  busId: string;
+  from: string;
+  to: string;
+  // Raw and rolled-up points read for the window
+  sourcePoints: number;
+  // Points left after simplification
+  points: number;
+  // Encoded polyline (precision 5)
+  polyline: string;
+  // Seconds since `from` for each polyline point
+  offsets: number[];
+  // km/h at each polyline point
+  speeds: number[];
+}
+
+// The authenticated user (JWT payload) asking for a trajectory
+export interface TrajectoryViewer {
+  userId: string;
+  role: string;
+  companyId?: string | null;
+}
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+const PARTITION_PATTERN = /^BusLocation_(\d{4})(\d{2})(\d{2})$/;
+
+/**
+ * Manages BusLocation history: day partitions, rollup of old raw points
+ * into BusTrack, retention, and compressed trajectory reads.
+ *
+ * Raw points live in one partition per UTC day. Once a day is older than
+ * GPS_RAW_RETENTION_DAYS its points are averaged per bus per minute,
+ * simplified with Douglas-Peucker, written to BusTrack, and the partition
+ * is detached concurrently and dropped, which is far cheaper than deleting
+ * rows and doesn't block writers on the parent table. BusTrack points older
+ * than GPS_TRACK_RETENTION_DAYS are deleted.
+ */
+@Injectable()
+export class LocationHistoryService implements OnModuleInit, OnModuleDestroy {
+  private readonly logger = new Logger(LocationHistoryService.name);
+  private readonly redis: Redis;
+
+  private readonly rawRetentionDays = parseInt(process.env.GPS_RAW_RETENTION_DAYS || '7', 10);
+  private readonly trackRetentionDays = parseInt(process.env.GPS_TRACK_RETENTION_DAYS || '365', 10);
+  private readonly partitionsAhead = parseInt(process.env.GPS_PARTITION_DAYS_AHEAD || '7', 10);
+  private readonly trackToleranceM = parseFloat(process.env.GPS_TRACK_TOLERANCE_M || '10');
+
+  private readonly MAINTENANCE_LOCK_KEY = 'gps_history:maintenance_lock';
+  private readonly MAINTENANCE_LOCK_SECONDS = 60 * 60;
+  private readonly ROLLUP_BUS_BATCH = 100;
+  private readonly TRACK_DELETE_BATCH = 10000;
+  private readonly MAX_WINDOW_DAYS = 31;
+
+  constructor(private prisma: PrismaService) {
+    this.redis = new Redis(process.env.REDIS_URL);
+  }
+
+  async onModuleInit() {
+    // Make sure today's partition exists even if the nightly job hasn't run
+    await this.ensurePartitions().catch((error) =>
+      this.logger.warn(`Could not create BusLocation partitions: ${error.message}`),
+    );
+  }
+
+  async onModuleDestroy() {
+    await this.redis.quit().catch(() => undefined);
+  }
+
+  /**
+   * Runs every night. Only one instance does the work; the others skip it.
+   */
+  @Cron('30 3 * * *')
+  async runMaintenance() {
+    const owner = randomUUID();
+    const acquired = await this.redis.set(
+      this.MAINTENANCE_LOCK_KEY,
+      owner,
+      'EX',
+      this.MAINTENANCE_LOCK_SECONDS,
+      'NX',
+    );
+    if (!acquired) {
+      this.logger.log('GPS history maintenance already running on another instance');
+      return;
+    }
+
+    try {
+      await this.ensurePartitions();
+      await this.rollupExpiredPartitions();
+      await this.applyTrackRetention();
+    } catch (error) {
+      this.logger.error('GPS history maintenance failed:', error);
+    } finally {
+      if ((await this.redis.get(this.MAINTENANCE_LOCK_KEY)) === owner) {
+        await this.redis.del(this.MAINTENANCE_LOCK_KEY);
+      }
+    }
+  }
+
+  async ensurePartitions(): Promise<void> {
+    const today = startOfUtcDay(new Date());
+    for (let offset = 0; offset <= this.partitionsAhead; offset++) {
+      const day = new Date(today.getTime() + offset * DAY_MS);
+      await this.prisma.$queryRaw`SELECT "bus_location_ensure_partition"(${toDateString(day)}::date)`;
+    }
+  }
+
+  /**
+   * Rolls up, detaches and drops every day partition older than the raw
+   * retention.
+   *
+   * Dropping an attached partition takes an ACCESS EXCLUSIVE lock on
+   * BusLocation and stalls every insert and read behind it. DETACH ...
+   * CONCURRENTLY only needs SHARE UPDATE EXCLUSIVE on the parent, so the
+   * partition is detached first and then dropped as a standalone table. The
+   * detach can't run in a transaction block, so these statements run on
+   * their own. A detach interrupted by a crash leaves the partition pending;
+   * the next run finishes it with FINALIZE.
+   */
+  async rollupExpiredPartitions(): Promise<void> {
+    const cutoff = new Date(startOfUtcDay(new Date()).getTime() - this.rawRetentionDays * DAY_MS);
+
+    const partitions = await this.prisma.$queryRaw<Array<{ name: string; detachPending: boolean }>>`
+      SELECT c.relname AS name, i.inhdetachpending AS "detachPending"
+      FROM pg_inherits i
+      JOIN pg_class c ON c.oid = i.inhrelid
+      JOIN pg_class p ON p.oid = i.inhparent
+      WHERE p.relname = 'BusLocation'
+    `;
+
+    for (const { name, detachPending } of partitions) {
+      const match = PARTITION_PATTERN.exec(name);
+      if (!match) continue;
+
+      const day = new Date(Date.UTC(+match[1], +match[2] - 1, +match[3]));
+      if (day >= cutoff) continue;
+
+      const started = Date.now();
+      const written = await this.rollup(Prisma.raw(`"${name}"`), Prisma.sql`TRUE`);
+      await this.prisma.$executeRawUnsafe(
+        `ALTER TABLE "BusLocation" DETACH PARTITION "${name}" ${detachPending ? 'FINALIZE' : 'CONCURRENTLY'}`,
+      );
+      await this.prisma.$executeRawUnsafe(`DROP TABLE "${name}"`);
+      this.logger.log(`Rolled up ${name} into ${written} track points in ${Date.now() - started}ms`);
+    }
+  }
+
+  async applyTrackRetention(): Promise<void> {
+    const cutoff = new Date(Date.now() - this.trackRetentionDays * DAY_MS);
+    let deleted = 0;
+    let batch: number;
+    do {
+      batch = await this.prisma.$executeRaw`
+        DELETE FROM "BusTrack"
+        WHERE ctid IN (
+          SELECT ctid FROM "BusTrack" WHERE "timestamp" < ${cutoff}::timestamp LIMIT ${this.TRACK_DELETE_BATCH}
+        )
+      `;
+      deleted += batch;
+    } while (batch === this.TRACK_DELETE_BATCH);
+
+    if (deleted > 0) {
+      this.logger.log(`Deleted ${deleted} track points older than ${cutoff.toISOString()}`);
+    }
+  }
+
+  /**
+   * Compressed track for one bus between two instants. Recent days come
+   * from raw points, older days from BusTrack.
+   */
+  async getTrajectory(busId: string, from: Date, to: Date, toleranceM = this.trackToleranceM): Promise<Trajectory> {
+    if (isNaN(from.getTime()) || isNaN(to.getTime()) || from > to) {
+      throw new BadRequestException('Invalid time window');
+    }
+    if (to.getTime() - from.getTime() > this.MAX_WINDOW_DAYS * DAY_MS) {
+      throw new BadRequestException(`Time window cannot exceed ${this.MAX_WINDOW_DAYS} days`);
+    }
+
+    const where = { busId, timestamp: { gte: from, lte: to } };
+    const select = { latitude: true, longitude: true, speed: true, timestamp: true };
+    const [tracks, raw] = await Promise.all([
+      this.prisma.busTrack.findMany({ where, select, orderBy: { timestamp: 'asc' } }),
+      this.prisma.busLocation.findMany({ where, select, orderBy: { timestamp: 'asc' } }),
+    ]);
+
+    // A day is either raw or rolled up, so the two lists don't interleave
+    // except for the day being rolled up right now
+    const source: TrackPoint[] =
+      tracks.length > 0 && raw.length > 0 && tracks[tracks.length - 1].timestamp > raw[0].timestamp
+        ? [...tracks, ...raw].sort((a, b) => a.timestamp.getTime() - b.timestamp.getTime())
+        : [...tracks, ...raw];
+
+    const simplified = simplifyTrack(source, toleranceM);
+    return {
+      busId,
+      from: from.toISOString(),
+      to: to.toISOString(),
+      sourcePoints: source.length,
+      points: simplified.length,
+      polyline: encodePolyline(simplified),
+      offsets: simplified.map((point) => Math.round((point.timestamp.getTime() - from.getTime()) / 1000)),
+      speeds: simplified.map((point) => Math.round(point.speed * 10) / 10),
+    };
+  }
+
+  async getTripTrajectory(tripId: string, toleranceM?: number, viewer?: TrajectoryViewer): Promise<Trajectory> {
+    const trip = await this.prisma.trip.findUnique({
+      where: { id: tripId },
+      select: {
+        busId: true,
+        companyId: true,
+        startTime: true,
+        endTime: true,
+        createdAt: true,
+        bus: { select: { companyId: true } },
+        driver: { select: { userId: true } },
+      },
+    });
+    if (!trip) {
+      throw new NotFoundException('Trip not found');
+    }
+    if (viewer && !(await this.canViewTrip(viewer, tripId, trip))) {
+      throw new ForbiddenException('You can only view trajectories of your own trips');
+    }
+
+    return this.getTrajectory(trip.busId, trip.startTime || trip.createdAt, trip.endTime || new Date(), toleranceM);
+  }
+
+  /**
+   * Platform admins see every bus, company admins their company's buses and
+   * drivers the buses assigned to them
+   */
+  async assertCanViewBus(viewer: TrajectoryViewer, busId: string): Promise<void> {
+    if (viewer.role === 'PLATFORM_ADMIN') return;
+
+    const bus = await this.prisma.bus.findUnique({
+      where: { id: busId },
+      select: { companyId: true, driver: { select: { userId: true } } },
+    });
+    if (!bus) {
+      throw new NotFoundException('Bus not found');
+    }
+
+    const allowed =
+      (viewer.role === 'COMPANY_ADMIN' && !!viewer.companyId && bus.companyId === viewer.companyId) ||
+      (viewer.role === 'DRIVER' && bus.driver?.userId === viewer.userId);
+    if (!allowed) {
+      throw new ForbiddenException('You can only view trajectories of your own buses');
+    }
+  }
+
+  // Same as buses, plus parents see the trips their children are on
+  private async canViewTrip(
+    viewer: TrajectoryViewer,
+    tripId: string,
+    trip: { companyId: string | null; bus: { companyId: string | null }; driver: { userId: string } },
+  ): Promise<boolean> {
+    switch (viewer.role) {
+      case 'PLATFORM_ADMIN':
+        return true;
+      case 'COMPANY_ADMIN':
+        return !!viewer.companyId && (trip.companyId ?? trip.bus.companyId) === viewer.companyId;
+      case 'DRIVER':
+        return trip.driver.userId === viewer.userId;
+      case 'PARENT': {
+        const riding = await this.prisma.childAttendance.count({
+          where: { tripId, child: { parentId: viewer.userId } },
+        });
+        return riding > 0;
+      }
+      default:
+        return false;
+    }
+  }
+
+  /**
+   * Writes per-minute, simplified tracks for the raw points in `table`
+   * matching `condition`, a batch of buses at a time. Safe to re-run: track
+   * points already written are skipped.
+   */
+  private async rollup(table: Prisma.Sql, condition: Prisma.Sql): Promise<number> {
+    const buses = await this.prisma.$queryRaw<Array<{ busId: string }>>`
+      SELECT DISTINCT "busId" FROM ${table} WHERE ${condition}
+    `;
+
+    let written = 0;
+    for (let i = 0; i < buses.length; i += this.ROLLUP_BUS_BATCH) {
+      const busIds = buses.slice(i, i + this.ROLLUP_BUS_BATCH).map((bus) => bus.busId);
+      const minutes = await this.prisma.$queryRaw<Array<TrackPoint & { busId: string; samples: number }>>`
+        SELECT "busId",
+               date_trunc('minute', "timestamp") AS "timestamp",
+               AVG("latitude")::float8 AS "latitude",
+               AVG("longitude")::float8 AS "longitude",
+               AVG("speed")::float8 AS "speed",
+               COUNT(*)::int AS "samples"
+        FROM ${table}
+        WHERE ${condition} AND "busId" IN (${Prisma.join(busIds)})
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+      `;
+
+      const rows: Prisma.BusTrackCreateManyInput[] = [];
+      let start = 0;
+      while (start < minutes.length) {
+        let end = start;
+        while (end < minutes.length && minutes[end].busId === minutes[start].busId) end++;
+        for (const point of simplifyTrack(minutes.slice(start, end), this.trackToleranceM)) {
+          rows.push(point);
+        }
+        start = end;
+      }
+
+      if (rows.length > 0) {
+        const result = await this.prisma.busTrack.createMany({ data: rows, skipDuplicates: true });
+        written += result.count;
+      }
+    }
+    return written;
+  }
+}
+
+function startOfUtcDay(date: Date): Date {
+  return new Date(Date.UTC(date.getUTCFullYear(), date.getUTCMonth(), date.getUTCDate()));
+}
+
+function toDateString(date: Date): string {
+  return date.toISOString().slice(0, 10);
+}
@@ -0,0 +1,32 @@
+import { Injectable, NestMiddleware } from '@nestjs/common';
+import { Request, Response, NextFunction } from 'express';
+import { SampledLogger } from '../../common/logging/sampled-logger';
+import { httpRequestDuration } from './metrics';
+
+/**
+ * Times every request into http_request_duration_seconds. The route label
+ * is the matched pattern (/trips/:id), not the raw path, so ids don't
+ * explode the series count; requests no handler matched share one label.
+ */
+@Injectable()
+export class HttpMetricsMiddleware implements NestMiddleware {
+  private readonly logger = new SampledLogger('HTTP');
+
+  use(req: Request, res: Response, next: NextFunction) {
+    const end = httpRequestDuration.startTimer({ method: req.method });
+    const start = Date.now();
+
+    res.on('finish', () => {
+      const route = req.route ? `${req.baseUrl}${req.route.path}` : 'unmatched';
+      end({ route, status: res.statusCode });
+      this.logger.debug({
+        message: 'request',
+        method: req.method,
+        route,
+        status: res.statusCode,
+        durationMs: Date.now() - start,
+      });
+    });
+    next();
+  }
+}
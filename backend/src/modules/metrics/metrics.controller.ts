@@ -0,0 +1,17 @@
+import { Controller, Get, Header, Headers, UnauthorizedException } from '@nestjs/common';
+import { registry } from './metrics';
+
+@Controller('metrics')
+export class MetricsController {
+  // Scrapers authenticate with a static bearer token when METRICS_TOKEN is set
+  private readonly token = process.env.METRICS_TOKEN;
+
+  @Get()
+  @Header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+  scrape(@Headers('authorization') authorization?: string) {
+    if (this.token && authorization !== `Bearer ${this.token}`) {
+      throw new UnauthorizedException('Invalid metrics token');
+    }
+    return registry.render();
+  }
+}
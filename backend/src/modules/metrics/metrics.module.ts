@@ -0,0 +1,10 @@
+import { Module } from '@nestjs/common';
+import { MetricsController } from './metrics.controller';
+import { HttpMetricsMiddleware } from './http-metrics.middleware';
+
+@Module({
+  controllers: [MetricsController],
+  providers: [HttpMetricsMiddleware],
+  exports: [HttpMetricsMiddleware],
+})
+export class MetricsModule {}
@@ -0,0 +1,118 @@
+import { monitorEventLoopDelay } from 'perf_hooks';
+import { Redis } from 'ioredis';
+import { Counter, Gauge, Histogram, Registry } from './registry';
+
+// Process-wide, like the default registry of other Prometheus clients:
+// Prisma middleware, Redis clients and the gateway record into it without
+// going through dependency injection
+export const registry = new Registry();
+
+export const httpRequestDuration = registry.register(
+  new Histogram<'method' | 'route' | 'status'>({
+    name: 'http_request_duration_seconds',
+    help: 'HTTP request latency by route pattern',
+    labelNames: ['method', 'route', 'status'],
+  }),
+);
+
+export const prismaQueryDuration = registry.register(
+  new Histogram<'model' | 'action'>({
+    name: 'prisma_query_duration_seconds',
+    help: 'Prisma query latency by model and action',
+    labelNames: ['model', 'action'],
+  }),
+);
+
+export const redisCommandDuration = registry.register(
+  new Histogram<'command'>({
+    name: 'redis_command_duration_seconds',
+    help: 'Redis command round-trip latency by command',
+    labelNames: ['command'],
+    buckets: [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1],
+  }),
+);
+
+export const socketConnections = registry.register(
+  new Gauge({ name: 'socketio_connections', help: 'Sockets connected to this instance' }),
+);
+
+export const socketRooms = registry.register(
+  new Gauge<'type'>({
+    name: 'socketio_room_sockets',
+    help: 'Socket memberships on this instance by room type (user, trip, company, bus, role, school)',
+    labelNames: ['type'],
+  }),
+);
+
+export const gpsPointsIngested = registry.register(
+  new Counter({ name: 'gps_points_ingested_total', help: 'GPS pings accepted (socket and REST)' }),
+);
+
+export const gpsPointsPersisted = registry.register(
+  new Counter({ name: 'gps_points_persisted_total', help: 'GPS rows written to BusLocation' }),
+);
+
+export const eventLoopLag = registry.register(
+  new Gauge<'quantile'>({
+    name: 'nodejs_eventloop_lag_seconds',
+    help: 'Event-loop delay since the previous scrape',
+    labelNames: ['quantile'],
+  }),
+);
+
+export const processMemory = registry.register(
+  new Gauge<'type'>({
+    name: 'nodejs_memory_bytes',
+    help: 'Process memory by type (rss, heap_used, heap_total, external)',
+    labelNames: ['type'],
+  }),
+);
+
+processMemory.collect(() => {
+  const usage = process.memoryUsage();
+  processMemory.set({ type: 'rss' }, usage.rss);
+  processMemory.set({ type: 'heap_used' }, usage.heapUsed);
+  processMemory.set({ type: 'heap_total' }, usage.heapTotal);
+  processMemory.set({ type: 'external' }, usage.external);
+});
+
+let eventLoopMonitorStarted = false;
+
+/**
+ * Sample event-loop delay continuously; each scrape reports the quantiles
+ * since the previous one
+ */
+export function startEventLoopMonitor() {
+  if (eventLoopMonitorStarted) return;
+  eventLoopMonitorStarted = true;
+
+  const histogram = monitorEventLoopDelay({ resolution: 20 });
+  histogram.enable();
+  eventLoopLag.collect(() => {
+    if (histogram.count === 0) return;
+    eventLoopLag.set({ quantile: '0.5' }, histogram.percentile(50) / 1e9);
+    eventLoopLag.set({ quantile: '0.99' }, histogram.percentile(99) / 1e9);
+    eventLoopLag.set({ quantile: 'max' }, histogram.max / 1e9);
+    histogram.reset();
+  });
+}
+
+let redisInstrumented = false;
+
+/**
+ * Time every command sent by any ioredis client in the process, including
+ * pipelined and MULTI commands. Call before the clients are created.
+ */
+export function instrumentRedis() {
+  if (redisInstrumented) return;
+  redisInstrumented = true;
+
+  const proto = Redis.prototype as any;
+  const sendCommand = proto.sendCommand;
+  proto.sendCommand = function (command: any, ...rest: any[]) {
+    const done = redisCommandDuration.startTimer({ command: command.name });
+    const observe = () => done();
+    command.promise.then(observe, observe);
+    return sendCommand.call(this, command, ...rest);
+  };
+}
@@ -0,0 +1,66 @@
+import { Counter, Gauge, Histogram, Registry } from './registry';
+
+describe('Registry', () => {
+  it('renders labelled counters and gauges in the text format', () => {
+    const registry = new Registry();
+    const requests = registry.register(
+      new Counter<'route'>({ name: 'requests_total', help: 'Requests', labelNames: ['route'] }),
+    );
+    const connections = registry.register(new Gauge({ name: 'connections', help: 'Connections' }));
+
+    requests.inc({ route: '/trips/:id' });
+    requests.inc({ route: '/trips/:id' }, 2);
+    requests.inc({ route: 'say "hi"' });
+    connections.set({}, 7);
+
+    expect(registry.render()).toBe(
+      [
+        '# HELP requests_total Requests',
+        '# TYPE requests_total counter',
+        'requests_total{route="/trips/:id"} 3',
+        'requests_total{route="say \\"hi\\""} 1',
+        '# HELP connections Connections',
+        '# TYPE connections gauge',
+        'connections 7',
+        '',
+      ].join('\n'),
+    );
+  });
+
+  it('renders cumulative histogram buckets', () => {
+    const histogram = new Histogram<'action'>({
+      name: 'query_seconds',
+      help: 'Queries',
+      labelNames: ['action'],
+      buckets: [0.01, 0.1],
+    });
+
+    histogram.observe({ action: 'findMany' }, 0.005);
+    histogram.observe({ action: 'findMany' }, 0.05);
+    histogram.observe({ action: 'findMany' }, 2);
+
+    expect(histogram.samples()).toEqual([
+      'query_seconds_bucket{action="findMany",le="0.01"} 1',
+      'query_seconds_bucket{action="findMany",le="0.1"} 2',
+      'query_seconds_bucket{action="findMany",le="+Inf"} 3',
+      'query_seconds_sum{action="findMany"} 2.055',
+      'query_seconds_count{action="findMany"} 3',
+    ]);
+  });
+
+  it('computes collected gauges at render time', () => {
+    const rooms = new Gauge<'type'>({ name: 'rooms', help: 'Rooms', labelNames: ['type'] });
+    let trips = 1;
+    rooms.collect(() => rooms.set({ type: 'trip' }, trips));
+
+    expect(rooms.samples()).toEqual(['rooms{type="trip"} 1']);
+    trips = 4;
+    expect(rooms.samples()).toEqual(['rooms{type="trip"} 4']);
+  });
+
+  it('rejects duplicate metric names', () => {
+    const registry = new Registry();
+    registry.register(new Counter({ name: 'dup', help: 'Dup' }));
+    expect(() => registry.register(new Counter({ name: 'dup', help: 'Dup' }))).toThrow();
+  });
+});
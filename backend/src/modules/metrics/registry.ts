@@ -0,0 +1,162 @@
+/**
+ * Minimal Prometheus client: counters, gauges and histograms with labels,
+ * rendered in the text exposition format (0.0.4). Updates are plain Map
+ * operations, cheap enough for the request, query and Redis hot paths.
+ */
+
+type Labels = Record<string, string | number>;
+
+interface MetricOptions<L extends string> {
+  name: string;
+  help: string;
+  labelNames?: readonly L[];
+}
+
+abstract class Metric<L extends string> {
+  readonly name: string;
+  readonly help: string;
+  protected readonly labelNames: readonly L[];
+
+  constructor(options: MetricOptions<L>) {
+    this.name = options.name;
+    this.help = options.help;
+    this.labelNames = options.labelNames || [];
+  }
+
+  abstract readonly type: 'counter' | 'gauge' | 'histogram';
+
+  abstract samples(): string[];
+
+  render(): string {
+    return [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} ${this.type}`, ...this.samples()].join('\n');
+  }
+
+  protected key(labels: Partial<Record<L, string | number>> = {}): string {
+    return this.labelNames.map((name) => String(labels[name] ?? '')).join('\u0000');
+  }
+
+  protected formatLabels(key: string, extra: Labels = {}): string {
+    const values = key === '' && this.labelNames.length === 0 ? [] : key.split('\u0000');
+    const pairs = this.labelNames.map((name, i) => `${name}="${escapeLabel(values[i])}"`);
+    for (const [name, value] of Object.entries(extra)) {
+      pairs.push(`${name}="${escapeLabel(String(value))}"`);
+    }
+    return pairs.length > 0 ? `{${pairs.join(',')}}` : '';
+  }
+}
+
+export class Counter<L extends string = never> extends Metric<L> {
+  readonly type = 'counter';
+  private readonly values = new Map<string, number>();
+
+  inc(labels?: Partial<Record<L, string | number>>, amount = 1) {
+    const key = this.key(labels);
+    this.values.set(key, (this.values.get(key) || 0) + amount);
+  }
+
+  samples(): string[] {
+    return [...this.values].map(([key, value]) => `${this.name}${this.formatLabels(key)} ${value}`);
+  }
+}
+
+export class Gauge<L extends string = never> extends Metric<L> {
+  readonly type = 'gauge';
+  private readonly values = new Map<string, number>();
+  private collector: (() => void) | null = null;
+
+  set(labels: Partial<Record<L, string | number>>, value: number) {
+    this.values.set(this.key(labels), value);
+  }
+
+  reset() {
+    this.values.clear();
+  }
+
+  /**
+   * Compute the values at scrape time instead of keeping them current
+   */
+  collect(collector: () => void) {
+    this.collector = collector;
+  }
+
+  samples(): string[] {
+    if (this.collector) {
+      this.collector();
+    }
+    return [...this.values].map(([key, value]) => `${this.name}${this.formatLabels(key)} ${value}`);
+  }
+}
+
+// Seconds; suits HTTP handlers, queries and Redis round-trips alike
+export const DEFAULT_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10];
+
+export class Histogram<L extends string = never> extends Metric<L> {
+  readonly type = 'histogram';
+  private readonly buckets: number[];
+  private readonly series = new Map<string, { counts: number[]; sum: number; count: number }>();
+
+  constructor(options: MetricOptions<L> & { buckets?: number[] }) {
+    super(options);
+    this.buckets = options.buckets || DEFAULT_BUCKETS;
+  }
+
+  observe(labels: Partial<Record<L, string | number>>, seconds: number) {
+    const key = this.key(labels);
+    let series = this.series.get(key);
+    if (!series) {
+      series = { counts: new Array(this.buckets.length).fill(0), sum: 0, count: 0 };
+      this.series.set(key, series);
+    }
+    // Buckets are cumulative when rendered, so only the first match counts here
+    const index = this.buckets.findIndex((bound) => seconds <= bound);
+    if (index !== -1) series.counts[index]++;
+    series.sum += seconds;
+    series.count++;
+  }
+
+  /**
+   * Start timing; call the result (optionally with labels known only at
+   * the end) to record the elapsed time
+   */
+  startTimer(labels: Partial<Record<L, string | number>> = {}) {
+    const start = process.hrtime.bigint();
+    return (endLabels: Partial<Record<L, string | number>> = {}) => {
+      this.observe({ ...labels, ...endLabels }, Number(process.hrtime.bigint() - start) / 1e9);
+    };
+  }
+
+  samples(): string[] {
+    const lines: string[] = [];
+    for (const [key, series] of this.series) {
+      let cumulative = 0;
+      this.buckets.forEach((bound, i) => {
+        cumulative += series.counts[i];
+        lines.push(`${this.name}_bucket${this.formatLabels(key, { le: bound })} ${cumulative}`);
+      });
+      lines.push(`${this.name}_bucket${this.formatLabels(key, { le: '+Inf' })} ${series.count}`);
+      lines.push(`${this.name}_sum${this.formatLabels(key)} ${series.sum}`);
+      lines.push(`${this.name}_count${this.formatLabels(key)} ${series.count}`);
+    }
+    return lines;
+  }
+}
+
+export class Registry {
+  private readonly metrics = new Map<string, Metric<string>>();
+
+  register<M extends Metric<any>>(metric: M): M {
+    if (this.metrics.has(metric.name)) {
+      throw new Error(`Metric ${metric.name} is already registered`);
+    }
+    this.metrics.set(metric.name, metric);
+    return metric;
+  }
+
+  render(): string {
+    return [...this.metrics.values()].map((metric) => metric.render()).join('\n') + '\n';
+  }
+}
+
+function escapeLabel(value: string): string {
+  return value.replace(/\\/g, '\\\\').replace(/\n/g, '\\n').replace(/"/g, '\\"');
+}
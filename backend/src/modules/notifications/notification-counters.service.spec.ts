@@ -0,0 +1,85 @@
+import { Test, TestingModule } from '@nestjs/testing';
+import { NotificationCountersService } from './notification-counters.service';
+import { PrismaService } from '../../prisma/prisma.service';
+
+const strings = new Map<string, string>();
+
+jest.mock('ioredis', () => ({
+  Redis: jest.fn().mockImplementation(() => ({
+    get: async (key: string) => strings.get(key) ?? null,
+    set: async (key: string, value: number, _ex: string, _ttl: number, _nx: string) => {
+      if (strings.has(key)) return null;
+      strings.set(key, String(value));
+      return 'OK';
+    },
+    // Mirrors ADJUST_IF_PRESENT
+    eval: async (_script: string, numKeys: number, ...args: any[]) => {
+      const keys = args.slice(0, numKeys);
+      const amounts = args.slice(numKeys);
+      keys.forEach((key: string, i: number) => {
+        if (!strings.has(key)) return;
+        const value = parseInt(strings.get(key), 10) + amounts[i];
+        if (value < 0) strings.delete(key);
+        else strings.set(key, String(value));
+      });
+      return 0;
+    },
+    quit: jest.fn().mockResolvedValue('OK'),
+  })),
+}));
+
+describe('NotificationCountersService', () => {
+  let service: NotificationCountersService;
+  let count: jest.Mock;
+
+  beforeEach(async () => {
+    strings.clear();
+    count = jest.fn().mockResolvedValue(3);
+
+    const module: TestingModule = await Test.createTestingModule({
+      providers: [NotificationCountersService, { provide: PrismaService, useValue: { notification: { count } } }],
+    }).compile();
+
+    service = module.get<NotificationCountersService>(NotificationCountersService);
+  });
+
+  it('counts in Postgres once, then serves reads from Redis', async () => {
+    await expect(service.getUnread('user-1')).resolves.toBe(3);
+    await expect(service.getUnread('user-1')).resolves.toBe(3);
+
+    expect(count).toHaveBeenCalledTimes(1);
+    expect(count).toHaveBeenCalledWith({ where: { userId: 'user-1', isRead: false } });
+  });
+
+  it('keeps a filled counter in step with creates and reads', async () => {
+    await service.getUnread('user-1');
+    await service.getUnacknowledged('user-1');
+
+    await service.recordCreated([
+      { userId: 'user-1', requiresAck: true },
+      { userId: 'user-1' },
+      { userId: 'user-2' },
+    ]);
+    await service.adjust([{ userId: 'user-1', unread: -1 }]);
+
+    await expect(service.getUnread('user-1')).resolves.toBe(4);
+    await expect(service.getUnacknowledged('user-1')).resolves.toBe(4);
+    expect(count).toHaveBeenCalledTimes(2);
+  });
+
+  it('leaves missing counters for the next read to rebuild', async () => {
+    await service.recordCreated([{ userId: 'user-2' }]);
+
+    expect(strings.has('notif:unread:user-2')).toBe(false);
+    await expect(service.getUnread('user-2')).resolves.toBe(3);
+  });
+
+  it('drops a counter that drifts below zero', async () => {
+    count.mockResolvedValue(0);
+    await service.getUnread('user-1');
+
+    await service.adjust([{ userId: 'user-1', unread: -1 }]);
+
+    expect(strings.has('notif:unread:user-1')).toBe(false);
+  });
+});
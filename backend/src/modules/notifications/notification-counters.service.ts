@@ -0,0 +1,118 @@
+import { Injectable, Logger, OnModuleDestroy } from '@nestjs/common';
+import { Redis } from 'ioredis';
+import { PrismaService } from '../../prisma/prisma.service';
+
+// Applies each delta only to counters that exist. A missing counter is
+// rebuilt from Postgres on the next read, so incrementing it here would
+// count the change twice. A counter that goes negative has drifted and is
+// dropped so the next read recounts.
+const ADJUST_IF_PRESENT = `
+for i, key in ipairs(KEYS) do
+  if redis.call('EXISTS', key) == 1 then
+    if redis.call('INCRBY', key, ARGV[i]) < 0 then
+      redis.call('DEL', key)
+    end
+  end
+end
+return 0
+`;
+
+export interface CounterDelta {
+  userId: string;
+  unread?: number;
+  unacknowledged?: number;
+}
+
+/**
+ * Per-user unread and unacknowledged notification counts kept in Redis, so
+ * badge polling is a GET. Counters are filled lazily from Postgres on a
+ * miss (first read, eviction or expiry) and adjusted on every state change
+ * after that. The TTL bounds how long a counter can stay off if an update
+ * races a refill.
+ */
+@Injectable()
+export class NotificationCountersService implements OnModuleDestroy {
+  private readonly logger = new Logger(NotificationCountersService.name);
+  private readonly redis: Redis;
+  private readonly ttlSeconds = parseInt(process.env.NOTIFICATION_COUNTER_TTL_SECONDS || '3600', 10);
+
+  constructor(private prisma: PrismaService) {
+    this.redis = new Redis(process.env.REDIS_URL);
+  }
+
+  async onModuleDestroy() {
+    await this.redis.quit();
+  }
+
+  getUnread(userId: string): Promise<number> {
+    return this.read(`notif:unread:${userId}`, () =>
+      this.prisma.notification.count({ where: { userId, isRead: false } }),
+    );
+  }
+
+  getUnacknowledged(userId: string): Promise<number> {
+    return this.read(`notif:unacked:${userId}`, () =>
+      this.prisma.notification.count({ where: { userId, requiresAck: true, acknowledgedAt: null } }),
+    );
+  }
+
+  /**
+   * Apply count changes. Failures are logged rather than thrown: the write
+   * they describe has already committed, and the counter corrects itself
+   * when it expires.
+   */
+  async adjust(deltas: CounterDelta[]): Promise<void> {
+    const keys: string[] = [];
+    const amounts: number[] = [];
+    for (const delta of deltas) {
+      if (delta.unread) {
+        keys.push(`notif:unread:${delta.userId}`);
+        amounts.push(delta.unread);
+      }
+      if (delta.unacknowledged) {
+        keys.push(`notif:unacked:${delta.userId}`);
+        amounts.push(delta.unacknowledged);
+      }
+    }
+    if (keys.length === 0) {
+      return;
+    }
+
+    try {
+      await this.redis.eval(ADJUST_IF_PRESENT, keys.length, ...keys, ...amounts);
+    } catch (error) {
+      this.logger.warn(`Could not update notification counters: ${error.message}`);
+    }
+  }
+
+  /**
+   * Count changes for newly created notifications, summed per user
+   */
+  async recordCreated(notifications: Array<{ userId: string; requiresAck?: boolean }>): Promise<void> {
+    const byUser = new Map<string, CounterDelta>();
+    for (const notification of notifications) {
+      const delta = byUser.get(notification.userId) || { userId: notification.userId, unread: 0, unacknowledged: 0 };
+      delta.unread += 1;
+      if (notification.requiresAck) delta.unacknowledged += 1;
+      byUser.set(notification.userId, delta);
+    }
+    await this.adjust([...byUser.values()]);
+  }
+
+  private async read(key: string, count: () => Promise<number>): Promise<number> {
+    try {
+      const cached = await this.redis.get(key);
+      if (cached !== null) {
+        return parseInt(cached, 10);
+      }
+    } catch (error) {
+      this.logger.warn(`Notification counter read failed, counting in Postgres: ${error.message}`);
+      return count();
+    }
+
+    const value = await count();
+    // NX: keep the value if a concurrent read filled the key first
+    await this.redis.set(key, value, 'EX', this.ttlSeconds, 'NX').catch(() => undefined);
+    return value;
+  }
+}
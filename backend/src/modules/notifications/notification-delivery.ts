@@ -0,0 +1,39 @@
+import { JobsOptions } from 'bullmq';
+
+// Shared by the API (producers, socket relay) and the worker process
+export const NOTIFICATION_OUTBOUND_QUEUE = 'notification.outbound';
+export const NOTIFICATION_DEAD_LETTER_QUEUE = 'notification.outbound.dead';
+export const NOTIFICATION_DELIVERY_CHANNEL = 'notification_deliveries';
+
+export interface OutboundNotificationJob {
+  notificationId: string;
+  userId: string;
+}
+
+/**
+ * What the worker publishes on NOTIFICATION_DELIVERY_CHANNEL: one message
+ * per delivered batch, relayed by every API instance to its own sockets
+ */
+export interface NotificationDeliveryMessage {
+  notifications: Array<{
+    id: string;
+    userId: string;
+    title: string;
+    message: string;
+    type: string;
+    requiresAck: boolean;
+    relatedEntityType: string | null;
+    relatedEntityId: string | null;
+    metadata: unknown;
+    sentAt: string;
+    createdAt: string;
+  }>;
+}
+
+export const OUTBOUND_JOB_OPTIONS: JobsOptions = {
+  attempts: parseInt(process.env.NOTIFICATION_MAX_ATTEMPTS || '5', 10),
+  backoff: { type: 'exponential', delay: 1000 },
+  // Completed jobs carry nothing worth keeping; failures move to the dead-letter queue
+  removeOnComplete: true,
+  removeOnFail: true,
+};
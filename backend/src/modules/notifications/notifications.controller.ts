@@ -40,6 +40,12 @@ export class NotificationsController {
     return this.notificationsService.getUnreadCount(userId);
   }
 
+  @Get('unacknowledged-count/:userId')
+  @Roles('DRIVER')
+  async getUnacknowledgedCount(@Param('userId') userId: string) {
+    return this.notificationsService.getUnacknowledgedCount(userId);
+  }
+
   @Patch(':id/read')
   @Roles('PLATFORM_ADMIN', 'COMPANY_ADMIN', 'PARENT', 'DRIVER')
   async markAsRead(@Param('id') id: string) {
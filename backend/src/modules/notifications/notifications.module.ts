@@ -1,12 +1,13 @@
 import { Module } from '@nestjs/common';
 import { NotificationsService } from './notifications.service';
+import { NotificationCountersService } from './notification-counters.service';
 import { NotificationsController } from './notifications.controller';
 import { PrismaModule } from '../../prisma/prisma.module';
 
 @Module({
   imports: [PrismaModule],
   controllers: [NotificationsController],
-  providers: [NotificationsService],
-  exports: [NotificationsService],
+  providers: [NotificationsService, NotificationCountersService],
+  exports: [NotificationsService, NotificationCountersService],
 })
 export class NotificationsModule {}
\ No newline at end of file
@@ -3,16 +3,23 @@ import { PrismaService } from '../../prisma/prisma.service';
 import { Notification, NotificationType } from '@prisma/client';
 import { Queue } from 'bullmq';
 import { Redis } from 'ioredis';
+import { NotificationCountersService } from './notification-counters.service';
+import { NOTIFICATION_OUTBOUND_QUEUE, OUTBOUND_JOB_OPTIONS, OutboundNotificationJob } from './notification-delivery';
 
 @Injectable()
 export class NotificationsService {
-  private readonly outboundQueue: Queue;
+  private readonly outboundQueue: Queue<OutboundNotificationJob>;
   private readonly redis: Redis;
 
-  constructor(private prisma: PrismaService) {
+  constructor(
+    private prisma: PrismaService,
+    private counters: NotificationCountersService,
+  ) {
     this.redis = new Redis(process.env.REDIS_URL);
-    this.outboundQueue = new Queue('notification.outbound', {
+    // Consumed by the worker process (workers/index.ts)
+    this.outboundQueue = new Queue<OutboundNotificationJob>(NOTIFICATION_OUTBOUND_QUEUE, {
       connection: this.redis,
+      defaultJobOptions: OUTBOUND_JOB_OPTIONS,
     });
   }
 
@@ -26,27 +33,47 @@ export class NotificationsService {
         type,
       },
     });
+    await this.counters.recordCreated([notification]);
 
     // Add to outbound queue for processing
     await this.outboundQueue.add('send-notification', {
       notificationId: notification.id,
       userId,
-      title,
-      message,
-      type,
     });
 
     return notification;
   }
 
+  /**
+   * Queue delivery for notifications that were written elsewhere (e.g. in
+   * a batch by the outbox). The caller has already counted them.
+   */
+  async enqueue(notifications: Array<{ id: string; userId: string }>): Promise<void> {
+    if (notifications.length === 0) {
+      return;
+    }
+    await this.outboundQueue.addBulk(
+      notifications.map((notification) => ({
+        name: 'send-notification',
+        data: { notificationId: notification.id, userId: notification.userId },
+      })),
+    );
+  }
+
   async markAsRead(id: string): Promise<Notification> {
-    return this.prisma.notification.update({
-      where: { id },
+    // Only the call that actually flips isRead adjusts the counter
+    const { count } = await this.prisma.notification.updateMany({
+      where: { id, isRead: false },
       data: {
         isRead: true,
         readAt: new Date(),
       },
     });
+    const notification = await this.prisma.notification.findUniqueOrThrow({ where: { id } });
+    if (count > 0) {
+      await this.counters.adjust([{ userId: notification.userId, unread: -1 }]);
+    }
+    return notification;
   }
 
   async getUserNotifications(userId: string): Promise<Notification[]> {
@@ -57,12 +84,11 @@ export class NotificationsService {
   }
 
   async getUnreadCount(userId: string): Promise<number> {
-    return this.prisma.notification.count({
-      where: {
-        userId,
-        isRead: false,
-      },
-    });
+    return this.counters.getUnread(userId);
+  }
+
+  async getUnacknowledgedCount(userId: string): Promise<number> {
+    return this.counters.getUnacknowledged(userId);
   }
 
   async sendNotificationToUser(userId: string, title: string, message: string, type: NotificationType = NotificationType.INFO): Promise<Notification> {
@@ -92,17 +118,13 @@ export class NotificationsService {
         metadata: data.metadata,
       },
     });
+    await this.counters.recordCreated([notification]);
 
     // Add to outbound queue
     try {
       await this.outboundQueue.add('send-notification', {
         notificationId: notification.id,
         userId: data.userId,
-        title: data.title,
-        message: data.message,
-        type: data.type,
-        requiresAck: data.requiresAck,
-        metadata: data.metadata,
       });
     } catch (error) {
       // Queue might be disabled - continue without it
@@ -122,14 +144,27 @@ export class NotificationsService {
       throw new Error('Notification not found or unauthorized');
     }
 
-    return this.prisma.notification.update({
-      where: { id },
-      data: {
-        acknowledgedAt: new Date(),
-        isRead: true,
-        readAt: new Date(),
+    // Guarded updates, so repeated taps don't decrement the counters twice
+    const now = new Date();
+    const [acknowledged, read] = await this.prisma.$transaction([
+      this.prisma.notification.updateMany({
+        where: { id, acknowledgedAt: null },
+        data: { acknowledgedAt: now },
+      }),
+      this.prisma.notification.updateMany({
+        where: { id, isRead: false },
+        data: { isRead: true, readAt: now },
+      }),
+    ]);
+    await this.counters.adjust([
+      {
+        userId,
+        unread: -read.count,
+        unacknowledged: notification.requiresAck ? -acknowledged.count : 0,
       },
-    });
+    ]);
+
+    return this.prisma.notification.findUnique({ where: { id } });
   }
 
   // Get notifications requiring acknowledgment
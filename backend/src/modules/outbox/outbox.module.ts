@@ -0,0 +1,10 @@
+import { Module } from '@nestjs/common';
+import { OutboxService } from './outbox.service';
+import { PrismaModule } from '../../prisma/prisma.module';
+
+@Module({
+  imports: [PrismaModule],
+  providers: [OutboxService],
+  exports: [OutboxService],
+})
+export class OutboxModule {}
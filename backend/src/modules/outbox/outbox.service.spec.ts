@@ -0,0 +1,90 @@
+import { Test, TestingModule } from '@nestjs/testing';
+import { OutboxService } from './outbox.service';
+import { PrismaService } from '../../prisma/prisma.service';
+
+describe('OutboxService', () => {
+  let service: OutboxService;
+  let pending: Array<{ id: bigint; type: string; payload: any; attempts: number }>;
+  let update: jest.Mock;
+
+  beforeEach(async () => {
+    pending = [];
+    update = jest.fn().mockResolvedValue({});
+
+    // Each statement sees the rows committed so far; a failing callback
+    // discards the transaction's deletes, like a rollback
+    const prisma = {
+      $transaction: jest.fn(async (callback: (tx: any) => Promise<any>) => {
+        const deleted = new Set<bigint>();
+        const tx = {
+          $queryRaw: jest.fn(async (strings: TemplateStringsArray, ...values: any[]) => {
+            const single = strings.join('?').includes('"id" = ?') ? values[0] : null;
+            return pending.filter((event) => single === null || event.id === single);
+          }),
+          outboxEvent: {
+            deleteMany: jest.fn(async ({ where }: any) => where.id.in.forEach((id: bigint) => deleted.add(id))),
+          },
+        };
+        const result = await callback(tx);
+        pending = pending.filter((event) => !deleted.has(event.id));
+        return result;
+      }),
+      outboxEvent: { update },
+    };
+
+    const module: TestingModule = await Test.createTestingModule({
+      providers: [OutboxService, { provide: PrismaService, useValue: prisma }],
+    }).compile();
+
+    service = module.get<OutboxService>(OutboxService);
+  });
+
+  it('hands a batch to its handler and runs the post-commit callback', async () => {
+    pending = [
+      { id: 1n, type: 'test', payload: { n: 1 }, attempts: 0 },
+      { id: 2n, type: 'test', payload: { n: 2 }, attempts: 0 },
+    ];
+    const afterCommit = jest.fn();
+    const handler = jest.fn().mockResolvedValue(afterCommit);
+    service.registerHandler('test', handler);
+
+    await expect(service.dispatchBatch()).resolves.toBe(2);
+
+    expect(handler).toHaveBeenCalledTimes(1);
+    expect(handler.mock.calls[0][0].map((event: any) => event.payload.n)).toEqual([1, 2]);
+    expect(afterCommit).toHaveBeenCalledTimes(1);
+    expect(pending).toEqual([]);
+  });
+
+  it('isolates a failing event and schedules it for retry', async () => {
+    pending = [
+      { id: 1n, type: 'test', payload: { ok: true }, attempts: 0 },
+      { id: 2n, type: 'test', payload: { ok: false }, attempts: 2 },
+    ];
+    service.registerHandler('test', async (events) => {
+      if (events.some((event) => !event.payload.ok)) throw new Error('boom');
+    });
+
+    await service.dispatchBatch();
+
+    expect(pending.map((event) => event.id)).toEqual([2n]);
+    expect(update).toHaveBeenCalledWith({
+      where: { id: 2n },
+      data: expect.objectContaining({ attempts: 3, lastError: 'boom', deadAt: null }),
+    });
+  });
+
+  it('dead-letters an event that runs out of attempts', async () => {
+    pending = [{ id: 7n, type: 'test', payload: {}, attempts: 7 }];
+    service.registerHandler('test', async () => {
+      throw new Error('still broken');
+    });
+
+    await service.dispatchBatch();
+
+    expect(update).toHaveBeenCalledWith({
+      where: { id: 7n },
+      data: expect.objectContaining({ attempts: 8, deadAt: expect.any(Date) }),
+    });
+  });
+});
@@ -0,0 +1,211 @@
+import { Injectable, Logger, OnModuleDestroy, OnModuleInit } from '@nestjs/common';
+import { Prisma } from '@prisma/client';
+import { PrismaService } from '../../prisma/prisma.service';
+
+export interface OutboxEventRecord<P = any> {
+  id: bigint;
+  type: string;
+  payload: P;
+  attempts: number;
+}
+
+/**
+ * Handles a batch of events of one type. Database writes go through `tx`,
+ * so they commit together with the removal of the events. The returned
+ * callback, if any, runs after the commit (for socket emits and other
+ * effects that can't be rolled back).
+ */
+export type OutboxHandler<P = any> = (
+  events: OutboxEventRecord<P>[],
+  tx: Prisma.TransactionClient,
+) => Promise<(() => void) | void>;
+
+/**
+ * Transactional outbox. Producers call `add` inside their own transaction,
+ * so an event exists if and only if the change that caused it committed.
+ *
+ * Pending events are claimed with FOR UPDATE SKIP LOCKED, so any number of
+ * instances can dispatch concurrently without handling an event twice.
+ * `wake` dispatches shortly after a local commit; the poll picks up
+ * everything else (other instances, retries, restarts). A batch that fails
+ * is retried one event at a time so a single bad event can't hold back the
+ * rest; an event that keeps failing backs off exponentially and is
+ * dead-lettered (deadAt set) after OUTBOX_MAX_ATTEMPTS.
+ */
+@Injectable()
+export class OutboxService implements OnModuleInit, OnModuleDestroy {
+  private readonly logger = new Logger(OutboxService.name);
+
+  private readonly pollIntervalMs = parseInt(process.env.OUTBOX_POLL_INTERVAL_MS || '1000', 10);
+  // Delay between a local commit and dispatch, so a burst of taps shares a batch
+  private readonly coalesceMs = parseInt(process.env.OUTBOX_COALESCE_MS || '50', 10);
+  private readonly batchSize = parseInt(process.env.OUTBOX_BATCH_SIZE || '200', 10);
+  private readonly maxAttempts = parseInt(process.env.OUTBOX_MAX_ATTEMPTS || '8', 10);
+  private readonly RETRY_BASE_MS = 1000;
+
+  private readonly handlers = new Map<string, OutboxHandler>();
+  private pollTimer: NodeJS.Timeout | null = null;
+  private wakeTimer: NodeJS.Timeout | null = null;
+  private draining: Promise<void> | null = null;
+
+  constructor(private prisma: PrismaService) {}
+
+  onModuleInit() {
+    this.pollTimer = setInterval(() => {
+      this.drain().catch(() => undefined);
+    }, this.pollIntervalMs);
+    this.pollTimer.unref();
+  }
+
+  async onModuleDestroy() {
+    if (this.pollTimer) {
+      clearInterval(this.pollTimer);
+      this.pollTimer = null;
+    }
+    if (this.wakeTimer) {
+      clearTimeout(this.wakeTimer);
+      this.wakeTimer = null;
+    }
+    await this.draining;
+  }
+
+  registerHandler<P>(type: string, handler: OutboxHandler<P>) {
+    this.handlers.set(type, handler);
+  }
+
+  /**
+   * Record an event as part of the caller's transaction
+   */
+  async add(tx: Prisma.TransactionClient, type: string, payload: Prisma.InputJsonValue): Promise<void> {
+    await tx.outboxEvent.create({ data: { type, payload }, select: { id: true } });
+  }
+
+  /**
+   * Dispatch soon. Call after the transaction that added events commits.
+   */
+  wake() {
+    if (this.wakeTimer) {
+      return;
+    }
+    this.wakeTimer = setTimeout(() => {
+      this.wakeTimer = null;
+      this.drain().catch(() => undefined);
+    }, this.coalesceMs);
+  }
+
+  /**
+   * Dispatch batches until nothing is ready. Concurrent callers share the
+   * same run.
+   */
+  drain(): Promise<void> {
+    if (!this.draining) {
+      this.draining = (async () => {
+        try {
+          while ((await this.dispatchBatch()) === this.batchSize) {
+            // Keep going while batches come back full
+          }
+        } catch (error) {
+          this.logger.error(`Outbox dispatch failed: ${error.message}`);
+        } finally {
+          this.draining = null;
+        }
+      })();
+    }
+    return this.draining;
+  }
+
+  /**
+   * Claim and handle one batch. Returns the number of events claimed.
+   */
+  async dispatchBatch(): Promise<number> {
+    let claimed: OutboxEventRecord[] = [];
+    try {
+      const afterCommit = await this.prisma.$transaction(async (tx) => {
+        claimed = await tx.$queryRaw<OutboxEventRecord[]>`
+          SELECT "id", "type", "payload", "attempts"
+          FROM "OutboxEvent"
+          WHERE "deadAt" IS NULL AND "availableAt" <= NOW()
+          ORDER BY "id"
+          LIMIT ${this.batchSize}
+          FOR UPDATE SKIP LOCKED
+        `;
+        return claimed.length > 0 ? this.handle(claimed, tx) : [];
+      });
+      afterCommit.forEach((callback) => this.runAfterCommit(callback));
+      return claimed.length;
+    } catch (error) {
+      if (claimed.length === 0) {
+        throw error;
+      }
+      this.logger.warn(`Outbox batch of ${claimed.length} failed, retrying events one by one: ${error.message}`);
+    }
+
+    for (const event of claimed) {
+      try {
+        const afterCommit = await this.prisma.$transaction(async (tx) => {
+          // Another instance may have taken it since the batch rolled back
+          const [locked] = await tx.$queryRaw<OutboxEventRecord[]>`
+            SELECT "id", "type", "payload", "attempts" FROM "OutboxEvent"
+            WHERE "id" = ${event.id} AND "deadAt" IS NULL
+            FOR UPDATE SKIP LOCKED
+          `;
+          return locked ? this.handle([locked], tx) : [];
+        });
+        afterCommit.forEach((callback) => this.runAfterCommit(callback));
+      } catch (error) {
+        await this.recordFailure(event, error);
+      }
+    }
+    return claimed.length;
+  }
+
+  private async handle(events: OutboxEventRecord[], tx: Prisma.TransactionClient): Promise<Array<() => void>> {
+    const byType = new Map<string, OutboxEventRecord[]>();
+    for (const event of events) {
+      const group = byType.get(event.type) || [];
+      group.push(event);
+      byType.set(event.type, group);
+    }
+
+    const afterCommit: Array<() => void> = [];
+    for (const [type, group] of byType) {
+      const handler = this.handlers.get(type);
+      if (!handler) {
+        throw new Error(`No outbox handler registered for "${type}"`);
+      }
+      const callback = await handler(group, tx);
+      if (callback) afterCommit.push(callback);
+    }
+
+    await tx.outboxEvent.deleteMany({ where: { id: { in: events.map((event) => event.id) } } });
+    return afterCommit;
+  }
+
+  private runAfterCommit(callback: () => void) {
+    try {
+      callback();
+    } catch (error) {
+      this.logger.error(`Outbox post-commit callback failed: ${error.message}`);
+    }
+  }
+
+  private async recordFailure(event: OutboxEventRecord, error: Error) {
+    const attempts = event.attempts + 1;
+    const dead = attempts >= this.maxAttempts;
+    if (dead) {
+      this.logger.error(`Outbox event ${event.id} (${event.type}) dead-lettered after ${attempts} attempts: ${error.message}`);
+    }
+
+    await this.prisma.outboxEvent
+      .update({
+        where: { id: event.id },
+        data: {
+          attempts,
+          lastError: error.message.slice(0, 1000),
+          availableAt: new Date(Date.now() + this.RETRY_BASE_MS * 2 ** (attempts - 1)),
+          deadAt: dead ? new Date() : null,
+        },
+      })
+      .catch((updateError) => this.logger.error(`Could not record outbox failure: ${updateError.message}`));
+  }
+}
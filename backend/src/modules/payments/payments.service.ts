@@ -4,13 +4,17 @@ import { PaymentIntent } from '@prisma/client';
 import { Queue } from 'bullmq';
 import { Redis } from 'ioredis';
 import * as crypto from 'crypto';
+import { TenantCacheService } from '../cache/tenant-cache.service';
 
 @Injectable()
 export class PaymentsService {
   private readonly webhookQueue: Queue;
   private readonly redis: Redis;
 
-  constructor(private prisma: PrismaService) {
+  constructor(
+    private prisma: PrismaService,
+    private cache: TenantCacheService,
+  ) {
     this.redis = new Redis(process.env.REDIS_URL);
     this.webhookQueue = new Queue('payment.process_webhook', {
       connection: this.redis,
@@ -31,6 +35,7 @@ export class PaymentsService {
         hubtleRef,
       },
     });
+    await this.cache.invalidate('payments', paymentIntent.companyId);
 
     return paymentIntent;
   }
@@ -0,0 +1,95 @@
+import { Server } from 'socket.io';
+import { WireFormat, encodeLocation } from '../gps/location-codec';
+
+export interface LocationFanoutTarget {
+  busId: string;
+  companyId?: string | null;
+}
+
+interface PendingLocation {
+  companyId: string | null;
+  data: any;
+}
+
+// Platform admins see every company's buses on the dashboard
+export const PLATFORM_ADMIN_ROOM = 'role:PLATFORM_ADMIN';
+
+// Every socket joins the room of the wire format it negotiated, so one
+// emit per format reaches each socket exactly once
+export const WIRE_ROOMS: Record<WireFormat, string> = {
+  json: 'wire:json',
+  msgpack: 'wire:msgpack',
+};
+
+/**
+ * Coalesces bus location updates and fans them out once per tick.
+ *
+ * Only the latest position per bus survives until the next tick, so a bus
+ * pinging faster than the tick costs one message per subscriber per tick.
+ * Positions go to the bus room (`bus_location`) and to the owning company's
+ * room plus platform admins (`new_location_update`), never to every socket.
+ * Bus room sockets that negotiated msgpack get `bus_location` as the compact
+ * location record instead of JSON.
+ * Emits are volatile: a client whose transport is not writable skips the
+ * update instead of queueing stale positions behind it.
+ */
+export class LocationFanout {
+  private pending = new Map<string, PendingLocation>();
+  private timer: NodeJS.Timeout | null = null;
+
+  constructor(
+    private readonly getServer: () => Server,
+    private readonly tickMs: number,
+  ) {}
+
+  start() {
+    if (this.timer) {
+      return;
+    }
+    this.timer = setInterval(() => this.flush(), this.tickMs);
+    this.timer.unref();
+  }
+
+  stop() {
+    if (this.timer) {
+      clearInterval(this.timer);
+      this.timer = null;
+    }
+    this.flush();
+  }
+
+  push(target: LocationFanoutTarget, data: any) {
+    // Re-insert so buses are flushed in order of their latest update
+    this.pending.delete(target.busId);
+    this.pending.set(target.busId, { companyId: target.companyId || null, data });
+  }
+
+  get pendingCount(): number {
+    return this.pending.size;
+  }
+
+  /**
+   * Emit the latest position of every bus updated since the last tick.
+   * Returns the number of buses flushed.
+   */
+  flush(): number {
+    const server = this.getServer();
+    if (!server || this.pending.size === 0) {
+      return 0;
+    }
+
+    const batch = this.pending;
+    this.pending = new Map();
+
+    for (const [busId, { companyId, data }] of batch) {
+      const busRoom = `bus:${busId}`;
+      server.to(busRoom).except(WIRE_ROOMS.msgpack).volatile.emit('bus_location', data);
+      server.to(busRoom).except(WIRE_ROOMS.json).volatile.emit('bus_location', encodeLocation(data));
+
+      const rooms = companyId ? [`company:${companyId}`, PLATFORM_ADMIN_ROOM] : [PLATFORM_ADMIN_ROOM];
+      server.to(rooms).volatile.emit('new_location_update', data);
+    }
+
+    return batch.size;
+  }
+}
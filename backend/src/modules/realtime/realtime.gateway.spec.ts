@@ -0,0 +1,102 @@
+import { Test, TestingModule } from '@nestjs/testing';
+import { JwtService } from '@nestjs/jwt';
+import { RealtimeGateway } from './realtime.gateway';
+import { PrismaService } from '../../prisma/prisma.service';
+import { GpsIngestionService } from '../gps/gps-ingestion.service';
+import { BusMembershipService } from '../bus-membership/bus-membership.service';
+import { AuthSessionService } from '../auth/auth-session.service';
+
+jest.mock('ioredis', () => {
+  const client = () => ({
+    subscribe: jest.fn(),
+    on: jest.fn(),
+    publish: jest.fn().mockResolvedValue(0),
+    duplicate: () => client(),
+    quit: jest.fn().mockResolvedValue('OK'),
+  });
+  return { Redis: jest.fn().mockImplementation(client) };
+});
+
+describe('RealtimeGateway room joins', () => {
+  let gateway: RealtimeGateway;
+  let getBusIds: jest.Mock;
+  let isRevoked: jest.Mock;
+
+  const socket = (data: Record<string, any>) => ({ id: 'socket-1', data, join: jest.fn() }) as any;
+
+  beforeEach(async () => {
+    getBusIds = jest.fn().mockResolvedValue(['bus-own']);
+    isRevoked = jest.fn().mockResolvedValue(false);
+
+    const module: TestingModule = await Test.createTestingModule({
+      providers: [
+        RealtimeGateway,
+        { provide: JwtService, useValue: { verify: () => ({ sub: 'parent-1', role: 'PARENT', sid: 'session-1' }) } },
+        { provide: AuthSessionService, useValue: { isRevoked } },
+        { provide: GpsIngestionService, useValue: {} },
+        { provide: BusMembershipService, useValue: { getBusIds } },
+        {
+          provide: PrismaService,
+          useValue: {
+            bus: {
+              findUnique: jest.fn(async ({ where }) => ({
+                companyId: where.id === 'bus-foreign' ? 'company-2' : 'company-1',
+                driver: null,
+              })),
+            },
+          },
+        },
+      ],
+    }).compile();
+
+    gateway = module.get<RealtimeGateway>(RealtimeGateway);
+  });
+
+  afterEach(() => gateway.onModuleDestroy());
+
+  it('should refuse connections from revoked sessions', async () => {
+    isRevoked.mockResolvedValue(true);
+    const client = { ...socket({}), handshake: { auth: { token: 'token' } }, disconnect: jest.fn() };
+
+    await gateway.handleConnection(client);
+
+    expect(isRevoked).toHaveBeenCalledWith('session-1');
+    expect(client.disconnect).toHaveBeenCalled();
+    expect(client.join).not.toHaveBeenCalled();
+  });
+
+  it("should refuse to join another company's room", async () => {
+    const client = socket({ userId: 'admin-1', role: 'COMPANY_ADMIN', companyId: 'company-1' });
+
+    const result = await gateway.handleJoinCompanyRoom(client, { companyId: 'company-2' });
+
+    expect(result.success).toBe(false);
+    expect(client.join).not.toHaveBeenCalled();
+  });
+
+  it('should let platform admins join any company room', async () => {
+    const client = socket({ userId: 'root', role: 'PLATFORM_ADMIN', companyId: null });
+
+    await expect(gateway.handleJoinCompanyRoom(client, { companyId: 'company-2' })).resolves.toEqual({ success: true });
+    expect(client.join).toHaveBeenCalledWith('company:company-2');
+  });
+
+  it("should refuse a bus room for a foreign company's bus the user doesn't ride", async () => {
+    const client = socket({ userId: 'parent-1', role: 'PARENT', companyId: 'company-1' });
+
+    const result = await gateway.handleJoinBusRoom(client, { busId: 'bus-foreign' });
+
+    expect(result.success).toBe(false);
+    expect(client.join).not.toHaveBeenCalled();
+  });
+
+  it("should allow member buses and the caller's company buses", async () => {
+    const parent = socket({ userId: 'parent-1', role: 'PARENT', companyId: null });
+    const admin = socket({ userId: 'admin-1', role: 'COMPANY_ADMIN', companyId: 'company-1' });
+
+    await expect(gateway.handleJoinBusRoom(parent, { busId: 'bus-own' })).resolves.toEqual({ success: true });
+    await expect(gateway.handleJoinBusRoom(admin, { busId: 'bus-7' })).resolves.toEqual({ success: true });
+    expect(getBusIds).toHaveBeenCalledWith('parent-1', 'PARENT');
+    expect(admin.join).toHaveBeenCalledWith('bus:bus-7');
+  });
+});
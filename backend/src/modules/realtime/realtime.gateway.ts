@@ -1,8 +1,29 @@
-import { WebSocketGateway, WebSocketServer, OnGatewayConnection, OnGatewayDisconnect, SubscribeMessage, ConnectedSocket, MessageBody } from '@nestjs/websockets';
+import { WebSocketGateway, WebSocketServer, OnGatewayConnection, OnGatewayDisconnect, OnGatewayInit, SubscribeMessage, ConnectedSocket, MessageBody } from '@nestjs/websockets';
+import { OnModuleDestroy } from '@nestjs/common';
 import { Server, Socket } from 'socket.io';
 import { JwtService } from '@nestjs/jwt';
 import { Redis } from 'ioredis';
+import { randomUUID } from 'crypto';
 import { PrismaService } from '../../prisma/prisma.service';
+import { GpsIngestionService } from '../gps/gps-ingestion.service';
+import { LocationFanout, WIRE_ROOMS } from './location-fanout';
+import { decodeLocation, resolveWireFormat } from '../gps/location-codec';
+import { BusMembershipService } from '../bus-membership/bus-membership.service';
+import { AuthSessionService } from '../auth/auth-session.service';
+import { isRedisAdapterEnabled } from '../../common/adapters/redis-io.adapter';
+import { NOTIFICATION_DELIVERY_CHANNEL, NotificationDeliveryMessage } from '../notifications/notification-delivery';
+import { SampledLogger } from '../../common/logging/sampled-logger';
+import { socketConnections, socketRooms } from '../metrics/metrics';
+
+interface GpsUpdateMessage {
+  busId: string;
+  latitude: number;
+  longitude: number;
+  speed?: number;
+  heading?: number;
+  accuracy?: number;
+  timestamp?: string;
+}
 
 @WebSocketGateway({
   cors: {
@@ -12,38 +33,117 @@ import { PrismaService } from '../../prisma/prisma.service';
   pingInterval: 25000,  // Send ping every 25 seconds
   pingTimeout: 60000,   // Wait 60 seconds for pong response
 })
-export class RealtimeGateway implements OnGatewayConnection, OnGatewayDisconnect {
+export class RealtimeGateway implements OnGatewayInit, OnGatewayConnection, OnGatewayDisconnect, OnModuleDestroy {
   @WebSocketServer()
   server: Server;
 
-  private readonly redis: Redis;
+  // Only used without the socket.io Redis adapter, to relay location updates
+  // published by other instances. Subscriber mode blocks normal commands, so
+  // publishing needs its own connection.
+  private readonly redisPublisher: Redis | null = null;
+  private readonly redisSubscriber: Redis | null = null;
+  // Deliveries from the notification worker process. Every instance gets
+  // each message and emits to its own sockets only.
+  private readonly deliverySubscriber: Redis;
+  private readonly instanceId = randomUUID();
+  // Per-connection and per-ping entries are sampled; errors are not
+  private readonly logger = new SampledLogger(RealtimeGateway.name);
   private readonly connectedUsers = new Map<string, string>(); // socketId -> userId
-  private readonly gpsHeartbeatCounter = new Map<string, number>(); // busId -> heartbeat count
-  private readonly HEARTBEAT_THRESHOLD = 5; // Save to DB every 5 heartbeats
 
-  constructor(private jwtService: JwtService, private prisma: PrismaService) {
-    this.redis = new Redis(process.env.REDIS_URL);
-    this.initializeRedisSubscriber();
+  private readonly BUS_COMPANY_TTL_MS = 5 * 60 * 1000;
+  private readonly busCompanyCache = new Map<string, { companyId: string | null; expiresAt: number }>();
+  private readonly locationFanout = new LocationFanout(
+    () => this.server,
+    parseInt(process.env.LOCATION_FANOUT_TICK_MS || '1000', 10),
+  );
+
+  constructor(
+    private jwtService: JwtService,
+    private prisma: PrismaService,
+    private gpsIngestion: GpsIngestionService,
+    private busMembership: BusMembershipService,
+    private sessions: AuthSessionService,
+  ) {
+    // With the Redis adapter, emits already reach every replica's clients
+    if (!isRedisAdapterEnabled()) {
+      this.redisPublisher = new Redis(process.env.REDIS_URL);
+      this.redisSubscriber = this.redisPublisher.duplicate();
+      this.initializeRedisSubscriber();
+    }
+    this.deliverySubscriber = new Redis(process.env.REDIS_URL);
+    this.initializeDeliverySubscriber();
+  }
+
+  afterInit() {
+    this.locationFanout.start();
+
+    // Read from the local adapter at scrape time: this instance's sockets only
+    socketConnections.collect(() => socketConnections.set({}, this.server.of('/').sockets.size));
+    socketRooms.collect(() => {
+      socketRooms.reset();
+      const counts = new Map<string, number>();
+      for (const [room, members] of this.server.of('/').adapter.rooms) {
+        // Every socket has a private room named after its id; only "type:id" rooms count
+        const separator = room.indexOf(':');
+        if (separator === -1) continue;
+        const type = room.slice(0, separator);
+        counts.set(type, (counts.get(type) || 0) + members.size);
+      }
+      for (const [type, count] of counts) {
+        socketRooms.set({ type }, count);
+      }
+    });
+  }
+
+  async onModuleDestroy() {
+    this.locationFanout.stop();
+    await Promise.all(
+      [this.redisPublisher, this.redisSubscriber, this.deliverySubscriber]
+        .filter(Boolean)
+        .map((client) => client.quit().catch(() => undefined)),
+    );
   }
 
   private async initializeRedisSubscriber() {
     // Subscribe to location updates
-    this.redis.subscribe('bus_location_updates', (err, count) => {
+    this.redisSubscriber.subscribe('bus_location_updates', (err, count) => {
       if (err) {
         console.error('Redis subscription error:', err);
       }
     });
 
     // Handle incoming messages
-    this.redis.on('message', (channel, message) => {
+    this.redisSubscriber.on('message', (channel, message) => {
       if (channel === 'bus_location_updates') {
-        const data = JSON.parse(message);
-        // Broadcast to relevant users
+        const { origin, ...data } = JSON.parse(message);
+        // Updates from this instance were already queued locally
+        if (origin === this.instanceId) {
+          return;
+        }
         this.broadcastLocationUpdate(data);
       }
     });
   }
 
+  private initializeDeliverySubscriber() {
+    this.deliverySubscriber.subscribe(NOTIFICATION_DELIVERY_CHANNEL, (err) => {
+      if (err) {
+        console.error('Redis subscription error:', err);
+      }
+    });
+
+    this.deliverySubscriber.on('message', (channel, message) => {
+      if (channel !== NOTIFICATION_DELIVERY_CHANNEL || !this.server) {
+        return;
+      }
+      const { notifications }: NotificationDeliveryMessage = JSON.parse(message);
+      for (const notification of notifications) {
+        // local: the other instances relay the same message themselves
+        this.server.local.to(`user:${notification.userId}`).emit('new_notification', notification);
+      }
+    });
+  }
+
   async handleConnection(client: Socket) {
     try {
       // Authenticate user
@@ -57,13 +157,28 @@ export class RealtimeGateway implements OnGatewayConnection, OnGatewayDisconnect
         secret: process.env.JWT_ACCESS_SECRET,
       });
 
+      // Same logout denylist check as JwtStrategy
+      if (payload.sid && (await this.sessions.isRevoked(payload.sid))) {
+        this.logger.warn({ message: 'Refused socket for revoked session', socketId: client.id, userId: payload.sub });
+        client.disconnect();
+        return;
+      }
+
       // Store user connection
       this.connectedUsers.set(client.id, payload.sub);
+      client.data.userId = payload.sub;
+      client.data.role = payload.role;
+      client.data.companyId = payload.companyId || null;
+
+      // Opt-in compact encoding for bus_location; JSON unless the client asks
+      const wire = resolveWireFormat(client.handshake);
+      client.data.wire = wire;
+      client.join(WIRE_ROOMS[wire]);
 
       // Join relevant rooms
       await this.joinUserRooms(client, payload);
       
-      console.log(`Client connected: ${client.id}, User: ${payload.sub}`);
+      this.logger.log({ message: 'Client connected', socketId: client.id, userId: payload.sub });
     } catch (error) {
       console.error('WebSocket authentication error:', error);
       client.disconnect();
@@ -74,7 +189,7 @@ export class RealtimeGateway implements OnGatewayConnection, OnGatewayDisconnect
     const userId = this.connectedUsers.get(client.id);
     if (userId) {
       this.connectedUsers.delete(client.id);
-      console.log(`Client disconnected: ${client.id}, User: ${userId}`);
+      this.logger.log({ message: 'Client disconnected', socketId: client.id, userId });
     }
   }
 
@@ -109,19 +224,56 @@ export class RealtimeGateway implements OnGatewayConnection, OnGatewayDisconnect
   }
 
   private async getRelevantBuses(userId: string, role: string): Promise<string[]> {
-    // This would fetch buses relevant to the user based on their role
-    // For drivers: buses they drive
-    // For parents: buses that transport their children
-    // Implementation would depend on your data model
-    return [];
+    // Drivers: buses they drive or are scheduled on. Parents: buses that
+    // carry their children. Served from the Redis-cached membership index.
+    try {
+      return await this.busMembership.getBusIds(userId, role);
+    } catch (error) {
+      console.error(`[Socket] Failed to load buses for user ${userId}:`, error);
+      return [];
+    }
   }
 
-  private broadcastLocationUpdate(data: any) {
-    // Broadcast to bus-specific room
-    this.server.to(`bus:${data.busId}`).emit('location_update', data);
-    
-    // Also emit to individual users who might be interested
-    this.server.emit('new_location_update', data);
+  private async broadcastLocationUpdate(data: any) {
+    const companyId = data.companyId || (await this.resolveBusCompanyId(data.busId));
+    this.locationFanout.push({ busId: data.busId, companyId }, data);
+  }
+
+  // A bus room is open to the bus's driver and riders (the membership index)
+  // and to its company's staff; platform admins can follow any bus
+  private async canJoinBusRoom(client: Socket, busId: string): Promise<boolean> {
+    if (!busId) return false;
+    const { userId, role, companyId } = client.data;
+    if (role === 'PLATFORM_ADMIN') return true;
+
+    const memberOf = await this.getRelevantBuses(userId, role);
+    if (memberOf.includes(busId)) return true;
+
+    return !!companyId && (await this.resolveBusCompanyId(busId)) === companyId;
+  }
+
+  private async resolveBusCompanyId(busId: string): Promise<string | null> {
+    const cached = this.busCompanyCache.get(busId);
+    if (cached && cached.expiresAt > Date.now()) {
+      return cached.companyId;
+    }
+
+    let companyId: string | null = null;
+    try {
+      const bus = await this.prisma.bus.findUnique({
+        where: { id: busId },
+        select: {
+          companyId: true,
+          driver: { select: { user: { select: { companyId: true } } } },
+        },
+      });
+      companyId = bus?.companyId || bus?.driver?.user?.companyId || null;
+    } catch (error) {
+      console.error(`[GPS Update] Failed to resolve company for bus ${busId}:`, error);
+    }
+
+    this.busCompanyCache.set(busId, { companyId, expiresAt: Date.now() + this.BUS_COMPANY_TTL_MS });
+    return companyId;
   }
 
   @SubscribeMessage('join_bus_room')
@@ -129,6 +281,10 @@ export class RealtimeGateway implements OnGatewayConnection, OnGatewayDisconnect
     @ConnectedSocket() client: Socket,
     @MessageBody() data: { busId: string },
   ) {
+    if (!(await this.canJoinBusRoom(client, data.busId))) {
+      this.logger.warn({ message: 'Bus room join refused', socketId: client.id, busId: data.busId });
+      return { success: false, error: 'Not allowed to follow this bus' };
+    }
     client.join(`bus:${data.busId}`);
     return { success: true };
   }
@@ -145,9 +301,11 @@ export class RealtimeGateway implements OnGatewayConnection, OnGatewayDisconnect
   @SubscribeMessage('gps_update')
   async handleGpsUpdate(
     @ConnectedSocket() client: Socket,
-    @MessageBody() data: { busId: string; latitude: number; longitude: number; speed?: number; heading?: number; accuracy?: number; timestamp?: string },
+    @MessageBody() payload: GpsUpdateMessage | Buffer,
   ) {
-    console.log('[GPS Update] Received from client:', client.id, 'Bus:', data.busId);
+    // msgpack clients send the compact location record as a binary attachment
+    const data: GpsUpdateMessage = Buffer.isBuffer(payload) ? decodeLocation(payload) : payload;
+    this.logger.debug({ message: 'GPS update', socketId: client.id, busId: data.busId });
     
     const locationData = {
       busId: data.busId,
@@ -159,44 +317,23 @@ export class RealtimeGateway implements OnGatewayConnection, OnGatewayDisconnect
       timestamp: data.timestamp || new Date().toISOString(),
     };
 
-    // Store in Redis for real-time access
-    try {
-      await this.redis.setex(`bus:${data.busId}:location`, 300, JSON.stringify(locationData));
-      console.log(`[GPS Update] Stored in Redis for bus ${data.busId}`);
-    } catch (error) {
-      console.warn('[GPS Update] Redis unavailable, continuing without cache', error);
-    }
+    // Cache in Redis and queue every Nth heartbeat for batched persistence.
+    // The heartbeat counter is shared with the REST heartbeat endpoint.
+    await this.gpsIngestion.ingest({
+      busId: data.busId,
+      latitude: data.latitude,
+      longitude: data.longitude,
+      speed: locationData.speed,
+      heading: data.heading,
+      accuracy: data.accuracy,
+      timestamp: new Date(locationData.timestamp),
+    });
 
-    // Save to database every N heartbeats
-    const heartbeatCount = (this.gpsHeartbeatCounter.get(data.busId) || 0) + 1;
-    this.gpsHeartbeatCounter.set(data.busId, heartbeatCount);
-    
-    if (heartbeatCount % this.HEARTBEAT_THRESHOLD === 0) {
-      try {
-        await this.prisma.busLocation.create({
-          data: {
-            busId: data.busId,
-            latitude: data.latitude,
-            longitude: data.longitude,
-            speed: data.speed || 0,
-            timestamp: new Date(locationData.timestamp),
-          },
-        });
-        console.log(`[GPS Update] Saved to database for bus ${data.busId}`);
-      } catch (error) {
-        console.error('[GPS Update] Database save failed:', error);
-      }
-    }
+    // Queue for the next fan-out tick. Only the bus room and the bus's
+    // company (plus platform admins) receive it.
+    const companyId = client.data.companyId || (await this.resolveBusCompanyId(data.busId));
+    this.locationFanout.push({ busId: data.busId, companyId }, locationData);
 
-    // Broadcast to bus-specific room
-    const roomSize = this.server.sockets.adapter.rooms.get(`bus:${data.busId}`)?.size || 0;
-    console.log(`[GPS Update] Broadcasting to ${roomSize} clients in room bus:${data.busId}`);
-    
-    this.server.to(`bus:${data.busId}`).emit('bus_location', locationData);
-    
-    // Also broadcast to all connected clients for admin dashboard
-    this.server.emit('new_location_update', locationData);
-    
     return { success: true };
   }
 
@@ -205,8 +342,12 @@ export class RealtimeGateway implements OnGatewayConnection, OnGatewayDisconnect
     @ConnectedSocket() client: Socket,
     @MessageBody() data: { companyId: string },
   ) {
+    if (client.data.role !== 'PLATFORM_ADMIN' && (!data.companyId || data.companyId !== client.data.companyId)) {
+      this.logger.warn({ message: 'Company room join refused', socketId: client.id, companyId: data.companyId });
+      return { success: false, error: 'Not allowed to join this company' };
+    }
     client.join(`company:${data.companyId}`);
-    console.log(`[Socket] Client ${client.id} joined company room: ${data.companyId}`);
+    this.logger.debug({ message: 'Joined company room', socketId: client.id, companyId: data.companyId });
     return { success: true };
   }
 
@@ -216,7 +357,7 @@ export class RealtimeGateway implements OnGatewayConnection, OnGatewayDisconnect
     @MessageBody() data: { tripId: string },
   ) {
     client.join(`trip:${data.tripId}`);
-    console.log(`[Socket] Client ${client.id} subscribed to trip: ${data.tripId}`);
+    this.logger.debug({ message: 'Subscribed to trip', socketId: client.id, tripId: data.tripId });
     return { success: true };
   }
 
@@ -226,20 +367,22 @@ export class RealtimeGateway implements OnGatewayConnection, OnGatewayDisconnect
     @MessageBody() data: { tripId: string },
   ) {
     client.leave(`trip:${data.tripId}`);
-    console.log(`[Socket] Client ${client.id} unsubscribed from trip: ${data.tripId}`);
+    this.logger.debug({ message: 'Unsubscribed from trip', socketId: client.id, tripId: data.tripId });
     return { success: true };
   }
 
   // Method to emit location updates (called by other services)
   async emitLocationUpdate(busId: string, locationData: any) {
-    // Publish to Redis for potential horizontal scaling
-    await this.redis.publish('bus_location_updates', JSON.stringify({
-      busId,
-      ...locationData,
-    }));
-
-    // Emit directly to connected clients
-    this.server.to(`bus:${busId}`).emit('location_update', locationData);
+    await this.broadcastLocationUpdate({ busId, ...locationData });
+
+    // Relay to the other instances when they don't share an adapter
+    if (this.redisPublisher) {
+      await this.redisPublisher.publish('bus_location_updates', JSON.stringify({
+        busId,
+        ...locationData,
+        origin: this.instanceId,
+      }));
+    }
   }
 
   // Method to emit notification events
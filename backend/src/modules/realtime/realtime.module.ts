@@ -3,12 +3,16 @@ import { RealtimeGateway } from './realtime.gateway';
 import { JwtModule } from '@nestjs/jwt';
 import { AuthModule } from '../auth/auth.module';
 import { PrismaModule } from '../../prisma/prisma.module';
+import { GpsModule } from '../gps/gps.module';
+import { BusMembershipModule } from '../bus-membership/bus-membership.module';
 
 @Module({
   imports: [
     JwtModule.register({}), // leave config empty, AppModule handles global config
     AuthModule,             // brings JwtService + strategies
     PrismaModule,           // brings PrismaService for database operations
+    GpsModule,              // brings GpsIngestionService for batched GPS writes
+    BusMembershipModule,    // brings the cached user -> bus index for room joins
   ],
   providers: [RealtimeGateway],
   exports: [RealtimeGateway],
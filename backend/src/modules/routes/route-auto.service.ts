@@ -1,29 +1,134 @@
-import { Injectable, Logger, BadRequestException } from '@nestjs/common';
+import { Injectable, Logger, BadRequestException, NotFoundException, OnModuleDestroy } from '@nestjs/common';
+import { Prisma } from '@prisma/client';
+import { Redis } from 'ioredis';
+import { randomUUID } from 'crypto';
+import { extname, join } from 'path';
+import { Worker } from 'worker_threads';
 import { PrismaService } from '../../prisma/prisma.service';
+import { haversineKm } from '../../common/geo/geo-index';
+import { RouteEngineInput, RouteEngineResult } from './route-engine';
 
-interface Location {
-  lat: number;
-  lon: number;
-  childId?: string;
+export interface AutoGenerateOptions {
+  // Same seed + same children => same routes
+  seed?: number;
 }
 
-interface Cluster {
-  centroid: Location;
-  children: Array<{ childId: string; lat: number; lon: number }>;
+export type AutoGenerateJobStatus = 'queued' | 'running' | 'completed' | 'failed';
+
+export interface AutoGenerateJob {
+  id: string;
+  schoolId: string;
+  // Owner of the school; only that company's admins can read the job
+  companyId: string;
+  status: AutoGenerateJobStatus;
+  phase: string;
+  progress: number;
+  result?: any;
+  error?: string;
+  createdAt: string;
+  updatedAt: string;
 }
 
+// Share of the overall progress bar each phase covers
+const PHASES: Record<string, [number, number]> = {
+  loading: [0, 10],
+  seeding: [10, 15],
+  clustering: [15, 75],
+  ordering: [75, 90],
+  saving: [90, 100],
+};
+
 @Injectable()
-export class RouteAutoService {
+export class RouteAutoService implements OnModuleDestroy {
   private readonly logger = new Logger(RouteAutoService.name);
+  private readonly redis: Redis;
+
+  private readonly JOB_TTL_SECONDS = 60 * 60;
+
+  constructor(private prisma: PrismaService) {
+    this.redis = new Redis(process.env.REDIS_URL);
+  }
 
-  constructor(private prisma: PrismaService) {}
+  async onModuleDestroy() {
+    await this.redis.quit().catch(() => undefined);
+  }
 
   /**
    * Auto-generate routes for a school based on children pickup locations
-   * Uses bus capacity to determine cluster count
+   * Uses bus capacity as a hard cap on children per route
+   */
+  async autoGenerateRoutes(schoolId: string, options: AutoGenerateOptions = {}): Promise<any> {
+    return this.generate(schoolId, options, () => undefined);
+  }
+
+  /**
+   * Same as autoGenerateRoutes, but returns a job id immediately. Poll
+   * getAutoGenerateJob for progress and the final result.
+   */
+  async startAutoGenerateJob(schoolId: string, options: AutoGenerateOptions = {}): Promise<AutoGenerateJob> {
+    const school = await this.prisma.school.findUnique({
+      where: { id: schoolId },
+      select: { companyId: true },
+    });
+    if (!school) {
+      throw new BadRequestException('School not found');
+    }
+
+    const now = new Date().toISOString();
+    const job: AutoGenerateJob = {
+      id: randomUUID(),
+      schoolId,
+      companyId: school.companyId,
+      status: 'queued',
+      phase: 'loading',
+      progress: 0,
+      createdAt: now,
+      updatedAt: now,
+    };
+    await this.saveJob(job);
+
+    this.generate(schoolId, options, (phase, percent) => {
+      const [from, to] = PHASES[phase] || [0, 100];
+      job.status = 'running';
+      job.phase = phase;
+      job.progress = Math.round(from + ((to - from) * percent) / 100);
+      this.saveJob(job).catch(() => undefined);
+    })
+      .then((result) => {
+        job.status = 'completed';
+        job.progress = 100;
+        job.result = result;
+      })
+      .catch((error) => {
+        this.logger.error(`Auto-route job ${job.id} for school ${schoolId} failed: ${error.message}`, error.stack);
+        job.status = 'failed';
+        job.error = error.message;
+      })
+      .finally(() => this.saveJob(job).catch(() => undefined));
+
+    return job;
+  }
+
+  /**
+   * Pass companyId to restrict the lookup to that company's jobs; another
+   * company's job reads as not found.
    */
-  async autoGenerateRoutes(schoolId: string): Promise<any> {
+  async getAutoGenerateJob(jobId: string, companyId?: string): Promise<AutoGenerateJob> {
+    const raw = await this.redis.get(this.jobKey(jobId));
+    const job: AutoGenerateJob | null = raw ? JSON.parse(raw) : null;
+    if (!job || (companyId && job.companyId !== companyId)) {
+      throw new NotFoundException('Route generation job not found or expired');
+    }
+    return job;
+  }
+
+  private async generate(
+    schoolId: string,
+    options: AutoGenerateOptions,
+    onProgress: (phase: string, percent: number) => void,
+  ): Promise<any> {
     this.logger.log(`Starting auto-route generation for school ${schoolId}`);
+    onProgress('loading', 0);
 
     // 1. Get all children with pickup locations for this school
     const children = await this.prisma.child.findMany({
@@ -32,6 +137,23 @@ export class RouteAutoService {
         pickupLatitude: { not: null },
         pickupLongitude: { not: null },
       },
+      // The result is cached in Redis with the job, so leave out parent contact details
+      select: {
+        id: true,
+        firstName: true,
+        lastName: true,
+        grade: true,
+        pickupLatitude: true,
+        pickupLongitude: true,
+        parent: {
+          select: {
+            id: true,
+            firstName: true,
+            lastName: true,
+          },
+        },
+      },
+      orderBy: { id: 'asc' }, // Stable input order keeps seeded runs reproducible
     });
 
     if (children.length === 0) {
@@ -58,273 +180,166 @@ export class RouteAutoService {
           },
         },
       },
+      select: { capacity: true },
     });
 
     if (buses.length === 0) {
       throw new BadRequestException('No buses available. Please add buses first.');
     }
 
-    // Calculate average capacity or use largest bus capacity
     const avgCapacity = Math.floor(
       buses.reduce((sum, bus) => sum + bus.capacity, 0) / buses.length,
     );
-    const targetChildrenPerRoute = Math.max(10, Math.floor(avgCapacity * 0.8)); // 80% of capacity
+    // 80% of capacity, enforced as a hard limit per route
+    const routeCapacity = Math.max(1, Math.floor(avgCapacity * 0.8));
+    const seed = options.seed ?? Math.floor(Math.random() * 2 ** 31);
 
     this.logger.log(
-      `Average bus capacity: ${avgCapacity}, target children per route: ${targetChildrenPerRoute}`,
+      `Average bus capacity: ${avgCapacity}, max children per route: ${routeCapacity}, seed: ${seed}`,
     );
+    onProgress('loading', 100);
+
+    // 4. Cluster and order stops in a worker thread
+    const engineInput: RouteEngineInput = {
+      latitudes: Float64Array.from(children, (child) => child.pickupLatitude),
+      longitudes: Float64Array.from(children, (child) => child.pickupLongitude),
+      capacity: routeCapacity,
+      seed,
+      school: school.latitude != null && school.longitude != null ? { lat: school.latitude, lon: school.longitude } : null,
+    };
+    const started = Date.now();
+    const { routes: engineRoutes, iterations } = await this.runEngine(engineInput, onProgress);
 
-    // 4. Determine number of clusters (routes) needed
-    const numRoutes = Math.max(1, Math.ceil(children.length / targetChildrenPerRoute));
-
-    this.logger.log(`Creating ${numRoutes} routes for ${children.length} children`);
-
-    // 5. Cluster children by location using k-means
-    const childLocations = children.map((child) => ({
-      childId: child.id,
-      lat: child.pickupLatitude!,
-      lon: child.pickupLongitude!,
-    }));
-
-    const clusters = this.kMeansClustering(childLocations, numRoutes);
-
-    // 6. Create routes and stops for each cluster
-    const createdRoutes = [];
-    const routeLabels = this.generateRouteLabels(numRoutes);
-
-    for (let i = 0; i < clusters.length; i++) {
-      const cluster = clusters[i];
-      const routeName = routeLabels[i];
-
-      // Order stops: closest to school first (or by cluster centroid if school has no coords)
-      const orderedStops = this.orderStops(
-        cluster.children,
-        school.latitude && school.longitude
-          ? { lat: school.latitude, lon: school.longitude }
-          : cluster.centroid,
-      );
+    this.logger.log(
+      `Clustered ${children.length} children into ${engineRoutes.length} routes in ${Date.now() - started}ms (${iterations} iterations)`,
+    );
 
-      // Create route with stops
-      const route = await this.prisma.route.create({
-        data: {
-          name: routeName,
-          schoolId,
-          stops: {
-            create: orderedStops.map((stop, idx) => ({
-              name: `Stop ${idx + 1}`,
-              latitude: stop.lat,
-              longitude: stop.lon,
-              order: idx + 1,
-            })),
-          },
-        },
-        include: {
-          stops: true,
-        },
+    // 5. Write every route and stop in one transaction
+    onProgress('saving', 0);
+    const routeLabels = this.generateRouteLabels(engineRoutes.length);
+    const routeRows: Prisma.RouteCreateManyInput[] = [];
+    const stopRows: Prisma.StopCreateManyInput[] = [];
+
+    engineRoutes.forEach((engineRoute, idx) => {
+      const routeId = randomUUID();
+      routeRows.push({ id: routeId, name: routeLabels[idx], schoolId });
+      engineRoute.stops.forEach((stop, order) => {
+        stopRows.push({
+          name: `Stop ${order + 1}`,
+          latitude: stop.lat,
+          longitude: stop.lon,
+          order: order + 1,
+          routeId,
+        });
       });
+    });
 
-      // Fetch full child details for this route
-      const routeChildren = await this.prisma.child.findMany({
-        where: {
-          id: { in: cluster.children.map((c) => c.childId) },
-        },
-        include: {
-          parent: {
-            select: {
-              id: true,
-              email: true,
-              firstName: true,
-              lastName: true,
-              phone: true,
-            },
-          },
-        },
-      });
+    const [createdRoutes, createdStops] = await this.prisma.$transaction([
+      this.prisma.route.createManyAndReturn({ data: routeRows }),
+      this.prisma.stop.createManyAndReturn({ data: stopRows }),
+    ]);
+    onProgress('saving', 100);
+
+    const stopsByRoute = new Map<string, typeof createdStops>();
+    for (const stop of createdStops) {
+      const routeStops = stopsByRoute.get(stop.routeId) || [];
+      routeStops.push(stop);
+      stopsByRoute.set(stop.routeId, routeStops);
+    }
 
-      createdRoutes.push({
-        route,
-        childrenCount: cluster.children.length,
-        children: routeChildren,
-        childrenIds: cluster.children.map((c) => c.childId),
-      });
+    // createManyAndReturn doesn't promise insert order; pair rows by their pre-generated id
+    const createdRoutesById = new Map(createdRoutes.map((route) => [route.id, route]));
+    const routes = engineRoutes.map((engineRoute, idx) => {
+      const route = createdRoutesById.get(routeRows[idx].id);
+      const stops = (stopsByRoute.get(route.id) || []).sort((a, b) => a.order - b.order);
+      const routeChildren = engineRoute.children.map((i) => children[i]);
 
       this.logger.log(
-        `Created ${routeName} with ${cluster.children.length} stops for ${cluster.children.length} children`,
+        `Created ${route.name} with ${stops.length} stops for ${routeChildren.length} children`,
       );
-    }
+
+      return {
+        route: { ...route, stops },
+        childrenCount: routeChildren.length,
+        children: routeChildren,
+        childrenIds: routeChildren.map((child) => child.id),
+        distanceKm: Math.round(this.routeDistanceKm(stops, engineInput.school) * 10) / 10,
+      };
+    });
 
     return {
-      message: `Successfully created ${numRoutes} routes for ${children.length} children`,
-      routes: createdRoutes,
+      message: `Successfully created ${routes.length} routes for ${children.length} children`,
+      routes,
       summary: {
         totalChildren: children.length,
-        routesCreated: numRoutes,
-        avgChildrenPerRoute: Math.floor(children.length / numRoutes),
+        routesCreated: routes.length,
+        avgChildrenPerRoute: Math.floor(children.length / routes.length),
+        maxChildrenPerRoute: routeCapacity,
         busCapacityUsed: avgCapacity,
+        seed,
       },
     };
   }
 
   /**
-   * K-means clustering algorithm for grouping children by location
+   * Run the route engine in a worker thread so a large school doesn't
+   * block the event loop for other requests
    */
-  private kMeansClustering(
-    points: Array<{ childId: string; lat: number; lon: number }>,
-    k: number,
-  ): Cluster[] {
-    const maxIterations = 100;
-    const tolerance = 0.0001;
-
-    // Initialize centroids randomly from existing points
-    let centroids: Location[] = this.initializeCentroids(points, k);
-
-    for (let iteration = 0; iteration < maxIterations; iteration++) {
-      // Assign each point to nearest centroid
-      const clusters: Cluster[] = centroids.map((centroid) => ({
-        centroid,
-        children: [],
-      }));
-
-      for (const point of points) {
-        const nearestClusterIdx = this.findNearestCentroid(point, centroids);
-        clusters[nearestClusterIdx].children.push(point);
-      }
-
-      // Remove empty clusters
-      const nonEmptyClusters = clusters.filter((c) => c.children.length > 0);
-
-      // Recalculate centroids
-      const newCentroids = nonEmptyClusters.map((cluster) => this.calculateCentroid(cluster.children));
-
-      // Check convergence
-      const hasConverged = centroids.every((oldCentroid, idx) => {
-        if (idx >= newCentroids.length) return true;
-        const newCentroid = newCentroids[idx];
-        return this.distance(oldCentroid, newCentroid) < tolerance;
-      });
-
-      centroids = newCentroids;
-
-      if (hasConverged) {
-        this.logger.log(`K-means converged after ${iteration + 1} iterations`);
-        return nonEmptyClusters;
-      }
-    }
-
-    this.logger.log(`K-means completed ${maxIterations} iterations`);
-    return centroids.map((centroid, idx) => ({
-      centroid,
-      children: points.filter((p) => this.findNearestCentroid(p, centroids) === idx),
-    })).filter((c) => c.children.length > 0);
-  }
+  private runEngine(
+    input: RouteEngineInput,
+    onProgress: (phase: string, percent: number) => void,
+  ): Promise<RouteEngineResult> {
+    const extension = extname(__filename);
+    const worker = new Worker(join(__dirname, `route-engine.worker${extension}`), {
+      workerData: input,
+      // Dev/test runs load TypeScript sources directly
+      execArgv: extension === '.ts' ? ['-r', 'ts-node/register/transpile-only'] : undefined,
+    });
 
-  /**
-   * Initialize centroids using k-means++ algorithm for better initial placement
-   */
-  private initializeCentroids(
-    points: Array<{ lat: number; lon: number }>,
-    k: number,
-  ): Location[] {
-    const centroids: Location[] = [];
-
-    // First centroid: random point
-    const firstIdx = Math.floor(Math.random() * points.length);
-    centroids.push({ lat: points[firstIdx].lat, lon: points[firstIdx].lon });
-
-    // Remaining centroids: choose points far from existing centroids
-    for (let i = 1; i < k; i++) {
-      const distances = points.map((point) => {
-        const minDist = Math.min(...centroids.map((c) => this.distance(point, c)));
-        return minDist * minDist; // Square for weighted probability
+    return new Promise((resolve, reject) => {
+      let settled = false;
+      worker.on('message', (message) => {
+        if (message.type === 'progress') {
+          onProgress(message.phase, message.percent);
+        } else if (message.type === 'result') {
+          settled = true;
+          resolve(message.result);
+        }
       });
-
-      const totalDist = distances.reduce((sum, d) => sum + d, 0);
-      const random = Math.random() * totalDist;
-
-      let cumulative = 0;
-      for (let j = 0; j < points.length; j++) {
-        cumulative += distances[j];
-        if (cumulative >= random) {
-          centroids.push({ lat: points[j].lat, lon: points[j].lon });
-          break;
+      worker.on('error', (error) => {
+        settled = true;
+        reject(error);
+      });
+      worker.on('exit', (code) => {
+        if (!settled) {
+          reject(new Error(`Route engine worker exited with code ${code}`));
         }
-      }
-    }
-
-    return centroids;
+      });
+    });
   }
 
-  /**
-   * Find nearest centroid index for a point
-   */
-  private findNearestCentroid(point: Location, centroids: Location[]): number {
-    let minDist = Infinity;
-    let nearestIdx = 0;
-
-    for (let i = 0; i < centroids.length; i++) {
-      const dist = this.distance(point, centroids[i]);
-      if (dist < minDist) {
-        minDist = dist;
-        nearestIdx = i;
-      }
+  private routeDistanceKm(
+    stops: Array<{ latitude: number; longitude: number }>,
+    school: { lat: number; lon: number } | null,
+  ): number {
+    let distance = 0;
+    for (let i = 1; i < stops.length; i++) {
+      distance += haversineKm(stops[i - 1].latitude, stops[i - 1].longitude, stops[i].latitude, stops[i].longitude);
     }
-
-    return nearestIdx;
-  }
-
-  /**
-   * Calculate centroid (average location) of a group of points
-   */
-  private calculateCentroid(points: Array<{ lat: number; lon: number }>): Location {
-    const sum = points.reduce(
-      (acc, p) => ({ lat: acc.lat + p.lat, lon: acc.lon + p.lon }),
-      { lat: 0, lon: 0 },
-    );
-
-    return {
-      lat: sum.lat / points.length,
-      lon: sum.lon / points.length,
-    };
-  }
-
-  /**
-   * Calculate Haversine distance between two points (in km)
-   */
-  private distance(point1: Location, point2: Location): number {
-    const R = 6371; // Earth's radius in km
-    const dLat = this.toRad(point2.lat - point1.lat);
-    const dLon = this.toRad(point2.lon - point1.lon);
-
-    const a =
-      Math.sin(dLat / 2) * Math.sin(dLat / 2) +
-      Math.cos(this.toRad(point1.lat)) *
-        Math.cos(this.toRad(point2.lat)) *
-        Math.sin(dLon / 2) *
-        Math.sin(dLon / 2);
-
-    const c = 2 * Math.atan2(Math.sqrt(a), Math.sqrt(1 - a));
-    return R * c;
+    if (school && stops.length > 0) {
+      const last = stops[stops.length - 1];
+      distance += haversineKm(last.latitude, last.longitude, school.lat, school.lon);
+    }
+    return distance;
   }
 
-  private toRad(degrees: number): number {
-    return (degrees * Math.PI) / 180;
+  private async saveJob(job: AutoGenerateJob) {
+    job.updatedAt = new Date().toISOString();
+    await this.redis.setex(this.jobKey(job.id), this.JOB_TTL_SECONDS, JSON.stringify(job));
   }
 
-  /**
-   * Order stops by distance to target (school or centroid)
-   * Nearest stops first for efficient pickup
-   */
-  private orderStops(
-    children: Array<{ childId: string; lat: number; lon: number }>,
-    target: Location,
-  ): Array<{ childId: string; lat: number; lon: number }> {
-    return children
-      .map((child) => ({
-        ...child,
-        distanceToTarget: this.distance(child, target),
-      }))
-      .sort((a, b) => a.distanceToTarget - b.distanceToTarget)
-      .map(({ childId, lat, lon }) => ({ childId, lat, lon }));
+  private jobKey(jobId: string): string {
+    return `route_autogen:job:${jobId}`;
   }
 
   /**
@@ -0,0 +1,46 @@
+import { createRandom, generateRoutes, orderStops } from './route-engine';
+
+describe('route engine', () => {
+  const points = (count: number, seed: number) => {
+    const random = createRandom(seed);
+    const latitudes = new Float64Array(count);
+    const longitudes = new Float64Array(count);
+    for (let i = 0; i < count; i++) {
+      latitudes[i] = 5.6 + (random() - 0.5) * 0.2;
+      longitudes[i] = -0.19 + (random() - 0.5) * 0.2;
+    }
+    return { latitudes, longitudes };
+  };
+
+  it('should never put more children on a route than its capacity', () => {
+    const { routes } = generateRoutes({ ...points(1000, 1), capacity: 30, seed: 1 });
+
+    const assigned = routes.flatMap((route) => route.children).sort((a, b) => a - b);
+    expect(assigned).toEqual(Array.from({ length: 1000 }, (_, i) => i));
+    expect(Math.max(...routes.map((route) => route.children.length))).toBeLessThanOrEqual(30);
+    expect(routes.length).toBe(Math.ceil(1000 / 30));
+  });
+
+  it('should return the same routes for the same seed', () => {
+    const input = { ...points(500, 2), capacity: 25, seed: 42 };
+    expect(generateRoutes(input).routes).toEqual(generateRoutes(input).routes);
+  });
+
+  it('should merge children at the same pickup point into one stop', () => {
+    const latitudes = Float64Array.from([5.6, 5.6, 5.61]);
+    const longitudes = Float64Array.from([-0.19, -0.19, -0.2]);
+    const { routes } = generateRoutes({ latitudes, longitudes, capacity: 10, seed: 3 });
+
+    expect(routes).toHaveLength(1);
+    expect(routes[0].stops).toHaveLength(2);
+    expect(routes[0].stops.map((stop) => stop.children.length).sort()).toEqual([1, 2]);
+  });
+
+  it('should order stops along a line towards the school', () => {
+    const xs = Float64Array.from([3, 1, 4, 0, 2]);
+    const ys = new Float64Array(5);
+    const order = Array.from(orderStops(xs, ys, { x: 5, y: 0 }));
+
+    expect(order.map((i) => xs[i])).toEqual([0, 1, 2, 3, 4]);
+  });
+});
@@ -0,0 +1,481 @@
+/**
+ * CPU side of automatic route generation. Pure functions over typed arrays so
+ * it can run in a worker thread and be benchmarked without Nest or Prisma.
+ *
+ * 1. Points are projected to a local equirectangular plane in km, so
+ *    distances inside a city are plain squared-Euclidean arithmetic.
+ * 2. Centroids are seeded with k-means++.
+ * 3. Lloyd iterations use a capacity-constrained assignment step: points are
+ *    placed in order of regret (how much worse their second-best centroid
+ *    is) into the nearest centroid that still has room, so no route ever
+ *    holds more than `capacity` children.
+ * 4. Children at the same spot share a stop; stops are ordered with a
+ *    nearest-neighbour tour improved by 2-opt, ending at the school when its
+ *    location is known.
+ *
+ * Every random choice comes from a seeded PRNG, so the same input and seed
+ * always produce the same routes.
+ */
+
+export interface RouteEngineInput {
+  latitudes: Float64Array;
+  longitudes: Float64Array;
+  // Hard cap on children per route
+  capacity: number;
+  seed: number;
+  school?: { lat: number; lon: number } | null;
+  maxIterations?: number;
+}
+
+export interface EngineStop {
+  lat: number;
+  lon: number;
+  // Indexes into the input arrays of the children picked up here
+  children: number[];
+}
+
+export interface EngineRoute {
+  children: number[];
+  // In driving order
+  stops: EngineStop[];
+  lengthKm: number;
+}
+
+export interface RouteEngineResult {
+  routes: EngineRoute[];
+  iterations: number;
+}
+
+export type RouteEngineProgress = (phase: string, percent: number) => void;
+
+const KM_PER_DEGREE = 111.195;
+// Centroids considered per point before falling back to a full scan
+const CANDIDATES = 8;
+// Stop iterating when fewer points than this move, or the total
+// child-to-centroid distance improves by less than this fraction
+const CONVERGED_FRACTION = 0.001;
+const MIN_IMPROVEMENT = 0.002;
+
+/**
+ * Small, fast, seedable PRNG (mulberry32)
+ */
+export function createRandom(seed: number): () => number {
+  let state = seed >>> 0;
+  return () => {
+    state = (state + 0x6d2b79f5) >>> 0;
+    let t = state;
+    t = Math.imul(t ^ (t >>> 15), t | 1);
+    t ^= t + Math.imul(t ^ (t >>> 7), t | 61);
+    return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+  };
+}
+
+export function generateRoutes(input: RouteEngineInput, onProgress: RouteEngineProgress = () => undefined): RouteEngineResult {
+  const n = input.latitudes.length;
+  if (n === 0) {
+    return { routes: [], iterations: 0 };
+  }
+
+  const capacity = Math.max(1, Math.floor(input.capacity));
+  const k = Math.ceil(n / capacity);
+  const maxIterations = input.maxIterations ?? 25;
+  const random = createRandom(input.seed);
+
+  const { xs, ys, project } = projectPoints(input.latitudes, input.longitudes);
+
+  onProgress('seeding', 0);
+  const cx = new Float64Array(k);
+  const cy = new Float64Array(k);
+  seedCentroids(xs, ys, cx, cy, random);
+
+  const assignment = new Int32Array(n).fill(-1);
+  let iterations = 0;
+  let previousCost = Infinity;
+  for (; iterations < maxIterations; iterations++) {
+    const { changed, cost } = assignWithCapacity(xs, ys, cx, cy, capacity, assignment);
+    updateCentroids(xs, ys, cx, cy, assignment, random);
+    onProgress('clustering', Math.round(((iterations + 1) / maxIterations) * 100));
+    // Capacity limits make boundary children swap back and forth between
+    // full routes indefinitely; stop once the clustering stops improving
+    if (changed <= n * CONVERGED_FRACTION || previousCost - cost < previousCost * MIN_IMPROVEMENT) {
+      iterations++;
+      break;
+    }
+    previousCost = cost;
+  }
+
+  onProgress('ordering', 0);
+  const members: number[][] = Array.from({ length: k }, () => []);
+  for (let i = 0; i < n; i++) {
+    members[assignment[i]].push(i);
+  }
+
+  const school = input.school ? project(input.school.lat, input.school.lon) : null;
+  const routes: EngineRoute[] = [];
+  members.forEach((children, idx) => {
+    if (children.length === 0) {
+      return;
+    }
+    routes.push(buildRoute(children, input.latitudes, input.longitudes, xs, ys, school));
+    onProgress('ordering', Math.round(((idx + 1) / k) * 100));
+  });
+
+  return { routes, iterations };
+}
+
+function projectPoints(latitudes: Float64Array, longitudes: Float64Array) {
+  const n = latitudes.length;
+  let latSum = 0;
+  for (let i = 0; i < n; i++) latSum += latitudes[i];
+  const cosLat = Math.cos(((latSum / n) * Math.PI) / 180);
+
+  const project = (lat: number, lon: number) => ({ x: lon * cosLat * KM_PER_DEGREE, y: lat * KM_PER_DEGREE });
+  const xs = new Float64Array(n);
+  const ys = new Float64Array(n);
+  for (let i = 0; i < n; i++) {
+    xs[i] = longitudes[i] * cosLat * KM_PER_DEGREE;
+    ys[i] = latitudes[i] * KM_PER_DEGREE;
+  }
+  return { xs, ys, project };
+}
+
+/**
+ * k-means++: each new centroid is a point drawn with probability
+ * proportional to its squared distance from the nearest existing centroid
+ */
+function seedCentroids(xs: Float64Array, ys: Float64Array, cx: Float64Array, cy: Float64Array, random: () => number) {
+  const n = xs.length;
+  const k = cx.length;
+  const nearest = new Float64Array(n).fill(Infinity);
+
+  let pick = Math.floor(random() * n);
+  for (let c = 0; c < k; c++) {
+    cx[c] = xs[pick];
+    cy[c] = ys[pick];
+    if (c === k - 1) break;
+
+    let total = 0;
+    for (let i = 0; i < n; i++) {
+      const dx = xs[i] - cx[c];
+      const dy = ys[i] - cy[c];
+      const d = dx * dx + dy * dy;
+      if (d < nearest[i]) nearest[i] = d;
+      total += nearest[i];
+    }
+
+    if (total === 0) {
+      // Fewer distinct locations than routes: any point will do
+      pick = Math.floor(random() * n);
+      continue;
+    }
+    let target = random() * total;
+    pick = n - 1;
+    for (let i = 0; i < n; i++) {
+      target -= nearest[i];
+      if (target <= 0) {
+        pick = i;
+        break;
+      }
+    }
+  }
+}
+
+/**
+ * Centroids sorted by x. Nearest-centroid searches sweep outwards from the
+ * point's x position and stop once the x gap alone exceeds the current
+ * worst candidate, so they touch far fewer than k centroids.
+ */
+class CentroidSweep {
+  private readonly order: Int32Array;
+  private readonly sortedX: Float64Array;
+
+  constructor(private readonly cx: Float64Array, private readonly cy: Float64Array) {
+    const k = cx.length;
+    this.order = Int32Array.from({ length: k }, (_, c) => c).sort((a, b) => cx[a] - cx[b] || a - b);
+    this.sortedX = Float64Array.from(this.order, (c) => cx[c]);
+  }
+
+  /**
+   * Fill `outIdx`/`outDist` (from `base`, up to `l` entries) with the nearest
+   * centroids accepted by `allow`, closest first. Returns how many were found.
+   */
+  nearest(
+    x: number,
+    y: number,
+    l: number,
+    outIdx: Int32Array,
+    outDist: Float64Array,
+    base: number,
+    allow?: (c: number) => boolean,
+  ): number {
+    const k = this.order.length;
+    let hi = this.lowerBound(x);
+    let lo = hi - 1;
+    let filled = 0;
+
+    while (lo >= 0 || hi < k) {
+      const gapLo = lo >= 0 ? x - this.sortedX[lo] : Infinity;
+      const gapHi = hi < k ? this.sortedX[hi] - x : Infinity;
+      const useLo = gapLo <= gapHi;
+      const gap = useLo ? gapLo : gapHi;
+      if (filled === l && gap * gap >= outDist[base + l - 1]) {
+        break;
+      }
+      const c = this.order[useLo ? lo-- : hi++];
+      if (allow && !allow(c)) {
+        continue;
+      }
+
+      const dx = x - this.cx[c];
+      const dy = y - this.cy[c];
+      const d = dx * dx + dy * dy;
+      if (filled === l && d >= outDist[base + l - 1]) {
+        continue;
+      }
+      // Insertion into the small sorted candidate list
+      let pos = filled < l ? filled++ : l - 1;
+      while (pos > 0 && outDist[base + pos - 1] > d) {
+        outDist[base + pos] = outDist[base + pos - 1];
+        outIdx[base + pos] = outIdx[base + pos - 1];
+        pos--;
+      }
+      outDist[base + pos] = d;
+      outIdx[base + pos] = c;
+    }
+    return filled;
+  }
+
+  private lowerBound(x: number): number {
+    let lo = 0;
+    let hi = this.sortedX.length;
+    while (lo < hi) {
+      const mid = (lo + hi) >>> 1;
+      if (this.sortedX[mid] < x) lo = mid + 1;
+      else hi = mid;
+    }
+    return lo;
+  }
+}
+
+/**
+ * Returns how many points changed centroid, and the total distance (km)
+ * from each point to its assigned centroid
+ */
+function assignWithCapacity(
+  xs: Float64Array,
+  ys: Float64Array,
+  cx: Float64Array,
+  cy: Float64Array,
+  capacity: number,
+  assignment: Int32Array,
+): { changed: number; cost: number } {
+  const n = xs.length;
+  const k = cx.length;
+  const l = Math.min(CANDIDATES, k);
+  const sweep = new CentroidSweep(cx, cy);
+  const candIdx = new Int32Array(n * l);
+  const candDist = new Float64Array(n * l);
+  const regret = new Float64Array(n);
+
+  for (let i = 0; i < n; i++) {
+    const base = i * l;
+    sweep.nearest(xs[i], ys[i], l, candIdx, candDist, base);
+    regret[i] = l > 1 ? Math.sqrt(candDist[base + 1]) - Math.sqrt(candDist[base]) : 0;
+  }
+
+  // Most constrained points first; ties broken by index for determinism
+  const order = Int32Array.from({ length: n }, (_, i) => i).sort((a, b) => regret[b] - regret[a] || a - b);
+  const load = new Int32Array(k);
+  const hasRoom = (c: number) => load[c] < capacity;
+  const fallbackIdx = new Int32Array(1);
+  const fallbackDist = new Float64Array(1);
+  let changed = 0;
+  let cost = 0;
+
+  for (const i of order) {
+    const base = i * l;
+    let chosen = -1;
+    let distance = 0;
+    for (let j = 0; j < l; j++) {
+      if (load[candIdx[base + j]] < capacity) {
+        chosen = candIdx[base + j];
+        distance = candDist[base + j];
+        break;
+      }
+    }
+    if (chosen === -1) {
+      // All nearby routes are full: nearest route with room left
+      sweep.nearest(xs[i], ys[i], 1, fallbackIdx, fallbackDist, 0, hasRoom);
+      chosen = fallbackIdx[0];
+      distance = fallbackDist[0];
+    }
+
+    cost += Math.sqrt(distance);
+    load[chosen]++;
+    if (assignment[i] !== chosen) {
+      assignment[i] = chosen;
+      changed++;
+    }
+  }
+
+  return { changed, cost };
+}
+
+function updateCentroids(
+  xs: Float64Array,
+  ys: Float64Array,
+  cx: Float64Array,
+  cy: Float64Array,
+  assignment: Int32Array,
+  random: () => number,
+) {
+  const k = cx.length;
+  const sumX = new Float64Array(k);
+  const sumY = new Float64Array(k);
+  const count = new Int32Array(k);
+  for (let i = 0; i < xs.length; i++) {
+    const c = assignment[i];
+    sumX[c] += xs[i];
+    sumY[c] += ys[i];
+    count[c]++;
+  }
+  for (let c = 0; c < k; c++) {
+    if (count[c] > 0) {
+      cx[c] = sumX[c] / count[c];
+      cy[c] = sumY[c] / count[c];
+    } else {
+      // Re-seed an empty route on a random child
+      const pick = Math.floor(random() * xs.length);
+      cx[c] = xs[pick];
+      cy[c] = ys[pick];
+    }
+  }
+}
+
+function buildRoute(
+  children: number[],
+  latitudes: Float64Array,
+  longitudes: Float64Array,
+  xs: Float64Array,
+  ys: Float64Array,
+  school: { x: number; y: number } | null,
+): EngineRoute {
+  // Children at the same spot (to ~1m) share one stop
+  const byLocation = new Map<string, EngineStop & { x: number; y: number }>();
+  for (const i of children) {
+    const key = `${latitudes[i].toFixed(5)},${longitudes[i].toFixed(5)}`;
+    const stop = byLocation.get(key);
+    if (stop) {
+      stop.children.push(i);
+    } else {
+      byLocation.set(key, { lat: latitudes[i], lon: longitudes[i], x: xs[i], y: ys[i], children: [i] });
+    }
+  }
+  const stops = [...byLocation.values()];
+  const m = stops.length;
+  const sx = new Float64Array(m);
+  const sy = new Float64Array(m);
+  stops.forEach((stop, i) => {
+    sx[i] = stop.x;
+    sy[i] = stop.y;
+  });
+
+  const order = orderStops(sx, sy, school);
+  const ordered = Array.from(order, (i) => ({ lat: stops[i].lat, lon: stops[i].lon, children: stops[i].children }));
+
+  return { children, stops: ordered, lengthKm: pathLength(order, sx, sy, school) };
+}
+
+/**
+ * Open tour through every stop, ending at the school when known: a
+ * nearest-neighbour tour starting from the stop farthest from the end,
+ * then 2-opt segment reversals until no reversal shortens it
+ */
+export function orderStops(sx: Float64Array, sy: Float64Array, end: { x: number; y: number } | null): Int32Array {
+  const m = sx.length;
+  const order = new Int32Array(m);
+  if (m === 0) return order;
+
+  const dist = (a: number, b: number) => Math.hypot(sx[a] - sx[b], sy[a] - sy[b]);
+  const distToEnd = (a: number) => (end ? Math.hypot(sx[a] - end.x, sy[a] - end.y) : 0);
+
+  // Start farthest from the school (or from the stops' centre without one)
+  let ax = end?.x;
+  let ay = end?.y;
+  if (!end) {
+    ax = 0;
+    ay = 0;
+    for (let i = 0; i < m; i++) {
+      ax += sx[i] / m;
+      ay += sy[i] / m;
+    }
+  }
+  let start = 0;
+  let farthest = -1;
+  for (let i = 0; i < m; i++) {
+    const d = Math.hypot(sx[i] - ax, sy[i] - ay);
+    if (d > farthest) {
+      farthest = d;
+      start = i;
+    }
+  }
+
+  const visited = new Uint8Array(m);
+  order[0] = start;
+  visited[start] = 1;
+  for (let pos = 1; pos < m; pos++) {
+    const from = order[pos - 1];
+    let next = -1;
+    let best = Infinity;
+    for (let j = 0; j < m; j++) {
+      if (visited[j]) continue;
+      const d = dist(from, j);
+      if (d < best) {
+        best = d;
+        next = j;
+      }
+    }
+    order[pos] = next;
+    visited[next] = 1;
+  }
+
+  // 2-opt on an open path: reversing order[i..j] swaps edges
+  // (order[i-1], order[i]) and (order[j], order[j+1] or the school)
+  const EPSILON = 1e-9;
+  for (let pass = 0, improved = true; improved && pass < 100; pass++) {
+    improved = false;
+    for (let i = 0; i < m - 1; i++) {
+      for (let j = i + 1; j < m; j++) {
+        const a = i > 0 ? order[i - 1] : -1;
+        const b = order[i];
+        const c = order[j];
+        const d = j < m - 1 ? order[j + 1] : -1;
+
+        const before = (a >= 0 ? dist(a, b) : 0) + (d >= 0 ? dist(c, d) : distToEnd(c));
+        const after = (a >= 0 ? dist(a, c) : 0) + (d >= 0 ? dist(b, d) : distToEnd(b));
+        if (after < before - EPSILON) {
+          for (let lo = i, hi = j; lo < hi; lo++, hi--) {
+            const tmp = order[lo];
+            order[lo] = order[hi];
+            order[hi] = tmp;
+          }
+          improved = true;
+        }
+      }
+    }
+  }
+
+  return order;
+}
+
+function pathLength(order: Int32Array, sx: Float64Array, sy: Float64Array, end: { x: number; y: number } | null) {
+  let length = 0;
+  for (let i = 1; i < order.length; i++) {
+    length += Math.hypot(sx[order[i]] - sx[order[i - 1]], sy[order[i]] - sy[order[i - 1]]);
+  }
+  if (end && order.length > 0) {
+    const last = order[order.length - 1];
+    length += Math.hypot(sx[last] - end.x, sy[last] - end.y);
+  }
+  return length;
+}
@@ -0,0 +1,15 @@
+import { parentPort, workerData } from 'worker_threads';
+import { generateRoutes, RouteEngineInput } from './route-engine';
+
+// Worker thread entry for RouteAutoService: runs the clustering off the
+// main event loop and streams progress back to it
+let lastReported = '';
+const result = generateRoutes(workerData as RouteEngineInput, (phase, percent) => {
+  const key = `${phase}:${Math.floor(percent / 5)}`;
+  if (key !== lastReported) {
+    lastReported = key;
+    parentPort.postMessage({ type: 'progress', phase, percent });
+  }
+});
+
+parentPort.postMessage({ type: 'result', result });
@@ -1,4 +1,4 @@
-import { Controller, Get, Post, Body, Patch, Param, Delete, UseGuards } from '@nestjs/common';
+import { Controller, Get, Post, Body, Patch, Param, Delete, UseGuards, Req } from '@nestjs/common';
 import { RoutesService } from './routes.service';
 import { RouteAutoService } from './route-auto.service';
 import { Roles } from '../roles/roles.decorator';
@@ -51,7 +51,21 @@ export class RoutesController {
 
   @Post('auto-generate/:schoolId')
   @Roles('COMPANY_ADMIN', 'PLATFORM_ADMIN')
-  autoGenerateRoutes(@Param('schoolId') schoolId: string) {
-    return this.routeAutoService.autoGenerateRoutes(schoolId);
+  autoGenerateRoutes(
+    @Param('schoolId') schoolId: string,
+    @Body() body: { seed?: number; async?: boolean } = {},
+  ) {
+    const options = { seed: body?.seed !== undefined ? Number(body.seed) : undefined };
+    if (body?.async) {
+      return this.routeAutoService.startAutoGenerateJob(schoolId, options);
+    }
+    return this.routeAutoService.autoGenerateRoutes(schoolId, options);
+  }
+
+  @Get('auto-generate/jobs/:jobId')
+  @Roles('COMPANY_ADMIN', 'PLATFORM_ADMIN')
+  getAutoGenerateJob(@Param('jobId') jobId: string, @Req() req: any) {
+    const companyId = req.user.role === 'COMPANY_ADMIN' ? req.user.companyId : undefined;
+    return this.routeAutoService.getAutoGenerateJob(jobId, companyId);
   }
 }
\ No newline at end of file
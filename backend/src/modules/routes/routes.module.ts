@@ -3,9 +3,10 @@ import { RoutesService } from './routes.service';
 import { RouteAutoService } from './route-auto.service';
 import { RoutesController } from './routes.controller';
 import { PrismaModule } from '../../prisma/prisma.module';
+import { BusMembershipModule } from '../bus-membership/bus-membership.module';
 
 @Module({
-  imports: [PrismaModule],
+  imports: [PrismaModule, BusMembershipModule],
   controllers: [RoutesController],
   providers: [RoutesService, RouteAutoService],
   exports: [RoutesService],
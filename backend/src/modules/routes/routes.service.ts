@@ -1,10 +1,14 @@
 import { Injectable } from '@nestjs/common';
 import { PrismaService } from '../../prisma/prisma.service';
 import { Route } from '@prisma/client';
+import { BusMembershipService } from '../bus-membership/bus-membership.service';
 
 @Injectable()
 export class RoutesService {
-  constructor(private prisma: PrismaService) {}
+  constructor(
+    private prisma: PrismaService,
+    private busMembership: BusMembershipService,
+  ) {}
 
   async findOne(id: string): Promise<Route | null> {
     return this.prisma.route.findUnique({
@@ -33,7 +37,7 @@ export class RoutesService {
   }
 
   async create(data: any): Promise<Route> {
-    return this.prisma.route.create({
+    const route = await this.prisma.route.create({
       data,
       include: {
         stops: {
@@ -43,10 +47,14 @@ export class RoutesService {
         },
       },
     });
+    if (data.busId !== undefined) {
+      await this.busMembership.invalidateAll();
+    }
+    return route;
   }
 
   async update(id: string, data: any): Promise<Route> {
-    return this.prisma.route.update({
+    const route = await this.prisma.route.update({
       where: { id },
       data,
       include: {
@@ -57,6 +65,10 @@ export class RoutesService {
         },
       },
     });
+    if (data.busId !== undefined) {
+      await this.busMembership.invalidateAll();
+    }
+    return route;
   }
 
   async findAll(): Promise<Route[]> {
@@ -72,8 +84,10 @@ export class RoutesService {
   }
 
   async remove(id: string): Promise<Route> {
-    return this.prisma.route.delete({
+    const route = await this.prisma.route.delete({
       where: { id },
     });
+    await this.busMembership.invalidateAll();
+    return route;
   }
 }
\ No newline at end of file
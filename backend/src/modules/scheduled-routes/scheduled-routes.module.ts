@@ -2,9 +2,10 @@ import { Module } from '@nestjs/common';
 import { ScheduledRoutesService } from './scheduled-routes.service';
 import { ScheduledRoutesController } from './scheduled-routes.controller';
 import { PrismaModule } from '../../prisma/prisma.module';
+import { BusMembershipModule } from '../bus-membership/bus-membership.module';
 
 @Module({
-  imports: [PrismaModule],
+  imports: [PrismaModule, BusMembershipModule],
   controllers: [ScheduledRoutesController],
   providers: [ScheduledRoutesService],
   exports: [ScheduledRoutesService],
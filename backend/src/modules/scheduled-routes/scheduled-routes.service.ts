@@ -1,10 +1,14 @@
 import { Injectable } from '@nestjs/common';
 import { PrismaService } from '../../prisma/prisma.service';
 import { DayOfWeek, ScheduleStatus } from '@prisma/client';
+import { BusMembershipService } from '../bus-membership/bus-membership.service';
 
 @Injectable()
 export class ScheduledRoutesService {
-  constructor(private prisma: PrismaService) {}
+  constructor(
+    private prisma: PrismaService,
+    private busMembership: BusMembershipService,
+  ) {}
 
   async create(data: {
     routeId: string;
@@ -15,7 +19,7 @@ export class ScheduledRoutesService {
     effectiveFrom?: Date;
     effectiveUntil?: Date;
   }) {
-    return this.prisma.scheduledRoute.create({
+    const scheduledRoute = await this.prisma.scheduledRoute.create({
       data,
       include: {
         route: { include: { stops: true, school: true } },
@@ -23,6 +27,8 @@ export class ScheduledRoutesService {
         bus: true,
       },
     });
+    await this.busMembership.invalidateAll();
+    return scheduledRoute;
   }
 
   async findAll() {
@@ -95,7 +101,7 @@ export class ScheduledRoutesService {
     effectiveFrom: Date;
     effectiveUntil: Date;
   }>) {
-    return this.prisma.scheduledRoute.update({
+    const scheduledRoute = await this.prisma.scheduledRoute.update({
       where: { id },
       data,
       include: {
@@ -104,12 +110,16 @@ export class ScheduledRoutesService {
         bus: true,
       },
     });
+    await this.busMembership.invalidateAll();
+    return scheduledRoute;
   }
 
   async delete(id: string) {
-    return this.prisma.scheduledRoute.delete({
+    const scheduledRoute = await this.prisma.scheduledRoute.delete({
       where: { id },
     });
+    await this.busMembership.invalidateAll();
+    return scheduledRoute;
   }
 
   async suspend(id: string) {
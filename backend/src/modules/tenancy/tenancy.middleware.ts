@@ -7,18 +7,9 @@ export class TenancyMiddleware implements NestMiddleware {
   constructor(private tenancyService: TenancyService) {}
 
   use(req: Request, res: Response, next: NextFunction) {
-    // Extract companyId and schoolId from JWT payload (would be attached by auth middleware)
-    const user = (req as any).user;
-    
-    if (user) {
-      const companyId = this.tenancyService.extractCompanyIdFromJwtPayload(user);
-      const schoolId = this.tenancyService.extractSchoolIdFromJwtPayload(user);
-      
-      // Attach to request for use in services
-      (req as any).companyId = companyId;
-      (req as any).schoolId = schoolId;
-    }
-    
-    next();
+    // The JWT payload is attached later by the auth guard, so the company
+    // is read from the request when a query asks for it
+    // (TenancyService.currentCompanyId) rather than here
+    this.tenancyService.run(req, next);
   }
-}
\ No newline at end of file
+}
@@ -1,9 +1,11 @@
 import { Module } from '@nestjs/common';
 import { TenancyService } from './tenancy.service';
 import { TenancyMiddleware } from './tenancy.middleware';
+import { PrismaModule } from '../../prisma/prisma.module';
 
 @Module({
-  providers: [TenancyService],
-  exports: [TenancyService],
+  imports: [PrismaModule],
+  providers: [TenancyService, TenancyMiddleware],
+  exports: [TenancyService, TenancyMiddleware],
 })
 export class TenancyModule {}
\ No newline at end of file
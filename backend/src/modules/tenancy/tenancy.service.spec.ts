@@ -0,0 +1,78 @@
+import { ForbiddenException } from '@nestjs/common';
+import { Test, TestingModule } from '@nestjs/testing';
+import { TenancyService } from './tenancy.service';
+import { PrismaService } from '../../prisma/prisma.service';
+
+// Routes model calls through the extension's $allOperations hook and
+// returns the arguments the query would have run with
+function fakeExtends(extension: any) {
+  const model = (name: string) =>
+    new Proxy(
+      {},
+      {
+        get: (_target, operation: string) => (args: any) =>
+          extension.query.$allModels.$allOperations({ model: name, operation, args, query: async (final: any) => final }),
+      },
+    );
+  return { trip: model('Trip'), paymentIntent: model('PaymentIntent'), school: model('School') };
+}
+
+describe('TenancyService', () => {
+  let service: TenancyService;
+  let prisma: any;
+
+  beforeEach(async () => {
+    prisma = { $extends: jest.fn(fakeExtends) };
+
+    const module: TestingModule = await Test.createTestingModule({
+      providers: [TenancyService, { provide: PrismaService, useValue: prisma }],
+    }).compile();
+
+    service = module.get<TenancyService>(TenancyService);
+  });
+
+  it('adds the company to filters on tenant-keyed models', async () => {
+    const tenant: any = service.forCompany('company-1');
+
+    await expect(tenant.trip.findMany({ where: { status: 'IN_PROGRESS' } })).resolves.toEqual({
+      where: { AND: [{ status: 'IN_PROGRESS' }, { companyId: 'company-1' }] },
+    });
+    await expect(tenant.paymentIntent.count()).resolves.toEqual({ where: { companyId: 'company-1' } });
+  });
+
+  it('stamps the company on creates and leaves other models alone', async () => {
+    const tenant: any = service.forCompany('company-1');
+
+    await expect(tenant.trip.createMany({ data: [{ busId: 'bus-1', companyId: 'other' }] })).resolves.toEqual({
+      data: [{ busId: 'bus-1', companyId: 'company-1' }],
+    });
+    await expect(tenant.school.findMany({ where: { name: 'A' } })).resolves.toEqual({ where: { name: 'A' } });
+  });
+
+  it("defaults to the current request's company", () => {
+    const request: any = {};
+    service.run(request, () => {
+      expect(() => service.forCompany()).toThrow(ForbiddenException);
+
+      // The auth guard attaches the user after the middleware ran
+      request.user = { sub: 'user-1', companyId: 'company-2' };
+      expect(service.currentCompanyId()).toBe('company-2');
+      expect(service.forCompany()).toBe(service.forCompany('company-2'));
+    });
+
+    expect(prisma.$extends).toHaveBeenCalledTimes(1);
+  });
+
+  it('only leaves platform admins unscoped', () => {
+    const request: any = { user: { sub: 'admin-1', role: 'PLATFORM_ADMIN', companyId: null } };
+    service.run(request, () => {
+      expect(service.forCurrentUser()).toBe(prisma);
+
+      request.user = { sub: 'user-1', role: 'COMPANY_ADMIN', companyId: null };
+      expect(() => service.forCurrentUser()).toThrow(ForbiddenException);
+
+      request.user.companyId = 'company-1';
+      expect(service.forCurrentUser()).toBe(service.forCompany('company-1'));
+    });
+  });
+});
@@ -1,7 +1,34 @@
-import { Injectable } from '@nestjs/common';
+import { ForbiddenException, Injectable } from '@nestjs/common';
+import { AsyncLocalStorage } from 'async_hooks';
+import { PrismaService } from '../../prisma/prisma.service';
+
+// Models that carry a denormalised companyId (see the tenant_company_keys migration)
+export const TENANT_MODELS = new Set(['Trip', 'ChildAttendance', 'BusLocation', 'PaymentIntent']);
+
+// Operations whose `where` can take an arbitrary filter. findUnique and
+// update/delete by id only accept unique fields and are left alone.
+const FILTERED_OPERATIONS = new Set([
+  'findMany',
+  'findFirst',
+  'findFirstOrThrow',
+  'count',
+  'aggregate',
+  'groupBy',
+  'updateMany',
+  'deleteMany',
+]);
+
+interface TenantContext {
+  request: any;
+}
 
 @Injectable()
 export class TenancyService {
+  private readonly context = new AsyncLocalStorage<TenantContext>();
+  private readonly scopedClients = new Map<string, PrismaService>();
+
+  constructor(private prisma: PrismaService) {}
+
   extractCompanyIdFromJwtPayload(payload: any): string | null {
     return payload.companyId || null;
   }
@@ -9,4 +36,84 @@ export class TenancyService {
   extractSchoolIdFromJwtPayload(payload: any): string | null {
     return payload.schoolId || null;
   }
-}
\ No newline at end of file
+
+  /**
+   * Run the rest of a request with it as the tenant context (see
+   * TenancyMiddleware)
+   */
+  run<T>(request: any, callback: () => T): T {
+    return this.context.run({ request }, callback);
+  }
+
+  /**
+   * Company of the user making the current request, if any. Read lazily:
+   * the middleware runs before the auth guard has attached the user.
+   */
+  currentCompanyId(): string | null {
+    const user = this.context.getStore()?.request?.user;
+    return user ? this.extractCompanyIdFromJwtPayload(user) : null;
+  }
+
+  /**
+   * Prisma client that filters the tenant-keyed models by company on every
+   * filterable query and stamps it on creates. Without a companyId it uses
+   * the current request's company. Throws when there is none, so a missing
+   * company never silently widens a query to every tenant; platform admins
+   * and jobs ask for unscoped() explicitly.
+   */
+  forCompany(companyId: string | null = this.currentCompanyId()): PrismaService {
+    if (!companyId) {
+      throw new ForbiddenException('No company in scope for this request');
+    }
+    let client = this.scopedClients.get(companyId);
+    if (!client) {
+      client = this.createScopedClient(companyId);
+      this.scopedClients.set(companyId, client);
+    }
+    return client;
+  }
+
+  /**
+   * The plain client, across every company. For platform-admin and
+   * background job code only.
+   */
+  unscoped(): PrismaService {
+    return this.prisma;
+  }
+
+  /**
+   * Unscoped for platform admins, otherwise scoped to the current request's
+   * company (and throwing without one).
+   */
+  forCurrentUser(): PrismaService {
+    const user = this.context.getStore()?.request?.user;
+    return user?.role === 'PLATFORM_ADMIN' ? this.unscoped() : this.forCompany();
+  }
+
+  // A query extension leaves the model API unchanged, so the scoped client
+  // can be handed out as a PrismaService
+  private createScopedClient(companyId: string): PrismaService {
+    const client = this.prisma.$extends({
+      query: {
+        $allModels: {
+          async $allOperations({ model, operation, args, query }) {
+            if (!TENANT_MODELS.has(model)) {
+              return query(args);
+            }
+            const scopedArgs: any = { ...args };
+            if (FILTERED_OPERATIONS.has(operation)) {
+              scopedArgs.where = scopedArgs.where ? { AND: [scopedArgs.where, { companyId }] } : { companyId };
+            } else if (operation === 'create') {
+              scopedArgs.data = { ...scopedArgs.data, companyId };
+            } else if (operation === 'createMany' || operation === 'createManyAndReturn') {
+              const rows = Array.isArray(scopedArgs.data) ? scopedArgs.data : [scopedArgs.data];
+              scopedArgs.data = rows.map((row: any) => ({ ...row, companyId }));
+            }
+            return query(scopedArgs);
+          },
+        },
+      },
+    });
+    return client as unknown as PrismaService;
+  }
+}
@@ -3,9 +3,10 @@ import { TripExceptionsService } from './trip-exceptions.service';
 import { TripExceptionsController } from './trip-exceptions.controller';
 import { PrismaModule } from '../../prisma/prisma.module';
 import { NotificationsModule } from '../notifications/notifications.module';
+import { DriverManifestModule } from '../driver-manifest/driver-manifest.module';
 
 @Module({
-  imports: [PrismaModule, NotificationsModule],
+  imports: [PrismaModule, NotificationsModule, DriverManifestModule],
   controllers: [TripExceptionsController],
   providers: [TripExceptionsService],
   exports: [TripExceptionsService],
@@ -2,12 +2,14 @@ import { Injectable, Optional, NotFoundException, BadRequestException } from '@n
 import { PrismaService } from '../../prisma/prisma.service';
 import { RealtimeGateway } from '../realtime/realtime.gateway';
 import { NotificationsService } from '../notifications/notifications.service';
+import { DriverManifestService } from '../driver-manifest/driver-manifest.service';
 import { NotificationType } from '@prisma/client';
 
 @Injectable()
 export class TripExceptionsService {
   constructor(
     private prisma: PrismaService,
+    private driverManifest: DriverManifestService,
     @Optional() private realtimeGateway?: RealtimeGateway,
     @Optional() private notificationsService?: NotificationsService,
   ) {}
@@ -33,6 +35,7 @@ export class TripExceptionsService {
         child: true,
       },
     });
+    await this.driverManifest.invalidate(tripId);
 
     // Notify driver via WebSocket
     if (this.realtimeGateway) {
@@ -49,12 +52,14 @@ export class TripExceptionsService {
 
   // Cancel a skip
   async cancelSkipTrip(childId: string, tripId: string): Promise<any> {
-    return this.prisma.tripException.update({
+    const exception = await this.prisma.tripException.update({
       where: { childId_tripId: { childId, tripId } },
       data: {
         status: 'CANCELLED',
       },
     });
+    await this.driverManifest.invalidate(tripId);
+    return exception;
   }
 
   // Get all active exceptions for a trip
@@ -178,6 +183,8 @@ export class TripExceptionsService {
       });
     }
 
+    await this.driverManifest.invalidate(tripId);
+
     // Notify driver with acknowledgment required
     if (this.notificationsService && trip.driver) {
       const notification = await this.notificationsService.create({
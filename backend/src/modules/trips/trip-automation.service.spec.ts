@@ -0,0 +1,122 @@
+import { Test, TestingModule } from '@nestjs/testing';
+import { TripAutomationService } from './trip-automation.service';
+import { PrismaService } from '../../prisma/prisma.service';
+
+describe('TripAutomationService', () => {
+  let service: TripAutomationService;
+  let prisma: any;
+  let tx: any;
+
+  const schedule = (id: string, schoolId: string, stops: Array<[number, number]>, autoAssignChildren = true) => ({
+    id,
+    routeId: `route-${id}`,
+    driverId: 'driver-1',
+    busId: 'bus-1',
+    scheduledTime: '07:30',
+    autoAssignChildren,
+    route: {
+      name: `Route ${id}`,
+      schoolId,
+      stops: stops.map(([latitude, longitude], i) => ({ id: `stop-${id}-${i}`, latitude, longitude })),
+    },
+  });
+
+  beforeEach(async () => {
+    tx = {
+      $queryRaw: jest.fn().mockResolvedValue([{ locked: true }]),
+      $executeRaw: jest.fn().mockResolvedValue(1),
+      trip: {
+        findMany: jest.fn().mockResolvedValue([]),
+        createManyAndReturn: jest.fn(async ({ data }) => data.map(({ id }) => ({ id }))),
+      },
+      child: { findMany: jest.fn() },
+      childAttendance: { createMany: jest.fn().mockResolvedValue({ count: 0 }) },
+    };
+    prisma = {
+      scheduledRoute: { findMany: jest.fn() },
+      $transaction: jest.fn((work) => work(tx)),
+    };
+
+    const module: TestingModule = await Test.createTestingModule({
+      providers: [TripAutomationService, { provide: PrismaService, useValue: prisma }],
+    }).compile();
+
+    service = module.get<TripAutomationService>(TripAutomationService);
+  });
+
+  it('should load children once per school and write each school in one transaction', async () => {
+    prisma.scheduledRoute.findMany.mockResolvedValue([
+      schedule('a', 'school-1', [[5.6, -0.18]]),
+      schedule('b', 'school-1', [[5.9, -0.5]]),
+      schedule('c', 'school-2', [[6.0, -1.0]], false),
+    ]);
+    tx.child.findMany.mockResolvedValue([
+      { id: 'near-a', pickupLatitude: 5.62, pickupLongitude: -0.2 },
+      { id: 'near-b', pickupLatitude: 5.91, pickupLongitude: -0.49 },
+      { id: 'far', pickupLatitude: 7.0, pickupLongitude: 1.0 },
+    ]);
+
+    await service.generateDailyTrips();
+
+    // school-2 has no auto-assigned schedules, so its children are never loaded
+    expect(tx.child.findMany).toHaveBeenCalledTimes(1);
+    expect(prisma.$transaction).toHaveBeenCalledTimes(2);
+
+    const trips = tx.trip.createManyAndReturn.mock.calls.find(([args]) => args.data.length === 2)[0].data;
+    const [{ data: attendances }] = tx.childAttendance.createMany.mock.calls[0];
+    const tripFor = (routeId: string) => trips.find((t) => t.routeId === routeId).id;
+
+    expect(trips[0]).toEqual(expect.objectContaining({ scheduledRouteId: expect.any(String), serviceDate: expect.any(Date) }));
+    expect(attendances).toEqual([
+      expect.objectContaining({ childId: 'near-a', tripId: tripFor('route-a'), recordedBy: 'stop-a-0' }),
+      expect.objectContaining({ childId: 'near-b', tripId: tripFor('route-b'), recordedBy: 'stop-b-0' }),
+    ]);
+  });
+
+  it('should wait for a school another instance held and create nothing when it succeeded', async () => {
+    prisma.scheduledRoute.findMany.mockResolvedValue([schedule('a', 'school-1', [[5.6, -0.18]])]);
+    tx.$queryRaw.mockResolvedValue([{ locked: false }]);
+    tx.trip.findMany.mockResolvedValue([{ scheduledRouteId: 'a' }]);
+
+    await service.generateDailyTrips();
+
+    expect(prisma.$transaction).toHaveBeenCalledTimes(2);
+    expect(tx.$executeRaw.mock.calls[0][0].join('')).toContain('pg_advisory_xact_lock');
+    expect(tx.trip.findMany).toHaveBeenCalledTimes(1);
+    expect(tx.trip.createManyAndReturn).not.toHaveBeenCalled();
+  });
+
+  it("should generate a held school's trips when the holder failed", async () => {
+    prisma.scheduledRoute.findMany.mockResolvedValue([schedule('a', 'school-1', [[5.6, -0.18]], false)]);
+    tx.$queryRaw.mockResolvedValue([{ locked: false }]);
+
+    await service.generateDailyTrips();
+
+    const [{ data }] = tx.trip.createManyAndReturn.mock.calls[0];
+    expect(data.map((trip) => trip.scheduledRouteId)).toEqual(['a']);
+  });
+
+  it('should only create trips for schedules without one for the day', async () => {
+    prisma.scheduledRoute.findMany.mockResolvedValue([
+      schedule('a', 'school-1', [[5.6, -0.18]], false),
+      schedule('b', 'school-1', [[5.9, -0.5]], false),
+    ]);
+    tx.trip.findMany.mockResolvedValue([{ scheduledRouteId: 'a' }]);
+
+    await service.generateDailyTrips();
+
+    const [{ data, skipDuplicates }] = tx.trip.createManyAndReturn.mock.calls[0];
+    expect(data.map((trip) => trip.scheduledRouteId)).toEqual(['b']);
+    expect(skipDuplicates).toBe(true);
+  });
+
+  it('should not write attendance for trips that already existed', async () => {
+    prisma.scheduledRoute.findMany.mockResolvedValue([schedule('a', 'school-1', [[5.6, -0.18]])]);
+    tx.child.findMany.mockResolvedValue([{ id: 'near-a', pickupLatitude: 5.62, pickupLongitude: -0.2 }]);
+    tx.trip.createManyAndReturn.mockResolvedValue([]);
+
+    await service.generateDailyTrips();
+
+    expect(tx.childAttendance.createMany).not.toHaveBeenCalled();
+  });
+});
@@ -1,18 +1,54 @@
-import { Injectable, Logger } from '@nestjs/common';
+import { Injectable, Logger, Optional } from '@nestjs/common';
 import { Cron, CronExpression } from '@nestjs/schedule';
 import { PrismaService } from '../../prisma/prisma.service';
-import { DayOfWeek, ScheduleStatus } from '@prisma/client';
+import { DayOfWeek, Prisma, ScheduleStatus } from '@prisma/client';
+import { randomUUID } from 'crypto';
+import { GeoIndex } from '../../common/geo/geo-index';
+import { TenantCacheService } from '../cache/tenant-cache.service';
+
+// First key of the two-key advisory locks taken per school and day
+const GENERATION_LOCK_NAMESPACE = 'trip-generation';
+
+interface ScheduleForGeneration {
+  id: string;
+  routeId: string;
+  driverId: string;
+  busId: string;
+  scheduledTime: string;
+  autoAssignChildren: boolean;
+  route: {
+    name: string;
+    schoolId: string;
+    stops: Array<{ id: string; latitude: number; longitude: number }>;
+  };
+}
 
 @Injectable()
 export class TripAutomationService {
   private readonly logger = new Logger(TripAutomationService.name);
 
-  constructor(private prisma: PrismaService) {}
+  // A child rides a route when their pickup point is this close to one of its stops
+  private readonly STOP_MATCH_RADIUS_KM = 5;
+  // Schools processed in parallel; each holds one connection for its transaction
+  private readonly schoolConcurrency = parseInt(process.env.TRIP_GENERATION_CONCURRENCY || '4', 10);
+  private readonly schoolTimeoutMs = parseInt(process.env.TRIP_GENERATION_SCHOOL_TIMEOUT_MS || '60000', 10);
+
+  constructor(
+    private prisma: PrismaService,
+    @Optional() private cache?: TenantCacheService,
+  ) {}
 
   /**
    * Runs every day at 2:00 AM to create trips for the day
    * This gives enough time after midnight for any late-night updates
    * and ensures trips are ready when drivers start their morning routine
+   *
+   * Every replica runs it. Schools are the unit of work: each replica walks
+   * the schools from a random starting point and takes a per-school
+   * advisory lock, skipping schools another replica holds, so the work is
+   * spread across replicas. A schedule gets at most one trip per day
+   * (unique scheduledRouteId + serviceDate), so schools finished elsewhere
+   * and reruns create nothing.
    */
   @Cron('0 2 * * *') // Every day at 2:00 AM
   async generateDailyTrips() {
@@ -36,131 +72,228 @@ export class TripAutomationService {
             { effectiveFrom: { lte: today }, effectiveUntil: { gte: today } },
           ],
         },
-        include: {
-          route: { include: { stops: true, school: true } },
-          driver: true,
-          bus: true,
+        select: {
+          id: true,
+          routeId: true,
+          driverId: true,
+          busId: true,
+          scheduledTime: true,
+          autoAssignChildren: true,
+          route: {
+            select: {
+              name: true,
+              schoolId: true,
+              stops: { select: { id: true, latitude: true, longitude: true } },
+            },
+          },
         },
       });
 
       this.logger.log(`Found ${scheduledRoutes.length} scheduled routes for today`);
 
+      // Children are matched per school, so each school is one unit of work
+      const schedulesBySchool = new Map<string, ScheduleForGeneration[]>();
       for (const schedule of scheduledRoutes) {
+        const schoolSchedules = schedulesBySchool.get(schedule.route.schoolId) || [];
+        schoolSchedules.push(schedule);
+        schedulesBySchool.set(schedule.route.schoolId, schoolSchedules);
+      }
+
+      // Start at a random school so concurrent replicas begin on different ones
+      const schools = [...schedulesBySchool.entries()];
+      const start = Math.floor(Math.random() * schools.length);
+      const ordered = [...schools.slice(start), ...schools.slice(0, start)];
+
+      let tripsCreated = 0;
+      let attendancesCreated = 0;
+      const skipped: typeof ordered = [];
+      const generate = (wait: boolean) => async ([schoolId, schedules]: (typeof ordered)[number]) => {
         try {
-          await this.createTripFromSchedule(schedule, today);
+          const result = await this.generateTripsForSchool(schoolId, schedules, today, wait);
+          if (result === null) {
+            skipped.push([schoolId, schedules]);
+            return;
+          }
+          tripsCreated += result.trips;
+          attendancesCreated += result.attendances;
         } catch (error) {
           this.logger.error(
-            `Failed to create trip for schedule ${schedule.id}: ${error.message}`,
+            `Failed to create trips for school ${schoolId} (${schedules.length} schedules): ${error.message}`,
             error.stack,
           );
         }
-      }
+      };
 
-      this.logger.log('Daily trip generation completed');
-    } catch (error) {
-      this.logger.error(`Error in daily trip generation: ${error.message}`, error.stack);
-    }
-  }
+      await this.forEachWithConcurrency(ordered, this.schoolConcurrency, generate(false));
 
-  /**
-   * Create a trip from a scheduled route
-   */
-  private async createTripFromSchedule(schedule: any, date: Date) {
-    const [hours, minutes] = schedule.scheduledTime.split(':');
-    const startTime = new Date(date);
-    startTime.setHours(parseInt(hours), parseInt(minutes), 0, 0);
-
-    this.logger.log(`Creating trip for route ${schedule.route.name} at ${schedule.scheduledTime}`);
-
-    // Create the trip
-    const trip = await this.prisma.trip.create({
-      data: {
-        busId: schedule.busId,
-        routeId: schedule.routeId,
-        driverId: schedule.driverId,
-        status: 'SCHEDULED',
-        startTime,
-      },
-    });
+      // The cron fires once a day, so a school whose holder failed or timed
+      // out would get no trips. Wait for each skipped school's lock and go
+      // over it again; when the holder succeeded this creates nothing.
+      await this.forEachWithConcurrency([...skipped], this.schoolConcurrency, generate(true));
 
-    this.logger.log(`Created trip ${trip.id} for route ${schedule.route.name}`);
+      if (tripsCreated > 0) {
+        await this.cache?.invalidate(['trips', 'attendance']);
+      }
 
-    // Auto-assign children if enabled
-    if (schedule.autoAssignChildren) {
-      await this.assignChildrenToTrip(trip.id, schedule.routeId, schedule.route.schoolId);
+      this.logger.log(
+        `Daily trip generation completed: ${tripsCreated} trips, ${attendancesCreated} attendance records across ${schedulesBySchool.size} schools (${skipped.length} rechecked after another instance held them)`,
+      );
+    } catch (error) {
+      this.logger.error(`Error in daily trip generation: ${error.message}`, error.stack);
     }
-
-    return trip;
   }
 
   /**
-   * Automatically assign children to a trip based on their school and pickup location
+   * Create the missing trips for one school's schedules, plus the attendance
+   * rows for auto-assigned children, in a single transaction. Children are
+   * loaded once for the whole school. Returns null when another instance
+   * holds the school, unless `wait` is set: then it blocks until the holder
+   * commits or rolls back.
    */
-  private async assignChildrenToTrip(tripId: string, routeId: string, schoolId: string) {
-    try {
-      // Get all children at this school
-      const children = await this.prisma.child.findMany({
-        where: { schoolId },
-      });
-
-      this.logger.log(`Found ${children.length} children at school for trip ${tripId}`);
-
-      // Get route stops to match children
-      const route = await this.prisma.route.findUnique({
-        where: { id: routeId },
-        include: { stops: true },
-      });
+  private async generateTripsForSchool(
+    schoolId: string,
+    schedules: ScheduleForGeneration[],
+    date: Date,
+    wait = false,
+  ): Promise<{ trips: number; attendances: number } | null> {
+    const serviceDate = this.toServiceDate(date);
+    const lockKey = `${schoolId}:${serviceDate.toISOString().slice(0, 10)}`;
+
+    return this.prisma.$transaction(
+      async (tx) => {
+        // Released at commit; the unique key guards anything that runs after
+        if (wait) {
+          // $executeRaw: the function returns void, which $queryRaw can't deserialize
+          await tx.$executeRaw`SELECT pg_advisory_xact_lock(hashtext(${GENERATION_LOCK_NAMESPACE}), hashtext(${lockKey}))`;
+        } else {
+          const [{ locked }] = await tx.$queryRaw<Array<{ locked: boolean }>>`
+            SELECT pg_try_advisory_xact_lock(hashtext(${GENERATION_LOCK_NAMESPACE}), hashtext(${lockKey})) AS locked
+          `;
+          if (!locked) {
+            return null;
+          }
+        }
 
-      if (!route || route.stops.length === 0) {
-        this.logger.warn(`Route ${routeId} has no stops, skipping child assignment`);
-        return;
-      }
+        const existing = await tx.trip.findMany({
+          where: { serviceDate, scheduledRouteId: { in: schedules.map((s) => s.id) } },
+          select: { scheduledRouteId: true },
+        });
+        const generated = new Set(existing.map((trip) => trip.scheduledRouteId));
+        const pending = schedules.filter((s) => !generated.has(s.id));
+        if (pending.length === 0) {
+          return { trips: 0, attendances: 0 };
+        }
 
-      // For each child, check if they should be on this route
-      const childrenToAssign = children.filter((child) =>
-        this.shouldChildBeOnRoute(child, route.stops),
-      );
+        const needsChildren = pending.some((s) => s.autoAssignChildren && s.route.stops.length > 0);
+        const children = needsChildren
+          ? await tx.child.findMany({
+              where: { schoolId, pickupLatitude: { not: null }, pickupLongitude: { not: null } },
+              select: { id: true, pickupLatitude: true, pickupLongitude: true },
+            })
+          : [];
+
+        const trips: Prisma.TripCreateManyInput[] = [];
+        const attendances: Prisma.ChildAttendanceCreateManyInput[] = [];
+        const assignable: Array<{ tripId: string; recordedBy: string }> = [];
+        const stopIndex = new GeoIndex<number>(this.STOP_MATCH_RADIUS_KM / 2);
+
+        for (const schedule of pending) {
+          const [hours, minutes] = schedule.scheduledTime.split(':');
+          const startTime = new Date(date);
+          startTime.setHours(parseInt(hours), parseInt(minutes), 0, 0);
+
+          const tripId = randomUUID();
+          trips.push({
+            id: tripId,
+            busId: schedule.busId,
+            routeId: schedule.routeId,
+            driverId: schedule.driverId,
+            scheduledRouteId: schedule.id,
+            serviceDate,
+            status: 'SCHEDULED',
+            startTime,
+          });
+
+          if (!schedule.autoAssignChildren) {
+            continue;
+          }
+          if (schedule.route.stops.length === 0) {
+            this.logger.warn(`Route ${schedule.routeId} has no stops, skipping child assignment`);
+            continue;
+          }
+
+          const slot = assignable.length;
+          assignable.push({ tripId, recordedBy: schedule.route.stops[0]?.id || 'system' }); // System assignment
+          for (const stop of schedule.route.stops) {
+            stopIndex.add(stop.latitude, stop.longitude, slot);
+          }
+        }
 
-      this.logger.log(`Assigning ${childrenToAssign.length} children to trip ${tripId}`);
+        // One radius query per child against every stop of the school's routes
+        for (const child of children) {
+          // Same rule as before: a 0 coordinate counts as missing
+          if (!child.pickupLatitude || !child.pickupLongitude) {
+            continue;
+          }
+          const slots = new Set(
+            stopIndex
+              .withinRadius(child.pickupLatitude, child.pickupLongitude, this.STOP_MATCH_RADIUS_KM)
+              .map((match) => match.item),
+          );
+          for (const slot of [...slots].sort((a, b) => a - b)) {
+            attendances.push({
+              childId: child.id,
+              tripId: assignable[slot].tripId,
+              status: 'PICKED_UP', // Default status, driver will update
+              recordedBy: assignable[slot].recordedBy,
+            });
+          }
+        }
 
-      // Create attendance records for matched children
-      for (const child of childrenToAssign) {
-        await this.prisma.childAttendance.create({
-          data: {
-            childId: child.id,
-            tripId,
-            status: 'PICKED_UP', // Default status, driver will update
-            recordedBy: route.stops[0]?.id || 'system', // System assignment
-          },
+        // The check above runs under this school's lock only: a schedule whose
+        // route just moved schools may be generated under the other school's
+        // lock too. The unique key skips that trip and its attendance rows.
+        const inserted = await tx.trip.createManyAndReturn({
+          data: trips,
+          skipDuplicates: true,
+          select: { id: true },
         });
-      }
+        const insertedIds = new Set(inserted.map((trip) => trip.id));
+        const rows = attendances.filter((attendance) => insertedIds.has(attendance.tripId));
+        if (rows.length > 0) {
+          await tx.childAttendance.createMany({ data: rows, skipDuplicates: true });
+        }
 
-      this.logger.log(`Successfully assigned children to trip ${tripId}`);
-    } catch (error) {
-      this.logger.error(`Error assigning children to trip ${tripId}: ${error.message}`);
-      throw error;
-    }
+        this.logger.log(
+          `Created ${inserted.length} trips and ${rows.length} attendance records for school ${schoolId} (${children.length} children with pickup locations)`,
+        );
+        return { trips: inserted.length, attendances: rows.length };
+      },
+      // Waiting for the lock counts against the timeout: allow for the
+      // holder's whole transaction on top of this one
+      { timeout: wait ? this.schoolTimeoutMs * 2 : this.schoolTimeoutMs },
+    );
   }
 
   /**
-   * Check if a child should be on this route based on their pickup location
-   * This is a simplified version - in production, use more sophisticated geo-matching
+   * The local calendar day of `date`, as the UTC midnight Prisma writes to a DATE column
    */
-  private shouldChildBeOnRoute(child: any, stops: any[]): boolean {
-    // If child has no pickup location, don't assign
-    if (!child.pickupLatitude || !child.pickupLongitude) {
-      return false;
-    }
-
-    // Check if child's pickup location is within reasonable distance of any stop
-    // This is a simple implementation - in production, use proper geospatial queries
-    const DISTANCE_THRESHOLD = 0.05; // ~5km radius (rough approximation)
+  private toServiceDate(date: Date): Date {
+    return new Date(Date.UTC(date.getFullYear(), date.getMonth(), date.getDate()));
+  }
 
-    return stops.some((stop) => {
-      const latDiff = Math.abs(child.pickupLatitude - stop.latitude);
-      const lonDiff = Math.abs(child.pickupLongitude - stop.longitude);
-      return latDiff < DISTANCE_THRESHOLD && lonDiff < DISTANCE_THRESHOLD;
+  /**
+   * Run `task` over `items` with at most `limit` in flight, so a large
+   * tenant doesn't hold every pooled DB connection at once
+   */
+  private async forEachWithConcurrency<T>(items: T[], limit: number, task: (item: T) => Promise<void>) {
+    let next = 0;
+    const workers = Array.from({ length: Math.min(Math.max(limit, 1), items.length) }, async () => {
+      while (next < items.length) {
+        await task(items[next++]);
+      }
     });
+    await Promise.all(workers);
   }
 
   /**
@@ -1,9 +1,10 @@
-import { Controller, Get, Post, Body, Patch, Param, Delete, UseGuards } from '@nestjs/common';
+import { Controller, Get, Post, Body, Patch, Param, Delete, UseGuards, Query } from '@nestjs/common';
 import { TripsService } from './trips.service';
 import { TripAutomationService } from './trip-automation.service';
 import { Roles } from '../roles/roles.decorator';
 import { RolesGuard } from '../roles/roles.guard';
 import { JwtAuthGuard } from '../auth/jwt-auth.guard';
+import { PageQueryDto } from '../../common/pagination/pagination';
 
 @Controller('trips')
 @UseGuards(JwtAuthGuard, RolesGuard)
@@ -21,8 +22,8 @@ export class TripsController {
 
   @Get()
   @Roles('PLATFORM_ADMIN', 'COMPANY_ADMIN', 'DRIVER')
-  findAll() {
-    return this.tripsService.findAll();
+  findAll(@Query() query: PageQueryDto) {
+    return this.tripsService.findAll(query);
   }
 
   @Get(':id')
@@ -3,9 +3,11 @@ import { TripsService } from './trips.service';
 import { TripsController } from './trips.controller';
 import { TripAutomationService } from './trip-automation.service';
 import { PrismaModule } from '../../prisma/prisma.module';
+import { DriverManifestModule } from '../driver-manifest/driver-manifest.module';
+import { TenancyModule } from '../tenancy/tenancy.module';
 
 @Module({
-  imports: [PrismaModule],
+  imports: [PrismaModule, DriverManifestModule, TenancyModule],
   controllers: [TripsController],
   providers: [TripsService, TripAutomationService],
   exports: [TripsService, TripAutomationService],
@@ -1,10 +1,24 @@
 import { Injectable } from '@nestjs/common';
 import { PrismaService } from '../../prisma/prisma.service';
-import { Trip, TripStatus } from '@prisma/client';
+import { Prisma, Trip, TripStatus } from '@prisma/client';
+import { DriverManifestService } from '../driver-manifest/driver-manifest.service';
+import { Page, PageQueryDto, findPage, scalarSelect, selectFields } from '../../common/pagination/pagination';
+import { TenancyService } from '../tenancy/tenancy.service';
+import { TenantCacheService } from '../cache/tenant-cache.service';
+
+const TRIP_LIST_SELECT = {
+  ...scalarSelect(Prisma.TripScalarFieldEnum),
+  histories: true,
+};
 
 @Injectable()
 export class TripsService {
-  constructor(private prisma: PrismaService) {}
+  constructor(
+    private prisma: PrismaService,
+    private driverManifest: DriverManifestService,
+    private tenancy: TenancyService,
+    private cache: TenantCacheService,
+  ) {}
 
   async findOne(id: string): Promise<Trip | null> {
     return this.prisma.trip.findUnique({
@@ -16,30 +30,36 @@ export class TripsService {
   }
 
   async create(data: any): Promise<Trip> {
-    return this.prisma.trip.create({
+    const trip = await this.prisma.trip.create({
       data,
       include: {
         histories: true,
       },
     });
+    await this.cache.invalidate('trips', trip.companyId);
+    return trip;
   }
 
   async update(id: string, data: any): Promise<Trip> {
-    return this.prisma.trip.update({
+    const trip = await this.prisma.trip.update({
       where: { id },
       data,
       include: {
         histories: true,
       },
     });
+    await this.driverManifest.invalidate(id);
+    await this.cache.invalidate('trips', trip.companyId);
+    return trip;
   }
 
-  async findAll(): Promise<Trip[]> {
-    return this.prisma.trip.findMany({
-      include: {
-        histories: true,
-      },
-    });
+  async findAll(query: PageQueryDto = {}): Promise<Page<Trip> | Trip[]> {
+    return findPage(
+      (args) => this.prisma.trip.findMany(args) as Promise<Trip[]>,
+      {},
+      selectFields(query.fields, TRIP_LIST_SELECT),
+      query,
+    );
   }
 
   async findActiveByChildId(childId: string): Promise<Trip | null> {
@@ -73,14 +93,9 @@ export class TripsService {
   }
 
   async findActiveByCompanyId(companyId: string): Promise<Trip[]> {
-    return this.prisma.trip.findMany({
+    return this.tenancy.forCompany(companyId).trip.findMany({
       where: {
         status: { in: ['IN_PROGRESS', 'ARRIVED_SCHOOL', 'RETURN_IN_PROGRESS', 'SCHEDULED'] },
-        driver: {
-          user: {
-            companyId: companyId,
-          },
-        },
       },
       include: {
         bus: {
@@ -104,9 +119,11 @@ export class TripsService {
   }
 
   async remove(id: string): Promise<Trip> {
-    return this.prisma.trip.delete({
+    const trip = await this.prisma.trip.delete({
       where: { id },
     });
+    await this.cache.invalidate('trips', trip.companyId);
+    return trip;
   }
 
   async transitionTripStatus(tripId: string, newStatus: TripStatus, userId: string): Promise<Trip> {
@@ -145,6 +162,9 @@ export class TripsService {
       },
     });
 
+    await this.driverManifest.invalidate(tripId);
+    await this.cache.invalidate('trips', updatedTrip.companyId);
+
     return updatedTrip;
   }
 
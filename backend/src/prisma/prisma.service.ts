@@ -1,8 +1,22 @@
 import { Injectable, OnModuleInit, OnModuleDestroy } from '@nestjs/common';
 import { PrismaClient } from '@prisma/client';
+import { prismaQueryDuration } from '../modules/metrics/metrics';
 
 @Injectable()
 export class PrismaService extends PrismaClient implements OnModuleInit, OnModuleDestroy {
+  constructor() {
+    super();
+    // Query latency by model and action; raw queries have no model
+    this.$use(async (params, next) => {
+      const end = prismaQueryDuration.startTimer({ model: params.model || 'raw', action: params.action });
+      try {
+        return await next(params);
+      } finally {
+        end();
+      }
+    });
+  }
+
   async onModuleInit() {
     await this.$connect();
   }
@@ -10,4 +24,4 @@ export class PrismaService extends PrismaClient implements OnModuleInit, OnModul
   async onModuleDestroy() {
     await this.$disconnect();
   }
-}
\ No newline at end of file
+}
@@ -0,0 +1,243 @@
+import { createServer, Server as HttpServer } from 'http';
+import { AddressInfo } from 'net';
+import { JwtService } from '@nestjs/jwt';
+import { Redis } from 'ioredis';
+import { Server } from 'socket.io';
+import { io as connect, Socket as ClientSocket } from 'socket.io-client';
+import { RedisIoAdapter } from './../src/common/adapters/redis-io.adapter';
+import { RealtimeGateway } from './../src/modules/realtime/realtime.gateway';
+import { FakeRedis } from './utils/fake-redis';
+
+interface Instance {
+  http: HttpServer;
+  adapter: RedisIoAdapter;
+  io: Server;
+  url: string;
+}
+
+describe('Realtime across two instances (e2e)', () => {
+  let redis: FakeRedis;
+  let redisUrl: string;
+  let instanceA: Instance;
+  let instanceB: Instance;
+  const clients: ClientSocket[] = [];
+
+  const startInstance = async (): Promise<Instance> => {
+    const http = createServer();
+    const adapter = new RedisIoAdapter(http);
+    await adapter.connectToRedis(redisUrl);
+    const io: Server = adapter.createIOServer(0, { transports: ['websocket'] });
+    io.on('connection', (socket) => {
+      const { busId } = socket.handshake.auth;
+      if (busId) {
+        socket.join(`bus:${busId}`);
+      }
+    });
+    await new Promise<void>((resolve) => http.listen(0, '127.0.0.1', resolve));
+    const { port } = http.address() as AddressInfo;
+    return { http, adapter, io, url: `http://127.0.0.1:${port}` };
+  };
+
+  const connectClient = (instance: Instance, auth: Record<string, string>) =>
+    new Promise<ClientSocket>((resolve, reject) => {
+      const client = connect(instance.url, { auth, transports: ['websocket'], forceNew: true });
+      clients.push(client);
+      client.once('connect', () => resolve(client));
+      client.once('connect_error', reject);
+    });
+
+  const nextEvent = <T = any>(client: ClientSocket, event: string) =>
+    new Promise<T>((resolve, reject) => {
+      const timer = setTimeout(() => reject(new Error(`Timed out waiting for ${event}`)), 2000);
+      client.once(event, (data: T) => {
+        clearTimeout(timer);
+        resolve(data);
+      });
+    });
+
+  beforeAll(async () => {
+    redis = new FakeRedis();
+    redisUrl = await redis.start();
+    instanceA = await startInstance();
+    instanceB = await startInstance();
+  });
+
+  afterAll(async () => {
+    clients.forEach((client) => client.disconnect());
+    for (const instance of [instanceA, instanceB]) {
+      await instance.adapter.close(instance.io);
+      await new Promise((resolve) => instance.http.close(resolve));
+    }
+    await redis.stop();
+  });
+
+  it('delivers a room emit from one instance to a client on the other', async () => {
+    const parent = await connectClient(instanceA, { busId: 'bus-1' });
+    const received = nextEvent(parent, 'bus_location');
+
+    instanceB.io.to('bus:bus-1').emit('bus_location', { busId: 'bus-1', latitude: 5.6 });
+
+    await expect(received).resolves.toEqual({ busId: 'bus-1', latitude: 5.6 });
+  });
+
+  it('does not deliver to clients outside the room on either instance', async () => {
+    const onBus2 = await connectClient(instanceB, { busId: 'bus-2' });
+    const onBus3 = await connectClient(instanceA, { busId: 'bus-3' });
+    const stray = jest.fn();
+    onBus3.on('bus_location', stray);
+    const received = nextEvent(onBus2, 'bus_location');
+
+    instanceA.io.to('bus:bus-2').emit('bus_location', { busId: 'bus-2' });
+
+    await expect(received).resolves.toEqual({ busId: 'bus-2' });
+    expect(stray).not.toHaveBeenCalled();
+  });
+
+  it('applies room joins made on one instance to sockets on the other', async () => {
+    const admin = await connectClient(instanceA, {});
+    instanceB.io.in(admin.id).socketsJoin('company:c-1');
+    // socketsJoin is fire-and-forget across instances
+    await new Promise((resolve) => setTimeout(resolve, 100));
+
+    const received = nextEvent(admin, 'new_location_update');
+    instanceB.io.to('company:c-1').emit('new_location_update', { busId: 'bus-9' });
+
+    await expect(received).resolves.toEqual({ busId: 'bus-9' });
+  });
+
+  it('counts both instances as one cluster', async () => {
+    const sockets = await instanceB.io.fetchSockets();
+    expect(sockets.length).toBe(clients.length);
+  });
+});
+
+// Without SOCKET_IO_REDIS_ADAPTER each replica keeps a plain in-memory
+// adapter. The gateway then relays location updates itself: one connection
+// publishes to bus_location_updates, a duplicate connection in subscriber
+// mode receives them, and updates tagged with the replica's own instance id
+// are skipped because they were already queued locally.
+describe('Realtime location relay without the Redis adapter (e2e)', () => {
+  const JWT_SECRET = 'relay-e2e-secret';
+  const envKeys = ['REDIS_URL', 'JWT_ACCESS_SECRET', 'LOCATION_FANOUT_TICK_MS', 'SOCKET_IO_REDIS_ADAPTER'];
+  const env = Object.fromEntries(envKeys.map((key) => [key, process.env[key]]));
+  let redis: FakeRedis;
+  let probe: Redis;
+  let jwt: JwtService;
+  let gatewayA: GatewayInstance;
+  let gatewayB: GatewayInstance;
+  const clients: ClientSocket[] = [];
+
+  interface GatewayInstance {
+    http: HttpServer;
+    io: Server;
+    gateway: RealtimeGateway;
+    url: string;
+  }
+
+  const startGateway = async (): Promise<GatewayInstance> => {
+    const prisma = { bus: { findUnique: jest.fn().mockResolvedValue({ companyId: 'company-1', driver: null }) } };
+    const gpsIngestion = { ingest: jest.fn().mockResolvedValue({ heartbeatCount: 1, snapshot: null }) };
+    const busMembership = { getBusIds: jest.fn().mockResolvedValue(['bus-1']) };
+    const sessions = { isRevoked: jest.fn().mockResolvedValue(false) };
+    const gateway = new RealtimeGateway(jwt, prisma as any, gpsIngestion as any, busMembership as any, sessions as any);
+
+    const http = createServer();
+    const io = new Server(http, { transports: ['websocket'] });
+    gateway.server = io;
+    gateway.afterInit();
+    io.on('connection', (socket) => gateway.handleConnection(socket));
+
+    await new Promise<void>((resolve) => http.listen(0, '127.0.0.1', resolve));
+    const { port } = http.address() as AddressInfo;
+    return { http, io, gateway, url: `http://127.0.0.1:${port}` };
+  };
+
+  const connectParent = (instance: GatewayInstance, userId: string) =>
+    new Promise<ClientSocket>((resolve, reject) => {
+      const token = jwt.sign({ sub: userId, role: 'PARENT', companyId: 'company-1' });
+      const client = connect(instance.url, { auth: { token }, transports: ['websocket'], forceNew: true });
+      clients.push(client);
+      client.once('connect', () => resolve(client));
+      client.once('connect_error', reject);
+    });
+
+  // The gateway joins rooms after an async membership lookup, and both
+  // gateways subscribe in the background; wait until both are in place
+  const settle = async () => {
+    for (let attempt = 0; attempt < 50; attempt++) {
+      const [, subscribers] = (await probe.pubsub('NUMSUB', 'bus_location_updates')) as [string, number];
+      const joined = [gatewayA, gatewayB].every((instance) =>
+        [...instance.io.of('/').sockets.values()].every((socket) => socket.rooms.has('bus:bus-1')),
+      );
+      if (Number(subscribers) === 2 && joined) return;
+      await new Promise((resolve) => setTimeout(resolve, 20));
+    }
+    throw new Error('Gateways did not subscribe to bus_location_updates or join the bus room');
+  };
+
+  const collect = (client: ClientSocket, event: string) => {
+    const received: any[] = [];
+    client.on(event, (data: any) => received.push(data));
+    return received;
+  };
+
+  beforeAll(async () => {
+    redis = new FakeRedis();
+    process.env.REDIS_URL = await redis.start();
+    process.env.JWT_ACCESS_SECRET = JWT_SECRET;
+    process.env.LOCATION_FANOUT_TICK_MS = '20';
+    delete process.env.SOCKET_IO_REDIS_ADAPTER;
+
+    jwt = new JwtService({ secret: JWT_SECRET });
+    probe = new Redis(process.env.REDIS_URL);
+    gatewayA = await startGateway();
+    gatewayB = await startGateway();
+  });
+
+  afterAll(async () => {
+    clients.forEach((client) => client.disconnect());
+    for (const instance of [gatewayA, gatewayB]) {
+      await instance.gateway.onModuleDestroy();
+      await new Promise((resolve) => instance.io.close(resolve));
+    }
+    await probe.quit();
+    await redis.stop();
+    for (const key of envKeys) {
+      if (env[key] === undefined) delete process.env[key];
+      else process.env[key] = env[key];
+    }
+  });
+
+  // Every update a gateway queues for its own sockets
+  const spyOnFanout = (instance: GatewayInstance) => jest.spyOn((instance.gateway as any).locationFanout, 'push');
+
+  it('relays a location update to the bus room on the other replica', async () => {
+    const parentOnA = await connectParent(gatewayA, 'parent-a');
+    const parentOnB = await connectParent(gatewayB, 'parent-b');
+    await settle();
+    const onA = collect(parentOnA, 'bus_location');
+    const onB = collect(parentOnB, 'bus_location');
+
+    await gatewayB.gateway.emitLocationUpdate('bus-1', { latitude: 5.6, longitude: -0.19, speed: 20 });
+    await new Promise((resolve) => setTimeout(resolve, 200));
+
+    expect(onA).toEqual([{ busId: 'bus-1', latitude: 5.6, longitude: -0.19, speed: 20 }]);
+    expect(onB).toEqual([{ busId: 'bus-1', latitude: 5.6, longitude: -0.19, speed: 20 }]);
+  });
+
+  it('skips its own updates when they come back over the channel', async () => {
+    const parentOnB = await connectParent(gatewayB, 'parent-c');
+    await settle();
+    const onB = collect(parentOnB, 'bus_location');
+    const queuedOnA = spyOnFanout(gatewayA);
+    const queuedOnB = spyOnFanout(gatewayB);
+
+    await gatewayA.gateway.emitLocationUpdate('bus-1', { latitude: 5.7, longitude: -0.2, speed: 0 });
+    await new Promise((resolve) => setTimeout(resolve, 200));
+
+    // A queued it locally and ignored the echo; B queued the relayed copy
+    expect(queuedOnA).toHaveBeenCalledTimes(1);
+    expect(queuedOnB).toHaveBeenCalledTimes(1);
+    expect(onB).toEqual([{ busId: 'bus-1', latitude: 5.7, longitude: -0.2, speed: 0 }]);
+  });
+});
@@ -0,0 +1,165 @@
+import { createServer, Server, Socket } from 'net';
+import { AddressInfo } from 'net';
+
+/**
+ * Minimal in-process Redis stand-in speaking RESP2, with just enough of the
+ * command set for ioredis pub/sub and the socket.io Redis adapter:
+ * PING, INFO, SELECT, CLIENT, QUIT, PUBLISH, (P)SUBSCRIBE, (P)UNSUBSCRIBE
+ * and PUBSUB NUMSUB. Payloads are handled as buffers because the adapter
+ * publishes msgpack.
+ */
+export class FakeRedis {
+  private server: Server;
+  private readonly channels = new Map<string, Set<Socket>>();
+  private readonly patterns = new Map<string, Set<Socket>>();
+
+  async start(): Promise<string> {
+    this.server = createServer((socket) => this.handle(socket));
+    await new Promise<void>((resolve) => this.server.listen(0, '127.0.0.1', resolve));
+    const { port } = this.server.address() as AddressInfo;
+    return `redis://127.0.0.1:${port}`;
+  }
+
+  async stop(): Promise<void> {
+    await new Promise<void>((resolve) => this.server.close(() => resolve()));
+  }
+
+  private handle(socket: Socket) {
+    let pending = Buffer.alloc(0);
+    socket.on('data', (chunk: Buffer) => {
+      pending = Buffer.concat([pending, chunk]);
+      let parsed: { args: Buffer[]; rest: Buffer } | null;
+      while ((parsed = parseCommand(pending))) {
+        pending = parsed.rest;
+        this.execute(socket, parsed.args);
+      }
+    });
+    socket.on('close', () => {
+      for (const subscribers of [...this.channels.values(), ...this.patterns.values()]) {
+        subscribers.delete(socket);
+      }
+    });
+    socket.on('error', () => undefined);
+  }
+
+  private subscriptionCount(socket: Socket): number {
+    let count = 0;
+    for (const subscribers of [...this.channels.values(), ...this.patterns.values()]) {
+      if (subscribers.has(socket)) count++;
+    }
+    return count;
+  }
+
+  private execute(socket: Socket, args: Buffer[]) {
+    const command = args[0].toString().toLowerCase();
+    const names = args.slice(1).map((arg) => arg.toString());
+
+    switch (command) {
+      case 'ping':
+        return socket.write(simple('PONG'));
+      case 'info':
+        return socket.write(bulk(Buffer.from('# Server\r\nredis_version:7.0.0\r\nloading:0\r\n')));
+      case 'select':
+      case 'client':
+        return socket.write(simple('OK'));
+      case 'quit':
+        socket.write(simple('OK'));
+        return socket.end();
+      case 'subscribe':
+      case 'psubscribe': {
+        const registry = command === 'subscribe' ? this.channels : this.patterns;
+        for (const name of names) {
+          if (!registry.has(name)) registry.set(name, new Set());
+          registry.get(name).add(socket);
+          socket.write(array([bulk(Buffer.from(command)), bulk(Buffer.from(name)), integer(this.subscriptionCount(socket))]));
+        }
+        return;
+      }
+      case 'unsubscribe':
+      case 'punsubscribe': {
+        const registry = command === 'unsubscribe' ? this.channels : this.patterns;
+        const targets = names.length ? names : [...registry.keys()].filter((name) => registry.get(name).has(socket));
+        for (const name of targets) {
+          registry.get(name)?.delete(socket);
+          socket.write(array([bulk(Buffer.from(command)), bulk(Buffer.from(name)), integer(this.subscriptionCount(socket))]));
+        }
+        return;
+      }
+      case 'publish':
+        return socket.write(integer(this.publish(names[0], args[2])));
+      case 'pubsub': {
+        if (names[0].toLowerCase() !== 'numsub') {
+          return socket.write(error(`unsupported PUBSUB ${names[0]}`));
+        }
+        const replies: Buffer[] = [];
+        for (const channel of names.slice(1)) {
+          replies.push(bulk(Buffer.from(channel)), integer(this.channels.get(channel)?.size || 0));
+        }
+        return socket.write(array(replies));
+      }
+      default:
+        return socket.write(error(`unknown command '${command}'`));
+    }
+  }
+
+  private publish(channel: string, message: Buffer): number {
+    let receivers = 0;
+    for (const subscriber of this.channels.get(channel) || []) {
+      subscriber.write(array([bulk(Buffer.from('message')), bulk(Buffer.from(channel)), bulk(message)]));
+      receivers++;
+    }
+    for (const [pattern, subscribers] of this.patterns) {
+      if (!globToRegExp(pattern).test(channel)) continue;
+      for (const subscriber of subscribers) {
+        subscriber.write(
+          array([bulk(Buffer.from('pmessage')), bulk(Buffer.from(pattern)), bulk(Buffer.from(channel)), bulk(message)]),
+        );
+        receivers++;
+      }
+    }
+    return receivers;
+  }
+}
+
+function parseCommand(buffer: Buffer): { args: Buffer[]; rest: Buffer } | null {
+  if (buffer.length === 0) return null;
+
+  // Inline command, e.g. "PING\r\n"
+  if (buffer[0] !== 0x2a) {
+    const end = buffer.indexOf('\r\n');
+    if (end === -1) return null;
+    const args = buffer.subarray(0, end).toString().trim().split(/\s+/).map((arg) => Buffer.from(arg));
+    return { args, rest: buffer.subarray(end + 2) };
+  }
+
+  let offset = buffer.indexOf('\r\n');
+  if (offset === -1) return null;
+  const count = parseInt(buffer.subarray(1, offset).toString(), 10);
+  offset += 2;
+
+  const args: Buffer[] = [];
+  for (let i = 0; i < count; i++) {
+    const lineEnd = buffer.indexOf('\r\n', offset);
+    if (lineEnd === -1) return null;
+    const length = parseInt(buffer.subarray(offset + 1, lineEnd).toString(), 10);
+    const start = lineEnd + 2;
+    if (buffer.length < start + length + 2) return null;
+    args.push(buffer.subarray(start, start + length));
+    offset = start + length + 2;
+  }
+  return { args, rest: buffer.subarray(offset) };
+}
+
+function globToRegExp(pattern: string): RegExp {
+  const source = pattern
+    .split('')
+    .map((char) => (char === '*' ? '.*' : char === '?' ? '.' : char.replace(/[.+^${}()|[\]\\]/g, '\\$&')))
+    .join('');
+  return new RegExp(`^${source}$`);
+}
+
+const simple = (value: string) => Buffer.from(`+${value}\r\n`);
+const error = (message: string) => Buffer.from(`-ERR ${message}\r\n`);
+const integer = (value: number) => Buffer.from(`:${value}\r\n`);
+const bulk = (value: Buffer) => Buffer.concat([Buffer.from(`$${value.length}\r\n`), value, Buffer.from('\r\n')]);
+const array = (items: Buffer[]) => Buffer.concat([Buffer.from(`*${items.length}\r\n`), ...items]);
@@ -1,19 +1,41 @@
-import { Worker } from 'bullmq';
+import { Queue, Worker } from 'bullmq';
+import { PrismaClient } from '@prisma/client';
 import { Redis } from 'ioredis';
 import { GpsHeartbeatWorker } from './gps.heartbeat.worker';
 import { NotificationOutboundWorker } from './notification.outbound.worker';
 import { PaymentProcessWebhookWorker } from './payment.process_webhook.worker';
 import { AnalyticsWorker } from './analytics.worker';
+import {
+  NOTIFICATION_DEAD_LETTER_QUEUE,
+  NOTIFICATION_OUTBOUND_QUEUE,
+} from '../src/modules/notifications/notification-delivery';
 
-const redis = new Redis(process.env.REDIS_URL);
+// Workers block on this connection, which BullMQ requires to retry forever
+const redis = new Redis(process.env.REDIS_URL, { maxRetriesPerRequest: null });
+const publisher = new Redis(process.env.REDIS_URL);
+const prisma = new PrismaClient();
 
 // Initialize workers
 const gpsHeartbeatWorker = new Worker('gps.heartbeat', GpsHeartbeatWorker.process, {
   connection: redis,
 });
 
-const notificationOutboundWorker = new Worker('notification.outbound', NotificationOutboundWorker.process, {
+const notificationOutbound = new NotificationOutboundWorker(
+  prisma,
+  publisher,
+  parseInt(process.env.NOTIFICATION_BATCH_SIZE || '100', 10),
+  parseInt(process.env.NOTIFICATION_BATCH_WAIT_MS || '50', 10),
+);
+const notificationDeadLetterQueue = new Queue(NOTIFICATION_DEAD_LETTER_QUEUE, { connection: redis });
+
+const notificationOutboundWorker = new Worker(NOTIFICATION_OUTBOUND_QUEUE, notificationOutbound.process, {
   connection: redis,
+  // Jobs in flight at once; this is also the largest batch that can form
+  concurrency: parseInt(process.env.NOTIFICATION_WORKER_CONCURRENCY || '100', 10),
+  limiter: {
+    max: parseInt(process.env.NOTIFICATION_RATE_MAX || '1000', 10),
+    duration: parseInt(process.env.NOTIFICATION_RATE_DURATION_MS || '1000', 10),
+  },
 });
 
 const paymentProcessWebhookWorker = new Worker('payment.process_webhook', PaymentProcessWebhookWorker.process, {
@@ -31,6 +53,12 @@ gpsHeartbeatWorker.on('failed', (job, err) => {
 
 notificationOutboundWorker.on('failed', (job, err) => {
   console.error(`Notification Outbound job failed ${job.id}:`, err);
+  // Out of retries: keep the job for inspection and replay
+  if (job && job.attemptsMade >= (job.opts.attempts || 1)) {
+    notificationDeadLetterQueue
+      .add('dead-notification', { ...job.data, failedReason: err.message, attemptsMade: job.attemptsMade })
+      .catch((error) => console.error(`Could not dead-letter notification job ${job.id}:`, error));
+  }
 });
 
 paymentProcessWebhookWorker.on('failed', (job, err) => {
@@ -48,8 +76,12 @@ process.on('SIGTERM', async () => {
   console.log('Shutting down workers...');
   await gpsHeartbeatWorker.close();
   await notificationOutboundWorker.close();
+  await notificationOutbound.close();
+  await notificationDeadLetterQueue.close();
   await paymentProcessWebhookWorker.close();
   await analyticsWorker.close();
   await redis.quit();
+  await publisher.quit();
+  await prisma.$disconnect();
   process.exit(0);
 });
\ No newline at end of file
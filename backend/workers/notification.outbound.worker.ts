@@ -1,28 +1,116 @@
 import { Job } from 'bullmq';
+import { PrismaClient } from '@prisma/client';
+import { Redis } from 'ioredis';
+import {
+  NOTIFICATION_DELIVERY_CHANNEL,
+  NotificationDeliveryMessage,
+  OutboundNotificationJob,
+} from '../src/modules/notifications/notification-delivery';
 
+interface PendingDelivery {
+  job: Job<OutboundNotificationJob>;
+  resolve: (result: { sent: boolean; notificationId: string }) => void;
+  reject: (error: Error) => void;
+}
+
+/**
+ * Delivers queued notifications in batches. BullMQ runs up to `concurrency`
+ * jobs at once; instead of one query and one publish each, concurrent jobs
+ * wait here until `batchSize` have arrived or `batchWaitMs` has passed, and
+ * the batch is loaded with one query, published to the API instances in one
+ * message and stamped with one update. Each job settles with its batch, so
+ * a failed batch is retried job by job under the queue's backoff.
+ */
 export class NotificationOutboundWorker {
-  static async process(job: Job) {
-    const { notificationId, userId, title, message, type } = job.data;
-    
-    console.log(`Processing outbound notification ${notificationId} for user ${userId}`);
-    
-    // In a real implementation, you would:
-    // 1. Send notification via FCM
-    // 2. Send SMS if needed
-    // 3. Update notification status in database
-    // 4. Handle delivery receipts
-    
-    // For now, we'll just log the data
-    console.log(`Sending notification to user ${userId}: ${title} - ${message}`);
-    
-    // Simulate sending notification
-    await new Promise(resolve => setTimeout(resolve, 200));
-    
-    // Simulate potential failure
-    if (Math.random() < 0.1) {
-      throw new Error('Failed to send notification');
+  private pending: PendingDelivery[] = [];
+  private flushTimer: NodeJS.Timeout | null = null;
+  private flushing = new Set<Promise<void>>();
+
+  constructor(
+    private readonly prisma: PrismaClient,
+    private readonly publisher: Redis,
+    private readonly batchSize = 100,
+    private readonly batchWaitMs = 50,
+  ) {}
+
+  process = (job: Job<OutboundNotificationJob>) =>
+    new Promise<{ sent: boolean; notificationId: string }>((resolve, reject) => {
+      this.pending.push({ job, resolve, reject });
+      if (this.pending.length >= this.batchSize) {
+        this.flush();
+      } else if (!this.flushTimer) {
+        this.flushTimer = setTimeout(() => this.flush(), this.batchWaitMs);
+      }
+    });
+
+  /**
+   * Deliver whatever is waiting and wait for batches in progress
+   */
+  async close() {
+    this.flush();
+    await Promise.all(this.flushing);
+  }
+
+  private flush() {
+    if (this.flushTimer) {
+      clearTimeout(this.flushTimer);
+      this.flushTimer = null;
+    }
+    const batch = this.pending;
+    this.pending = [];
+    if (batch.length === 0) {
+      return;
+    }
+
+    const run = this.deliver(batch).finally(() => this.flushing.delete(run));
+    this.flushing.add(run);
+  }
+
+  private async deliver(batch: PendingDelivery[]): Promise<void> {
+    try {
+      const ids = [...new Set(batch.map(({ job }) => job.data.notificationId))];
+      const notifications = await this.prisma.notification.findMany({
+        where: { id: { in: ids } },
+        select: {
+          id: true,
+          userId: true,
+          title: true,
+          message: true,
+          type: true,
+          requiresAck: true,
+          relatedEntityType: true,
+          relatedEntityId: true,
+          metadata: true,
+          createdAt: true,
+        },
+      });
+
+      if (notifications.length > 0) {
+        const sentAt = new Date();
+        const message: NotificationDeliveryMessage = {
+          notifications: notifications.map((notification) => ({
+            ...notification,
+            sentAt: sentAt.toISOString(),
+            createdAt: notification.createdAt.toISOString(),
+          })),
+        };
+        await this.publisher.publish(NOTIFICATION_DELIVERY_CHANNEL, JSON.stringify(message));
+        await this.prisma.notification.updateMany({
+          where: { id: { in: notifications.map((notification) => notification.id) } },
+          data: { sentAt },
+        });
+      }
+
+      // A notification deleted before delivery has nothing left to send
+      const found = new Set(notifications.map((notification) => notification.id));
+      for (const { job, resolve } of batch) {
+        resolve({ sent: found.has(job.data.notificationId), notificationId: job.data.notificationId });
+      }
+      console.log(`Delivered ${notifications.length} notification(s) from ${batch.length} job(s)`);
+    } catch (error) {
+      for (const { reject } of batch) {
+        reject(error);
+      }
     }
-    
-    return { sent: true, notificationId, userId };
   }
-}
\ No newline at end of file
+}
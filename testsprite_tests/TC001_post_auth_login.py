@@ -1,7 +1,4 @@
-import requests
-
-BASE_URL = "http://localhost:3000"
-TIMEOUT = 30
+from fixtures import BASE_URL, CREDENTIALS, SESSION, TIMEOUT, TOKENS
 
 def test_post_auth_login():
     login_endpoint = f"{BASE_URL}/auth/login"
@@ -10,8 +7,8 @@ def test_post_auth_login():
     }
 
     users = [
-        {"email": "parent@test.com", "password": "Test@1234", "expected_role": "parent"},
-        {"email": "driver@saferide.com", "password": "Test@1234", "expected_role": "driver"}
+        {**CREDENTIALS["parent"], "expected_role": "parent"},
+        {**CREDENTIALS["driver"], "expected_role": "driver"}
     ]
 
     for user in users:
@@ -20,7 +17,7 @@ def test_post_auth_login():
             "password": user["password"]
         }
 
-        response = requests.post(login_endpoint, json=payload, headers=headers, timeout=TIMEOUT)
+        response = SESSION.post(login_endpoint, json=payload, headers=headers, timeout=TIMEOUT)
         try:
             # Validate HTTP status code
             assert response.status_code == 200, f"Expected 200 OK for {user['email']}, got {response.status_code}"
@@ -42,7 +39,11 @@ def test_post_auth_login():
             # Role should correspond to login used
             assert user_info["role"].lower() == user["expected_role"], \
                 f"User role '{user_info['role']}' does not match expected '{user['expected_role']}' for {user['email']}"
+
+            # Seed the shared cache so later tests reuse this login
+            TOKENS.store(user["expected_role"], data)
         except (AssertionError, KeyError) as e:
             raise AssertionError(f"Login test failed for {user['email']}: {e}")
 
-test_post_auth_login()
\ No newline at end of file
+if __name__ == "__main__":
+    test_post_auth_login()
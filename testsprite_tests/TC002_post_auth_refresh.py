@@ -1,22 +1,14 @@
 import requests
 
-BASE_URL = "http://localhost:3000"
-TIMEOUT = 30
-
-PARENT_CREDENTIALS = {
-    "email": "parent@test.com",
-    "password": "Test@1234"
-}
+from fixtures import BASE_URL, SESSION, TIMEOUT, fresh_login
 
 def test_post_auth_refresh():
-    login_url = f"{BASE_URL}/auth/login"
     refresh_url = f"{BASE_URL}/auth/refresh"
 
-    # Step 1: Login to get refresh token
+    # Step 1: Login to get refresh token. This test spends its own refresh
+    # token, so it uses a dedicated account rather than the cached parent.
     try:
-        login_resp = requests.post(login_url, json=PARENT_CREDENTIALS, timeout=TIMEOUT)
-        login_resp.raise_for_status()
-        login_data = login_resp.json()
+        login_data = fresh_login("refresh")
         refresh_token = login_data.get("refresh_token")
         assert refresh_token and isinstance(refresh_token, str), "No refresh_token in login response"
     except (requests.RequestException, AssertionError) as e:
@@ -24,7 +16,7 @@ def test_post_auth_refresh():
 
     # Step 2: Use refresh token to get new access token
     try:
-        refresh_resp = requests.post(refresh_url, json={"refresh_token": refresh_token}, timeout=TIMEOUT)
+        refresh_resp = SESSION.post(refresh_url, json={"refreshToken": refresh_token}, timeout=TIMEOUT)
         refresh_resp.raise_for_status()
         refresh_data = refresh_resp.json()
 
@@ -44,4 +36,5 @@ def test_post_auth_refresh():
     except (requests.RequestException, AssertionError) as e:
         raise AssertionError(f"Token refresh failed or invalid response: {e}")
 
-test_post_auth_refresh()
\ No newline at end of file
+if __name__ == "__main__":
+    test_post_auth_refresh()
@@ -1,8 +1,8 @@
 import requests
 
-BASE_URL = "http://localhost:3000"
+from fixtures import BASE_URL, SESSION, TIMEOUT
+
 FORGOT_PASSWORD_ENDPOINT = "/auth/forgot-password"
-TIMEOUT = 30
 
 def test_post_auth_forgot_password():
     url = BASE_URL + FORGOT_PASSWORD_ENDPOINT
@@ -11,7 +11,7 @@ def test_post_auth_forgot_password():
         "email": "parent@test.com"
     }
     try:
-        response = requests.post(url, json=payload, headers=headers, timeout=TIMEOUT)
+        response = SESSION.post(url, json=payload, headers=headers, timeout=TIMEOUT)
         # Expecting 200 OK for successful submission of forgot password request
         assert response.status_code == 200, f"Expected status code 200, got {response.status_code}"
         json_response = response.json()
@@ -20,4 +20,5 @@ def test_post_auth_forgot_password():
     except requests.RequestException as e:
         assert False, f"Request failed: {e}"
 
-test_post_auth_forgot_password()
\ No newline at end of file
+if __name__ == "__main__":
+    test_post_auth_forgot_password()
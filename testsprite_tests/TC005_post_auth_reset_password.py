@@ -1,25 +1,17 @@
 import requests
 
-BASE_URL = "http://localhost:3000"
-TIMEOUT = 30
+from fixtures import BASE_URL, CREDENTIALS, SESSION, TIMEOUT, TOKENS
 
-PARENT_EMAIL = "parent@test.com"
-PARENT_PASSWORD = "Test@1234"
+PARENT_EMAIL = CREDENTIALS["parent"]["email"]
 
 def test_post_auth_reset_password():
     try:
         # Step 1: Login as parent to get access token
-        login_resp = requests.post(
-            f"{BASE_URL}/auth/login",
-            json={"email": PARENT_EMAIL, "password": PARENT_PASSWORD},
-            timeout=TIMEOUT
-        )
-        assert login_resp.status_code == 200, f"Login failed with status {login_resp.status_code}"
-        login_data = login_resp.json()
+        login_data = TOKENS.login_response("parent")
         assert "access_token" in login_data and "refresh_token" in login_data, "Missing tokens in login response"
 
         # Step 2: Initiate forgot-password to generate reset token sent to email
-        forgot_resp = requests.post(
+        forgot_resp = SESSION.post(
             f"{BASE_URL}/auth/forgot-password",
             json={"email": PARENT_EMAIL},
             timeout=TIMEOUT
@@ -41,7 +33,7 @@ def test_post_auth_reset_password():
             "password": new_password,
             "password_confirm": new_password
         }
-        reset_resp = requests.post(
+        reset_resp = SESSION.post(
             f"{BASE_URL}/auth/reset-password",
             json=reset_payload,
             headers=headers,
@@ -57,4 +49,5 @@ def test_post_auth_reset_password():
         assert False, f"Request failed: {e}"
 
 
-test_post_auth_reset_password()
+if __name__ == "__main__":
+    test_post_auth_reset_password()
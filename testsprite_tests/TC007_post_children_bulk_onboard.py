@@ -1,26 +1,18 @@
-import requests
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 
-BASE_URL = "http://localhost:3000"
-TIMEOUT = 30
+from fixtures import BASE_URL, SESSION, TIMEOUT, TOKENS, make_session
 
-COMPANY_ADMIN_CREDENTIALS = {
-    "email": "admin@saferide.com",
-    "password": "Test@1234"
-}
-
-def login(email: str, password: str) -> str:
-    url = f"{BASE_URL}/auth/login"
-    payload = {"email": email, "password": password}
-    response = requests.post(url, json=payload, timeout=TIMEOUT)
-    response.raise_for_status()
-    data = response.json()
-    assert "access_token" in data, "Login response missing access_token"
-    return data["access_token"]
+# Rows in the large-batch import. Set to 50000 to rehearse a school-year intake.
+LARGE_BATCH_SIZE = int(os.environ.get("TC007_LARGE_BATCH_SIZE", "5000"))
+# Every this-many rows is deliberately invalid, to check per-row errors
+INVALID_EVERY = 1000
 
 def bulk_onboard_children(token: str, children_data: list) -> dict:
     url = f"{BASE_URL}/children/bulk-onboard"
     headers = {"Authorization": f"Bearer {token}"}
-    response = requests.post(url, json={"children": children_data}, headers=headers, timeout=TIMEOUT)
+    response = SESSION.post(url, json={"children": children_data}, headers=headers, timeout=TIMEOUT)
     return response
 
 def delete_child(token: str, child_id: str):
@@ -28,12 +20,12 @@ def delete_child(token: str, child_id: str):
     headers = {"Authorization": f"Bearer {token}"}
     # Assuming DELETE /children/:id endpoint exists for cleanup
     # If not provided in PRD, skip deletion
-    response = requests.delete(url, headers=headers, timeout=TIMEOUT)
+    response = SESSION.delete(url, headers=headers, timeout=TIMEOUT)
     if response.status_code not in (200, 204, 404):
         response.raise_for_status()
 
 def test_tc007_post_children_bulk_onboard():
-    token = login(COMPANY_ADMIN_CREDENTIALS["email"], COMPANY_ADMIN_CREDENTIALS["password"])
+    token = TOKENS.access_token("admin")
 
     children_to_create = [
         {
@@ -77,4 +69,65 @@ def test_tc007_post_children_bulk_onboard():
                 # Log error or ignore cleanup failure
                 pass
 
-test_tc007_post_children_bulk_onboard()
+def csv_rows(marker, count):
+    """Yield the upload a chunk of rows at a time, so it streams chunked."""
+    yield b"First Name,Last Name,Date of Birth,Grade,Parent Phone,Days Until Payment\n"
+    chunk = []
+    for i in range(1, count + 1):
+        last_name = "" if i % INVALID_EVERY == 0 else f"Child{i}"
+        chunk.append(f"{marker},{last_name},2015-03-15,Grade 1,024{i:07d},30\n")
+        if len(chunk) == 500:
+            yield "".join(chunk).encode()
+            chunk = []
+    if chunk:
+        yield "".join(chunk).encode()
+
+
+def test_tc007_post_children_bulk_import_large_batch():
+    token = TOKENS.access_token("admin")
+    headers = {"Authorization": f"Bearer {token}"}
+    company_id = TOKENS.login_response("admin").get("companyId")
+    schools = SESSION.get(f"{BASE_URL}/admin/company/{company_id}/schools", headers=headers, timeout=TIMEOUT)
+    schools.raise_for_status()
+    assert schools.json(), f"Company {company_id} has no schools to import into"
+    school_id = schools.json()[0]["id"]
+
+    marker = f"TC007{uuid.uuid4().hex[:8]}"
+    expected_invalid = LARGE_BATCH_SIZE // INVALID_EVERY
+    created_ids = []
+    try:
+        response = SESSION.post(
+            f"{BASE_URL}/children/import/{school_id}",
+            data=csv_rows(marker, LARGE_BATCH_SIZE),
+            headers={**headers, "Content-Type": "text/csv"},
+            timeout=max(TIMEOUT, LARGE_BATCH_SIZE / 100),
+        )
+        assert response.status_code == 201, f"Expected 201 Created, got {response.status_code}: {response.text[:500]}"
+        data = response.json()
+        created_ids = [child["id"] for child in data["children"]]
+
+        assert data["received"] == LARGE_BATCH_SIZE
+        assert data["created"] == LARGE_BATCH_SIZE - expected_invalid
+        assert data["failed"] == expected_invalid
+        assert [error["row"] for error in data["errors"]] == [
+            i for i in range(1, LARGE_BATCH_SIZE + 1) if i % INVALID_EVERY == 0
+        ], "Per-row errors should point at the invalid rows"
+
+        codes = [child["uniqueCode"] for child in data["children"]]
+        assert len(set(codes)) == len(codes), "Allocated child codes must be unique"
+    finally:
+        session = make_session()
+
+        def delete(child_id):
+            try:
+                session.delete(f"{BASE_URL}/children/{child_id}", headers=headers, timeout=TIMEOUT)
+            except Exception:
+                pass
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(delete, created_ids))
+
+
+if __name__ == "__main__":
+    test_tc007_post_children_bulk_onboard()
+    test_tc007_post_children_bulk_import_large_batch()
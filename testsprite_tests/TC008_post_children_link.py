@@ -1,20 +1,4 @@
-import requests
-
-BASE_URL = "http://localhost:3000"
-PARENT_CREDENTIALS = {"email": "parent@test.com", "password": "Test@1234"}
-ADMIN_CREDENTIALS = {"email": "admin@saferide.com", "password": "Test@1234"}
-
-TIMEOUT = 30
-
-
-def login(email, password):
-    url = f"{BASE_URL}/auth/login"
-    payload = {"email": email, "password": password}
-    resp = requests.post(url, json=payload, timeout=TIMEOUT)
-    resp.raise_for_status()
-    data = resp.json()
-    assert "access_token" in data and data["access_token"]
-    return data["access_token"]
+from fixtures import BASE_URL, SESSION, TIMEOUT, TOKENS
 
 
 def create_child(admin_token):
@@ -30,7 +14,7 @@ def create_child(admin_token):
         ]
     }
     headers = {"Authorization": f"Bearer {admin_token}"}
-    resp = requests.post(url, json=payload, headers=headers, timeout=TIMEOUT)
+    resp = SESSION.post(url, json=payload, headers=headers, timeout=TIMEOUT)
     resp.raise_for_status()
     data = resp.json()
     assert "children" in data and len(data["children"]) == 1
@@ -44,8 +28,8 @@ def delete_child(child_id, admin_token):
 
 
 def test_post_children_link():
-    parent_token = login(**PARENT_CREDENTIALS)
-    admin_token = login(**ADMIN_CREDENTIALS)
+    parent_token = TOKENS.access_token("parent")
+    admin_token = TOKENS.access_token("admin")
 
     child_id = None
     try:
@@ -55,7 +39,7 @@ def test_post_children_link():
         headers_link = {"Authorization": f"Bearer {parent_token}"}
         payload_link = {"unique_code": unique_code}
 
-        resp_link = requests.post(url_link, json=payload_link, headers=headers_link, timeout=TIMEOUT)
+        resp_link = SESSION.post(url_link, json=payload_link, headers=headers_link, timeout=TIMEOUT)
         resp_link.raise_for_status()
         data_link = resp_link.json()
 
@@ -67,4 +51,5 @@ def test_post_children_link():
             delete_child(child_id, admin_token)
 
 
-test_post_children_link()
+if __name__ == "__main__":
+    test_post_children_link()
@@ -1,34 +1,13 @@
-import requests
-
-BASE_URL = "http://localhost:3000"
-TIMEOUT = 30
-
-PARENT_CREDENTIALS = {
-    "email": "parent@test.com",
-    "password": "Test@1234"
-}
-
-DRIVER_CREDENTIALS = {
-    "email": "driver@saferide.com",
-    "password": "Test@1234"
-}
-
-def login(credentials):
-    url = f"{BASE_URL}/auth/login"
-    resp = requests.post(url, json=credentials, timeout=TIMEOUT)
-    resp.raise_for_status()
-    data = resp.json()
-    assert "access_token" in data and "refresh_token" in data
-    return data["access_token"]
+from fixtures import BASE_URL, SESSION, TIMEOUT, TOKENS
 
 def test_get_children_with_parent_and_driver():
     # Login as parent
-    parent_token = login(PARENT_CREDENTIALS)
-    parent_headers = {"Authorization": f"Bearer {parent_token}"}
+    assert "refresh_token" in TOKENS.login_response("parent")
+    parent_headers = TOKENS.headers("parent")
     
     # Login as driver
-    driver_token = login(DRIVER_CREDENTIALS)
-    driver_headers = {"Authorization": f"Bearer {driver_token}"}
+    assert "refresh_token" in TOKENS.login_response("driver")
+    driver_headers = TOKENS.headers("driver")
 
     # Step 1: As parent, get children list via /children/parent/:parentId endpoint
     # Need to get parentId; assuming API returns user info at /auth/me or in token payload?
@@ -47,7 +26,7 @@ def test_get_children_with_parent_and_driver():
     parent_id = "1"
     
     url_parent_children = f"{BASE_URL}/children/parent/{parent_id}"
-    resp_parent = requests.get(url_parent_children, headers=parent_headers, timeout=TIMEOUT)
+    resp_parent = SESSION.get(url_parent_children, headers=parent_headers, timeout=TIMEOUT)
 
     # Validate parent access is allowed and response is correct: 200 and returns list of children
     assert resp_parent.status_code == 200
@@ -60,7 +39,7 @@ def test_get_children_with_parent_and_driver():
         # Permissions: parent sees their children only - no children from other users
 
     # Step 2: As driver, attempt to GET same endpoint expecting failure due to permission
-    resp_driver = requests.get(url_parent_children, headers=driver_headers, timeout=TIMEOUT)
+    resp_driver = SESSION.get(url_parent_children, headers=driver_headers, timeout=TIMEOUT)
     
     # Driver should be unauthorized or forbidden to get parent-specific children list
     assert resp_driver.status_code in (401, 403)
@@ -68,4 +47,5 @@ def test_get_children_with_parent_and_driver():
     err_data = resp_driver.json()
     assert "error" in err_data or "message" in err_data
 
-test_get_children_with_parent_and_driver()
\ No newline at end of file
+if __name__ == "__main__":
+    test_get_children_with_parent_and_driver()
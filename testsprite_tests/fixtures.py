@@ -0,0 +1,146 @@
+"""Shared HTTP session and per-role token cache for the testsprite API tests.
+
+Every TC used to open its own connection and log in from scratch, paying a
+bcrypt round on the backend each time. Importing ``SESSION`` and ``TOKENS``
+from here means each role logs in once per process. The access token is
+refreshed through ``/auth/refresh`` shortly before its ``exp`` claim, with
+a full login as the fallback when the refresh token has been revoked.
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+BASE_URL = os.environ.get("ROSAGO_BASE_URL", "http://localhost:3000")
+TIMEOUT = 30
+
+CREDENTIALS = {
+    "parent": {"email": "parent@test.com", "password": "Test@1234"},
+    "driver": {"email": "driver@saferide.com", "password": "Test@1234"},
+    "admin": {"email": "admin@saferide.com", "password": "Test@1234"},
+    "platform": {"email": "platform@saferide.com", "password": "Test@1234"},
+    # Session tests spend or revoke their tokens. Each gets its own account so
+    # it never races the cached parent session (or another test) when the
+    # suite runs in parallel.
+    "refresh": {"email": "refresh@test.com", "password": "Test@1234"},
+    "logout": {"email": "logout@test.com", "password": "Test@1234"},
+}
+
+# Refresh this many seconds before the access token actually expires
+EXPIRY_SKEW = 30
+
+
+def make_session(pool_size=32):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+SESSION = make_session()
+
+
+def decode_jwt_payload(token):
+    try:
+        payload_part = token.split(".")[1]
+        payload_part += "=" * (-len(payload_part) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload_part))
+    except Exception:
+        return None
+
+
+def fresh_login(role, session=SESSION, base_url=BASE_URL):
+    """Log in without touching the cache, for tests that consume their tokens."""
+    resp = session.post(f"{base_url}/auth/login", json=CREDENTIALS[role], timeout=TIMEOUT)
+    resp.raise_for_status()
+    data = resp.json()
+    assert "access_token" in data, f"No access_token in login response for {role}"
+    return data
+
+
+class TokenCache:
+    def __init__(self, session=SESSION, base_url=BASE_URL):
+        self._session = session
+        self._base_url = base_url
+        self._entries = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock(self, role):
+        with self._guard:
+            return self._locks.setdefault(role, threading.Lock())
+
+    def store(self, role, login_data):
+        """Seed the cache from a login response the caller already obtained."""
+        entry = {
+            "response": login_data,
+            "access_token": login_data["access_token"],
+            "refresh_token": login_data.get("refresh_token"),
+            "expires_at": self._expiry(login_data["access_token"]),
+        }
+        self._entries[role] = entry
+        return entry
+
+    def _expiry(self, token):
+        payload = decode_jwt_payload(token) or {}
+        return payload.get("exp", float("inf"))
+
+    def _login(self, role):
+        return self.store(role, fresh_login(role, self._session, self._base_url))
+
+    def _refresh(self, role, entry):
+        if not entry["refresh_token"]:
+            return None
+        try:
+            resp = self._session.post(
+                f"{self._base_url}/auth/refresh",
+                json={"refreshToken": entry["refresh_token"]},
+                timeout=TIMEOUT,
+            )
+        except requests.RequestException:
+            return None
+        if resp.status_code != 200:
+            return None
+        data = resp.json()
+        entry["access_token"] = data["access_token"]
+        entry["refresh_token"] = data.get("refresh_token", entry["refresh_token"])
+        entry["expires_at"] = self._expiry(data["access_token"])
+        return entry
+
+    def _entry(self, role):
+        with self._lock(role):
+            entry = self._entries.get(role)
+            if entry is None:
+                return self._login(role)
+            if entry["expires_at"] - EXPIRY_SKEW <= time.time():
+                return self._refresh(role, entry) or self._login(role)
+            return entry
+
+    def access_token(self, role):
+        return self._entry(role)["access_token"]
+
+    def refresh_token(self, role):
+        return self._entry(role)["refresh_token"]
+
+    def login_response(self, role):
+        return self._entry(role)["response"]
+
+    def headers(self, role):
+        return {"Authorization": f"Bearer {self.access_token(role)}"}
+
+    def user_id(self, role):
+        payload = decode_jwt_payload(self.access_token(role)) or {}
+        return payload.get("sub")
+
+    def invalidate(self, role):
+        with self._lock(role):
+            self._entries.pop(role, None)
+
+
+TOKENS = TokenCache()
@@ -0,0 +1,383 @@
+"""Load generator for the ROSAgo REST API.
+
+Replays the TC00x scenarios (login, refresh, bulk onboarding, parent child
+lookups) as a weighted workload across a pool of worker threads. Every worker
+keeps its own keep-alive ``requests.Session`` so connection setup is paid once
+per worker rather than once per request.
+
+Examples::
+
+    python loadgen.py run --concurrency 50 --duration 60 --label build-123
+    python loadgen.py run --weight TC007_bulk_onboard=0 --output base.json
+    python loadgen.py compare base.json head.json
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from fixtures import BASE_URL, CREDENTIALS, TIMEOUT, TokenCache, fresh_login, make_session
+
+BULK_BATCH_SIZE = 5
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile over an already sorted list."""
+    if not sorted_values:
+        return None
+    index = math.ceil(pct / 100.0 * len(sorted_values)) - 1
+    return sorted_values[min(len(sorted_values) - 1, max(0, index))]
+
+
+class Recorder:
+    """Thread-safe collector of per-endpoint latencies and outcomes."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}
+        self.recording = True
+
+    def record(self, endpoint, latency, ok, status):
+        if not self.recording:
+            return
+        with self._lock:
+            entry = self._samples.setdefault(
+                endpoint, {"latencies": [], "errors": 0, "statuses": {}}
+            )
+            entry["latencies"].append(latency)
+            if not ok:
+                entry["errors"] += 1
+            key = str(status)
+            entry["statuses"][key] = entry["statuses"].get(key, 0) + 1
+
+    def reset(self):
+        with self._lock:
+            self._samples = {}
+
+    def summary(self, elapsed):
+        endpoints = {}
+        with self._lock:
+            items = list(self._samples.items())
+        for endpoint, entry in sorted(items):
+            latencies = sorted(entry["latencies"])
+            count = len(latencies)
+            endpoints[endpoint] = {
+                "requests": count,
+                "errors": entry["errors"],
+                "error_rate": round(entry["errors"] / count, 4) if count else 0.0,
+                "throughput_rps": round(count / elapsed, 2) if elapsed else 0.0,
+                "latency_ms": {
+                    "mean": round(sum(latencies) / count * 1000, 2) if count else None,
+                    "p50": _ms(percentile(latencies, 50)),
+                    "p95": _ms(percentile(latencies, 95)),
+                    "p99": _ms(percentile(latencies, 99)),
+                    "max": _ms(latencies[-1] if latencies else None),
+                },
+                "status_codes": entry["statuses"],
+            }
+        return endpoints
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+class LoadContext:
+    """Tokens and ids shared by all workers, resolved once during setup."""
+
+    def __init__(self, base_url, recorder, session):
+        self.base_url = base_url
+        self.recorder = recorder
+        self.tokens = TokenCache(session, base_url)
+        self.parent_id = None
+        self.company_id = None
+        self.school_id = None
+        self.created_child_ids = []
+        self._lock = threading.Lock()
+
+    def request(self, session, method, endpoint, path, expected, **kwargs):
+        """Issue a request and record it under the templated ``endpoint`` name."""
+        started = time.perf_counter()
+        status = "error"
+        ok = False
+        response = None
+        try:
+            response = session.request(method, self.base_url + path, timeout=TIMEOUT, **kwargs)
+            status = response.status_code
+            ok = status in expected
+        except requests.RequestException as e:
+            status = type(e).__name__
+        self.recorder.record(endpoint, time.perf_counter() - started, ok, status)
+        return response if ok else None
+
+    def auth(self, role):
+        return self.tokens.headers(role)
+
+    def remember_children(self, ids):
+        with self._lock:
+            self.created_child_ids.extend(ids)
+
+
+def setup_context(ctx, session, needs_admin):
+    ctx.parent_id = ctx.tokens.user_id("parent")
+
+    if needs_admin:
+        ctx.company_id = ctx.tokens.login_response("admin").get("companyId")
+        resp = session.get(
+            f"{ctx.base_url}/admin/company/{ctx.company_id}/schools",
+            headers=ctx.auth("admin"),
+            timeout=TIMEOUT,
+        )
+        resp.raise_for_status()
+        schools = resp.json()
+        assert schools, f"Company {ctx.company_id} has no schools to onboard children into"
+        ctx.school_id = schools[0]["id"]
+
+
+# Scenarios -----------------------------------------------------------------
+
+def scenario_login(ctx, session, rng):
+    # TC001: alternate between the parent and driver accounts. Never the
+    # refresh account, whose sessions belong to scenario_refresh's chains.
+    credentials = CREDENTIALS["parent"] if rng.random() < 0.5 else CREDENTIALS["driver"]
+    ctx.request(session, "POST", "POST /auth/login", "/auth/login", (200,), json=credentials)
+
+
+_refresh_chain = threading.local()
+
+
+def scenario_refresh(ctx, session, rng):
+    # TC002. Refresh tokens rotate and replaying a spent one revokes the
+    # session, so each worker logs in once and follows its own chain, on an
+    # account no other scenario logs in as.
+    token = getattr(_refresh_chain, "token", None)
+    if token is None:
+        token = fresh_login("refresh", session, ctx.base_url)["refresh_token"]
+    resp = ctx.request(
+        session, "POST", "POST /auth/refresh", "/auth/refresh", (200,),
+        json={"refreshToken": token},
+    )
+    # Start a new chain after a failure rather than replaying the token
+    _refresh_chain.token = resp.json()["refresh_token"] if resp is not None else None
+
+
+def scenario_children_by_parent(ctx, session, rng):
+    # TC009 / TC010
+    ctx.request(
+        session, "GET", "GET /children/parent/:parentId", f"/children/parent/{ctx.parent_id}",
+        (200,), headers=ctx.auth("parent"),
+    )
+
+
+def scenario_bulk_onboard(ctx, session, rng):
+    # TC007
+    suffix = rng.randrange(1_000_000)
+    children = [
+        {
+            "firstName": f"Load{suffix}",
+            "lastName": f"Child{i}",
+            "dateOfBirth": "2015-03-15",
+            "grade": "Grade 1",
+        }
+        for i in range(BULK_BATCH_SIZE)
+    ]
+    resp = ctx.request(
+        session, "POST", "POST /children/bulk-onboard", "/children/bulk-onboard", (200, 201),
+        headers=ctx.auth("admin"),
+        json={"companyId": ctx.company_id, "schoolId": ctx.school_id, "children": children},
+    )
+    if resp is not None:
+        ctx.remember_children([c["id"] for c in resp.json().get("children", [])])
+
+
+SCENARIOS = {
+    "TC001_login": (scenario_login, 3),
+    "TC002_refresh": (scenario_refresh, 1),
+    "TC007_bulk_onboard": (scenario_bulk_onboard, 1),
+    "TC009_children_by_parent": (scenario_children_by_parent, 6),
+}
+
+
+# Runner --------------------------------------------------------------------
+
+def worker(ctx, scenarios, weights, deadline, seed):
+    rng = random.Random(seed)
+    session = make_session(pool_size=1)
+    try:
+        while time.monotonic() < deadline:
+            fn = rng.choices(scenarios, weights=weights)[0]
+            fn(ctx, session, rng)
+    finally:
+        session.close()
+
+
+def cleanup(ctx, session):
+    for child_id in ctx.created_child_ids:
+        try:
+            session.delete(
+                f"{ctx.base_url}/children/{child_id}", headers=ctx.auth("admin"), timeout=TIMEOUT
+            )
+        except requests.RequestException:
+            pass
+
+
+def parse_weights(overrides):
+    weights = {name: weight for name, (_, weight) in SCENARIOS.items()}
+    for item in overrides or []:
+        name, _, value = item.partition("=")
+        if name not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario '{name}'. Known: {', '.join(SCENARIOS)}")
+        weights[name] = float(value)
+    return {name: w for name, w in weights.items() if w > 0}
+
+
+def run(args):
+    weights = parse_weights(args.weight)
+    if not weights:
+        raise SystemExit("All scenario weights are zero")
+
+    recorder = Recorder()
+    setup_session = make_session()
+    ctx = LoadContext(args.base_url.rstrip("/"), recorder, setup_session)
+    setup_context(ctx, setup_session, needs_admin="TC007_bulk_onboard" in weights)
+
+    names = list(weights)
+    scenarios = [SCENARIOS[name][0] for name in names]
+    scenario_weights = [weights[name] for name in names]
+
+    start = time.monotonic()
+    recorder.recording = args.warmup <= 0
+    deadline = start + args.warmup + args.duration
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [
+            pool.submit(worker, ctx, scenarios, scenario_weights, deadline, args.seed + i)
+            for i in range(args.concurrency)
+        ]
+        if args.warmup > 0:
+            time.sleep(args.warmup)
+            recorder.reset()
+            recorder.recording = True
+        measured_from = time.monotonic()
+        for future in futures:
+            future.result()
+    elapsed = time.monotonic() - measured_from
+
+    endpoints = recorder.summary(elapsed)
+    total = sum(e["requests"] for e in endpoints.values())
+    errors = sum(e["errors"] for e in endpoints.values())
+    report = {
+        "label": args.label,
+        "base_url": ctx.base_url,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "seed": args.seed,
+            "weights": weights,
+        },
+        "totals": {
+            "requests": total,
+            "errors": errors,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+            "elapsed_s": round(elapsed, 2),
+        },
+        "endpoints": endpoints,
+    }
+
+    if not args.keep_data:
+        cleanup(ctx, setup_session)
+    setup_session.close()
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print_report(report)
+    print(f"\nReport written to {args.output}")
+
+
+def print_report(report):
+    print(f"{'endpoint':<36}{'reqs':>8}{'rps':>9}{'err%':>8}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for endpoint, e in report["endpoints"].items():
+        lat = e["latency_ms"]
+        print(
+            f"{endpoint:<36}{e['requests']:>8}{e['throughput_rps']:>9.1f}"
+            f"{e['error_rate'] * 100:>8.2f}{_fmt(lat['p50'])}{_fmt(lat['p95'])}{_fmt(lat['p99'])}"
+        )
+    t = report["totals"]
+    print(f"{'TOTAL':<36}{t['requests']:>8}{t['throughput_rps']:>9.1f}{t['error_rate'] * 100:>8.2f}")
+
+
+def _fmt(value):
+    return f"{value:>9.1f}" if value is not None else f"{'-':>9}"
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    def delta(old, new):
+        if old in (None, 0) or new is None:
+            return "    n/a"
+        return f"{(new - old) / old * 100:+7.1f}%"
+
+    print(f"{base.get('label') or args.base} -> {head.get('label') or args.head}")
+    print(f"{'endpoint':<36}{'p50':>9}{'p95':>9}{'p99':>9}{'rps':>9}{'err% (abs)':>12}")
+    for endpoint in sorted(set(base["endpoints"]) | set(head["endpoints"])):
+        old = base["endpoints"].get(endpoint)
+        new = head["endpoints"].get(endpoint)
+        if not old or not new:
+            print(f"{endpoint:<36}  only in {'head' if new else 'base'}")
+            continue
+        err = (new["error_rate"] - old["error_rate"]) * 100
+        print(
+            f"{endpoint:<36}"
+            f"{delta(old['latency_ms']['p50'], new['latency_ms']['p50']):>9}"
+            f"{delta(old['latency_ms']['p95'], new['latency_ms']['p95']):>9}"
+            f"{delta(old['latency_ms']['p99'], new['latency_ms']['p99']):>9}"
+            f"{delta(old['throughput_rps'], new['throughput_rps']):>9}"
+            f"{err:>+11.2f}%"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ROSAgo API load generator")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run a weighted load test")
+    run_parser.add_argument("--base-url", default=BASE_URL)
+    run_parser.add_argument("--concurrency", type=int, default=20)
+    run_parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    run_parser.add_argument("--warmup", type=float, default=0.0, help="Unmeasured seconds before recording")
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument(
+        "--weight", action="append", metavar="SCENARIO=WEIGHT",
+        help=f"Override a scenario weight (0 disables). Scenarios: {', '.join(SCENARIOS)}",
+    )
+    run_parser.add_argument("--label", default=None, help="Build label stored in the report")
+    run_parser.add_argument("--output", default="load-report.json")
+    run_parser.add_argument(
+        "--keep-data", action="store_true", help="Do not delete children created by TC007"
+    )
+    run_parser.set_defaults(func=run)
+
+    compare_parser = sub.add_parser("compare", help="Diff two load reports")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
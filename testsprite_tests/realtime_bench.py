@@ -0,0 +1,570 @@
+"""End-to-end latency benchmark for the realtime gateway.
+
+Driver sockets emit ``gps_update`` for real buses at a fixed rate. Parent
+sockets join bus rooms (``join_bus_room``) and receive ``bus_location``.
+Company admin sockets receive ``new_location_update`` in their company room.
+Parents can also follow trips (``subscribe_trip_tracking``) to time the
+``attendance_updated`` events recorded while the benchmark runs.
+
+Each ping carries a unique timestamp that the gateway passes through, so
+every delivery is matched to its ping on this process's clock. The report
+covers:
+
+- fan-out latency percentiles per event;
+- pings sent and deliveries received per second;
+- late and dropped deliveries;
+- server memory growth and event-loop lag, read from ``/metrics``.
+
+Run it against a local backend with local Redis and Postgres and the
+seeded test accounts. It needs ``python-socketio[asyncio_client]`` next to
+``requests``::
+
+    python realtime_bench.py run --drivers 20 --parents 200 --admins 5 --duration 60
+    python realtime_bench.py run --rate 2 --trip <tripId> --label build-123 --output head.json
+    python realtime_bench.py compare base.json head.json
+
+The fan-out keeps only the latest position per bus each tick
+(LOCATION_FANOUT_TICK_MS). With ``--rate`` above one ping per tick, most
+pings are superseded by design; these are reported as ``coalesced``, not
+dropped. A delivery counts as dropped when a subscriber misses a ping that
+other subscribers of the same bus received. All sockets of a role share
+that role's test account.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from datetime import datetime, timezone
+
+import requests
+import socketio
+
+from fixtures import BASE_URL, TIMEOUT, TokenCache, make_session
+from loadgen import percentile
+
+# Deliveries slower than this count as late
+DEFAULT_LATE_MS = 2000
+# Seconds between /metrics samples while measuring
+METRICS_INTERVAL = 5.0
+# Seconds between client event-loop lag probes
+LOOP_PROBE_INTERVAL = 0.1
+
+# Pings start here and random-walk, so persisted rows look like a bus route
+ORIGIN = (5.6037, -0.1870)
+
+
+def now_iso():
+    # Microseconds keep timestamps unique per bus, so a delivery maps back to one ping
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+def parse_iso(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def latency_summary(values):
+    values = sorted(values)
+    count = len(values)
+    return {
+        "mean": round(sum(values) / count * 1000, 2) if count else None,
+        "p50": _ms(percentile(values, 50)),
+        "p95": _ms(percentile(values, 95)),
+        "p99": _ms(percentile(values, 99)),
+        "max": _ms(values[-1] if values else None),
+    }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+class Subscriber:
+    """A listening socket and the pings it received, per bus it follows."""
+
+    def __init__(self, role, event, bus_ids):
+        self.role = role
+        self.event = event
+        self.received = {bus_id: set() for bus_id in bus_ids}
+
+
+class Bench:
+    """Pings sent and deliveries received. Everything runs on one event loop, so no locks."""
+
+    def __init__(self, late_ms):
+        self.late_s = late_ms / 1000.0
+        self.measuring = False
+        self.closing = False
+        # (busId, timestamp) -> perf_counter() at emit, for pings sent while measuring
+        self.sent = {}
+        self.acks = []
+        self.latencies = {}
+        self.late = {}
+        # busId -> timestamps that reached at least one subscriber
+        self.delivered = {}
+        self.subscribers = []
+        self.loop_lag = []
+        self.errors = {}
+
+    def error(self, kind):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def record(self, event, latency):
+        self.latencies.setdefault(event, []).append(latency)
+        if latency > self.late_s:
+            self.late[event] = self.late.get(event, 0) + 1
+
+    def on_location(self, subscriber, data):
+        key = (data.get("busId"), data.get("timestamp"))
+        sent_at = self.sent.get(key)
+        if sent_at is None:
+            # Warmup ping, or a bus the account follows outside the benchmark
+            return
+        self.record(subscriber.event, time.perf_counter() - sent_at)
+        self.delivered.setdefault(key[0], set()).add(key[1])
+        if key[0] in subscriber.received:
+            subscriber.received[key[0]].add(key[1])
+
+    def on_attendance(self, data):
+        if not self.measuring or not data.get("timestamp"):
+            return
+        # Stamped by the server when the change commits; assumes a local backend sharing this clock
+        self.record("attendance_updated", time.time() - parse_iso(data["timestamp"]))
+
+    def coalesced(self):
+        return len(self.sent) - sum(len(timestamps) for timestamps in self.delivered.values())
+
+    def dropped(self):
+        missed = 0
+        for subscriber in self.subscribers:
+            for bus_id, received in subscriber.received.items():
+                missed += len(self.delivered.get(bus_id, set()) - received)
+        return missed
+
+
+# Sockets -------------------------------------------------------------------
+
+async def connect(bench, url, token, role):
+    sio = socketio.AsyncClient(reconnection=False)
+
+    def on_disconnect(*_reason):
+        if not bench.closing:
+            bench.error(f"disconnect_{role}")
+
+    sio.on("disconnect", on_disconnect)
+    try:
+        await sio.connect(url, auth={"token": token}, transports=["websocket"], wait_timeout=TIMEOUT)
+    except socketio.exceptions.ConnectionError:
+        bench.error(f"connect_{role}")
+        return None
+    return sio
+
+
+async def join_parent(bench, url, token, bus_ids, trip_ids):
+    sio = await connect(bench, url, token, "parent")
+    if sio is None:
+        return None
+    subscriber = Subscriber("parent", "bus_location", bus_ids)
+    sio.on("bus_location", lambda data: bench.on_location(subscriber, data))
+    sio.on("attendance_updated", bench.on_attendance)
+    try:
+        for bus_id in bus_ids:
+            joined = await sio.call("join_bus_room", {"busId": bus_id}, timeout=TIMEOUT)
+            if not (joined or {}).get("success"):
+                # The gateway only lets parents follow their own company's buses
+                bench.error("join_bus_room_refused")
+        for trip_id in trip_ids:
+            await sio.call("subscribe_trip_tracking", {"tripId": trip_id}, timeout=TIMEOUT)
+    except socketio.exceptions.SocketIOError:
+        bench.error("join_parent")
+        await sio.disconnect()
+        return None
+    bench.subscribers.append(subscriber)
+    return sio
+
+
+async def join_admin(bench, url, token, bus_ids):
+    # The gateway puts admins in their company room on connect
+    sio = await connect(bench, url, token, "admin")
+    if sio is None:
+        return None
+    subscriber = Subscriber("admin", "new_location_update", bus_ids)
+    sio.on("new_location_update", lambda data: bench.on_location(subscriber, data))
+    bench.subscribers.append(subscriber)
+    return sio
+
+
+async def wait_or_stop(stop, delay):
+    try:
+        await asyncio.wait_for(stop.wait(), timeout=max(0.0, delay))
+    except asyncio.TimeoutError:
+        pass
+
+
+async def drive(bench, sio, bus_id, interval, stop, rng):
+    # Spread the drivers across one interval instead of pinging in lockstep
+    await wait_or_stop(stop, rng.uniform(0, interval))
+    lat, lng = ORIGIN[0] + rng.uniform(-0.05, 0.05), ORIGIN[1] + rng.uniform(-0.05, 0.05)
+    next_at = time.perf_counter()
+
+    while not stop.is_set():
+        lat += rng.uniform(-0.0002, 0.0002)
+        lng += rng.uniform(-0.0002, 0.0002)
+        timestamp = now_iso()
+        sent_at = time.perf_counter()
+        measured = bench.measuring
+        if measured:
+            bench.sent[(bus_id, timestamp)] = sent_at
+
+        def on_ack(*_response, sent_at=sent_at, measured=measured):
+            if measured:
+                bench.acks.append(time.perf_counter() - sent_at)
+
+        ping = {
+            "busId": bus_id,
+            "latitude": lat,
+            "longitude": lng,
+            "speed": rng.uniform(0, 60),
+            "heading": rng.uniform(0, 360),
+            "timestamp": timestamp,
+        }
+        try:
+            await sio.emit("gps_update", ping, callback=on_ack)
+        except socketio.exceptions.SocketIOError:
+            bench.error("emit")
+
+        next_at += interval
+        if next_at < time.perf_counter():
+            # This process can't keep up; skip ahead rather than burst
+            bench.error("driver_behind")
+            next_at = time.perf_counter()
+        await wait_or_stop(stop, next_at - time.perf_counter())
+
+
+async def probe_loop_lag(bench, stop):
+    # Lag here means the benchmark itself is the bottleneck, not the server
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(LOOP_PROBE_INTERVAL)
+        bench.loop_lag.append(max(0.0, time.perf_counter() - started - LOOP_PROBE_INTERVAL))
+
+
+# Server metrics ------------------------------------------------------------
+
+def scrape_metrics(session, base_url, token):
+    """Flat {series: value} from the backend's /metrics, or None when unavailable."""
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    try:
+        resp = session.get(f"{base_url}/metrics", headers=headers, timeout=TIMEOUT)
+        resp.raise_for_status()
+    except requests.RequestException:
+        return None
+    samples = {}
+    for line in resp.text.splitlines():
+        if line and not line.startswith("#"):
+            series, _, value = line.rpartition(" ")
+            samples[series] = float(value)
+    return samples
+
+
+def _memory(samples, kind):
+    return samples.get(f'nodejs_memory_bytes{{type="{kind}"}}') if samples else None
+
+
+async def watch_server(session, args, stop, scrapes):
+    while not stop.is_set():
+        await wait_or_stop(stop, METRICS_INTERVAL)
+        samples = await asyncio.to_thread(scrape_metrics, session, args.base_url, args.metrics_token)
+        if samples:
+            scrapes.append(samples)
+
+
+def server_summary(baseline, scrapes, final):
+    if not baseline or not final:
+        return {"available": False}
+    everything = [baseline, *scrapes, final]
+    rss = [_memory(s, "rss") for s in everything if _memory(s, "rss") is not None]
+    lag_p99 = [s.get('nodejs_eventloop_lag_seconds{quantile="0.99"}') for s in scrapes + [final]]
+    lag_p99 = [value for value in lag_p99 if value is not None]
+
+    def growth(kind):
+        start, end = _memory(baseline, kind), _memory(final, kind)
+        return None if start is None or end is None else int(end - start)
+
+    return {
+        "available": True,
+        "rss_start_bytes": _memory(baseline, "rss"),
+        "rss_end_bytes": _memory(final, "rss"),
+        "rss_peak_bytes": max(rss) if rss else None,
+        "rss_growth_bytes": growth("rss"),
+        "heap_used_growth_bytes": growth("heap_used"),
+        "eventloop_lag_p99_ms": _ms(max(lag_p99)) if lag_p99 else None,
+        "socket_connections": final.get("socketio_connections"),
+    }
+
+
+# Runner --------------------------------------------------------------------
+
+def resolve_buses(session, tokens, base_url, wanted):
+    company_id = tokens.login_response("admin").get("companyId")
+    resp = session.get(
+        f"{base_url}/buses/company/{company_id}", headers=tokens.headers("admin"), timeout=TIMEOUT
+    )
+    resp.raise_for_status()
+    bus_ids = [bus["id"] for bus in resp.json()]
+    if len(bus_ids) < wanted:
+        raise SystemExit(
+            f"Company {company_id} has {len(bus_ids)} buses; lower --drivers or pass --bus ids"
+        )
+    return bus_ids[:wanted]
+
+
+async def run_bench(args, session, tokens, bus_ids):
+    bench = Bench(args.late_ms)
+    rng = random.Random(args.seed)
+    gate = asyncio.Semaphore(args.connect_concurrency)
+    stop = asyncio.Event()
+
+    async def gated(coro):
+        async with gate:
+            return await coro
+
+    def buses_for(i):
+        count = min(args.buses_per_parent, len(bus_ids))
+        return [bus_ids[(i * count + j) % len(bus_ids)] for j in range(count)]
+
+    tokens_by_role = {role: tokens.access_token(role) for role in ("driver", "parent", "admin")}
+
+    # Listeners first, so the first measured pings already have an audience
+    parents = await asyncio.gather(*[
+        gated(join_parent(bench, args.base_url, tokens_by_role["parent"], buses_for(i), args.trip or []))
+        for i in range(args.parents)
+    ])
+    admins = await asyncio.gather(*[
+        gated(join_admin(bench, args.base_url, tokens_by_role["admin"], bus_ids))
+        for _ in range(args.admins)
+    ])
+    drivers = await asyncio.gather(*[
+        gated(connect(bench, args.base_url, tokens_by_role["driver"], "driver")) for _ in bus_ids
+    ])
+    clients = [sio for sio in parents + admins + drivers if sio is not None]
+    connected = {
+        "drivers": sum(1 for sio in drivers if sio),
+        "parents": sum(1 for sio in parents if sio),
+        "admins": sum(1 for sio in admins if sio),
+    }
+
+    interval = 1.0 / args.rate
+    tasks = [
+        asyncio.create_task(drive(bench, sio, bus_id, interval, stop, random.Random(rng.random())))
+        for sio, bus_id in zip(drivers, bus_ids)
+        if sio is not None
+    ]
+    tasks.append(asyncio.create_task(probe_loop_lag(bench, stop)))
+
+    await asyncio.sleep(args.warmup)
+    baseline = await asyncio.to_thread(scrape_metrics, session, args.base_url, args.metrics_token)
+    scrapes = []
+    tasks.append(asyncio.create_task(watch_server(session, args, stop, scrapes)))
+
+    bench.measuring = True
+    started = time.perf_counter()
+    await asyncio.sleep(args.duration)
+    bench.measuring = False
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await asyncio.gather(*tasks)
+    # Pings sent just before the end are still in the fan-out tick
+    await asyncio.sleep(args.drain)
+    final = await asyncio.to_thread(scrape_metrics, session, args.base_url, args.metrics_token)
+
+    bench.closing = True
+    await asyncio.gather(*(sio.disconnect() for sio in clients), return_exceptions=True)
+    return bench, connected, elapsed, server_summary(baseline, scrapes, final)
+
+
+def build_report(args, bench, connected, elapsed, server):
+    events = {}
+    for event, latencies in sorted(bench.latencies.items()):
+        events[event] = {
+            "received": len(latencies),
+            "per_sec": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "late": bench.late.get(event, 0),
+            "latency_ms": latency_summary(latencies),
+        }
+    received = sum(e["received"] for e in events.values())
+    delivered = sum(len(timestamps) for timestamps in bench.delivered.values())
+
+    return {
+        "label": args.label,
+        "base_url": args.base_url,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {
+            "drivers": args.drivers,
+            "parents": args.parents,
+            "admins": args.admins,
+            "rate_hz": args.rate,
+            "buses_per_parent": args.buses_per_parent,
+            "trips": args.trip or [],
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "late_ms": args.late_ms,
+            "seed": args.seed,
+        },
+        "connected": connected,
+        "pings": {
+            "sent": len(bench.sent),
+            "per_sec": round(len(bench.sent) / elapsed, 2) if elapsed else 0.0,
+            "delivered": delivered,
+            "coalesced": bench.coalesced(),
+            "ack_ms": latency_summary(bench.acks),
+        },
+        "events": events,
+        "totals": {
+            "received": received,
+            "per_sec": round(received / elapsed, 2) if elapsed else 0.0,
+            "late": sum(bench.late.values()),
+            "dropped": bench.dropped(),
+            "elapsed_s": round(elapsed, 2),
+        },
+        "server": server,
+        "client": {"loop_lag_ms": latency_summary(bench.loop_lag)},
+        "errors": bench.errors,
+    }
+
+
+def run(args):
+    args.base_url = args.base_url.rstrip("/")
+    session = make_session()
+    tokens = TokenCache(session, args.base_url)
+    bus_ids = args.bus or resolve_buses(session, tokens, args.base_url, args.drivers)
+    args.drivers = len(bus_ids)
+
+    bench, connected, elapsed, server = asyncio.run(run_bench(args, session, tokens, bus_ids))
+    session.close()
+
+    report = build_report(args, bench, connected, elapsed, server)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print_report(report)
+    print(f"\nReport written to {args.output}")
+
+
+def print_report(report):
+    c = report["connected"]
+    p = report["pings"]
+    print(f"sockets: {c['drivers']} drivers, {c['parents']} parents, {c['admins']} admins")
+    print(
+        f"pings: {p['sent']} sent ({p['per_sec']:.1f}/s), {p['delivered']} delivered, "
+        f"{p['coalesced']} coalesced, ack p99 {_fmt(p['ack_ms']['p99']).strip()} ms"
+    )
+    print(f"\n{'event':<24}{'recv':>9}{'per s':>9}{'late':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}")
+    for event, e in report["events"].items():
+        lat = e["latency_ms"]
+        print(
+            f"{event:<24}{e['received']:>9}{e['per_sec']:>9.1f}{e['late']:>7}"
+            f"{_fmt(lat['p50'])}{_fmt(lat['p95'])}{_fmt(lat['p99'])}{_fmt(lat['max'])}"
+        )
+    t = report["totals"]
+    print(f"{'TOTAL':<24}{t['received']:>9}{t['per_sec']:>9.1f}{t['late']:>7}   dropped {t['dropped']}")
+
+    s = report["server"]
+    if s.get("available"):
+        print(
+            f"\nserver: rss {_mb(s['rss_start_bytes'])} -> {_mb(s['rss_end_bytes'])} MB "
+            f"(peak {_mb(s['rss_peak_bytes'])}), heap growth {_mb(s['heap_used_growth_bytes'])} MB, "
+            f"event-loop lag p99 {s['eventloop_lag_p99_ms']} ms"
+        )
+    else:
+        print("\nserver: /metrics unavailable (set --metrics-token if METRICS_TOKEN is configured)")
+    print(f"client loop lag p99: {report['client']['loop_lag_ms']['p99']} ms")
+    if report["errors"]:
+        print(f"errors: {report['errors']}")
+
+
+def _fmt(value):
+    return f"{value:>9.1f}" if value is not None else f"{'-':>9}"
+
+
+def _mb(value):
+    return "-" if value is None else f"{value / 1024 / 1024:.1f}"
+
+
+def compare(args):
+    with open(args.base) as f:
+        base = json.load(f)
+    with open(args.head) as f:
+        head = json.load(f)
+
+    def delta(old, new):
+        if old in (None, 0) or new is None:
+            return "    n/a"
+        return f"{(new - old) / old * 100:+7.1f}%"
+
+    print(f"{base.get('label') or args.base} -> {head.get('label') or args.head}")
+    print(f"{'event':<24}{'p50':>9}{'p95':>9}{'p99':>9}{'per s':>9}{'late':>9}")
+    for event in sorted(set(base["events"]) | set(head["events"])):
+        old = base["events"].get(event)
+        new = head["events"].get(event)
+        if not old or not new:
+            print(f"{event:<24}  only in {'head' if new else 'base'}")
+            continue
+        print(
+            f"{event:<24}"
+            f"{delta(old['latency_ms']['p50'], new['latency_ms']['p50']):>9}"
+            f"{delta(old['latency_ms']['p95'], new['latency_ms']['p95']):>9}"
+            f"{delta(old['latency_ms']['p99'], new['latency_ms']['p99']):>9}"
+            f"{delta(old['per_sec'], new['per_sec']):>9}"
+            f"{new['late'] - old['late']:>+9}"
+        )
+    print(f"{'dropped':<24}{head['totals']['dropped'] - base['totals']['dropped']:>+9}")
+    old_rss = base["server"].get("rss_growth_bytes")
+    new_rss = head["server"].get("rss_growth_bytes")
+    if old_rss is not None and new_rss is not None:
+        print(f"{'rss growth (MB)':<24}{_mb(old_rss):>9} -> {_mb(new_rss)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ROSAgo realtime gateway benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run the socket fan-out benchmark")
+    run_parser.add_argument("--base-url", default=BASE_URL)
+    run_parser.add_argument("--drivers", type=int, default=10, help="Driver sockets, one bus each")
+    run_parser.add_argument("--parents", type=int, default=100)
+    run_parser.add_argument("--admins", type=int, default=2)
+    run_parser.add_argument("--rate", type=float, default=1.0, help="Pings per second per driver")
+    run_parser.add_argument("--buses-per-parent", type=int, default=1)
+    run_parser.add_argument(
+        "--bus", action="append", metavar="BUS_ID",
+        help="Bus to drive (repeatable); defaults to the admin company's first --drivers buses",
+    )
+    run_parser.add_argument(
+        "--trip", action="append", metavar="TRIP_ID",
+        help="Trip whose attendance_updated events parents follow (repeatable)",
+    )
+    run_parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    run_parser.add_argument("--warmup", type=float, default=5.0, help="Unmeasured seconds before recording")
+    run_parser.add_argument("--drain", type=float, default=3.0, help="Seconds to wait for in-flight deliveries")
+    run_parser.add_argument("--late-ms", type=float, default=DEFAULT_LATE_MS)
+    run_parser.add_argument("--connect-concurrency", type=int, default=50)
+    run_parser.add_argument("--metrics-token", default=None, help="METRICS_TOKEN of the backend, if set")
+    run_parser.add_argument("--seed", type=int, default=1)
+    run_parser.add_argument("--label", default=None, help="Build label stored in the report")
+    run_parser.add_argument("--output", default="realtime-report.json")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = sub.add_parser("compare", help="Diff two benchmark reports")
+    compare_parser.add_argument("base")
+    compare_parser.add_argument("head")
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+"""Run the TC00x API tests in parallel against a live backend.
+
+All tests are imported into one process, so they share the pooled session
+and the per-role token cache from ``fixtures``. Each role therefore logs in
+once for the whole suite. The tests do not depend on each other, so they
+run on a thread pool. Tests that spend or revoke a session (TC002, TC003)
+log in with their own accounts, so they cannot invalidate a token another
+test is using.
+
+Examples::
+
+    python run_suite.py
+    python run_suite.py --workers 4 -k children
+"""
+
+import argparse
+import glob
+import importlib
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def discover(pattern):
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+    tests = []
+    for path in sorted(glob.glob(os.path.join(HERE, "TC*.py"))):
+        module_name = os.path.splitext(os.path.basename(path))[0]
+        if pattern and pattern.lower() not in module_name.lower():
+            continue
+        module = importlib.import_module(module_name)
+        for name in sorted(dir(module)):
+            if name.startswith("test_") and callable(getattr(module, name)):
+                tests.append((module_name, getattr(module, name)))
+    return tests
+
+
+def run_one(module_name, fn):
+    started = time.perf_counter()
+    try:
+        fn()
+        return module_name, True, time.perf_counter() - started, None
+    except Exception:
+        return module_name, False, time.perf_counter() - started, traceback.format_exc()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the testsprite API tests in parallel")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("-k", dest="pattern", default=None, help="Only run TCs whose name contains this")
+    args = parser.parse_args(argv)
+
+    tests = discover(args.pattern)
+    if not tests:
+        print("No tests selected")
+        return 1
+
+    started = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(run_one, module_name, fn) for module_name, fn in tests]
+        for future in as_completed(futures):
+            module_name, ok, elapsed, error = future.result()
+            results.append((module_name, ok, elapsed, error))
+            print(f"{'PASS' if ok else 'FAIL'}  {module_name}  ({elapsed:.2f}s)")
+
+    failed = [r for r in results if not r[1]]
+    for module_name, _, _, error in sorted(failed):
+        print(f"\n===== {module_name} =====\n{error}")
+
+    total = time.perf_counter() - started
+    print(f"\n{len(results) - len(failed)} passed, {len(failed)} failed in {total:.2f}s")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())